@@ -0,0 +1,30 @@
+"""
+Headless batch run of a task pipeline (StartTask → UpdateAttributes → EvaluateAOI → EndTask) for many processes.
+Run from the ArcGIS Pro python environment, outside of ArcGIS Pro:
+    propy BatchTasks.py <processes> <task> <aprx path> [workers] <user name> <password> [post]
+
+processes: Process names separated by ';' or a path to a text file with a process name per line.
+task: ImproveCurrentCadaster, RetireAndCreateCadaster or RetireAndCreateCadaster3D.
+post: 'false' leaves the versions open for review. Default is 'true'.
+"""
+import os
+from Utils.BatchRunner import run_batch
+from arcpy import GetParameterAsText
+
+
+def read_process_names(processes: str) -> list[str]:
+    """ Returns the process names from a ';' separated list or from a text file with a process name per line. """
+    if os.path.isfile(processes):
+        with open(processes, 'r', encoding='utf-8-sig') as f:
+            return [line.strip() for line in f if line.strip()]
+    return [name.strip().strip("'") for name in processes.split(';') if name.strip()]
+
+
+if __name__ == "__main__":
+    run_batch(ProcessNames= read_process_names(GetParameterAsText(0)),
+              task= GetParameterAsText(1),
+              aprx_path= GetParameterAsText(2),
+              max_workers= int(GetParameterAsText(3) or 2),
+              user_name= GetParameterAsText(4),
+              password= GetParameterAsText(5),
+              post= GetParameterAsText(6).lower() != 'false')
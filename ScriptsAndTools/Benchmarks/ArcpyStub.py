@@ -0,0 +1,65 @@
+import os
+import re
+import sys
+from types import ModuleType
+from importlib.util import find_spec
+from unittest.mock import MagicMock
+
+
+# The folder of the tools scripts, the root of the Utils package
+ScriptsFolder: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def arcpy_module_names(folder: str = ScriptsFolder) -> list[str]:
+    """
+    Lists the arcpy modules imported by the tools scripts (i.e. 'arcpy', 'arcpy.da', 'arcpy.management').
+
+    Parameters:
+        folder (str): The scripts folder to scan. Default is the ScriptsAndTools folder.
+
+    Returns:
+        list[str]: The module names, parents before their submodules.
+    """
+    pattern: re.Pattern = re.compile(r'^\s*(?:from|import)\s+(arcpy(?:\.\w+)*)', re.MULTILINE)
+    names: set[str] = {'arcpy'}
+    for root, _, files in os.walk(folder):
+        for file in [f for f in files if f.endswith('.py')]:
+            with open(os.path.join(root, file), 'r', encoding='utf-8', errors='ignore') as f:
+                for name in pattern.findall(f.read()):
+                    parts: list[str] = name.split('.')
+                    names.update('.'.join(parts[:i]) for i in range(1, len(parts) + 1))
+
+    return sorted(names, key=lambda n: (n.count('.'), n))
+
+
+def install_arcpy_stub(folder: str = ScriptsFolder) -> None:
+    """
+    Registers a stub arcpy (and a stub Utils.Configs if the local configuration file is missing) in sys.modules,
+    so the tools modules can be imported outside of ArcGIS Pro. Every attribute of the stub is a MagicMock,
+    module scope calls succeed and nothing is executed against a geodatabase.
+
+    Parameters:
+        folder (str): The scripts folder, added to sys.path. Default is the ScriptsAndTools folder.
+    """
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
+
+    for name in arcpy_module_names(folder):
+        if name in sys.modules:
+            continue
+        module: MagicMock = MagicMock(name=name)
+        module.__name__ = name
+        module.__path__ = []
+        sys.modules[name] = module
+        if '.' in name:
+            parent, child = name.rsplit('.', 1)
+            setattr(sys.modules[parent], child, module)
+
+    # Windows only calls used by the tools at module scope
+    if not hasattr(os, 'startfile'):
+        os.startfile = MagicMock(name='startfile')
+
+    if find_spec('Utils.Configs') is None:
+        configs: ModuleType = ModuleType('Utils.Configs')
+        configs.CNFG = MagicMock(name='CNFG', Library=os.path.join(folder, 'Library', ''))
+        sys.modules['Utils.Configs'] = configs
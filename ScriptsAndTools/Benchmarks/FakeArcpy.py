@@ -0,0 +1,1474 @@
+"""
+An in-memory stand-in for arcpy, enough of it to run the cadaster tools hot paths on a plain Python interpreter:
+geometries are backed by shapely, datasets are dictionaries of rows, layers and tables live in a single fake project.
+Edits are applied immediately, aborting an edit operation does not restore the rows.
+Every name that is not implemented here resolves to a MagicMock so the tools modules can still be imported.
+"""
+import os
+import re
+import sys
+import json
+import tempfile
+from fnmatch import fnmatch
+from collections import deque
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Any, Optional, Callable, Iterator
+from unittest.mock import MagicMock
+
+import shapely
+from shapely import STRtree
+from shapely.geometry import shape as shapely_shape
+from shapely.geometry.base import BaseGeometry
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Messages and environment
+
+# The latest geoprocessing messages, set BENCH_VERBOSE=1 to print them as well
+Messages: deque = deque(maxlen=500)
+_Verbose: bool = os.environ.get('BENCH_VERBOSE') == '1'
+
+
+def _record(severity: str, message: Any) -> None:
+    Messages.append((severity, str(message)))
+    if _Verbose:
+        print(message)
+
+
+def AddMessage(message: Any) -> None:
+    _record('message', message)
+
+
+def AddWarning(message: Any) -> None:
+    _record('warning', message)
+
+
+def AddError(message: Any) -> None:
+    _record('error', message)
+
+
+def GetParameterAsText(index: int) -> str:
+    return ''
+
+
+def GetParameter(index: int) -> None:
+    return None
+
+
+def GetSigninToken() -> None:
+    return None  # Not signed in to a portal
+
+
+def GetActivePortalURL() -> str:
+    return ''
+
+
+def RefreshLayer(*args, **kwargs) -> None:
+    return None
+
+
+class _Environment:
+    """ arcpy.env, unknown settings are None. """
+    def __init__(self):
+        self.workspace: str|None = None
+        self.overwriteOutput: bool = False
+        self.addOutputsToMap: bool = True
+        self.extent: Any = None
+        self.scratchGDB: str = 'memory'
+
+    def __getattr__(self, name: str) -> None:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return None
+
+
+env: _Environment = _Environment()
+
+
+@contextmanager
+def EnvManager(**settings) -> Iterator[None]:
+    previous: dict[str, Any] = {key: getattr(env, key) for key in settings}
+    for key, value in settings.items():
+        setattr(env, key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            setattr(env, key, value)
+
+
+class Result:
+    """ arcpy.Result of a geoprocessing tool. """
+    def __init__(self, outputs: list[Any]):
+        self.outputs: list[Any] = outputs
+        self.outputCount: int = len(outputs)
+        self.status: int = 4
+
+    def getOutput(self, index: int) -> Any:
+        return self.outputs[index]
+
+    def __getitem__(self, index: int) -> Any:
+        return self.outputs[index]
+
+    def __str__(self) -> str:
+        return str(self.outputs[0]) if self.outputs else ''
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Geometries
+
+class SpatialReference:
+    def __init__(self, item: Any = 2039, *args, **kwargs):
+        self.factoryCode: Any = item
+        self.name: str = 'Israel_TM_Grid' if item == 2039 else str(item)
+
+
+class Point:
+    def __init__(self, X: float|None = None, Y: float|None = None, Z: float|None = None, M: float|None = None, ID: int = 0):
+        self.X, self.Y, self.Z, self.M, self.ID = X, Y, Z, M, ID
+
+    def equals(self, other: 'Point') -> bool:
+        return (self.X, self.Y) == (other.X, other.Y)
+
+    def __repr__(self) -> str:
+        return f'{self.X} {self.Y} {self.Z if self.Z is not None else "NaN"} NaN'
+
+
+class Array(list):
+    """ arcpy.Array, a list of Points or of Arrays of Points. """
+    def __init__(self, items: Any = None):
+        super().__init__([] if items is None else (items if isinstance(items, (list, tuple)) else [items]))
+
+    def add(self, item: Any) -> None:
+        self.append(item)
+
+    def getObject(self, index: int) -> Any:
+        return self[index]
+
+    @property
+    def count(self) -> int:
+        return len(self)
+
+
+def _coords(points: Any) -> list[tuple[float, ...]]:
+    return [(p.X, p.Y) if p.Z is None else (p.X, p.Y, p.Z) for p in points if p is not None]
+
+
+def _parts(inputs: Any) -> list[list[tuple[float, ...]]]:
+    """ Splits an Array (or Array of Arrays) of Points to lists of coordinates per part. """
+    if isinstance(inputs, Point):
+        return [_coords([inputs])]
+    if inputs and isinstance(inputs[0], (Array, list)):
+        return [_coords(part) for part in inputs]
+    return [_coords(inputs)]
+
+
+def _shape(item: Any) -> BaseGeometry:
+    """ The shapely geometry of a fake geometry, extent, point or shapely object. """
+    if isinstance(item, Geometry):
+        return item._g
+    if isinstance(item, Extent):
+        return shapely.box(item.XMin, item.YMin, item.XMax, item.YMax)
+    if isinstance(item, Point):
+        return shapely.Point(item.X, item.Y)
+    if isinstance(item, BaseGeometry):
+        return item
+    raise TypeError(f'Not a geometry: {item!r}')
+
+
+class Geometry:
+    """ arcpy.Geometry backed by a shapely geometry. """
+    type: str = 'geometry'
+
+    def __init__(self, geometry_type: str = 'polygon', inputs: Any = None, spatial_reference: Any = None, *args, **kwargs):
+        self.type: str = geometry_type
+        self._g: BaseGeometry = _shape(inputs) if inputs is not None else shapely.Polygon()
+        self.spatialReference: Any = spatial_reference
+
+    # Construction from shapely
+    @staticmethod
+    def wrap(g: BaseGeometry|None, spatial_reference: Any = None) -> 'Geometry|None':
+        if g is None:
+            return None
+        cls: type = {'Polygon': Polygon, 'MultiPolygon': Polygon, 'LineString': Polyline, 'MultiLineString': Polyline,
+                     'Point': PointGeometry, 'MultiPoint': Multipoint}.get(g.geom_type, Geometry)
+        geometry: Geometry = object.__new__(cls)
+        geometry._g = g
+        geometry.spatialReference = spatial_reference
+        if cls is Geometry:
+            geometry.type = g.geom_type.lower()
+        return geometry
+
+    # Properties
+    @property
+    def area(self) -> float:
+        return self._g.area
+
+    @property
+    def length(self) -> float:
+        return self._g.length if self.type != 'polygon' else self._g.boundary.length
+
+    @property
+    def isMultipart(self) -> bool:
+        return self._g.geom_type.startswith('Multi')
+
+    @property
+    def partCount(self) -> int:
+        return len(self._g.geoms) if self.isMultipart else (0 if self._g.is_empty else 1)
+
+    @property
+    def pointCount(self) -> int:
+        return int(shapely.get_num_coordinates(self._g))
+
+    def _vertices(self) -> list[tuple[float, ...]]:
+        return [tuple(c) for c in shapely.get_coordinates(self._g, include_z=self._g.has_z)]
+
+    @property
+    def firstPoint(self) -> Point|None:
+        vertices: list[tuple[float, ...]] = self._vertices()
+        return Point(*vertices[0]) if vertices else None
+
+    @property
+    def lastPoint(self) -> Point|None:
+        if self._g.is_empty:
+            return None
+        part: BaseGeometry = self._g.geoms[-1] if self.isMultipart else self._g
+        ring: Any = part.exterior if part.geom_type == 'Polygon' else part
+        return Point(*ring.coords[-1])
+
+    @property
+    def centroid(self) -> Point:
+        c: BaseGeometry = self._g.centroid
+        return Point(c.x, c.y)
+
+    @property
+    def trueCentroid(self) -> Point:
+        return self.centroid
+
+    @property
+    def labelPoint(self) -> Point:
+        p: BaseGeometry = self._g.representative_point()
+        return Point(p.x, p.y)
+
+    @property
+    def extent(self) -> 'Extent':
+        return Extent(*self._g.bounds)
+
+    @property
+    def WKT(self) -> str:
+        return self._g.wkt
+
+    @property
+    def JSON(self) -> str:
+        return json.dumps(esri_json(self._g))
+
+    @property
+    def hasZ(self) -> bool:
+        return self._g.has_z
+
+    # Relations
+    def contains(self, other: Any, relation: Any = None) -> bool:
+        return self._g.contains(_shape(other))
+
+    def within(self, other: Any, relation: Any = None) -> bool:
+        return self._g.within(_shape(other))
+
+    def crosses(self, other: Any) -> bool:
+        return self._g.crosses(_shape(other))
+
+    def disjoint(self, other: Any) -> bool:
+        return self._g.disjoint(_shape(other))
+
+    def equals(self, other: Any) -> bool:
+        return self._g.equals(_shape(other))
+
+    def overlaps(self, other: Any) -> bool:
+        return self._g.overlaps(_shape(other))
+
+    def touches(self, other: Any) -> bool:
+        return self._g.touches(_shape(other))
+
+    def distanceTo(self, other: Any) -> float:
+        return self._g.distance(_shape(other))
+
+    # Operations
+    def buffer(self, distance: float) -> 'Geometry':
+        return Geometry.wrap(self._g.buffer(distance), self.spatialReference)
+
+    def union(self, other: Any) -> 'Geometry':
+        return Geometry.wrap(self._g.union(_shape(other)), self.spatialReference)
+
+    def difference(self, other: Any) -> 'Geometry':
+        return Geometry.wrap(self._g.difference(_shape(other)), self.spatialReference)
+
+    def symmetricDifference(self, other: Any) -> 'Geometry':
+        return Geometry.wrap(self._g.symmetric_difference(_shape(other)), self.spatialReference)
+
+    def intersect(self, other: Any, dimension: int) -> 'Geometry':
+        g: BaseGeometry = self._g.intersection(_shape(other))
+        keep: dict[int, tuple[str, ...]] = {1: ('Point', 'MultiPoint'), 2: ('LineString', 'MultiLineString'), 4: ('Polygon', 'MultiPolygon')}
+        if g.geom_type == 'GeometryCollection':
+            g: BaseGeometry = shapely.union_all([part for part in g.geoms if part.geom_type in keep[dimension]])
+        return Geometry.wrap(g, self.spatialReference)
+
+    def clip(self, envelope: 'Extent') -> 'Geometry':
+        return Geometry.wrap(self._g.intersection(_shape(envelope)), self.spatialReference)
+
+    def boundary(self) -> 'Geometry':
+        return Geometry.wrap(self._g.boundary, self.spatialReference)
+
+    def convexHull(self) -> 'Geometry':
+        return Geometry.wrap(self._g.convex_hull, self.spatialReference)
+
+    def generalize(self, max_offset: float) -> 'Geometry':
+        return Geometry.wrap(self._g.simplify(max_offset), self.spatialReference)
+
+    def projectAs(self, spatial_reference: Any, transformation_name: Any = None) -> 'Geometry':
+        return self
+
+    def getPart(self, index: int|None = None) -> Array:
+        parts: list[BaseGeometry] = list(self._g.geoms) if self.isMultipart else [self._g]
+        arrays: Array = Array([Array([Point(*c) for c in shapely.get_coordinates(p, include_z=p.has_z)]) for p in parts])
+        return arrays if index is None else arrays[index]
+
+    def __iter__(self) -> Iterator[Array]:
+        return iter(self.getPart())
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Geometry) and self._g.equals(other._g)
+
+    __hash__ = object.__hash__
+
+
+class Polygon(Geometry):
+    type: str = 'polygon'
+
+    def __init__(self, inputs: Any = None, spatial_reference: Any = None, has_z: bool = False, has_m: bool = False):
+        parts: list[list[tuple[float, ...]]] = _parts(inputs or [])
+        polygons: list[BaseGeometry] = [shapely.Polygon(p) for p in parts if len(p) >= 3]
+        self._g: BaseGeometry = polygons[0] if len(polygons) == 1 else shapely.MultiPolygon(polygons)
+        self.spatialReference: Any = spatial_reference
+
+
+class Polyline(Geometry):
+    type: str = 'polyline'
+
+    def __init__(self, inputs: Any = None, spatial_reference: Any = None, has_z: bool = False, has_m: bool = False):
+        parts: list[list[tuple[float, ...]]] = _parts(inputs or [])
+        lines: list[BaseGeometry] = [shapely.LineString(p) for p in parts if len(p) >= 2]
+        self._g: BaseGeometry = lines[0] if len(lines) == 1 else shapely.MultiLineString(lines)
+        self.spatialReference: Any = spatial_reference
+
+
+class PointGeometry(Geometry):
+    type: str = 'point'
+
+    def __init__(self, inputs: Any = None, spatial_reference: Any = None, has_z: bool = False, has_m: bool = False):
+        self._g: BaseGeometry = shapely.Point(*_coords([inputs])[0]) if inputs is not None else shapely.Point()
+        self.spatialReference: Any = spatial_reference
+
+
+class Multipoint(Geometry):
+    type: str = 'multipoint'
+
+    def __init__(self, inputs: Any = None, spatial_reference: Any = None, has_z: bool = False, has_m: bool = False):
+        self._g: BaseGeometry = shapely.MultiPoint(_coords(inputs or []))
+        self.spatialReference: Any = spatial_reference
+
+
+class Extent:
+    def __init__(self, XMin: float = None, YMin: float = None, XMax: float = None, YMax: float = None, *args, **kwargs):
+        self.XMin, self.YMin, self.XMax, self.YMax = XMin, YMin, XMax, YMax
+        self.spatialReference: SpatialReference = SpatialReference(2039)
+
+    @property
+    def width(self) -> float:
+        return self.XMax - self.XMin
+
+    @property
+    def height(self) -> float:
+        return self.YMax - self.YMin
+
+    @property
+    def polygon(self) -> Polygon:
+        return Geometry.wrap(_shape(self), self.spatialReference)
+
+    def contains(self, other: Any) -> bool:
+        return _shape(self).contains(_shape(other))
+
+    def within(self, other: Any) -> bool:
+        return _shape(self).within(_shape(other))
+
+    def disjoint(self, other: Any) -> bool:
+        return _shape(self).disjoint(_shape(other))
+
+    def overlaps(self, other: Any) -> bool:
+        return _shape(self).intersects(_shape(other))
+
+
+def esri_json(g: BaseGeometry) -> dict[str, Any]:
+    """ The Esri JSON of a shapely geometry. """
+    sr: dict[str, int] = {'wkid': 2039}
+    if g.geom_type == 'Point':
+        return {'x': g.x, 'y': g.y, 'spatialReference': sr}
+    if g.geom_type in ['LineString', 'MultiLineString']:
+        lines: list[BaseGeometry] = list(g.geoms) if g.geom_type.startswith('Multi') else [g]
+        return {'paths': [[list(c) for c in line.coords] for line in lines], 'spatialReference': sr}
+    polygons: list[BaseGeometry] = list(g.geoms) if g.geom_type.startswith('Multi') else [g]
+    rings: list[list[list[float]]] = []
+    for polygon in polygons:
+        rings.append([list(c) for c in polygon.exterior.coords])
+        rings.extend([list(c) for c in ring.coords] for ring in polygon.interiors)
+    return {'rings': rings, 'spatialReference': sr}
+
+
+def AsShape(geojson_struct: Any, esri_json: bool = False) -> Geometry:
+    data: dict[str, Any] = json.loads(geojson_struct) if isinstance(geojson_struct, str) else geojson_struct
+    if not esri_json:
+        return Geometry.wrap(shapely_shape(data))
+    if 'rings' in data:
+        return Geometry.wrap(shapely.Polygon(data['rings'][0], data['rings'][1:]) if len(data['rings']) > 0 else shapely.Polygon())
+    if 'paths' in data:
+        lines: list[BaseGeometry] = [shapely.LineString(p) for p in data['paths']]
+        return Geometry.wrap(lines[0] if len(lines) == 1 else shapely.MultiLineString(lines))
+    return Geometry.wrap(shapely.Point(data['x'], data['y']))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Datasets
+
+class Dataset:
+    """
+    A feature class or table in memory. Rows are dicts keyed by the lower case field names, the shape is kept as a shapely geometry.
+    The GlobalID index and the spatial index are maintained lazily.
+    """
+    def __init__(self, name: str, fields: list[str], geometry_type: str|None = None):
+        self.name: str = name
+        self.fields: list[str] = ['OBJECTID'] + [f for f in fields if f.lower() not in ['objectid', 'shape']]
+        self.geometry_type: str|None = geometry_type
+        self.types: dict[str, str] = {}
+        self.rows: dict[int, dict[str, Any]] = {}
+        self.next_oid: int = 1
+        self.shape_version: int = 0
+        self._tree: tuple[int, STRtree, list[int]]|None = None
+        self._indexes: dict[str, dict[Any, set[int]]] = {}
+
+    @property
+    def field_keys(self) -> set[str]:
+        return {f.lower() for f in self.fields} | ({'shape'} if self.geometry_type else set())
+
+    def add_field(self, field: str, field_type: str|None = None) -> None:
+        if field.lower() not in self.field_keys:
+            self.fields.append(field)
+            if field_type:
+                self.types[field.lower()] = field_type
+
+    def field_type(self, field: str) -> str:
+        """ The arcpy type of a field: its own type, else the type of the fabric field by that name, else 'String'. """
+        key: str = field.lower()
+        return 'OID' if key == 'objectid' else self.types.get(key) or FieldTypes.get(key, 'String')
+
+    def insert(self, values: dict[str, Any]) -> int:
+        oid: int = self.next_oid
+        self.next_oid += 1
+        row: dict[str, Any] = {f.lower(): None for f in self.fields}
+        row.update(values)
+        row['objectid'] = oid
+        if 'globalid' in row and row['globalid'] is None:
+            row['globalid'] = _guid(0xE, oid)
+        self.rows[oid] = row
+        for field, index in self._indexes.items():
+            index.setdefault(row.get(field), set()).add(oid)
+        if row.get('shape') is not None:
+            self.shape_version += 1
+        return oid
+
+    def update(self, oid: int, values: dict[str, Any]) -> None:
+        row: dict[str, Any] = self.rows[oid]
+        for field, value in values.items():
+            if field in self._indexes and row.get(field) != value:
+                self._indexes[field][row.get(field)].discard(oid)
+                self._indexes[field].setdefault(value, set()).add(oid)
+            if field == 'shape' and value is not row.get('shape'):
+                self.shape_version += 1
+            row[field] = value
+
+    def delete(self, oid: int) -> None:
+        row: dict[str, Any] = self.rows.pop(oid)
+        for field, index in self._indexes.items():
+            index.get(row.get(field), set()).discard(oid)
+        self.shape_version += 1
+
+    def index(self, field: str) -> dict[Any, set[int]]:
+        """ An equality index of a field, built on first use. """
+        if field not in self._indexes:
+            index: dict[Any, set[int]] = {}
+            for oid, row in self.rows.items():
+                index.setdefault(row.get(field), set()).add(oid)
+            self._indexes[field] = index
+        return self._indexes[field]
+
+    def tree(self) -> tuple[STRtree, list[int]]:
+        """ The spatial index of the shapes and the ObjectIDs of its items, rebuilt after the shapes changed. """
+        if self._tree is None or self._tree[0] != self.shape_version:
+            oids: list[int] = [oid for oid, row in self.rows.items() if row.get('shape') is not None]
+            self._tree = (self.shape_version, STRtree([self.rows[oid]['shape'] for oid in oids]), oids)
+        return self._tree[1], self._tree[2]
+
+
+# All the datasets of the fake workspaces by name
+Datasets: dict[str, Dataset] = {}
+
+# The types of the fabric fields by their lower case name, the other fields are text
+FieldTypes: dict[str, str] = {'globalid': 'GlobalID', 'parcelnumber': 'Integer', 'blocknumber': 'Integer', 'subblocknumber': 'Integer',
+                              'statedarea': 'Double', 'legalarea': 'Double', 'distance': 'Double', 'radius': 'Double', 'legallength': 'Double',
+                              'landtype': 'SmallInteger', 'istax': 'SmallInteger', 'parceltype': 'SmallInteger', 'createprocesstype': 'SmallInteger',
+                              'cancelprocesstype': 'SmallInteger', 'linetype': 'SmallInteger', 'blockstatus': 'SmallInteger',
+                              'recordtype': 'SmallInteger', 'processtype': 'SmallInteger', 'createdbyrecord': 'Guid', 'retiredbyrecord': 'Guid',
+                              'updatedbyrecord': 'Guid', 'blockuniqueid': 'Guid', 'cpbuniqueid': 'Guid'}
+
+# The arcpy field types of the CalculateField field types
+_CalculateTypes: dict[str, str] = {'SHORT': 'SmallInteger', 'LONG': 'Integer', 'BIGINTEGER': 'BigInteger', 'FLOAT': 'Single', 'DOUBLE': 'Double',
+                                   'TEXT': 'String', 'DATE': 'Date', 'GUID': 'Guid'}
+
+
+def _guid(kind: int, number: int) -> str:
+    """ A deterministic GlobalID, `kind` tells the source (a hex digit). """
+    return f'{{{kind:X}{number // 16 ** 19 % 16 ** 7:07X}-0000-4000-8000-{number % 16 ** 12:012X}}}'
+
+
+def dataset_name(path: Any) -> str:
+    """ The dataset name of a path (without the workspace and the owner prefix), a layer or a table. """
+    if isinstance(path, Layer):
+        return path.dataset
+    return re.split(r'[\\/]', str(path))[-1].split('.')[-1]
+
+
+def create_dataset(name: str, fields: list[str], geometry_type: str|None = None) -> Dataset:
+    """ Creates (or replaces) a dataset. """
+    Datasets[name] = Dataset(name, fields, geometry_type)
+    return Datasets[name]
+
+
+def get_dataset(path: Any) -> Dataset:
+    name: str = dataset_name(path)
+    if name not in Datasets:
+        raise RuntimeError(f'Cannot open {path}: dataset {name} does not exist')
+    return Datasets[name]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# SQL where-clauses
+
+_Tokens: re.Pattern = re.compile(r"""\s*(?:('(?:[^']|'')*')|(-?\d+(?:\.\d+)?(?![\w.]))|(<>|!=|<=|>=|=|<|>)|([(),])|("[^"]+"|[A-Za-z_][\w.@]*))""")
+_Compiled: dict[str, Callable[[dict[str, Any]], bool]] = {}
+
+
+def _like(value: Any, pattern: str) -> bool:
+    if value is None:
+        return False
+    regex: str = '^' + re.escape(pattern).replace('%', '.*').replace('_', '.') + '$'
+    return re.match(regex, str(value), re.IGNORECASE | re.DOTALL) is not None
+
+
+def compile_where(where_clause: str|None) -> Callable[[dict[str, Any]], bool]:
+    """
+    Compiles a SQL where-clause (comparisons, IS [NOT] NULL, [NOT] IN, [NOT] LIKE, AND/OR/NOT, parentheses) to a row predicate.
+    Comparisons with NULL are False as in SQL.
+    """
+    if not where_clause or not where_clause.strip():
+        return lambda row: True
+    if where_clause in _Compiled:
+        return _Compiled[where_clause]
+
+    tokens: list[str] = []
+    position: int = 0
+    text: str = where_clause.strip()
+    while position < len(text):
+        match: re.Match|None = _Tokens.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f'Unsupported where-clause: {where_clause}')
+        tokens.append(match.group(0).strip())
+        position = match.end()
+
+    out: list[str] = []
+    i: int = 0
+    while i < len(tokens):
+        token: str = tokens[i]
+        upper: str = token.upper()
+        if token.startswith("'"):
+            out.append(repr(token[1:-1].replace("''", "'")))
+        elif upper in ['AND', 'OR']:
+            out.append(f' {upper.lower()} ')
+        elif upper == 'NOT' and i + 1 < len(tokens) and tokens[i + 1].upper() in ['IN', 'LIKE']:
+            out.append(' not')
+        elif upper == 'NOT':
+            out.append(' not ')
+        elif upper == 'IS':
+            negate: bool = tokens[i + 1].upper() == 'NOT'
+            i += 2 if negate else 1
+            out.append(' is not None' if negate else ' is None')
+        elif upper == 'IN':
+            depth, values, j = 0, [], i + 1
+            while j < len(tokens):
+                if tokens[j] == '(':
+                    depth += 1
+                elif tokens[j] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                elif tokens[j] != ',':
+                    values.append(repr(tokens[j][1:-1].replace("''", "'")) if tokens[j].startswith("'") else tokens[j])
+                j += 1
+            negated: bool = bool(out) and out[-1] == ' not'
+            if negated:
+                out.pop()
+            out.append(f" {'not in' if negated else 'in'} {{{', '.join(values)}}}")
+            i = j
+        elif upper == 'LIKE':
+            negated: bool = out[-1] == ' not'
+            if negated:
+                out.pop()
+            operand: str = out.pop()
+            out.append(f"{'not ' if negated else ''}_like({operand}, {tokens[i + 1]})")
+            i += 1
+        elif upper in ['DATE', 'TIMESTAMP'] and i + 1 < len(tokens) and tokens[i + 1].startswith("'"):
+            pass
+        elif upper == 'NULL':
+            out.append('None')
+        elif token in ['(', ')', ',']:
+            out.append(token)
+        elif token in ['=', '<>', '!=', '<', '>', '<=', '>=']:
+            out.append({'=': ' == ', '<>': ' != '}.get(token, f' {token} '))
+        elif re.match(r'^-?\d', token):
+            out.append(token)
+        else:
+            out.append(f"r.get({token.strip(chr(34)).lower()!r})")
+        i += 1
+
+    code: Any = compile(f'lambda r: {"".join(out)}', '<where>', 'eval')
+    predicate: Callable[[dict[str, Any]], bool] = eval(code, {'_like': _like})
+
+    def safe(row: dict[str, Any]) -> bool:
+        try:
+            return bool(predicate(row))
+        except TypeError:
+            return False
+
+    _Compiled[where_clause] = safe
+    return safe
+
+
+_EqualsClause: re.Pattern = re.compile(r"^\s*(\w+)\s*=\s*('(?:[^']|'')*'|-?\d+)\s*$")
+_InClause: re.Pattern = re.compile(r"^\s*(\w+)\s+IN\s*\(([^()]*)\)\s*$", re.IGNORECASE)
+
+
+def matching_oids(dataset: Dataset, where_clause: str|None, candidates: Optional[Any] = None) -> list[int]:
+    """
+    The ObjectIDs of the rows matching a where-clause, in ObjectID order.
+    Single `field = value` and `field IN (...)` clauses on GlobalID fields are answered from an index.
+    """
+    if where_clause and candidates is None:
+        equals: re.Match|None = _EqualsClause.match(where_clause)
+        in_list: re.Match|None = _InClause.match(where_clause)
+        indexed: re.Match|None = equals or in_list
+        if indexed and ('globalid' in indexed.group(1).lower() or indexed.group(1).lower().endswith('uniqueid')
+                        or indexed.group(1).lower() in ['name', 'processname', 'createdbyrecord', 'retiredbyrecord']):
+            field: str = indexed.group(1).lower()
+            raw: list[str] = [equals.group(2)] if equals else [v.strip() for v in in_list.group(2).split(',') if v.strip()]
+            values: list[Any] = [v[1:-1].replace("''", "'") if v.startswith("'") else float(v) for v in raw]
+            index: dict[Any, set[int]] = dataset.index(field)
+            return sorted(set().union(*[index.get(v, set()) for v in values]))
+
+    predicate: Callable[[dict[str, Any]], bool] = compile_where(where_clause)
+    oids: Any = dataset.rows.keys() if candidates is None else candidates
+    return [oid for oid in sorted(oids) if oid in dataset.rows and predicate(dataset.rows[oid])]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Project, maps, layers and tables
+
+class Layer:
+    """ arcpy.mp.Layer over an in-memory dataset, with definition queries and a selection set. """
+    def __init__(self, name: str, dataset: str|None = None, definition_query: str|None = None, group: bool = False):
+        self.name: str = name
+        self.longName: str = name
+        self.dataset: str|None = dataset
+        self.isGroupLayer: bool = group
+        self.isFeatureLayer: bool = not group
+        self.isBasemapLayer: bool = False
+        self.isBroken: bool = False
+        self.visible: bool = True
+        self.layers: list[Layer] = []
+        self.selection: set[int]|None = None
+        self.subset: frozenset[int]|None = None
+        self._queries: list[dict[str, Any]] = [{'name': 'Base', 'sql': definition_query, 'isActive': True}] if definition_query else []
+        self.connectionProperties: dict[str, Any] = {'dataset': dataset, 'workspace_factory': 'SDE',
+                                                     'connection_info': {'version': 'sde.DEFAULT'}}
+
+    @property
+    def dataSource(self) -> str:
+        return f'memory\\{self.dataset}'
+
+    @property
+    def definitionQuery(self) -> str:
+        return next((q['sql'] for q in self._queries if q.get('isActive')), '')
+
+    @definitionQuery.setter
+    def definitionQuery(self, sql: str) -> None:
+        self._queries = [{'name': 'Query', 'sql': sql, 'isActive': True}] if sql else []
+
+    def supports(self, property_name: str) -> bool:
+        return property_name.upper() in ['NAME', 'DATASOURCE', 'DEFINITIONQUERY', 'CONNECTIONPROPERTIES', 'VISIBLE', 'LONGNAME']
+
+    def listDefinitionQueries(self) -> list[dict[str, Any]]:
+        return [dict(q) for q in self._queries]
+
+    def updateDefinitionQueries(self, queries: list[dict[str, Any]]|None) -> None:
+        self._queries = [dict(q) for q in queries or []]
+
+    def updateConnectionProperties(self, current: Any, new: dict[str, Any], *args, **kwargs) -> None:
+        if isinstance(new, dict) and new.get('dataset'):
+            self.dataset = new['dataset']
+            self.connectionProperties.update(new)
+
+    def getSelectionSet(self) -> set[int]|None:
+        return set(self.selection) if self.selection else None
+
+    def setSelectionSet(self, oidList: list[int]|None = None, method: str = 'NEW') -> None:
+        oids: set[int] = set(oidList or [])
+        current: set[int] = self.selection or set()
+        self.selection = {'NEW': oids, 'UNION': current | oids, 'DIFFERENCE': current - oids, 'INTERSECT': current & oids,
+                          'SYMDIFFERENCE': current ^ oids}[method.upper()] or None
+
+    def listLayers(self, wildcard: str|None = None) -> list['Layer']:
+        return [layer for layer in self.layers if wildcard is None or fnmatch(layer.name, wildcard)]
+
+    def accepts(self, oid: int) -> bool:
+        """ Checks if a row is displayed by the layer (its subset and active definition query). """
+        if self.subset is not None and oid not in self.subset:
+            return False
+        row: dict[str, Any]|None = Datasets[self.dataset].rows.get(oid)
+        return row is not None and compile_where(self.definitionQuery)(row)
+
+    def visible_oids(self) -> list[int]:
+        """ The rows displayed by the layer, ignoring the selection. """
+        return matching_oids(Datasets[self.dataset], self.definitionQuery or None, self.subset)
+
+    def cursor_oids(self) -> list[int]:
+        """ The rows a cursor on the layer reads: the selected rows if there is a selection, otherwise the displayed rows. """
+        if self.selection is not None:
+            return sorted(oid for oid in self.selection if self.accepts(oid))
+        return self.visible_oids()
+
+
+class Table(Layer):
+    def __init__(self, name: str, dataset: str|None = None, definition_query: str|None = None):
+        super().__init__(name, dataset, definition_query)
+        self.isFeatureLayer: bool = False
+
+
+class Camera:
+    def __init__(self, project: 'ArcGISProject'):
+        self._project: ArcGISProject = project
+
+    def getExtent(self) -> Extent:
+        return self._project.view_extent or Extent(0, 0, 1, 1)
+
+    def setExtent(self, extent: Extent) -> None:
+        self._project.view_extent = extent
+
+
+class MapView:
+    def __init__(self, project: 'ArcGISProject'):
+        self.camera: Camera = Camera(project)
+
+    def zoomToAllLayers(self, *args, **kwargs) -> None:
+        return None
+
+
+class Map:
+    def __init__(self, name: str):
+        self.name: str = name
+        self.layers: list[Layer] = []
+        self.tables: list[Table] = []
+        self.spatialReference: SpatialReference = SpatialReference(2039)
+
+    def _all_layers(self) -> list[Layer]:
+        stack: list[Layer] = []
+        for layer in self.layers:
+            stack.append(layer)
+            stack.extend(layer.layers)
+        return stack
+
+    def listLayers(self, wildcard: str|None = None) -> list[Layer]:
+        return [layer for layer in self._all_layers() if wildcard is None or fnmatch(layer.name, wildcard) or fnmatch(layer.longName, wildcard)]
+
+    def listTables(self, wildcard: str|None = None) -> list[Table]:
+        return [table for table in self.tables if wildcard is None or fnmatch(table.name, wildcard)]
+
+    def clearSelection(self) -> None:
+        for item in self._all_layers() + self.tables:
+            item.selection = None
+
+    def addLayer(self, layer: Layer, add_position: str = 'AUTO_ARRANGE') -> list[Layer]:
+        self.layers.insert(0, layer)
+        return [layer]
+
+    def addTable(self, table: Table) -> None:
+        self.tables.append(table)
+
+    def removeLayer(self, layer: Layer) -> None:
+        if layer in self.layers:
+            self.layers.remove(layer)
+        for group in self.layers:
+            if layer in group.layers:
+                group.layers.remove(layer)
+
+    def removeTable(self, table: Table) -> None:
+        if table in self.tables:
+            self.tables.remove(table)
+
+    def moveLayer(self, reference_layer: Layer, move_layer: Layer, insert_position: str = 'BEFORE') -> None:
+        return None
+
+    def addLayerToGroup(self, target_group_layer: Layer, add_layer_or_layerfile: Layer, add_position: str = 'AUTO_ARRANGE') -> None:
+        target_group_layer.layers.append(add_layer_or_layerfile)
+        add_layer_or_layerfile.longName = f'{target_group_layer.name}\\{add_layer_or_layerfile.name}'
+
+    def addTableToGroup(self, target_group_layer: Layer, add_table: Table) -> None:
+        return None
+
+    def addDataFromPath(self, data_path: str, *args, **kwargs) -> Layer:
+        """ Adds a layer file (see LayerFiles) or a dataset of the fake workspace to the map. """
+        stem: str = re.split(r'[\\/]', str(data_path))[-1]
+        if stem.lower().endswith('.lyrx'):
+            stem: str = re.sub(r'(_(Development|Test|Production))?\.lyrx$', '', stem, flags=re.IGNORECASE)
+            name, dataset, query = LayerFiles.get(stem, (stem, stem, None))
+        else:
+            dataset: str = dataset_name(data_path)
+            name, query = Aliases.get(dataset, dataset), None
+
+        if dataset in Datasets and Datasets[dataset].geometry_type is None:
+            table: Table = Table(name, dataset, query)
+            self.tables.append(table)
+            return table
+
+        layer: Layer = Layer(name, dataset, query)
+        self.layers.insert(0, layer)
+        return layer
+
+
+# The layer files the tools add to the map: file name (without the environment suffix) -> (layer name, dataset, definition query)
+LayerFiles: dict[str, tuple[str, str, str|None]] = {'UnmatchedFronts': ('חזיתות לא מתואמות', 'InProcessFronts', None),
+                                                    'RedundantVertices': ('נקודות מפנה מיותרות', 'RedundantVertices', None)}
+
+# The layer names of datasets added to the map by their path
+Aliases: dict[str, str] = {'DeviatedAreaParcels': 'חלקות עם שטחים חורגים'}
+
+
+class ArcGISProject:
+    """ arcpy.mp.ArcGISProject, every path opens the same in-memory project. """
+    _current: Optional['ArcGISProject'] = None
+
+    def __new__(cls, aprx_path: str = 'current'):
+        if cls._current is None:
+            project: ArcGISProject = super().__new__(cls)
+            project.maps = [Map('מפת עריכה')]
+            project.view_extent = None
+            project.homeFolder = tempfile.mkdtemp(prefix='FakeProject_')
+            project.defaultGeodatabase = 'memory'
+            project.filePath = os.path.join(project.homeFolder, 'Fake.aprx')
+            project.activeView = MapView(project)
+            cls._current = project
+        return cls._current
+
+    @property
+    def activeMap(self) -> Map:
+        return self.maps[0]
+
+    def listMaps(self, wildcard: str|None = None) -> list[Map]:
+        return [m for m in self.maps if wildcard is None or fnmatch(m.name, wildcard)]
+
+    def save(self) -> None:
+        return None
+
+    def closeViews(self, *args, **kwargs) -> None:
+        return None
+
+
+def reset() -> None:
+    """ Removes all the datasets, layers and messages. """
+    Datasets.clear()
+    Messages.clear()
+    _Compiled.clear()
+    ArcGISProject._current = None
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Cursors and editing
+
+def _source(in_table: Any) -> tuple[Dataset, Layer|None]:
+    if isinstance(in_table, Layer):
+        return Datasets[in_table.dataset], in_table
+    return get_dataset(in_table), None
+
+
+def _read_field(dataset: Dataset, oid: int, row: dict[str, Any], field: str) -> Any:
+    key: str = field.lower()
+    g: BaseGeometry|None = row.get('shape')
+    if key in ['oid@', 'objectid']:
+        return oid
+    if key in ['shape@', 'shape']:
+        return Geometry.wrap(g, SpatialReference(2039))
+    if key.startswith('shape@') or key in ['shape__area', 'shape__length', 'shape_area', 'shape_length']:
+        if g is None:
+            return None
+        if key in ['shape@xy', 'shape@truecentroid']:
+            c: BaseGeometry = g if g.geom_type == 'Point' else g.centroid
+            return c.x, c.y
+        if key == 'shape@x':
+            return (g if g.geom_type == 'Point' else g.centroid).x
+        if key == 'shape@y':
+            return (g if g.geom_type == 'Point' else g.centroid).y
+        if key == 'shape@z':
+            return g.z if g.has_z and g.geom_type == 'Point' else None
+        if key in ['shape@area', 'shape__area', 'shape_area']:
+            return g.area
+        if key in ['shape@length', 'shape__length', 'shape_length']:
+            return g.length if g.geom_type != 'Polygon' else g.boundary.length
+        if key == 'shape@json':
+            return json.dumps(esri_json(g))
+        if key == 'shape@wkt':
+            return g.wkt
+    return row.get(key)
+
+
+def _check_fields(dataset: Dataset, fields: list[str]) -> None:
+    keys: set[str] = dataset.field_keys
+    for field in fields:
+        key: str = field.lower()
+        if key not in keys and key not in ['oid@'] and not key.startswith('shape'):
+            raise RuntimeError(f'Cannot find field {field} in {dataset.name}')
+
+
+def _fields(dataset: Dataset, field_names: Any) -> list[str]:
+    fields: list[str] = [field_names] if isinstance(field_names, str) else list(field_names)
+    if fields == ['*']:
+        fields: list[str] = dataset.fields + (['Shape'] if dataset.geometry_type else [])
+    _check_fields(dataset, fields)
+    return fields
+
+
+class SearchCursor:
+    """ arcpy.da.SearchCursor on a dataset path, a layer or a table. """
+    def __init__(self, in_table: Any, field_names: Any, where_clause: str|None = None, spatial_reference: Any = None,
+                 explode_to_points: bool = False, sql_clause: tuple[str|None, str|None] = (None, None), datum_transformation: Any = None,
+                 spatial_filter: Any = None, spatial_relationship: str = 'INTERSECTS', search_order: str = 'ATTRIBUTEFIRST'):
+        self._dataset, layer = _source(in_table)
+        self.fields: list[str] = _fields(self._dataset, field_names)
+
+        candidates: Any = layer.cursor_oids() if layer is not None else None
+        if spatial_filter is not None:
+            tree, tree_oids = self._dataset.tree()
+            predicate: str = {'INTERSECTS': 'intersects', 'WITHIN': 'contains', 'CONTAINS': 'within'}.get(spatial_relationship.upper(), 'intersects')
+            hits: set[int] = {tree_oids[i] for i in tree.query(_shape(spatial_filter), predicate=predicate)}
+            candidates: Any = hits if candidates is None else [oid for oid in candidates if oid in hits]
+        oids: list[int] = matching_oids(self._dataset, where_clause, candidates) if where_clause or candidates is None else list(candidates)
+
+        rows: list[tuple[Any, ...]] = [tuple(_read_field(self._dataset, oid, self._dataset.rows[oid], f) for f in self.fields) for oid in oids]
+        self._oids: list[int] = oids
+        self._rows: list[tuple[Any, ...]] = self._apply_sql_clause(rows, sql_clause or (None, None))
+        self._position: int = 0
+
+    def _apply_sql_clause(self, rows: list[tuple[Any, ...]], sql_clause: tuple[str|None, str|None]) -> list[tuple[Any, ...]]:
+        prefix, postfix = (sql_clause[0] or '').upper(), sql_clause[1] or ''
+        if 'DISTINCT' in prefix:
+            rows: list[tuple[Any, ...]] = list(dict.fromkeys(rows))
+        order: re.Match|None = re.search(r'ORDER\s+BY\s+(.+)$', postfix, re.IGNORECASE)
+        if order:
+            names: list[str] = [f.lower() for f in self.fields]
+            for term in reversed([t.strip() for t in order.group(1).split(',')]):
+                parts: list[str] = term.split()
+                column: int = names.index(parts[0].lower())
+                rows.sort(key=lambda r: (r[column] is None, r[column]), reverse=len(parts) > 1 and parts[1].upper() == 'DESC')
+        top: re.Match|None = re.search(r'TOP\s+(\d+)', prefix)
+        return rows[:int(top.group(1))] if top else rows
+
+    def __iter__(self) -> 'SearchCursor':
+        return self
+
+    def __next__(self) -> tuple[Any, ...]:
+        if self._position >= len(self._rows):
+            raise StopIteration
+        self._position += 1
+        return self._rows[self._position - 1]
+
+    def next(self) -> tuple[Any, ...]:
+        return self.__next__()
+
+    def reset(self) -> None:
+        self._position = 0
+
+    def __enter__(self) -> 'SearchCursor':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._position = len(self._rows)
+
+
+def _write_values(dataset: Dataset, fields: list[str], values: Any) -> dict[str, Any]:
+    written: dict[str, Any] = {}
+    for field, value in zip(fields, values):
+        key: str = field.lower()
+        if key in ['oid@', 'objectid'] or key in ['shape__area', 'shape__length', 'shape_area', 'shape_length', 'shape@area', 'shape@length']:
+            continue
+        if key in ['shape@', 'shape']:
+            written['shape'] = _shape(value) if value is not None else None
+        elif key == 'shape@xy':
+            written['shape'] = shapely.Point(*value) if value is not None else None
+        elif key == 'shape@json':
+            written['shape'] = _shape(AsShape(value, True)) if value is not None else None
+        else:
+            written[key] = value
+    return written
+
+
+class UpdateCursor(SearchCursor):
+    """ arcpy.da.UpdateCursor, rows are written to the dataset on updateRow. """
+    def __init__(self, in_table: Any, field_names: Any, where_clause: str|None = None, *args, **kwargs):
+        super().__init__(in_table, field_names, where_clause, *args, **kwargs)
+
+    def __next__(self) -> list[Any]:
+        return list(super().__next__())
+
+    def updateRow(self, row: list[Any]) -> None:
+        self._dataset.update(self._oids[self._position - 1], _write_values(self._dataset, self.fields, row))
+
+    def deleteRow(self) -> None:
+        self._dataset.delete(self._oids[self._position - 1])
+
+
+class InsertCursor:
+    """ arcpy.da.InsertCursor, a missing GlobalID is generated. """
+    def __init__(self, in_table: Any, field_names: Any, *args, **kwargs):
+        self._dataset, _ = _source(in_table)
+        self.fields: list[str] = [field_names] if isinstance(field_names, str) else list(field_names)
+        _check_fields(self._dataset, self.fields)
+
+    def insertRow(self, row: Any) -> int:
+        return self._dataset.insert(_write_values(self._dataset, self.fields, row))
+
+    def __enter__(self) -> 'InsertCursor':
+        return self
+
+    def __exit__(self, *args) -> None:
+        return None
+
+
+class Editor:
+    """ arcpy.da.Editor, edits are applied immediately so aborting an operation does not restore rows. """
+    def __init__(self, workspace: str|None = None, multiuser_mode: bool = True):
+        self.workspace: str|None = workspace
+        self.isEditing: bool = False
+
+    def startEditing(self, with_undo: bool = True, multiuser_mode: bool = True) -> None:
+        self.isEditing = True
+
+    def stopEditing(self, save_changes: bool = True) -> None:
+        self.isEditing = False
+
+    def startOperation(self) -> None:
+        return None
+
+    def stopOperation(self) -> None:
+        return None
+
+    def abortOperation(self) -> None:
+        return None
+
+    def __enter__(self) -> 'Editor':
+        self.startEditing()
+        return self
+
+    def __exit__(self, exc_type: Any, *args) -> None:
+        self.stopEditing(exc_type is None)
+
+
+def ListDomains(workspace: str|None = None) -> list[Any]:
+    return []
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Schemas and field mappings
+
+class Field:
+    """ arcpy.Field of a dataset. """
+    def __init__(self, name: str, field_type: str):
+        self.name: str = name
+        self.aliasName: str = name
+        self.type: str = field_type
+        self.length: int = 255 if field_type == 'String' else 38 if field_type in ['Guid', 'GlobalID'] else 0
+        self.editable: bool = field_type not in ['OID', 'GlobalID', 'Geometry']
+
+
+def ListFields(dataset: Any, wild_card: str|None = None, field_type: str|None = None) -> list[Field]:
+    source, _ = _source(dataset)
+    fields: list[Field] = [Field(name, source.field_type(name)) for name in source.fields]
+    if source.geometry_type:
+        fields.append(Field('Shape', 'Geometry'))
+    return [f for f in fields if (wild_card is None or fnmatch(f.name.lower(), wild_card.lower())) and field_type in [None, 'All', f.type]]
+
+
+class _Description:
+    """ The arcpy.Describe of a dataset or a layer, the properties that are not simulated are MagicMocks. """
+    def __init__(self, item: Any):
+        self.name: str = item.name if isinstance(item, Layer) else dataset_name(item)
+        self.baseName: str = dataset_name(item)
+        self.catalogPath: str = f'memory\\{dataset_name(item)}'
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return MagicMock(name=f'Describe.{name}')
+
+
+def Describe(item: Any, *args, **kwargs) -> _Description:
+    return _Description(item)
+
+
+class FieldMap:
+    """ arcpy.FieldMap, the input fields of one output field. """
+    def __init__(self):
+        self.inputs: list[tuple[Any, str]] = []
+        self.mergeRule: str = 'First'
+        self.joinDelimiter: str = ''
+        self.outputField: Field|None = None
+
+    def addInputField(self, table_dataset: Any, field_name: str, start_position: int = -1, end_position: int = -1) -> None:
+        self.inputs.append((table_dataset, field_name))
+
+    @property
+    def inputFieldCount(self) -> int:
+        return len(self.inputs)
+
+
+class FieldMappings:
+    """ arcpy.FieldMappings, the field maps given to Append. """
+    def __init__(self):
+        self.fieldMappings: list[FieldMap] = []
+
+    def addFieldMap(self, field_map: FieldMap) -> None:
+        self.fieldMappings.append(field_map)
+
+    @property
+    def fieldCount(self) -> int:
+        return len(self.fieldMappings)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Geoprocessing tools
+
+def _as_layer(item: Any) -> Layer:
+    """ A layer of a dataset path (i.e. the output of a tool), layers are returned as is. """
+    if isinstance(item, Layer):
+        return item
+    if isinstance(item, Result):
+        return _as_layer(item[0])
+    return Layer(dataset_name(item), dataset_name(item))
+
+
+def _distance(search_distance: Any) -> float:
+    if search_distance in [None, '', '#']:
+        return 0.0
+    if isinstance(search_distance, (int, float)):
+        return float(search_distance)
+    return float(str(search_distance).split()[0])
+
+
+def _selection_geometries(select_features: Any) -> list[BaseGeometry]:
+    if select_features is None:
+        return []
+    if isinstance(select_features, (list, tuple)):
+        return [g for item in select_features for g in _selection_geometries(item)]
+    if isinstance(select_features, (Geometry, Extent, BaseGeometry)):
+        return [_shape(select_features)]
+    if isinstance(select_features, Result):
+        return _selection_geometries(select_features[0])
+    layer: Layer = _as_layer(select_features)
+    rows: dict[int, dict[str, Any]] = Datasets[layer.dataset].rows
+    return [rows[oid]['shape'] for oid in layer.cursor_oids() if rows[oid].get('shape') is not None]
+
+
+def _apply_selection(layer: Layer, oids: set[int], selection_type: str) -> None:
+    current: set[int] = layer.selection or set()
+    selection_type: str = (selection_type or 'NEW_SELECTION').upper()
+    if selection_type == 'NEW_SELECTION':
+        selected: set[int] = oids
+    elif selection_type == 'ADD_TO_SELECTION':
+        selected: set[int] = current | oids
+    elif selection_type == 'REMOVE_FROM_SELECTION':
+        selected: set[int] = current - oids
+    elif selection_type == 'SUBSET_SELECTION':
+        selected: set[int] = current & oids
+    elif selection_type == 'SWITCH_SELECTION':
+        selected: set[int] = set(layer.visible_oids()) - current
+    else:
+        selected: set[int] = set()
+    layer.selection = selected or None
+
+
+def _count(layer: Layer) -> int:
+    """ GetCount of a layer: the selected rows, or all the displayed rows when nothing is selected (as in arcpy). """
+    return len(layer.selection) if layer.selection is not None else len(layer.visible_oids())
+
+
+def SelectLayerByLocation(in_layer: Any, overlap_type: str = 'INTERSECT', select_features: Any = None, search_distance: Any = None,
+                          selection_type: str = 'NEW_SELECTION', invert_spatial_relationship: str = 'NOT_INVERT') -> Result:
+    """ Spatial selection using the STRtree of the layer dataset. Outputs: layer, layer, selected count (as string). """
+    layer: Layer = _as_layer(in_layer)
+    dataset: Dataset = Datasets[layer.dataset]
+    geometries: list[BaseGeometry] = _selection_geometries(select_features)
+    distance: float = _distance(search_distance)
+    overlap: str = (overlap_type or 'INTERSECT').upper()
+
+    hits: set[int] = set()
+    if geometries:
+        tree, tree_oids = dataset.tree()
+        if overlap in ['WITHIN', 'COMPLETELY_WITHIN', 'WITHIN_CLEMENTINI']:
+            predicate: str = 'contains'
+        elif overlap in ['CONTAINS', 'COMPLETELY_CONTAINS', 'CONTAINS_CLEMENTINI']:
+            predicate: str = 'within'
+        elif overlap == 'BOUNDARY_TOUCHES':
+            predicate: str = 'touches'
+        elif overlap == 'CROSSED_BY_THE_OUTLINE_OF':
+            predicate: str = 'crosses'
+        elif distance > 0 or overlap.startswith('WITHIN_A_DISTANCE'):
+            predicate: str = 'dwithin'
+        else:
+            predicate: str = 'intersects'
+
+        if predicate == 'dwithin':
+            pairs: Any = tree.query(geometries, predicate='dwithin', distance=distance)
+        else:
+            pairs: Any = tree.query(geometries, predicate=predicate)
+
+        for source, item in zip(pairs[0], pairs[1]):
+            oid: int = tree_oids[item]
+            feature: BaseGeometry = dataset.rows[oid]['shape']
+            if overlap == 'ARE_IDENTICAL_TO' and not feature.equals(geometries[source]):
+                continue
+            if overlap == 'HAVE_THEIR_CENTER_IN' and not feature.centroid.within(geometries[source]):
+                continue
+            if overlap == 'SHARE_A_LINE_SEGMENT_WITH' and feature.boundary.intersection(geometries[source].boundary).length == 0:
+                continue
+            hits.add(oid)
+        hits: set[int] = {oid for oid in hits if layer.accepts(oid)}
+
+    if str(invert_spatial_relationship).upper() == 'INVERT':
+        hits: set[int] = set(layer.visible_oids()) - hits
+
+    _apply_selection(layer, hits, selection_type)
+    return Result([layer, layer, str(len(layer.selection or ()))])
+
+
+def SelectLayerByAttribute(in_layer_or_view: Any, selection_type: str = 'NEW_SELECTION', where_clause: str|None = None,
+                           invert_where_clause: str|None = None) -> Result:
+    layer: Layer = _as_layer(in_layer_or_view)
+    if (selection_type or '').upper() == 'CLEAR_SELECTION':
+        layer.selection = None
+        return Result([layer, layer, '0'])
+
+    dataset: Dataset = Datasets[layer.dataset]
+    if where_clause:
+        oids: set[int] = {oid for oid in matching_oids(dataset, where_clause) if layer.accepts(oid)}
+    else:
+        oids: set[int] = set(layer.visible_oids())
+    if str(invert_where_clause).upper() == 'INVERT':
+        oids: set[int] = set(layer.visible_oids()) - oids
+
+    _apply_selection(layer, oids, selection_type)
+    return Result([layer, layer, str(len(layer.selection or ()))])
+
+
+def MakeFeatureLayer(in_features: Any, out_layer: str, where_clause: str|None = None, *args, **kwargs) -> Result:
+    """ A new layer of the rows of the input (its selection if any) matching the where-clause. """
+    source: Layer = _as_layer(in_features)
+    oids: list[int] = matching_oids(Datasets[source.dataset], where_clause, source.cursor_oids()) if isinstance(in_features, Layer) \
+        else matching_oids(Datasets[source.dataset], where_clause)
+    layer: Layer = Layer(out_layer, source.dataset)
+    layer.subset = frozenset(oids)
+    return Result([layer])
+
+
+def MakeTableView(in_table: Any, out_view: str, where_clause: str|None = None, *args, **kwargs) -> Result:
+    view: Layer = MakeFeatureLayer(in_table, out_view, where_clause)[0]
+    table: Table = Table(out_view, view.dataset)
+    table.subset = view.subset
+    return Result([table])
+
+
+def GetCount(in_rows: Any) -> Result:
+    if isinstance(in_rows, Layer):
+        return Result([str(_count(in_rows))])
+    return Result([str(len(get_dataset(in_rows).rows))])
+
+
+def Exists(dataset: Any) -> bool:
+    return dataset_name(dataset) in Datasets
+
+
+# Schemas of the template feature classes copied by the QA tools
+TemplateSchemas: dict[str, tuple[list[str], str|None]] = {
+    'DeviatedAreaParcels': (['Parcel2DUniqueID', 'ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'StatedArea', 'CalculatedArea',
+                             'AbsDifference', 'NormalizedStatedArea1', 'NormalizedStatedArea2', 'MaxNormalizedStatedArea'], None),
+    'RedundantVertices': (['ReferencedLayer'], 'point')}
+
+
+def Copy(in_data: Any, out_data: str, *args, **kwargs) -> Result:
+    source: str = dataset_name(in_data)
+    target: str = dataset_name(out_data)
+    if source in Datasets:
+        copy: Dataset = create_dataset(target, list(Datasets[source].fields), Datasets[source].geometry_type)
+        for row in Datasets[source].rows.values():
+            copy.insert(dict(row))
+    else:
+        fields, geometry_type = TemplateSchemas.get(source, ([], None))
+        create_dataset(target, fields, geometry_type)
+    return Result([out_data])
+
+
+def Delete(in_data: Any, *args, **kwargs) -> Result:
+    for item in in_data if isinstance(in_data, (list, tuple)) else [in_data]:
+        Datasets.pop(dataset_name(item), None)
+    return Result([True])
+
+
+def FeatureVerticesToPoints(in_features: Any, out_feature_class: str, point_location: str = 'ALL') -> Result:
+    """ The vertices of the input features (without the closing vertex of rings) as points with ORIG_FID. """
+    layer: Layer = _as_layer(in_features)
+    rows: dict[int, dict[str, Any]] = Datasets[layer.dataset].rows
+    output: Dataset = create_dataset(dataset_name(out_feature_class), ['ORIG_FID'], 'point')
+    for oid in layer.cursor_oids():
+        g: BaseGeometry|None = rows[oid].get('shape')
+        if g is None:
+            continue
+        parts: list[BaseGeometry] = list(g.geoms) if g.geom_type.startswith('Multi') else [g]
+        for part in parts:
+            coords: list[tuple[float, ...]] = list(part.exterior.coords)[:-1] if part.geom_type == 'Polygon' else list(part.coords)
+            for c in coords:
+                output.insert({'orig_fid': oid, 'shape': shapely.Point(c)})
+    return Result([out_feature_class])
+
+
+def CalculateField(in_table: Any, field: str, expression: str, expression_type: str = 'PYTHON3', *args, **kwargs) -> Result:
+    """ Python expressions with !Field! references are evaluated on the selected (or displayed) rows. """
+    dataset, layer = _source(in_table)
+    dataset.add_field(field, _CalculateTypes.get(str(kwargs.get('field_type', '')).upper()))
+    code: Any = compile(re.sub(r'!(\w+)!', lambda m: f"r.get({m.group(1).lower()!r})", expression), '<expression>', 'eval')
+    for oid in layer.cursor_oids() if layer is not None else list(dataset.rows):
+        dataset.update(oid, {field.lower(): eval(code, {}, {'r': dataset.rows[oid]})})
+    return Result([in_table])
+
+
+def ExportFeatures(in_features: Any, out_features: str, where_clause: str|None = None, *args, **kwargs) -> Result:
+    """ Copies the displayed (or selected) rows matching the where-clause into a new dataset with the same schema. """
+    layer: Layer = _as_layer(in_features)
+    source: Dataset = Datasets[layer.dataset]
+    output: Dataset = create_dataset(dataset_name(out_features), list(source.fields), source.geometry_type)
+    output.types = {f.lower(): source.field_type(f) for f in source.fields}
+    for oid in matching_oids(source, where_clause or None, layer.cursor_oids()):
+        output.insert({k: v for k, v in source.rows[oid].items() if k != 'objectid'})
+    return Result([out_features])
+
+
+def Append(inputs: Any, target: Any, schema_type: str = 'TEST', field_mapping: Any = None, subtype: str = '', expression: str|None = None,
+           *args, **kwargs) -> Result:
+    """ Inserts the input rows into the target, by the field maps of a FieldMappings or else by the same field names. """
+    layer: Layer = _as_layer(inputs)
+    source: Dataset = Datasets[layer.dataset]
+    output, _ = _source(target)
+    for oid in matching_oids(source, expression or None, layer.cursor_oids()):
+        row: dict[str, Any] = source.rows[oid]
+        values: dict[str, Any] = {'shape': row.get('shape')} if output.geometry_type else {}
+        if isinstance(field_mapping, FieldMappings):
+            for field_map in field_mapping.fieldMappings:
+                parts: list[Any] = [row.get(field.lower()) for _, field in field_map.inputs]
+                values[field_map.outputField.name.lower()] = field_map.joinDelimiter.join(str(p) for p in parts if p is not None) \
+                    if field_map.mergeRule == 'Join' else next((p for p in parts if p is not None), None)
+        else:
+            values.update({k: v for k, v in row.items() if k in output.field_keys and k not in ['objectid', 'globalid', 'shape']})
+        output.insert(values)
+    return Result([target])
+
+
+def _no_op(*args, **kwargs) -> Result:
+    return Result([args[0] if args else None])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Installation
+
+def _module(name: str, members: dict[str, Any]) -> ModuleType:
+    """ A fake module with the given members, every other public name resolves to a MagicMock. """
+    module: ModuleType = ModuleType(name)
+    module.__dict__.update(members)
+    module.__path__ = []
+
+    def __getattr__(attribute: str) -> Any:
+        if attribute.startswith('__'):
+            raise AttributeError(attribute)
+        mock: MagicMock = MagicMock(name=f'{name}.{attribute}')
+        setattr(module, attribute, mock)
+        return mock
+
+    module.__getattr__ = __getattr__
+    return module
+
+
+def install_fake_arcpy(library: str|None = None) -> ModuleType:
+    """
+    Registers the fake arcpy modules in sys.modules (replacing any stub) together with a Utils.Configs
+    pointing the fabric workspaces at the in-memory datasets. Must run before the first import of a Utils module.
+
+    Parameters:
+        library (str, optional): The library folder of the process shelves. Default is a temporary folder.
+
+    Returns:
+        ModuleType: The fake arcpy module.
+    """
+    scripts_folder: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if scripts_folder not in sys.path:
+        sys.path.insert(0, scripts_folder)
+
+    mp: ModuleType = _module('arcpy.mp', {'ArcGISProject': ArcGISProject, 'Map': Map, 'Layer': Layer, 'Table': Table, 'Camera': Camera})
+    da: ModuleType = _module('arcpy.da', {'SearchCursor': SearchCursor, 'UpdateCursor': UpdateCursor, 'InsertCursor': InsertCursor,
+                                          'Editor': Editor, 'ListDomains': ListDomains, 'Domain': MagicMock})
+    management: ModuleType = _module('arcpy.management', {
+        'SelectLayerByLocation': SelectLayerByLocation, 'SelectLayerByAttribute': SelectLayerByAttribute, 'MakeFeatureLayer': MakeFeatureLayer,
+        'MakeTableView': MakeTableView, 'GetCount': GetCount, 'Copy': Copy, 'Delete': Delete, 'FeatureVerticesToPoints': FeatureVerticesToPoints,
+        'CalculateField': CalculateField, 'Append': Append, 'ClearWorkspaceCache': _no_op})
+    arcpy: ModuleType = _module('arcpy', {
+        'AddMessage': AddMessage, 'AddWarning': AddWarning, 'AddError': AddError, 'GetParameterAsText': GetParameterAsText,
+        'GetParameter': GetParameter, 'GetSigninToken': GetSigninToken, 'GetActivePortalURL': GetActivePortalURL, 'RefreshLayer': RefreshLayer, 'env': env, 'EnvManager': EnvManager, 'Result': Result,
+        'SpatialReference': SpatialReference, 'Point': Point, 'Array': Array, 'Geometry': Geometry, 'Polygon': Polygon, 'Polyline': Polyline,
+        'PointGeometry': PointGeometry, 'Multipoint': Multipoint, 'Extent': Extent, 'AsShape': AsShape, 'Exists': Exists,
+        'ListFields': ListFields, 'Describe': Describe, 'FieldMap': FieldMap, 'mp': mp, '_mp': mp, 'da': da, 'management': management,
+        'Field': Field, 'FieldMappings': FieldMappings})
+
+    sys.modules.update({'arcpy': arcpy, 'arcpy.mp': mp, 'arcpy._mp': mp, 'arcpy.da': da, 'arcpy.management': management})
+    tools: dict[str, dict[str, Any]] = {'conversion': {'ExportFeatures': ExportFeatures}}
+    for name in ['analysis', 'conversion', 'parcel', 'cim', 'edit', 'ddd', 'geoprocessing']:
+        sys.modules[f'arcpy.{name}'] = _module(f'arcpy.{name}', tools.get(name, {}))
+        setattr(arcpy, name, sys.modules[f'arcpy.{name}'])
+
+    library: str = library or tempfile.mkdtemp(prefix='FakeLibrary_')
+    configs: ModuleType = ModuleType('Utils.Configs')
+    configs.CNFG = MagicMock(name='CNFG', ParcelFabricDatabase='memory\\', ParcelFabricDataset='memory\\', OwnerName='CADASTER.',
+                             Library=os.path.join(library, ''), TemplatesPath='templates\\', LayerFiles='layers\\', Environment='Development',
+                             ParcelFabricFeatureServer='memory', default_version_guid='{00000000-0000-0000-0000-000000000000}')
+    sys.modules['Utils.Configs'] = configs
+
+    env.workspace = 'memory'
+    return arcpy
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import datetime as dt
+from time import perf_counter
+from importlib.util import spec_from_file_location, module_from_spec
+
+if __package__ in [None, '']:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Benchmarks.ArcpyStub import ScriptsFolder, install_arcpy_stub
+
+
+# Third party modules the tools should load only on first use (see Utils.LazyImports)
+_HeavyModules: list[str] = ['pandas', 'numpy', 'openpyxl', 'arcgis', 'requests']
+
+# Import time budget in seconds per entry point, entry points not listed get the default budget
+_DefaultBudget: float = 0.5
+_ImportBudgets: dict[str, float] = {'StartTaskNewCadaster': 1.0,
+                                    'StartTaskRetireAndCreateCadaster': 1.0,
+                                    'StartTaskRetireAndCreateCadaster3D': 1.0,
+                                    'EndTask': 1.0}
+
+
+def entry_points(folder: str = ScriptsFolder) -> dict[str, str]:
+    """
+    Returns the tools entry points: the scripts at the root of the scripts folder and in the QA folder.
+
+    Returns:
+        dict[str, str]: Entry point name as key, and the script path as value.
+    """
+    scripts: dict[str, str] = {}
+    for sub_folder in ['', 'QA']:
+        path: str = os.path.join(folder, sub_folder)
+        for file in sorted(os.listdir(path)):
+            if file.endswith('.py') and file != '__init__.py':
+                scripts[os.path.join(sub_folder, file[:-3]).replace(os.sep, '/')] = os.path.join(path, file)
+
+    return scripts
+
+
+def measure_import(script_path: str) -> dict[str, object]:
+    """
+    Imports a single entry point against the arcpy stub and measures it. Should run in a fresh interpreter (see profile_imports).
+
+    Parameters:
+        script_path (str): The path of the entry point script.
+
+    Returns:
+        dict[str, object]: 'seconds' - the import duration, 'heavy' - the heavy modules loaded at import,
+                           'error' - the import error if the import failed, otherwise None.
+    """
+    install_arcpy_stub()
+    before: set[str] = set(sys.modules)
+    error: str|None = None
+
+    start: float = perf_counter()
+    try:
+        spec = spec_from_file_location('profiled_entry_point', script_path)
+        spec.loader.exec_module(module_from_spec(spec))
+    except Exception as e:
+        error: str = f'{type(e).__name__}: {e}'
+    seconds: float = perf_counter() - start
+
+    loaded: set[str] = set(sys.modules) - before
+    heavy: list[str] = [name for name in _HeavyModules if name in loaded]
+
+    return {'seconds': round(seconds, 4), 'heavy': heavy, 'error': error}
+
+
+def profile_imports(names: list[str]|None = None) -> list[dict[str, object]]:
+    """
+    Measures the import time of the entry points, each in its own interpreter so modules cached by one do not hide the cost of the other.
+
+    Parameters:
+        names (list[str], optional): The entry points to measure. Default is all of them.
+
+    Returns:
+        list[dict[str, object]]: The measurement of every entry point, with its budget and status.
+    """
+    scripts: dict[str, str] = entry_points()
+    results: list[dict[str, object]] = []
+
+    for name in names or scripts:
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', scripts[name]],
+                               capture_output=True, text=True, cwd=ScriptsFolder)
+        try:
+            result: dict[str, object] = json.loads(child.stdout.strip().splitlines()[-1])
+        except (IndexError, json.JSONDecodeError):
+            result: dict[str, object] = {'seconds': None, 'heavy': [], 'error': child.stderr.strip().splitlines()[-1:] or 'no output'}
+
+        budget: float = _ImportBudgets.get(name, _DefaultBudget)
+        if result['error']:
+            status: str = 'error'
+        elif result['seconds'] > budget:
+            status: str = 'over'
+        else:
+            status: str = 'ok'
+        results.append({'entry_point': name, **result, 'budget': budget, 'status': status})
+
+    return results
+
+
+def report_budgets(results: list[dict[str, object]]) -> None:
+    """ Prints the import time budget report of the entry points. """
+    width: int = max(len(r['entry_point']) for r in results)
+    print(f"{'Entry point'.ljust(width)} | {'Seconds':>8} | {'Budget':>6} | Status | Heavy modules at import")
+    for r in results:
+        seconds: str = f"{r['seconds']:8.3f}" if r['seconds'] is not None else ' ' * 8
+        print(f"{r['entry_point'].ljust(width)} | {seconds} | {r['budget']:6.2f} | {r['status'].ljust(6)} | "
+              f"{', '.join(r['heavy']) or '-'}{'  ' + str(r['error']) if r['error'] else ''}")
+
+    over: list[str] = [r['entry_point'] for r in results if r['status'] != 'ok']
+    print(f"\n{len(results) - len(over)}/{len(results)} entry points within budget")
+
+
+def save_history(results: list[dict[str, object]], release: str, history_file: str) -> None:
+    """ Appends the measurements to the history file, one JSON line per entry point, so the import cost can be tracked over releases. """
+    with open(history_file, 'a', encoding='utf-8') as f:
+        for r in results:
+            f.write(json.dumps({'time': dt.datetime.now().isoformat(timespec='seconds'), 'release': release, **r}, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    """
+    Offline import time profile of the tools entry points, arcpy is stubbed so it runs in any Python 3.9+ environment:
+        python Benchmarks/ImportProfile.py [--release <tag>] [--history <file>] [entry points...]
+    """
+    if len(sys.argv) == 3 and sys.argv[1] == '--child':
+        print(json.dumps(measure_import(sys.argv[2])))
+        sys.exit(0)
+
+    args: list[str] = sys.argv[1:]
+    release: str = args[args.index('--release') + 1] if '--release' in args else 'local'
+    history: str = args[args.index('--history') + 1] if '--history' in args else os.path.join(tempfile.gettempdir(), 'CadasterBenchmarks', 'ImportProfile.jsonl')
+    names: list[str] = [a for i, a in enumerate(args) if not a.startswith('--') and (i == 0 or args[i - 1] not in ['--release', '--history'])]
+
+    results: list[dict[str, object]] = profile_imports(names or None)
+    report_budgets(results)
+    os.makedirs(os.path.dirname(os.path.abspath(history)), exist_ok=True)
+    save_history(results, release, history)
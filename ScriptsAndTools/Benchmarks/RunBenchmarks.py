@@ -0,0 +1,169 @@
+"""
+Offline benchmarks of the tools hot paths on a synthetic fabric, backed by the fake arcpy (requires shapely and numpy,
+the pandas based paths are skipped without pandas):
+    python Benchmarks/RunBenchmarks.py [--parcels 1000] [--repeat 3] [--tolerance 0.2] [--release <tag>] [--history <file>] [cases...]
+
+Every case runs on a freshly generated fabric, only the call of the tool function is timed.
+The results are appended to a JSONL history (default in the temp folder), a case slower than its baseline at the same scale
+(by more than the tolerance) is reported as a regression and the run exits with status 1. The baseline is the latest result that
+was not a regression, so a regressed run is never compared against itself in the next run.
+"""
+import os
+import sys
+import json
+import tempfile
+import statistics
+import datetime as dt
+from importlib import import_module
+from importlib.util import find_spec
+from time import perf_counter
+from typing import Any, Callable
+
+if __package__ in [None, '']:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _modify_fronts(fabric: dict[str, Any]) -> Callable[[], Any]:
+    modify_CurrentFrontsAttributes: Callable = import_module('Utils.UpdateAttributes').modify_CurrentFrontsAttributes
+    return lambda: modify_CurrentFrontsAttributes(fabric['ProcessName'])
+
+
+def _final_parcels(fabric: dict[str, Any]) -> Callable[[], Any]:
+    get_FinalParcel: Callable = import_module('Utils.Helpers').get_FinalParcel
+    return lambda: [get_FinalParcel(temp, block, sub_block) for temp, block, sub_block in fabric['process_parcels']]
+
+
+def _load_rows(append_threshold: int) -> Callable[[dict[str, Any]], Callable[[], Any]]:
+    """ Loads the process parcels with the constants of a settlement load, by the insert cursor or (threshold 0) by Append. """
+    def setup(fabric: dict[str, Any]) -> Callable[[], Any]:
+        load_rows: Callable = import_module('Utils.FieldMapping').load_rows
+        field_map: dict[str, str] = {field: field for field in ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'StatedArea', 'SHAPE@']}
+        constants: dict[str, Any] = {'CreatedByRecord': fabric['RecordGUID'], 'LandType': '1', 'CreateProcessType': '3'}
+        return lambda: load_rows('InProcessParcels2D', 'Parcels2D', field_map, f"CPBUniqueID = '{fabric['ProcessGUID']}'", constants, append_threshold)
+    return setup
+
+
+def _qa(function_name: str) -> Callable[[dict[str, Any]], Callable[[], Any]]:
+    return lambda fabric: getattr(import_module('Utils.QA'), function_name)
+
+
+# The benchmark cases: name -> (setup returning the timed call, required modules, size key of the fabric used for the throughput)
+Cases: dict[str, tuple[Callable[[dict[str, Any]], Callable[[], Any]], list[str], str]] = {
+    'modify_CurrentFrontsAttributes': (_modify_fronts, [], 'fronts'),
+    'get_FinalParcel': (_final_parcels, ['pandas'], 'parcels'),
+    'load_rows_cursor': (_load_rows(10 ** 9), [], 'process_parcels'),
+    'load_rows_append': (_load_rows(0), [], 'process_parcels'),
+    'track_deviated_parcel_areas': (_qa('track_deviated_parcel_areas'), ['pandas'], 'parcels'),
+    'track_redundant_vertices': (_qa('track_redundant_vertices'), ['pandas'], 'parcels')}
+
+# Hot paths the fake arcpy can not run, reported as skipped
+Unsupported: dict[str, str] = {'compare_and_document_version_changes': 'needs the version management service of the portal',
+                               'track_gaps_overlaps': 'parcel fabric tools are not simulated',
+                               'track_adjacent_points': 'parcel fabric tools are not simulated',
+                               'track_disconnected_points': 'parcel fabric tools are not simulated',
+                               'track_volumetric_overlaps': 'parcel fabric tools are not simulated'}
+
+
+def run_case(name: str, parcels: int, repeat: int) -> dict[str, Any]:
+    """
+    Runs a benchmark case `repeat` times, each time on a newly generated fabric.
+
+    Returns:
+        dict[str, Any]: 'case', 'parcels', 'runs' (seconds per run), 'best', 'median', 'rows_per_second' and 'status' ('ran', 'skipped' or 'error').
+    """
+    from Benchmarks.SyntheticFabric import generate_fabric
+
+    result: dict[str, Any] = {'case': name, 'parcels': parcels, 'runs': [], 'best': None, 'median': None, 'rows_per_second': None}
+    if name in Unsupported:
+        return {**result, 'status': 'skipped', 'reason': Unsupported[name]}
+
+    setup, required, size_key = Cases[name]
+    missing: list[str] = [module for module in required if find_spec(module) is None]
+    if missing:
+        return {**result, 'status': 'skipped', 'reason': f"{', '.join(missing)} not installed"}
+
+    try:
+        for _ in range(repeat):
+            fabric: dict[str, Any] = generate_fabric(parcels)
+            call: Callable[[], Any] = setup(fabric)
+            start: float = perf_counter()
+            call()
+            result['runs'].append(round(perf_counter() - start, 4))
+    except Exception as error:
+        return {**result, 'status': 'error', 'reason': f'{type(error).__name__}: {error}'}
+
+    result['best'] = min(result['runs'])
+    result['median'] = round(statistics.median(result['runs']), 4)
+    size: int = len(fabric[size_key]) if isinstance(fabric[size_key], list) else fabric[size_key]
+    result['rows_per_second'] = round(size / result['median']) if result['median'] else None
+    return {**result, 'status': 'ran'}
+
+
+def load_baselines(history_file: str, release: str|None = None) -> dict[tuple[str, int], float]:
+    """ The latest median of every (case, parcels) in the history that was not a regression, optionally of a specific release only. """
+    baselines: dict[tuple[str, int], float] = {}
+    if not os.path.exists(history_file):
+        return baselines
+
+    with open(history_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            entry: dict[str, Any] = json.loads(line)
+            if entry.get('median') is not None and entry.get('status') != 'slower' and (release is None or entry.get('release') == release):
+                baselines[(entry['case'], entry['parcels'])] = entry['median']
+    return baselines
+
+
+def compare(results: list[dict[str, Any]], baselines: dict[tuple[str, int], float], tolerance: float) -> None:
+    """ Adds the baseline and the comparison status ('ok', 'slower', 'faster' or 'new') to the cases that ran. """
+    for result in [r for r in results if r['status'] == 'ran']:
+        baseline: float|None = baselines.get((result['case'], result['parcels']))
+        result['baseline'] = baseline
+        if baseline is None:
+            result['status'] = 'new'
+        elif result['median'] > baseline * (1 + tolerance):
+            result['status'] = 'slower'
+        elif result['median'] < baseline * (1 - tolerance):
+            result['status'] = 'faster'
+        else:
+            result['status'] = 'ok'
+
+
+def report(results: list[dict[str, Any]]) -> None:
+    """ Prints the benchmark results table. """
+    width: int = max(len(r['case']) for r in results)
+    print(f"{'Case'.ljust(width)} | {'Parcels':>8} | {'Median s':>9} | {'Best s':>8} | {'Baseline':>8} | {'Rows/s':>9} | Status")
+    for r in results:
+        cells: list[str] = [f'{r[k]:.3f}' if isinstance(r.get(k), float) else '' for k in ['median', 'best', 'baseline']]
+        print(f"{r['case'].ljust(width)} | {r['parcels']:>8} | {cells[0]:>9} | {cells[1]:>8} | {cells[2]:>8} | "
+              f"{r['rows_per_second'] or '':>9} | {r['status']}{'  ' + r['reason'] if r.get('reason') else ''}")
+
+
+def save_history(results: list[dict[str, Any]], release: str, history_file: str) -> None:
+    """ Appends the cases that ran to the history file, one JSON line per case. """
+    with open(history_file, 'a', encoding='utf-8') as f:
+        for r in [r for r in results if r.get('median') is not None]:
+            f.write(json.dumps({'time': dt.datetime.now().isoformat(timespec='seconds'), 'release': release, **r}, ensure_ascii=False) + '\n')
+
+
+if __name__ == "__main__":
+    args: list[str] = sys.argv[1:]
+    options: dict[str, str] = {args[i]: args[i + 1] for i in range(len(args) - 1) if args[i].startswith('--')}
+    names: list[str] = [a for i, a in enumerate(args) if not a.startswith('--') and (i == 0 or not args[i - 1].startswith('--'))]
+
+    missing: list[str] = [module for module in ['shapely', 'numpy'] if find_spec(module) is None]
+    if missing:
+        sys.exit(f"The benchmarks require {', '.join(missing)}")
+
+    from Benchmarks.FakeArcpy import install_fake_arcpy
+    install_fake_arcpy()
+
+    history: str = options.get('--history', os.path.join(tempfile.gettempdir(), 'CadasterBenchmarks', 'Benchmarks.jsonl'))
+    os.makedirs(os.path.dirname(os.path.abspath(history)), exist_ok=True)
+    baselines: dict[tuple[str, int], float] = load_baselines(history, options.get('--baseline'))
+    results: list[dict[str, Any]] = [run_case(name, int(options.get('--parcels', 1000)), int(options.get('--repeat', 3)))
+                                     for name in names or list(Cases) + list(Unsupported)]
+
+    compare(results, baselines, float(options.get('--tolerance', 0.2)))
+    report(results)
+    save_history(results, options.get('--release', 'local'), history)
+    sys.exit(1 if any(r['status'] in ['slower', 'error'] for r in results) else 0)
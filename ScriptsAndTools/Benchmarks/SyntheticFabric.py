@@ -0,0 +1,191 @@
+"""
+A generator of a synthetic parcel fabric for the fake arcpy: a grid of square parcels grouped in square blocks,
+the fronts on the parcels edges and a border point on every grid vertex, plus an improvement process over the first parcels.
+Geometries are created with the vectorized shapely functions, 1M parcels take several GB of memory.
+"""
+import math
+from typing import Any
+
+import numpy as np
+import shapely
+
+from Benchmarks.FakeArcpy import ArcGISProject, Extent, Layer, Table, Dataset, create_dataset, reset, _guid
+
+
+# The Hebrew layer names of the fabric in the edit map: layer name -> (dataset, definition query)
+FabricLayers: dict[str, tuple[str, str|None]] = {'חלקות': ('Parcels2D', 'RetiredByRecord IS NULL'),
+                                                 'חלקות מבוטלות': ('Parcels2D', 'RetiredByRecord IS NOT NULL'),
+                                                 'גושים': ('Blocks', 'RetiredByRecord IS NULL'),
+                                                 'גושים מבוטלים': ('Blocks', 'RetiredByRecord IS NOT NULL'),
+                                                 'חזיתות': ('Parcels2DFronts', 'RetiredByRecord IS NULL'),
+                                                 'חזיתות מבוטלות': ('Parcels2DFronts', 'RetiredByRecord IS NOT NULL'),
+                                                 'נקודות גבול': ('BorderPoints', 'RetiredByRecord IS NULL'),
+                                                 'נקודות גבול מבוטלות': ('BorderPoints', 'RetiredByRecord IS NOT NULL'),
+                                                 'גבולות רישומים': ('CadasterRecordsBorders', None),
+                                                 'גבולות תהליכי קדסטר': ('CadasterProcessBorders', None)}
+
+# The process layers, their definition query is set to the generated process
+ProcessLayers: dict[str, str] = {'גבול תכנית': 'CadasterProcessBorders',
+                                 'חלקות ביסוס': 'InProcessParcels2D',
+                                 'חזיתות ביסוס': 'InProcessFronts',
+                                 'נקודות ביסוס': 'InProcessBorderPoints',
+                                 'חלקות בתהליך': 'InProcessParcels2D',
+                                 'חזיתות בתהליך': 'InProcessFronts',
+                                 'נקודות בתהליך': 'InProcessBorderPoints'}
+
+# Group layers referenced by the QA tools
+GroupLayers: list[str] = ['בקרת איכות', 'אימות נתונים']
+
+ProcessName: str = '100/2025'
+CellSize: float = 20.0
+Origin: tuple[float, float] = (180000.0, 650000.0)
+
+
+def _insert_all(dataset: Dataset, columns: dict[str, Any], count: int) -> None:
+    """ Inserts `count` rows, every column is a sequence of values (or a single value for all rows). """
+    keys: list[str] = [k.lower() for k in columns]
+    values: list[Any] = [v if isinstance(v, (list, np.ndarray)) else [v] * count for v in columns.values()]
+    for row in zip(*values):
+        dataset.insert(dict(zip(keys, [v.item() if isinstance(v, np.generic) else v for v in row])))
+
+
+def generate_fabric(parcels: int = 1000, parcels_per_block: int = 100, process_parcels: int = 100, deviated_share: float = 0.02,
+                    redundant_share: float = 0.01, unmatched_share: float = 0.02, seed: int = 0) -> dict[str, Any]:
+    """
+    Creates the synthetic fabric in the fake arcpy workspace and its layers in the fake project (the previous fabric is removed).
+
+    Parameters:
+        parcels (int): The number of parcels. Default is 1000.
+        parcels_per_block (int): The number of parcels of a full block, rounded to a square. Default is 100.
+        process_parcels (int): The number of parcels of the improvement process, taken from the first grid rows. Default is 100.
+        deviated_share (float): The share of parcels whose stated area deviates from the calculated one. Default is 0.02.
+        redundant_share (float): The share of parcels with a redundant vertex (not a border point). Default is 0.01.
+        unmatched_share (float): The share of process fronts shifted so they do not match an active front. Default is 0.02.
+        seed (int): The random seed. Default is 0.
+
+    Returns:
+        dict[str, Any]: The generated sizes and identifiers: 'parcels', 'blocks', 'fronts', 'points', 'ProcessName',
+                        'ProcessGUID', 'RecordGUID' and 'process_parcels' (the (temp number, block, sub block) of the process parcels).
+    """
+    reset()
+    rng: np.random.Generator = np.random.default_rng(seed)
+    cols: int = math.ceil(math.sqrt(parcels))
+    side: int = max(1, round(math.sqrt(parcels_per_block)))
+    blocks_per_row: int = math.ceil(cols / side)
+    x0, y0 = Origin
+
+    # Parcels
+    index: np.ndarray = np.arange(parcels)
+    col, row = index % cols, index // cols
+    xmin, ymin = x0 + col * CellSize, y0 + row * CellSize
+    boxes: np.ndarray = shapely.box(xmin, ymin, xmin + CellSize, ymin + CellSize)
+
+    redundant: np.ndarray = rng.random(parcels) < redundant_share
+    for i in np.flatnonzero(redundant):
+        x, y = xmin[i], ymin[i]
+        boxes[i] = shapely.Polygon([(x, y), (x + CellSize / 2, y), (x + CellSize, y), (x + CellSize, y + CellSize), (x, y + CellSize)])
+
+    block_index: np.ndarray = (row // side) * blocks_per_row + col // side
+    block_numbers: np.ndarray = block_index + 1000
+    parcel_numbers: np.ndarray = np.zeros(parcels, dtype=int)
+    for block in np.unique(block_index):
+        members: np.ndarray = np.flatnonzero(block_index == block)
+        parcel_numbers[members] = np.arange(1, len(members) + 1)
+
+    area: float = CellSize ** 2
+    deviated: np.ndarray = rng.random(parcels) < deviated_share
+    stated: np.ndarray = np.round(area * (1 + np.where(deviated, rng.choice([-0.2, 0.2], parcels), rng.normal(0, 0.002, parcels))), 2)
+    block_guids: dict[int, str] = {int(b): _guid(0xB, int(b)) for b in np.unique(block_index)}
+
+    parcels_ds: Dataset = create_dataset('Parcels2D', ['GlobalID', 'ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'StatedArea', 'LandType',
+                                                       'IsTax', 'BlockUniqueID', 'CreatedByRecord', 'RetiredByRecord', 'CancelProcessType',
+                                                       'CreateProcessType', 'UpdatedByRecord'], 'polygon')
+    _insert_all(parcels_ds, {'GlobalID': [_guid(0xA, int(i)) for i in index], 'ParcelNumber': parcel_numbers, 'BlockNumber': block_numbers,
+                             'SubBlockNumber': 0, 'StatedArea': stated, 'LandType': 1, 'IsTax': 0,
+                             'BlockUniqueID': [block_guids[int(b)] for b in block_index], 'Shape': list(boxes)}, parcels)
+
+    # Blocks, a box for full blocks and a union of the parcels for the partial ones
+    blocks_ds: Dataset = create_dataset('Blocks', ['GlobalID', 'BlockNumber', 'SubBlockNumber', 'Name', 'BlockStatus', 'CreatedByRecord',
+                                                   'RetiredByRecord', 'last_edited_date'], 'polygon')
+    for block, guid in block_guids.items():
+        members: np.ndarray = np.flatnonzero(block_index == block)
+        if len(members) == side * side:
+            g: Any = shapely.box(xmin[members].min(), ymin[members].min(), xmin[members].max() + CellSize, ymin[members].max() + CellSize)
+        else:
+            g: Any = shapely.union_all(shapely.box(xmin[members], ymin[members], xmin[members] + CellSize, ymin[members] + CellSize))
+        blocks_ds.insert({'globalid': guid, 'blocknumber': block + 1000, 'subblocknumber': 0, 'name': f'{block + 1000}/0', 'blockstatus': 2, 'shape': g})
+
+    # Border points on the grid vertices
+    occupied: set[tuple[int, int]] = set(zip(col.tolist(), row.tolist()))
+    vertices: list[tuple[int, int]] = sorted({(c + dc, r + dr) for c, r in occupied for dc in (0, 1) for dr in (0, 1)})
+    vertex_guids: dict[tuple[int, int], str] = {v: _guid(0xC, i) for i, v in enumerate(vertices)}
+    points_array: np.ndarray = np.array(vertices, dtype=float)
+    points_ds: Dataset = create_dataset('BorderPoints', ['GlobalID', 'Name', 'PointType', 'CreatedByRecord', 'RetiredByRecord', 'UpdatedByRecord'], 'point')
+    _insert_all(points_ds, {'GlobalID': list(vertex_guids.values()), 'Name': [f'P{i}' for i in range(len(vertices))], 'PointType': 1,
+                            'Shape': list(shapely.points(x0 + points_array[:, 0] * CellSize, y0 + points_array[:, 1] * CellSize))}, len(vertices))
+
+    # Fronts on the unique edges of the parcels
+    edges: set[tuple[tuple[int, int], tuple[int, int]]] = set()
+    for c, r in occupied:
+        edges.update({((c, r), (c + 1, r)), ((c, r), (c, r + 1)), ((c, r + 1), (c + 1, r + 1)), ((c + 1, r), (c + 1, r + 1))})
+    edges_list: list[tuple[tuple[int, int], tuple[int, int]]] = sorted(edges)
+    coords: np.ndarray = np.array([[[x0 + a[0] * CellSize, y0 + a[1] * CellSize], [x0 + b[0] * CellSize, y0 + b[1] * CellSize]] for a, b in edges_list])
+    fronts_ds: Dataset = create_dataset('Parcels2DFronts', ['GlobalID', 'Distance', 'Radius', 'LineType', 'StartPointUniqueID', 'EndPointUniqueID',
+                                                            'CreatedByRecord', 'RetiredByRecord', 'UpdatedByRecord'], 'polyline')
+    _insert_all(fronts_ds, {'GlobalID': [_guid(0xD, i) for i in range(len(edges_list))], 'Distance': CellSize, 'LineType': 1,
+                            'StartPointUniqueID': [vertex_guids[a] for a, _ in edges_list], 'EndPointUniqueID': [vertex_guids[b] for _, b in edges_list],
+                            'Shape': list(shapely.linestrings(coords))}, len(edges_list))
+
+    # The improvement process and its record
+    process_guid, record_guid = _guid(0xF, 1), _guid(0xF, 2)
+    process_count: int = min(process_parcels, parcels)
+    process_area: Any = shapely.union_all(boxes[:process_count]).envelope
+    process_ds: Dataset = create_dataset('CadasterProcessBorders', ['GlobalID', 'ProcessName', 'ProcessType', 'BlockUniqueID', 'Status'], 'polygon')
+    process_ds.insert({'globalid': process_guid, 'processname': ProcessName, 'processtype': 1, 'blockuniqueid': block_guids[int(block_index[0])],
+                       'status': 4, 'shape': process_area})
+    records_ds: Dataset = create_dataset('CadasterRecordsBorders', ['GlobalID', 'Name', 'RecordType', 'CreatedByRecord', 'RetiredByRecord'], 'polygon')
+    records_ds.insert({'globalid': record_guid, 'name': ProcessName, 'recordtype': 1, 'shape': process_area})
+
+    in_parcels: Dataset = create_dataset('InProcessParcels2D', ['GlobalID', 'CPBUniqueID', 'ParcelNumber', 'BlockNumber', 'SubBlockNumber',
+                                                                'StatedArea', 'ParcelRole'], 'polygon')
+    _insert_all(in_parcels, {'CPBUniqueID': process_guid, 'ParcelNumber': list(range(1, process_count + 1)), 'BlockNumber': block_numbers[:process_count],
+                             'SubBlockNumber': 0, 'StatedArea': stated[:process_count], 'ParcelRole': 2, 'Shape': list(boxes[:process_count])}, process_count)
+
+    in_fronts: Dataset = create_dataset('InProcessFronts', ['GlobalID', 'CPBUniqueID', 'LegalLength', 'Radius', 'LineType', 'LineStatus'], 'polyline')
+    tree: Any = shapely.STRtree(list(shapely.linestrings(coords)))
+    inside: np.ndarray = np.sort(tree.query(process_area, predicate='covers'))
+    shifted: np.ndarray = rng.random(len(inside)) < unmatched_share
+    shapes: list[Any] = [shapely.transform(tree.geometries[i], lambda c: c + 0.5) if s else tree.geometries[i] for i, s in zip(inside, shifted)]
+    _insert_all(in_fronts, {'CPBUniqueID': process_guid, 'LegalLength': CellSize + 0.01, 'LineType': 1, 'LineStatus': 1, 'Shape': shapes}, len(inside))
+
+    in_points: Dataset = create_dataset('InProcessBorderPoints', ['GlobalID', 'CPBUniqueID', 'PointName'], 'point')
+    point_shapes: list[Any] = [r['shape'] for r in points_ds.rows.values()]
+    process_points: np.ndarray = np.sort(shapely.STRtree(point_shapes).query(process_area, predicate='covers'))
+    _insert_all(in_points, {'CPBUniqueID': process_guid, 'PointName': [f'P{i}' for i in process_points],
+                            'Shape': [point_shapes[i] for i in process_points]}, len(process_points))
+
+    # Sequence actions: every process parcel is divided into a temporary parcel with a final number
+    actions: Dataset = create_dataset('SequenceActions', ['CPBUniqueID', 'FromParcelFinal', 'FromParcelTemp', 'ToParcelTemp', 'ToParcelFinal',
+                                                          'BlockNumber', 'SubBlockNumber', 'ToBlockNumber', 'ToSubBlockNumber', 'ActionType'])
+    temp_numbers: list[int] = list(range(100, 100 + process_count))
+    _insert_all(actions, {'CPBUniqueID': process_guid, 'FromParcelFinal': parcel_numbers[:process_count], 'ToParcelTemp': temp_numbers,
+                          'ToParcelFinal': list(range(500, 500 + process_count)), 'BlockNumber': block_numbers[:process_count],
+                          'SubBlockNumber': 0, 'ActionType': 1}, process_count)
+
+    # Layers and tables of the edit map
+    edit_map: Any = ArcGISProject('current').activeMap
+    for name, (dataset, query) in FabricLayers.items():
+        edit_map.layers.append(Layer(name, dataset, query))
+    for name, dataset in ProcessLayers.items():
+        field: str = 'ProcessName' if dataset == 'CadasterProcessBorders' else 'CPBUniqueID'
+        value: str = ProcessName if field == 'ProcessName' else process_guid
+        edit_map.layers.append(Layer(name, dataset, f"{field} = '{value}'"))
+    for name in GroupLayers:
+        edit_map.layers.append(Layer(name, group=True))
+    edit_map.tables.append(Table('פעולות בתכנית', 'SequenceActions', f"CPBUniqueID = '{process_guid}'"))
+
+    ArcGISProject('current').view_extent = Extent(*shapely.total_bounds(boxes))
+
+    return {'parcels': parcels, 'blocks': len(block_guids), 'fronts': len(edges_list), 'points': len(vertices),
+            'ProcessName': ProcessName, 'ProcessGUID': process_guid, 'RecordGUID': record_guid,
+            'process_parcels': [(t, int(b), 0) for t, b in zip(temp_numbers, block_numbers[:process_count])]}
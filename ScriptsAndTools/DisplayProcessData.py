@@ -1,9 +1,8 @@
 from Utils.TypeHints import *
 from Utils.Configs import CNFG
 from Utils.Validations import process_exist
-from Utils.Helpers import get_ProcessType, get_ProcessGUID, refresh_map_view, timestamp, zoom_to_aoi
+from Utils.Helpers import get_map, get_ProcessType, get_ProcessGUID, refresh_map_view, timestamp, zoom_to_aoi, in_query
 from arcpy import RefreshLayer, GetParameterAsText, AddMessage
-from arcpy.mp import ArcGISProject
 from arcpy.da import SearchCursor
 
 
@@ -15,7 +14,7 @@ def display_process_data(ProcessName: str) -> None:
         ProcessName (str): The name of the process for which data is displayed.
     """
     if process_exist(ProcessName) == 'Valid':
-        current_map: Map = ArcGISProject("current").activeMap
+        current_map: Map = get_map()
         process_type: int = get_ProcessType(ProcessName)
         process_guid: str = get_ProcessGUID(ProcessName)
         query_name: str = f'Process {ProcessName}'
@@ -72,13 +71,13 @@ def display_process_data(ProcessName: str) -> None:
 
             # Projected layers:
             projected_parcels3D: Layer = current_map.listLayers('היטלי חלקות חדשות')[0]
-            guids: str = ','.join([f"'{row[0]}'" for row in SearchCursor(current_map.listLayers('חלקות חדשות')[0], "GlobalID")])
-            new_query: dict[str, str|bool] = {'name': query_name, 'sql': f"Parcel3DUniqueID IN ({guids})", 'isActive': True}
+            guids: list[str] = [row[0] for row in SearchCursor(current_map.listLayers('חלקות חדשות')[0], "GlobalID")]
+            new_query: dict[str, str|bool] = {'name': query_name, 'sql': in_query('Parcel3DUniqueID', guids), 'isActive': True}
             projected_parcels3D.updateDefinitionQueries([new_query])
 
             projected_substractions: Layer = current_map.listLayers('היטלי גריעות חדשות')[0]
-            guids: str = ','.join([f"'{row[0]}'" for row in SearchCursor(current_map.listLayers('גריעות חדשות')[0], "GlobalID")])
-            new_query: dict[str, str|bool] = {'name': query_name, 'sql': f"SubstractionUniqueID IN ({guids})", 'isActive': True}
+            guids: list[str] = [row[0] for row in SearchCursor(current_map.listLayers('גריעות חדשות')[0], "GlobalID")]
+            new_query: dict[str, str|bool] = {'name': query_name, 'sql': in_query('SubstractionUniqueID', guids), 'isActive': True}
             projected_substractions.updateDefinitionQueries([new_query])
 
             RefreshLayer([projected_parcels3D, projected_substractions])
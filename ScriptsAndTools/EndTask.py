@@ -1,7 +1,10 @@
+from time import perf_counter
+ScriptStart = perf_counter()   # The startup latency of the tool is measured from here, before its imports (see Utils.WarmWorker.dispatch)
 from ReinitializeProject import reinitialize
 from Utils.VersionManagement import close_version
 from Utils.UpdateAttributes import set_as_recorded, update_record_status
 from Utils.Reports import compare_and_document_version_changes
+from Utils.WarmWorker import dispatch
 from Utils.Helpers import get_ActiveRecord, get_ProcessStatus, reopen_map, respond_to_CMS, get_RecordType
 from arcpy import GetParameter, GetParameterAsText, env as ENV, AddMessage
 
@@ -56,4 +59,4 @@ def EndTask(user_name: str, password: str, reinitializer: bool = False) -> None:
 
 
 if __name__ == "__main__":
-    EndTask(user_name= GetParameterAsText(0), password= GetParameterAsText(1), reinitializer= GetParameter(2))
+    dispatch('EndTask', user_name= GetParameterAsText(0), password= GetParameterAsText(1), reinitializer= GetParameter(2), started= ScriptStart, fallback= EndTask)
@@ -1,9 +1,11 @@
+from time import perf_counter
+ScriptStart = perf_counter()   # The startup latency of the tool is measured from here, before its imports (see Utils.WarmWorker.dispatch)
 from Utils.TypeHints import Literal, Optional, Extent
-from Utils.Helpers import get_LayerExtent, zoom_to_layer, get_ActiveRecord, timestamp
+from Utils.Helpers import get_display_extent, get_LayerExtent, zoom_to_layer, get_ActiveRecord, timestamp
+from Utils.WarmWorker import dispatch
 from Utils.QA import track_deviated_parcel_areas, track_adjacent_points, track_gaps_overlaps, track_disconnected_points,\
                      eval_topology_rules, eval_validation_rules, track_redundant_vertices, track_volumetric_overlaps
 from arcpy import AddMessage, env as ENV, GetParameter, GetParameterAsText
-from arcpy.mp import ArcGISProject
 
 
 def EvaluateAOI(qa_extent: Literal['Full map', 'Record', 'Current display'] = 'Full',
@@ -72,7 +74,7 @@ def EvaluateAOI(qa_extent: Literal['Full map', 'Record', 'Current display'] = 'F
             zoom_to_layer('גבול תכנית')
             ENV.extent = get_LayerExtent('גבול תכנית')
         if qa_extent == 'Current display':
-            ENV.extent = ArcGISProject("current").activeView.camera.getExtent()
+            ENV.extent = get_display_extent()
 
 
         # Evaluations:
@@ -110,7 +112,8 @@ def EvaluateAOI(qa_extent: Literal['Full map', 'Record', 'Current display'] = 'F
 
 if __name__ == "__main__":
 
-    EvaluateAOI(qa_extent= GetParameterAsText(0),
+    dispatch('EvaluateAOI',
+                qa_extent= GetParameterAsText(0),
                 validate_validation= GetParameter(1),
                 validate_topology= GetParameter(2),
                 validate_gaps_overlaps= GetParameter(3),
@@ -120,4 +123,6 @@ if __name__ == "__main__":
                 validate_disconnected_points= GetParameter(7),
                 validate_deviated_areas= GetParameter(8),
                 validate_redundant_vertices= GetParameter(9),
-                validate_volumetric_overlaps= GetParameter(10))
+                validate_volumetric_overlaps= GetParameter(10),
+                started= ScriptStart,
+                fallback= EvaluateAOI)
@@ -1,13 +1,12 @@
-from pandas import DataFrame
 from arcpy import GetParameter, GetParameterAsText, AddMessage, env as ENV
-from arcpy.mp import ArcGISProject
 from arcpy.da import SearchCursor
 from arcpy.analysis import Buffer
 from arcpy.parcel import ImportParcelFabricPoints
 from arcpy.management import MakeFeatureLayer as MakeLayer
 from Utils.Configs import CNFG
 from Utils.TypeHints import Literal, Result, Layer, df
-from Utils.Helpers import get_ActiveRecord, drop_layer, get_layer, AddTabularMessage, timestamp
+from Utils.LazyImports import load
+from Utils.Helpers import get_project, get_map, get_ActiveRecord, drop_layer, get_layer, AddTabularMessage, timestamp, in_query
 
 
 def IPFP(source_points: Layer,
@@ -86,23 +85,23 @@ def IPFP(source_points: Layer,
             else:
                 conflicts_count += 1
 
-        result_table: df = DataFrame({'Metric': 'Stats', **result_table}, index=[0])
+        result_table: df = load('pandas').DataFrame({'Metric': 'Stats', **result_table}, index=[0])
         AddTabularMessage(result_table)
 
         # When conflicts are found, a buffered layer of the conflict points will be computed and added to the active map.
         if conflicts_count > 0:
-            home_gdb: str = fr'{ArcGISProject("current").defaultGeodatabase}'
+            home_gdb: str = fr'{get_project().defaultGeodatabase}'
             conflicts_table: str = fr'{home_gdb}\ConflictsTable'
             conflicts_buffer: str = fr'{home_gdb}\Conflicts'
 
-            conflicts_oid: str = ', '.join([str(row[0]) for row in SearchCursor(conflicts_table, 'SOURCE_OID')])
+            conflicts_oid: list[int] = [row[0] for row in SearchCursor(conflicts_table, 'SOURCE_OID')]
 
             ENV.addOutputsToMap = False
-            conflicts_points: Layer = MakeLayer(source_points, 'conflicts', f"OBJECTID IN ({conflicts_oid})").getOutput(0)
+            conflicts_points: Layer = MakeLayer(source_points, 'conflicts', in_query('OBJECTID', conflicts_oid)).getOutput(0)
             Buffer(conflicts_points, conflicts_buffer, distance)
 
             ENV.addOutputsToMap = True
-            ArcGISProject("current").activeMap.addDataFromPath(fr'{CNFG.LayerFiles}Conflicts.lyrx')
+            get_map().addDataFromPath(fr'{CNFG.LayerFiles}Conflicts.lyrx')
             conflicts_layer: Layer = get_layer("קונפליקטים")
             new_connection: dict[str, str|dict[str, str]] = {'dataset': 'Conflicts',
                                                              'workspace_factory': 'File Geodatabase',
@@ -1,6 +1,6 @@
 from Utils.Helpers import get_ProcessGUID, get_RecordGUID, get_ProcessType, get_DomainValue, AddTabularMessage
+from Utils.LazyImports import load
 from arcpy import GetParameterAsText
-import pandas as pd
 
 
 def print_process_id(ProcessName: str) -> None:
@@ -10,7 +10,7 @@ def print_process_id(ProcessName: str) -> None:
                                 "מזהה תהליך": get_ProcessGUID(ProcessName, 'MAP'),
                                 "מזהה רישום": get_RecordGUID(ProcessName, 'MAP')}
 
-    df = pd.DataFrame([data])
+    df = load('pandas').DataFrame([data])
     AddTabularMessage(df)
 
 
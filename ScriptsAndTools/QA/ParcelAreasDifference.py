@@ -15,12 +15,12 @@ from arcpy.management import Delete, CreateTable, AddFields, CalculateFields
 from arcpy.conversion import TableToExcel
 
 from Utils.Helpers import cursor_length
+from Utils.LazyImports import load
 
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.worksheet.worksheet import Worksheet
-from openpyxl.workbook.workbook import Workbook
-from openpyxl.styles import Alignment
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from openpyxl.worksheet.worksheet import Worksheet
+    from openpyxl.workbook.workbook import Workbook
 
 
 TEMP_TABLE_PATH = "memory/temp_area_diff_table"
@@ -42,8 +42,9 @@ def is_valid_diff(validity):
 
 
 def __format_excel_report__(report_path: str):
-    report_file: Workbook = load_workbook(report_path)
-    report: Worksheet = report_file.active
+    # openpyxl is loaded on first use, see Utils.LazyImports
+    report_file: 'Workbook' = load('openpyxl').load_workbook(report_path)
+    report: 'Worksheet' = report_file.active
 
     report.title = "הפרשי שטחים"
     report["A1"] = "מס'"
@@ -54,9 +55,9 @@ def __format_excel_report__(report_path: str):
         for cell in row:
             cell.number_format = "#.0#"
 
-    rtl_align = Alignment(horizontal="right")
+    rtl_align = load('openpyxl.styles').Alignment(horizontal="right")
     for i in range(1, 10):
-        column_letter = get_column_letter(i)
+        column_letter = load('openpyxl.utils').get_column_letter(i)
         report.column_dimensions[column_letter].bestFit = True  # Space out columns to best fit
         report[f"{column_letter}1"].alignment = rtl_align # Align header row to be right-to-left
 
@@ -1,121 +1,264 @@
+import os
+import shutil
+from time import perf_counter, time
 from Utils.TypeHints import *
-from Utils.VersionManagement import get_VersionName
-from Utils.Helpers import deactivate_record, drop_layer, drop_dbtable, reopen_map, timestamp, get_layer, get_table
-from arcpy import AddMessage, ListFeatureClasses, ListTables, env
-from arcpy.mp import ArcGISProject
-from arcpy.management import ChangeVersion, Delete, ClearWorkspaceCache
+from Utils.Pipeline import report_timings
+from Utils.Helpers import get_project, get_map, deactivate_record, reopen_map, timestamp, same_definition_query
+from arcpy import AddMessage, AddWarning, ListFeatureClasses, ListTables, ListDatasets, env
+from arcpy.management import ChangeVersion, Delete, ClearWorkspaceCache, CreateFileGDB
+from arcpy.da import ListDomains
 
 
-def reset_definition_queries() -> None:
+def template_definition_queries() -> dict[str, list[dict[str, Any]]]:
     """
-    Reset the definition query of the current and retired cadaster layers in the ArcGIS project.
-    """
-    current_map: Map = ArcGISProject('current').activeMap
+    Returns the expected definition queries of the cadaster layers in a reinitialized project.
 
-    active_layers: list[str] = ['חלקות', 'גושים', 'חזיתות', 'נקודות גבול', 'חלקות תלת-ממדיות', 'גריעות', 'נקודות גבול תלת-ממדיות']
+    Returns:
+        dict[str, list[dict[str, Any]]]: Layer name as key, and its definition queries as value.
+    """
     current_base_query: list[dict[str, Any]] = [{'name': 'Base', 'sql': 'RetiredByRecord IS NULL', 'isActive': True}]
-    for name in active_layers:
-        layer: Layer = current_map.listLayers(name)[0]
-        layer.updateDefinitionQueries(current_base_query)
-
-    retired_layer: list[str] = ['נקודות גבול מבוטלות', 'חזיתות מבוטלות', 'חלקות מבוטלות', 'גושים מבוטלים',
-                                'נקודות גבול תלת-ממדיות מבוטלות', 'חלקות תלת-ממדיות מבוטלות', 'גריעות מבוטלות']
     retired_base_query: list[dict[str, Any]] = [{'name': 'Base', 'sql': 'RetiredByRecord IS NOT NULL', 'isActive': True}]
-    for name in retired_layer:
-        layer: Layer = current_map.listLayers(name)[0]
-        layer.updateDefinitionQueries(retired_base_query)
+    background_query: list[dict[str, Any]] = [{'name': 'Base', 'sql': 'OBJECTID <> -1', 'isActive': True}]
 
+    active_layers: list[str] = ['חלקות', 'גושים', 'חזיתות', 'נקודות גבול', 'חלקות תלת-ממדיות', 'גריעות', 'נקודות גבול תלת-ממדיות']
+    retired_layers: list[str] = ['נקודות גבול מבוטלות', 'חזיתות מבוטלות', 'חלקות מבוטלות', 'גושים מבוטלים',
+                                 'נקודות גבול תלת-ממדיות מבוטלות', 'חלקות תלת-ממדיות מבוטלות', 'גריעות מבוטלות']
     background_layers: list[str] = ['נקודות בקרה', 'היטלי חלקות תלת-ממדיות', 'היטלי גריעות']
-    query: list[dict[str, Any]] = [{'name': 'Base', 'sql': 'OBJECTID <> -1', 'isActive': True}]
-    for name in background_layers:
-        layer: Layer = current_map.listLayers(name)[0]
-        if layer:
-            layer.updateDefinitionQueries(query)
-
     qa_names: list[str] = ['קווי אימות' , 'נקודות אימות', 'שגיאות מסוג פוליגון' , 'שגיאות מסוג קו' , 'שגיאות מסוג נקודה' , 'אזורים לא חוקיים' , 'שטחי אימות']
-    for name in qa_names:
-        layer: Layer = current_map.listLayers(name)[0]
-        layer.updateDefinitionQueries(None)
 
-    AddMessage(f'{timestamp()} | ✔️ layers definition queries reset')
+    template: dict[str, list[dict[str, Any]]] = {name: current_base_query for name in active_layers}
+    template.update({name: retired_base_query for name in retired_layers})
+    template.update({name: background_query for name in background_layers})
+    template.update({name: [] for name in qa_names})
 
+    return template
 
-def drop_intermediate_layers() -> None:
+
+def template_versioned_objects() -> dict[str, str]:
     """
-    Removes layer and tables created during a task from the content panel.
+    Returns the layers and tables expected to be at the default version in a reinitialized project.
+
+    Returns:
+        dict[str, str]: Layer or table name as key, and 'layer' or 'table' as value.
     """
+    layers: list[str] = ['רישומים', 'גריעות', 'גריעות מבוטלות', 'חלקות תלת-ממדיות', 'חלקות תלת-ממדיות מבוטלות',
+                         'נקודות גבול תלת-ממדיות', 'נקודות גבול תלת-ממדיות מבוטלות', 'היטלי חלקות תלת-ממדיות', 'היטלי גריעות']
 
-    # Drop unwanted layers
-    layers: list[Layer] = [layer for layer in ArcGISProject('current').activeMap.listLayers()]
-    to_remove: list[str] = [layer.name for layer in layers
-                            if
-                            layer.name in ['נקודות סמוכות', 'חורים וחפיפות', 'קונפליקטים']
-                            or
-                            (any(substring in layer.name for substring in [' תכנית', 'תכנית ']) and layer.isGroupLayer)
-                            or
-                            (any(substring in layer.name for substring in ['גבול תכנית']))]
+    objects: dict[str, str] = {name: 'layer' for name in layers}
+    objects['טבלת אימות'] = 'table'
+    return objects
 
-    for layer in to_remove:
-        drop_layer(layer)
-        AddMessage(f"{timestamp()} | ✔️ Layer {layer} dropped")
-    del layers, to_remove
 
-    # Drop unwanted table
-    tables: list[Table] = [table for table in ArcGISProject('current').activeMap.listTables()]
-    to_remove: list[str] = [table.name for table in tables if table.name not in ['טבלת אימות', 'סדר פעולות']]
+def is_intermediate_layer(layer: Layer) -> bool:
+    """ Checks if a layer was added to the map during a task (process groups, process borders and QA outputs). """
+    return (layer.name in ['נקודות סמוכות', 'חורים וחפיפות', 'קונפליקטים']
+            or (any(substring in layer.name for substring in [' תכנית', 'תכנית ']) and layer.isGroupLayer)
+            or 'גבול תכנית' in layer.name)
 
-    for table in to_remove:
-        drop_dbtable(table)
-        AddMessage(f"{timestamp()} | ✔️ Table {table} dropped")
 
+def project_state_diff(current_map: Map) -> dict[str, Any]:
+    """
+    Compares the current state of the map with the state of a reinitialized project, listing the map layers and tables only once.
 
-def return_to_default_version() -> None:
-    """Changing the project layers back to sde.DEFAULT version if they are set on other version."""
+    Parameters:
+        current_map (Map): The map object to compare.
 
-    layers: list[str] = ['רישומים', 'גריעות', 'גריעות מבוטלות', 'חלקות תלת-ממדיות', 'חלקות תלת-ממדיות מבוטלות',
-                         'חלקות תלת-ממדיות מבוטלות', 'נקודות גבול תלת-ממדיות', 'נקודות גבול תלת-ממדיות מבוטלות',
-                         'היטלי חלקות תלת-ממדיות', 'היטלי גריעות']
-    for name in layers:
-        if get_VersionName(name, source='layer') != 'sde.DEFAULT':
-            layer: Layer = get_layer(name)
-            ChangeVersion(layer, "BRANCH", 'sde.DEFAULT', include_participating= "INCLUDE" if name == 'רישומים' else "EXCLUDE")
+    Returns:
+        dict[str, Any]: The differences:
+                        'queries' - {Layer: expected definition queries} of the layers whose queries differ,
+                        'layers' and 'tables' - the intermediate layers and tables to remove,
+                        'versions' - [(Layer|Table, name)] of the objects not at the default version.
+    """
+    layers: list[Layer] = current_map.listLayers()
+    tables: list[Table] = current_map.listTables()
+
+    # Layers nested in an intermediate group are removed with it
+    to_remove: list[Layer] = [layer for layer in layers if is_intermediate_layer(layer)]
+    removed_groups: list[str] = [layer.longName for layer in to_remove if layer.isGroupLayer]
+    to_remove: list[Layer] = [layer for layer in to_remove if not any(layer.longName.startswith(f'{group}\\') for group in removed_groups)]
+
+    template: dict[str, list[dict[str, Any]]] = template_definition_queries()
+    queries: dict[Layer, list[dict[str, Any]]] = {}
+    for layer in layers:
+        if layer.name in template and layer.supports('DEFINITIONQUERY'):
+            current: list[dict[str, Any]] = layer.listDefinitionQueries()
+            expected: list[dict[str, Any]] = template[layer.name]
+            if len(current) != len(expected) or not all(same_definition_query(c, e) for c, e in zip(current, expected)):
+                queries[layer] = expected
+
+    versioned: dict[str, str] = template_versioned_objects()
+    versions: list[tuple[Layer|Table, str]] = []
+    for obj in [layer for layer in layers if versioned.get(layer.name) == 'layer'] + [table for table in tables if versioned.get(table.name) == 'table']:
+        connection_properties: dict[str, Any] = obj.connectionProperties or {}
+        if connection_properties.get('connection_info', {}).get('version', 'sde.DEFAULT') != 'sde.DEFAULT':
+            versions.append((obj, obj.name))
+
+    diff: dict[str, Any] = {'queries': queries,
+                            'layers': to_remove,
+                            'tables': [table for table in tables if table.name not in ['טבלת אימות', 'סדר פעולות']],
+                            'versions': versions}
+
+    del layers, tables, template, versioned
+    return diff
+
+
+def reset_definition_queries(queries: dict[Layer, list[dict[str, Any]]]) -> None:
+    """
+    Reset the definition query of the current and retired cadaster layers which differ from the project template.
+
+    Parameters:
+        queries (dict[Layer, list[dict[str, Any]]]): The layers to reset and their expected definition queries (see project_state_diff).
+    """
+    for layer, expected in queries.items():
+        layer.updateDefinitionQueries([dict(q) for q in expected] or None)
+
+    AddMessage(f'{timestamp()} | ✔️ {len(queries)} layers definition queries reset')
+
+
+def drop_intermediate_layers(current_map: Map, layers: list[Layer], tables: list[Table]) -> None:
+    """
+    Removes layer and tables created during a task from the content panel.
+
+    Parameters:
+        current_map (Map): The map object holding the layers.
+        layers (list[Layer]): The layers to remove.
+        tables (list[Table]): The tables to remove.
+    """
+    for layer in layers:
+        current_map.removeLayer(layer)
+    for table in tables:
+        current_map.removeTable(table)
 
-    AddMessage(f"{timestamp()} | ✔️ Layers returned to default version")
+    if layers:
+        AddMessage(f"{timestamp()} | ✔️ Layers dropped: {', '.join(layer.name for layer in layers)}")
+    if tables:
+        AddMessage(f"{timestamp()} | ✔️ Tables dropped: {', '.join(table.name for table in tables)}")
 
-    if get_VersionName('טבלת אימות', source='table') != 'sde.DEFAULT':
-        error_table: Table = get_table('טבלת אימות')
-        ChangeVersion(error_table, "BRANCH", 'sde.DEFAULT')
-        AddMessage(f"{timestamp()} | ✔️ Error layers returned to default version")
+
+def return_to_default_version(versions: list[tuple[Layer|Table, str]]) -> None:
+    """
+    Changing the project layers back to sde.DEFAULT version if they are set on other version.
+    The records layer includes its participating layers, all the other objects are changed with a single call.
+
+    Parameters:
+        versions (list[tuple[Layer|Table, str]]): The objects not at the default version and their names (see project_state_diff).
+    """
+    records: list[Layer] = [obj for obj, name in versions if name == 'רישומים']
+    others: list[Layer|Table] = [obj for obj, name in versions if name != 'רישומים']
+
+    if records:
+        ChangeVersion(records, "BRANCH", 'sde.DEFAULT', include_participating= "INCLUDE")
+    if others:
+        ChangeVersion(others, "BRANCH", 'sde.DEFAULT', include_participating= "EXCLUDE")
+
+    AddMessage(f"{timestamp()} | ✔️ {len(versions)} layers and tables returned to default version")
 
 
 def clear_project_gdb() -> None:
-    """Deletes all tables and feature classes created during a task in the project home gdb."""
-    env.workspace = fr"{ArcGISProject('current').homeFolder}\Project.gdb"
+    """
+    Clears the tables and feature classes created during a task in the project home gdb.
+    The home gdb is swapped with a fresh copy of an empty template gdb (created once in the project home folder).
+    The items are deleted one by one instead if the gdb is locked, if it holds other items (feature datasets, rasters, domains)
+    that the swap would lose, or if the copy fails (the original gdb is restored first).
+    """
+    home_folder: str = get_project().homeFolder
+    home_gdb: str = os.path.join(home_folder, 'Project.gdb')
+    template_gdb: str = os.path.join(home_folder, 'EmptyTemplate.gdb')
+
+    remove_stale_gdbs(home_folder)
+
+    env.workspace = home_gdb
     data: list[str] = ListFeatureClasses() + ListTables()
-    if data:
+    if not data:
+        return
+
+    def delete_items() -> None:
         for item in data:
             Delete(item)
-        AddMessage(f"{timestamp()} | ✔️ Home geodatabase cleared")
+        AddMessage(f"{timestamp()} | ✔️ Home geodatabase cleared ({len(data)} items deleted)")
+
+    if ListDatasets() or ListDomains(home_gdb):
+        delete_items()
+        return
+
+    if not os.path.exists(template_gdb):
+        CreateFileGDB(home_folder, 'EmptyTemplate.gdb')
+
+    ClearWorkspaceCache(home_gdb)
+    stale_gdb: str = os.path.join(home_folder, f'Project_{int(time())}.gdb.old')
+    try:
+        os.rename(home_gdb, stale_gdb)
+    except OSError:
+        delete_items()
+        return
+
+    try:
+        shutil.copytree(template_gdb, home_gdb)
+    except OSError as error:
+        shutil.rmtree(home_gdb, ignore_errors=True)  # A partial copy
+        os.rename(stale_gdb, home_gdb)
+        AddWarning(f"{timestamp()} | ⚠️ The empty geodatabase could not be copied ({error}), the home geodatabase was restored")
+        delete_items()
+        return
+
+    AddMessage(f"{timestamp()} | ✔️ Home geodatabase cleared ({len(data)} items, swapped with an empty copy)")
+    remove_stale_gdbs(home_folder)
+
+
+def remove_stale_gdbs(home_folder: str) -> None:
+    """
+    Removes the home geodatabases swapped out by clear_project_gdb (Project_*.gdb.old) from the project home folder.
+    A geodatabase that can not be removed (i.e. still locked) is reported and left for the next reinitialization.
+    """
+    for name in [n for n in os.listdir(home_folder) if n.startswith('Project_') and n.endswith('.gdb.old')]:
+        try:
+            shutil.rmtree(os.path.join(home_folder, name))
+        except OSError as error:
+            AddWarning(f"{timestamp()} | ⚠️ The old home geodatabase {name} could not be removed ({error})")
+
+
+def refresh_project(current_map: Map) -> None:
+    """ Clears the map selection, reopens the map and clears the workspaces cache. """
+    current_map.clearSelection()
+    reopen_map()
+    ClearWorkspaceCache()
 
 
 def reinitialize() -> None:
     """
     Reinitialize the project by:
+    - Comparing the project state with the template state, only the differences are handled
     - Resetting definition queries
     - Removing layers and tables created during a task
     - Returning layer versions to default.
-    - Deleting any table of feature class created during a task.
+    - Swapping the home gdb with an empty one.
     - Finally, reopens the map object.
+    The duration of each phase is reported.
     """
     AddMessage(f'\n ⭕ Reinitializing project')
-    reset_definition_queries()
-    deactivate_record()
-    drop_intermediate_layers()
-    return_to_default_version()
-    clear_project_gdb()
-    ArcGISProject('current').activeMap.clearSelection()
-    reopen_map()
-    ClearWorkspaceCache()
+    current_map: Map = get_map()
+    timings: list[tuple[str, str, float]] = []
+
+    start: float = perf_counter()
+    diff: dict[str, Any] = project_state_diff(current_map)
+    timings.append(('state diff', 'ran', perf_counter() - start))
+
+    phases: list[tuple[str, bool, Callable[[], None]]] = [
+        ('definition queries', bool(diff['queries']), lambda: reset_definition_queries(diff['queries'])),
+        ('active record', True, deactivate_record),
+        ('intermediate layers', bool(diff['layers'] or diff['tables']), lambda: drop_intermediate_layers(current_map, diff['layers'], diff['tables'])),
+        ('versions', bool(diff['versions']), lambda: return_to_default_version(diff['versions'])),
+        ('home gdb', True, clear_project_gdb),
+        ('map', True, lambda: refresh_project(current_map))]
+
+    for name, needed, phase in phases:
+        start: float = perf_counter()
+        if needed:
+            phase()
+        timings.append((name, 'ran' if needed else 'skipped', perf_counter() - start))
+
+    report_timings('Reinitialize', timings)
+    del current_map, diff, phases, timings
 
 
 if __name__ == "__main__":
@@ -1,14 +1,13 @@
 from Utils.Configs import CNFG
-from Utils.Helpers import get_RecordGUID, start_editing, stop_editing, timestamp, reopen_map,get_layer, get_ActiveRecord, Type2CancelType,get_ProcessType
-from Utils.NewCadasterHelpers import get_ProcessName, update_blocks_geometry_by_active_parcels, is_tax_process, is_settled_block_by_process, \
-    get_RecordGUID_NewCadaster,get_parcel_parameters_by_guid,get_block_parameters_by_guid, clear_map_selections
+from Utils.Helpers import get_RecordGUID, edit_session, bulk_update, chunked_in_clauses, timestamp, reopen_map,get_layer, get_ActiveRecord, Type2CancelType,get_ProcessType
+from Utils.NewCadasterHelpers import get_ProcessName, is_tax_process, is_settled_block_by_process, get_RecordGUID_NewCadaster, clear_map_selections
 from Utils.ValidationsNewCadaster import layer_exists
+from Utils.GeometryUnion import union_by_group
 from arcpy.mp import ArcGISProject
 from arcpy import AddMessage, AddError, GetParameterAsText, AddWarning
-from arcpy.da import SearchCursor, UpdateCursor
-from arcpy.management import SelectLayerByAttribute, SelectLayerByLocation, Dissolve, GetCount, CalculateField
-from typing import Literal
-from collections import Counter
+from arcpy.da import SearchCursor
+from arcpy.management import SelectLayerByAttribute, SelectLayerByLocation
+from typing import Literal, Any
 
 def get_number_of_selections(LayerName:str) -> int:
     """
@@ -30,254 +29,247 @@ def get_number_of_selections(LayerName:str) -> int:
         return 0
 
 
-def RetireSelectedFeatures(ProcessName:str, used_layer: Literal['PARCELS','BLOCKS'] = 'PARCELS') -> None:
+def select_by_ids(layer, ids:list) -> None:
+    """
+    Selects the features of a layer by their GlobalIDs, the IN clause is split into chunks for long lists.
+    """
+    SelectLayerByAttribute(layer, "CLEAR_SELECTION")
+    for clause in chunked_in_clauses('GlobalID', ids):
+        SelectLayerByAttribute(layer, "ADD_TO_SELECTION", clause)
+
+
+def read_selected_ids(layer) -> list[str]:
+    """
+    Returns the GlobalIDs of the selected features of a layer.
+    """
+    with SearchCursor(layer, 'GlobalID') as cursor:
+        return [row[0] for row in cursor]
+
+
+def plan_retirement(ProcessName:str, Record_GUID:str, used_layer: Literal['PARCELS','BLOCKS'] = 'PARCELS', parcel_ids:set[str]|None = None) -> dict[str, Any]|None:
+    """
+    Builds the retirement plan of the selected non-settled features without editing any data.
+    The parcel to block membership is read once, blocks whose active parcels are all retired are retired
+    and the rest of the affected blocks get their geometry updated.
+
+    Parameters:
+    ProcessName (str): The name of the retiring record.
+    Record_GUID (str): The GlobalID of the retiring record.
+    used_layer (str): 'PARCELS' to retire the selected parcels, 'BLOCKS' to retire the selected blocks and their parcels.
+    parcel_ids (set[str], optional): The GlobalIDs of unsettled parcels already filtered for retirement (i.e. by find_within_tax_parcels),
+                                     used instead of the map selection.
+
+    Returns:
+    dict: 'parcels' - {GlobalID: (ParcelNumber, BlockNumber, SubBlockNumber, IsTax)} of the parcels to retire,
+          'blocks_to_retire' and 'blocks_to_update' - {GlobalID: (BlockNumber, SubBlockNumber, IsTax, RetiredByRecord)},
+          'fronts' and 'points' - the GlobalIDs of the fronts and points to retire.
+          None if nothing was selected for retirement.
+    """
+
+    non_settled_parcels = get_layer('חלקות לא מוסדרות')
+    non_settled_blocks = get_layer('גושים לא מוסדרים')
+    selected_layer, layer_name, features_type = (non_settled_parcels, 'חלקות לא מוסדרות', 'parcels') if used_layer == "PARCELS" else (non_settled_blocks, 'גושים לא מוסדרים', 'blocks')
+
+    if parcel_ids is not None:
+        used_layer = "PARCELS"
+        selected_ids = list(parcel_ids)
+        if not selected_ids:
+            return None
+    else:
+        # ensuring only non-settled features are selected for retirement, excluding those created by the current record
+        # to prevent user from removing definition query from the layer and retiring settled features by mistake
+        SelectLayerByAttribute(selected_layer,selection_type="SUBSET_SELECTION",where_clause=f"LandType = 2 AND CreatedByRecord <> '{Record_GUID}'")
+        num_of_selected = get_number_of_selections(layer_name)
+        if num_of_selected == 0:
+            return None
+
+        AddMessage(f'{timestamp()} | {num_of_selected} unsettled {features_type} were selected for retirement')
+        if not is_settled_block_by_process(ProcessName):
+            SelectLayerByAttribute(selected_layer,selection_type="SUBSET_SELECTION",where_clause="IsTax = 1")
+            new_num_of_selected = get_number_of_selections(layer_name)
+            if new_num_of_selected != num_of_selected:
+                AddMessage(f'{timestamp()} | The process {ProcessName} contains unsettled non-tax parcels and can retire only tax features:')
+                AddMessage(f'{timestamp()} | {num_of_selected-new_num_of_selected} {features_type} were removed from the selection')
+                if new_num_of_selected == 0:
+                    AddMessage(f'{timestamp()} | No selected {features_type} remained for retirement, skipping retirement process.')
+                    return None
+
+        selected_ids = read_selected_ids(selected_layer)
+    SelectLayerByAttribute(non_settled_parcels, "CLEAR_SELECTION")
+    SelectLayerByAttribute(non_settled_blocks, "CLEAR_SELECTION")
+
+    # read the parcels to retire and the membership of the affected blocks once
+    parcel_fields = ["GlobalID","BlockUniqueID","ParcelNumber","BlockNumber","SubBlockNumber","IsTax"]
+    parcels = {}
+    if used_layer == "PARCELS":
+        for clause in chunked_in_clauses('GlobalID', selected_ids):
+            with SearchCursor(non_settled_parcels, parcel_fields, clause) as cursor:
+                for guid, block_id, *parameters in cursor:
+                    parcels[guid] = (block_id, tuple(parameters))
+        if parcel_ids is not None and not is_settled_block_by_process(ProcessName):
+            # the same tax-only rule the selection path applies, checked on the IsTax value read above
+            non_tax = [guid for guid, (_, parameters) in parcels.items() if parameters[-1] != 1]
+            if non_tax:
+                AddMessage(f'{timestamp()} | The process {ProcessName} contains unsettled non-tax parcels and can retire only tax features:')
+                AddMessage(f'{timestamp()} | {len(non_tax)} parcels were removed from the retirement')
+                for guid in non_tax:
+                    del parcels[guid]
+            if not parcels:
+                AddMessage(f'{timestamp()} | No parcels remained for retirement, skipping retirement process.')
+                return None
+        affected_blocks = {block_id for block_id, _ in parcels.values()}
+    else:
+        affected_blocks = set(selected_ids)
+
+    block_members = {block_id: set() for block_id in affected_blocks}
+    for clause in chunked_in_clauses('BlockUniqueID', list(affected_blocks)):
+        with SearchCursor(non_settled_parcels, parcel_fields, clause) as cursor:
+            for guid, block_id, *parameters in cursor:
+                block_members[block_id].add(guid)
+                if used_layer == "BLOCKS":
+                    parcels[guid] = (block_id, tuple(parameters))
+
+    if used_layer == "PARCELS":
+        blocks_to_retire = {block_id for block_id, members in block_members.items() if members <= set(parcels)}
+    else:
+        blocks_to_retire = affected_blocks
+
+    blocks = {}
+    for clause in chunked_in_clauses('GlobalID', list(affected_blocks)):
+        with SearchCursor(get_layer('גושים'), ["GlobalID","BlockNumber","SubBlockNumber","IsTax","RetiredByRecord"], clause) as cursor:
+            for guid, *parameters in cursor:
+                blocks[guid] = tuple(parameters)
+
+    # fronts and points of the retired parcels, excluding the ones created by the record
+    # (an empty selection makes the location tools use all the features, so the step is guarded)
+    fronts = get_layer('חזיתות')
+    border_points = get_layer('נקודות גבול')
+    fronts_ids, points_ids = [], []
+    if parcels:
+        select_by_ids(non_settled_parcels, list(parcels))
+        SelectLayerByLocation(in_layer=fronts,overlap_type="SHARE_A_LINE_SEGMENT_WITH",select_features=non_settled_parcels,selection_type="NEW_SELECTION")
+        SelectLayerByAttribute(fronts,selection_type="REMOVE_FROM_SELECTION",where_clause=f"CreatedByRecord = '{Record_GUID}'")
+        SelectLayerByLocation(in_layer=border_points,overlap_type="BOUNDARY_TOUCHES",select_features=non_settled_parcels,selection_type="NEW_SELECTION")
+        SelectLayerByAttribute(border_points,selection_type="REMOVE_FROM_SELECTION",where_clause=f"CreatedByRecord = '{Record_GUID}'")
+
+        fronts_ids = read_selected_ids(fronts) if get_number_of_selections('חזיתות') > 0 else []
+        points_ids = read_selected_ids(border_points) if get_number_of_selections('נקודות גבול') > 0 else []
+
+    plan = {'parcels': {guid: parameters for guid, (_, parameters) in parcels.items()},
+            'blocks_to_retire': {guid: blocks[guid] for guid in blocks_to_retire if guid in blocks},
+            'blocks_to_update': {guid: blocks[guid] for guid in affected_blocks - blocks_to_retire if guid in blocks},
+            'fronts': fronts_ids,
+            'points': points_ids}
+
+    for layer in [non_settled_parcels, fronts, border_points]:
+        SelectLayerByAttribute(layer, "CLEAR_SELECTION")
+
+    del [non_settled_parcels, non_settled_blocks, selected_layer, fronts, border_points, parcels, block_members, blocks]
+    return plan
+
+
+def report_retirement_plan(plan: dict[str, Any], ProcessName:str, dry_run:bool = False) -> None:
+    """
+    Prints the retirement plan, with dry_run=True the messages state that no changes were made.
+    """
+    verb = 'would be' if dry_run else 'were'
+
+    if plan['parcels']:
+        AddMessage(f'{timestamp()} | {len(plan["parcels"])} non-settled parcels {verb} retired by the process {ProcessName}:')
+        for parcel, block, sub_block, is_tax in sorted(plan['parcels'].values(), key=lambda x: (x[1], x[2], x[0])):
+            AddMessage(f"            {parcel}/{block}/{sub_block}{('', ' (Tax)')[is_tax]}")
+    else:
+        AddMessage(f'{timestamp()} | No parcels were found for retirement.')
+
+    if plan['blocks_to_retire']:
+        AddMessage(f'{timestamp()} | {len(plan["blocks_to_retire"])} non-settled blocks {verb} retired by the process {ProcessName}:')
+        for block, sub_block, is_tax, _ in sorted(plan['blocks_to_retire'].values(), key=lambda x: (x[0], x[1])):
+            AddMessage(f"            {block}/{sub_block}{('', ' (Tax)')[is_tax]}")
+    else:
+        AddMessage(f'{timestamp()} | No blocks were found for retirement.')
+
+    if dry_run:
+        for block, sub_block, is_tax, _ in sorted(plan['blocks_to_update'].values(), key=lambda x: (x[0], x[1])):
+            AddMessage(f'{timestamp()} | Geometry would be updated for block {block}/{sub_block}{("", " (Tax)")[is_tax]}')
+
+    AddMessage(f'{timestamp()} | ✴️ {len(plan["fronts"])} fronts {verb} retired by the process {ProcessName}')
+    AddMessage(f'{timestamp()} | ✴️ {len(plan["points"])} points {verb} retired by the process {ProcessName}')
+
+    if dry_run:
+        AddMessage(f'{timestamp()} | Dry run, no changes were made.')
+
+
+def apply_retirement_plan(plan: dict[str, Any], ProcessName:str, Record_GUID:str) -> None:
+    """
+    Applies a retirement plan in one edit session: the parcels, blocks, fronts and points are retired with bulk
+    updates, and the geometry of the partially retired blocks is rebuilt from their remaining active parcels.
+    """
+
+    cancel_type = Type2CancelType(get_ProcessType(ProcessName))
+    blocks_layer = get_layer('גושים')
+
+    with edit_session(CNFG.ParcelFabricDatabase):
+        bulk_update(get_layer('חלקות לא מוסדרות'), "GlobalID", {guid: {"RetiredByRecord": Record_GUID, "CancelProcessType": cancel_type} for guid in plan['parcels']})
+        bulk_update(blocks_layer, "GlobalID", {guid: {"RetiredByRecord": Record_GUID} for guid in plan['blocks_to_retire']})
+        bulk_update(get_layer('חזיתות'), "GlobalID", {guid: {"RetiredByRecord": Record_GUID} for guid in plan['fronts']})
+        bulk_update(get_layer('נקודות גבול'), "GlobalID", {guid: {"RetiredByRecord": Record_GUID} for guid in plan['points']})
+
+        # the remaining active parcels of every partially retired block, unioned in memory
+        geometries = union_by_group([(get_layer('חלקות'), "RetiredByRecord IS NULL")], 'BlockUniqueID', list(plan['blocks_to_update']))
+        block_updates = {}
+        for guid, geometry in geometries.items():
+            already_retired = plan['blocks_to_update'][guid][3]
+            if geometry:
+                block_updates[guid] = {"SHAPE@": geometry}
+            elif not already_retired:
+                block_updates[guid] = {"RetiredByRecord": Record_GUID}
+        bulk_update(blocks_layer, "GlobalID", block_updates)
+
+    report_retirement_plan(plan, ProcessName)
+
+    for guid, (block, sub_block, is_tax, already_retired) in plan['blocks_to_update'].items():
+        block_name = f"{block}/{sub_block}{('', ' (Tax)')[is_tax]}"
+        if "SHAPE@" in block_updates.get(guid, {}):
+            AddMessage(f'{timestamp()} | Geometry updated for block {block_name}')
+        elif guid in block_updates:
+            AddMessage(f'{timestamp()} | No active parcels found for block {block_name}, the block was still active and hence retired by record {Record_GUID}')
+        else:
+            AddWarning(f'{timestamp()} | Block {block_name} was already retired while some of its parcels were active or doesn\'t exist, please review data integrity.')
+
+    reopen_map()
+    del [blocks_layer, geometries, block_updates]
+
+
+def RetireSelectedFeatures(ProcessName:str, used_layer: Literal['PARCELS','BLOCKS'] = 'PARCELS', dry_run:bool = False, parcel_ids:set[str]|None = None) -> dict[str, Any]|None:
     """
     Retires selected non-settled features and its related fronts and points, the RetiredByProcess field is set to the record with the name ProcessName
     Parameters:
     ProcessName (str): The name of the retiring record.
+    used_layer (str): 'PARCELS' or 'BLOCKS', the layer the features were selected in.
+    dry_run (bool): True to only report the retirement plan without editing any data.
+    parcel_ids (set[str], optional): The GlobalIDs of the parcels to retire, used instead of the map selection.
 
     Returns:
-    None
+    dict: The retirement plan (see plan_retirement), None if nothing was retired.
     """
 
     if is_tax_process(ProcessName):
         AddMessage(f'{timestamp()} | The process {ProcessName} is a tax process, retirement of features is not allowed.')
 
     Record_GUID = get_RecordGUID_NewCadaster(ProcessName)
+    plan = None
 
     if not Record_GUID:
         AddMessage(f'{timestamp()} | ⚠️ No Record GUID found for process {ProcessName}, skipping retirement.')
     else:
         if layer_exists('גושים לא מוסדרים') and layer_exists('חלקות לא מוסדרות'):
-            block_ids_for_geometry_update = []
-            block_ids_for_retirement = []
-            parcel_ids_for_retirement = []
-            used_block_ids_in_parcels_layer = []
-            num_of_selected_parcels = 0
-            num_of_selected_blocks = 0
-            if used_layer == "PARCELS":
-                parcels_for_retirement = get_layer('חלקות לא מוסדרות')
-                # ensuring only non-settled parcels are selected for retirement, excluding those created by the current record
-                # to prevent user from removing definition query from the layer and retiring settled parcels by mistake
-                SelectLayerByAttribute(parcels_for_retirement,selection_type="SUBSET_SELECTION",where_clause=f"LandType = 2 AND CreatedByRecord <> '{Record_GUID}'")
-                num_of_selected_parcels = get_number_of_selections('חלקות לא מוסדרות')
-
-                if num_of_selected_parcels > 0:
-                    AddMessage(f'{timestamp()} | {num_of_selected_parcels} unsettled parcels were selected for retirement')
-                    if not is_settled_block_by_process(ProcessName):
-                        SelectLayerByAttribute(parcels_for_retirement,selection_type="SUBSET_SELECTION",where_clause="IsTax = 1")
-                        new_num_of_selected_parcels = get_number_of_selections('חלקות לא מוסדרות')
-                        if new_num_of_selected_parcels != num_of_selected_parcels:
-                            AddMessage(f'{timestamp()} | The process {ProcessName} contains unsettled non-tax parcels and can retire only tax features:')
-                            AddMessage(f'{timestamp()} | {num_of_selected_parcels-new_num_of_selected_parcels} parcels were removed from the selection')
-                            if new_num_of_selected_parcels == 0:
-                                AddMessage(f'{timestamp()} | No selected parcels remained for retirement, skipping retirement process.')
-                                return
-
-                    parcel_ids_for_retirement = [row[0] for row in SearchCursor(parcels_for_retirement, 'GlobalID')]
-                    parcel_ids_for_retirement_str = ",".join(f"'{uniqueID}'" for uniqueID in parcel_ids_for_retirement)
-                    used_block_ids_in_parcels_layer = [row[0] for row in SearchCursor(parcels_for_retirement, 'BlockUniqueID')]
-                    hist = dict(Counter(used_block_ids_in_parcels_layer))
-
-                    for block_id in hist.keys():
-                        temp_parcels_layer = SelectLayerByAttribute(parcels_for_retirement, "NEW_SELECTION", f"BlockUniqueID = '{block_id}'")
-                        count = get_number_of_selections('חלקות לא מוסדרות')
-                        if get_number_of_selections('חלקות לא מוסדרות') == hist[block_id]:
-                            block_ids_for_retirement.append(block_id)
-                        else:
-                            block_ids_for_geometry_update.append(block_id)
-
-                    block_ids_for_retirement_str = ",".join(f"'{uniqueID}'" for uniqueID in block_ids_for_retirement) 
-                    parcels_for_retirement = SelectLayerByAttribute(parcels_for_retirement, "NEW_SELECTION", f"GlobalID IN ({parcel_ids_for_retirement_str})")
-
-            else: # BLOCKS
-                blocks_for_retirement = get_layer('גושים לא מוסדרים')
-                # ensuring only non-settled blocks are selected for retirement, excluding those created by the current record
-                # to prevent user from removing definition query from the layer and retiring settled blocks by mistake
-                SelectLayerByAttribute(blocks_for_retirement,selection_type="SUBSET_SELECTION",where_clause=f"LandType = 2 AND CreatedByRecord <> '{Record_GUID}'")
-                num_of_selected_blocks = get_number_of_selections('גושים לא מוסדרים')
-
-                if num_of_selected_blocks > 0:
-                    
-                    AddMessage(f'{timestamp()} | {num_of_selected_blocks} unsettled blocks were selected for retirement')
-                    if not is_settled_block_by_process(ProcessName):
-                        SelectLayerByAttribute(blocks_for_retirement,selection_type="SUBSET_SELECTION",where_clause="IsTax = 1")
-                        new_num_of_selected_blocks = get_number_of_selections('גושים לא מוסדרים')
-                        if new_num_of_selected_blocks != num_of_selected_blocks:
-                            AddMessage(f'{timestamp()} | The process {ProcessName} contains unsettled non-tax parcels and can retire only tax features:')
-                            AddMessage(f'{timestamp()} | {num_of_selected_blocks-new_num_of_selected_blocks} blocks were removed from the selection')
-                            if new_num_of_selected_blocks == 0:
-                                AddMessage(f'{timestamp()} | No selected blocks remained for retirement, skipping retirement process.')
-                                return
-
-
-                    non_settled_parcels = get_layer('חלקות לא מוסדרות')
-
-                    block_ids_for_retirement = [row[0] for row in SearchCursor(blocks_for_retirement, 'GlobalID')]
-                    block_ids_for_retirement_str = ",".join(f"'{uniqueID}'" for uniqueID in block_ids_for_retirement)
-                    parcels_for_retirement = SelectLayerByAttribute(non_settled_parcels, "NEW_SELECTION", f"BlockUniqueID IN ({block_ids_for_retirement_str})")
-                    parcel_ids_for_retirement = [row[0] for row in SearchCursor(parcels_for_retirement, 'GlobalID')]
-                    parcel_ids_for_retirement_str = ",".join(f"'{uniqueID}'" for uniqueID in parcel_ids_for_retirement)
-
-
-            if num_of_selected_parcels > 0 or num_of_selected_blocks > 0:
-                #dissolved_parcels = Dissolve(in_features=parcels_for_retirement,dissolve_field=None,statistics_fields=None,multi_part="MULTI_PART",unsplit_lines="UNSPLIT_LINES",concatenation_separator="")
-                fronts = get_layer('חזיתות')
-                border_points = get_layer('נקודות גבול')
-
-                fronts_for_retirement = SelectLayerByLocation(in_layer=fronts,overlap_type="SHARE_A_LINE_SEGMENT_WITH",select_features=parcels_for_retirement,
-                                            search_distance=None,selection_type="NEW_SELECTION",invert_spatial_relationship="NOT_INVERT")
-                #fronts_for_retirement = SelectLayerByLocation(in_layer=fronts_for_retirement,overlap_type="SHARE_A_LINE_SEGMENT_WITH",select_features=dissolved_parcels,
-                #                            search_distance=None,selection_type="REMOVE_FROM_SELECTION",invert_spatial_relationship="NOT_INVERT")          
-                fronts_for_retirement = SelectLayerByAttribute(in_layer_or_view=fronts_for_retirement,selection_type="REMOVE_FROM_SELECTION",
-                                            where_clause=f"CreatedByRecord = '{Record_GUID}'",invert_where_clause=None)
-
-                points_for_retirement = SelectLayerByLocation(in_layer=border_points, overlap_type="BOUNDARY_TOUCHES", select_features=parcels_for_retirement,
-                                            search_distance=None, selection_type="NEW_SELECTION", invert_spatial_relationship="NOT_INVERT")
-                #points_for_retirement = SelectLayerByLocation(in_layer=points_for_retirement, overlap_type="BOUNDARY_TOUCHES", select_features=dissolved_parcels,
-                #                            search_distance=None, selection_type="REMOVE_FROM_SELECTION", invert_spatial_relationship="NOT_INVERT")
-                points_for_retirement = SelectLayerByAttribute(in_layer_or_view=points_for_retirement,selection_type="REMOVE_FROM_SELECTION",
-                                            where_clause=f"CreatedByRecord = '{Record_GUID}'",invert_where_clause=None)
-
-                num_of_parcels = len(parcel_ids_for_retirement)
-                num_of_blocks = len(block_ids_for_retirement)
-
-
-
-                reopen_map()
-                if num_of_parcels > 0:
-                    parcels_list = []
-                    cancel_type = Type2CancelType(get_ProcessType(ProcessName))
-                    editor = start_editing(CNFG.ParcelFabricDatabase)
-                    with UpdateCursor(parcels_for_retirement, ["GlobalID","RetiredByRecord","CancelProcessType","ParcelNumber","BlockNumber","SubBlockNumber","IsTax"],where_clause=f"GlobalID IN ({parcel_ids_for_retirement_str})") as cursor:
-                        for row in cursor: 
-                            #parcel_parameters = get_parcel_parameters_by_guid(row[0])
-                            parcel_parameters = (row[3],row[4],row[5],row[6])  #ParcelNumber, BlockNumber, SubBlockNumber, IsTax
-                            
-
-                            parcels_list.append(parcel_parameters)
-                            row[1] = Record_GUID
-                            row[2] = cancel_type
-                            cursor.updateRow(row)
-                    stop_editing(editor)
-
-                    parcels_list.sort(key=lambda x: (x[1], x[2], x[0]))
-                    AddMessage(f'{timestamp()} | {num_of_parcels} non-settled parcels were retired by the process {ProcessName}:')
-                    for parcel, block,sub_block,is_tax in parcels_list:
-                        tax_addition = ("", " (Tax)")[is_tax]
-                        AddMessage(f"            {parcel}/{block}/{sub_block}{tax_addition}")
-                    del parcels_list
-                else:
-                    AddMessage(f'{timestamp()} | No parcels were found for retirement.')
-
-                reopen_map()
-
-                if num_of_blocks > 0:
-                    blocks_list = []
-                    editor = start_editing(CNFG.ParcelFabricDatabase)
-                    with UpdateCursor(blocks_for_retirement, ["GlobalID","RetiredByRecord","BlockNumber","SubBlockNumber","IsTax"],where_clause=f"GlobalID IN ({block_ids_for_retirement_str})") as cursor:
-                        for row in cursor:
-                            block_parameters = (row[2],row[3],row[4])  #BlockNumber, SubBlockNumber, IsTax
-                            blocks_list.append(block_parameters)
-                            row[1] = Record_GUID
-                            cursor.updateRow(row)
-                    stop_editing(editor)
-                            
-                    blocks_list.sort(key=lambda x: (x[0], x[1]))
-                    AddMessage(f'{timestamp()} | {num_of_blocks} non-settled blocks were retired by the process {ProcessName}:')
-                    for block,sub_block,is_tax in blocks_list:
-                        tax_addition = ("", " (Tax)")[is_tax]
-                        AddMessage(f"            {block}/{sub_block}{tax_addition}")
-
-                    del blocks_list
-                else:
-                    AddMessage(f'{timestamp()} | No blocks were found for retirement.')
-                
-
-                if block_ids_for_geometry_update:
-                    for block_id in block_ids_for_geometry_update:
-                        
-                        update_status = update_blocks_geometry_by_active_parcels(block_id,Record_GUID)
-                        block_parameters = get_block_parameters_by_guid(block_id)
-                        tax_addition = ("", " (Tax)")[block_parameters[2]]
-                        block_name = f"{block_parameters[0]}/{block_parameters[1]}{tax_addition}"
-                        if update_status==1:
-                            AddMessage(f'{timestamp()} | Geometry updated for block {block_name}')
-                        elif update_status==2:
-                            AddMessage(f'{timestamp()} | No active parcels found for block {block_name}, the block was still active and hence retired by record {Record_GUID}')
-                        elif update_status==0:
-                            AddWarning(f'{timestamp()} | Block {block_name} was already retired while some of its parcels were active or doesn\'t exist, please review data integrity.')
-                        else:
-                            AddError(f'{timestamp()} | An error occurred while updating geometry for block {block_name}')
-
-                non_settled_parcels = get_layer('חלקות לא מוסדרות')
-                SelectLayerByAttribute(non_settled_parcels,selection_type="CLEAR_SELECTION")
-                non_settled_parcels = SelectLayerByAttribute(in_layer_or_view=non_settled_parcels,selection_type="NEW_SELECTION",
-                                            where_clause=f"GlobalID NOT IN ({parcel_ids_for_retirement_str})",invert_where_clause=None)
-                fronts_for_retirement = SelectLayerByLocation(in_layer=fronts_for_retirement,overlap_type="SHARE_A_LINE_SEGMENT_WITH",select_features=non_settled_parcels,
-                                            search_distance=None,selection_type="REMOVE_FROM_SELECTION",invert_spatial_relationship="NOT_INVERT")
-                points_for_retirement = SelectLayerByLocation(in_layer=points_for_retirement, overlap_type="BOUNDARY_TOUCHES", select_features=non_settled_parcels,
-                                            search_distance=None, selection_type="REMOVE_FROM_SELECTION", invert_spatial_relationship="NOT_INVERT")
-                
-                '''
-                
-
-                num_of_fronts = 0
-                num_of_points = 0
-
-                with UpdateCursor(fronts_for_retirement, ["RetiredByRecord","GlobalID"]) as cursor:
-                    for row in cursor:
-                        row[0] = Record_GUID
-                        cursor.updateRow(row)
-                        num_of_fronts += 1
-                        AddMessage(f'{timestamp()} | ✴️ Retired front {row[1]} by the process {ProcessName}')
-
-                with UpdateCursor(points_for_retirement, ["RetiredByRecord","GlobalID"]) as cursor:
-                    for row in cursor:
-                        row[0] = Record_GUID
-                        cursor.updateRow(row)
-                        num_of_points += 1
-                        AddMessage(f'{timestamp()} | ✴️ Retired point {row[1]} by the process {ProcessName}')
-
-                AddMessage(f'{timestamp()} | ✴️ {num_of_fronts} fronts were retired by the process {ProcessName}')
-
-                AddMessage(f'{timestamp()} | ✴️ {num_of_points} points were retired by the process {ProcessName}')
-                '''
-              
-                editor = start_editing(CNFG.ParcelFabricDatabase)
-                # using calculate field for better performance
-                CalculateField(
-                    in_table=fronts_for_retirement,
-                    field="RetiredByRecord",
-                    expression=f"'{Record_GUID}'",
-                    expression_type="SQL",
-                    code_block="",
-                    field_type="TEXT",
-                    enforce_domains="NO_ENFORCE_DOMAINS"
-                )
-                
-
-
-
-                
-                CalculateField(
-                    in_table=points_for_retirement,
-                    field="RetiredByRecord",
-                    expression=f"'{Record_GUID}'",
-                    expression_type="SQL",
-                    code_block="",
-                    field_type="TEXT",
-                    enforce_domains="NO_ENFORCE_DOMAINS"
-                )
-                
-                stop_editing(editor)
-                AddMessage(f'{timestamp()} | ✴️ {get_number_of_selections("חזיתות")} fronts were retired by the process {ProcessName}')
-                AddMessage(f'{timestamp()} | ✴️ {get_number_of_selections("נקודות גבול")} points were retired by the process {ProcessName}')
-
-
-                #del [dissolved_parcels]
-            else:
+            plan = plan_retirement(ProcessName, Record_GUID, used_layer, parcel_ids)
+            if plan is None:
                 AddMessage(f"   No selection was made or there is nothing to retire")
+            elif dry_run:
+                report_retirement_plan(plan, ProcessName, dry_run=True)
+            else:
+                apply_retirement_plan(plan, ProcessName, Record_GUID)
         else:
             if not layer_exists('גושים לא מוסדרים') and not layer_exists('חלקות לא מוסדרות'):
                 AddMessage(f'{timestamp()} | No layers were found with unsettled features, no changes were made.')
@@ -287,6 +279,8 @@ def RetireSelectedFeatures(ProcessName:str, used_layer: Literal['PARCELS','BLOCK
 
         clear_map_selections()
 
+    return plan
+
 
 
    
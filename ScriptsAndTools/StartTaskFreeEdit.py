@@ -1,21 +1,23 @@
+from time import perf_counter
+ScriptStart = perf_counter()   # The startup latency of the tool is measured from here, before its imports (see Utils.WarmWorker.dispatch)
 from os import startfile
 from Utils.Configs import CNFG
 from Utils.TypeHints import Layer, Map
 from Utils.Validations import validation_set
 from Utils.VersionManagement import open_version
-from Utils.Helpers import filter_to_roi, set_priority, create_shelf, activate_record, get_layer, zoom_to_aoi
+from Utils.WarmWorker import dispatch
+from Utils.Helpers import is_headless, get_project, get_map, filter_to_roi, set_priority, create_shelf, activate_record, get_layer, zoom_to_aoi
 from arcpy import GetParameterAsText
-from arcpy.mp import ArcGISProject
 from arcpy.conversion import ExportFeatures
 
 
 def display_process_data(RecordName: str) -> None:
 
     RecordsBorders: str = fr'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}CadasterRecordsBorders'
-    output: str = fr"{ArcGISProject('current').defaultGeodatabase}\FreeEditRecordBorders"
+    output: str = fr"{get_project().defaultGeodatabase}\FreeEditRecordBorders"
 
     ExportFeatures(RecordsBorders, output, f"Name = '{RecordName}'", field_mapping= fr'Name "שם המפה" true true true 255 Text 0 0,First,#,{RecordsBorders},Name,0,254')
-    current_map: Map = ArcGISProject('current').activeMap
+    current_map: Map = get_map()
     current_map.addDataFromPath(fr'{CNFG.LayerFiles}FreeEditRecordBorders.lyrx')
     layer: Layer = get_layer("גבול תכנית")
     layer.name = f'{RecordName} גבול תכנית'
@@ -41,7 +43,8 @@ def start_task_FreeEdit(RecordName: str) -> None:
 
         open_version(RecordName)
 
-        startfile(fr'{shelf}')
+        if not is_headless():
+            startfile(fr'{shelf}')
 
         filter_to_roi(RecordName)
 
@@ -53,4 +56,4 @@ def start_task_FreeEdit(RecordName: str) -> None:
 
 
 if __name__ == "__main__":
-    start_task_FreeEdit(GetParameterAsText(0))
+    dispatch('StartTaskFreeEdit', GetParameterAsText(0), started= ScriptStart, fallback= start_task_FreeEdit)
@@ -1,13 +1,15 @@
+from time import perf_counter
+ScriptStart = perf_counter()   # The startup latency of the tool is measured from here, before its imports (see Utils.WarmWorker.dispatch)
 from os import startfile
 from Utils.Configs import CNFG
 from Utils.TypeHints import *
-from Utils.Helpers import create_shelf, get_ProcessGUID, activate_record, load_to_records, filter_to_aoi, zoom_to_aoi, \
+from Utils.WarmWorker import dispatch
+from Utils.Helpers import is_headless, get_map, create_shelf, get_ProcessGUID, activate_record, load_to_records, filter_to_aoi, zoom_to_aoi, \
                           set_priority, rewrite_record_data, get_aprx_name
 from Utils.VersionManagement import open_version
 from Utils.Validations import process_in_records, features_exist, validation_set
 from Utils.Reports import compute_matching_points_report
 from arcpy import GetParameter, GetParameterAsText, env as ENV
-from arcpy.mp import ArcGISProject
 
 
 ENV.preserveGlobalIds = False
@@ -20,7 +22,7 @@ def display_process_data(ProcessName: str) -> None:
     Parameters:
         ProcessName (str): The name of the process for which data is displayed.
     """
-    CurrentMap: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+    CurrentMap: Map = get_map('מפת עריכה')
     ProcessGUID: str = get_ProcessGUID(ProcessName)
     query_name: str = f'Process {ProcessName}'
 
@@ -71,7 +73,8 @@ def start_task_ImproveCurrentCadaster(Independent: bool, ProcessName: str|None,
 
         open_version(ProcessName)
 
-        startfile(fr'{shelf}')
+        if not is_headless():
+            startfile(fr'{shelf}')
 
         if process_in_records(ProcessName):
             rewrite_record_data(ProcessName)
@@ -87,8 +90,10 @@ def start_task_ImproveCurrentCadaster(Independent: bool, ProcessName: str|None,
         # Report
         if Report:
             compute_matching_points_report(ProcessName, 'ImproveCurrentCadaster')
-            startfile(fr'{shelf}/PointsDistanceReport-{ProcessName.replace("/","_")}.xlsx')
+            if not is_headless():
+                startfile(fr'{shelf}/PointsDistanceReport-{ProcessName.replace("/","_")}.xlsx')
 
 
 if __name__ == "__main__":
-    start_task_ImproveCurrentCadaster(Independent= GetParameter(0), ProcessName= GetParameterAsText(1), Report= GetParameter(2))
+    dispatch('StartTaskImproveCurrentCadaster', Independent= GetParameter(0), ProcessName= GetParameterAsText(1), Report= GetParameter(2),
+             started= ScriptStart, fallback= start_task_ImproveCurrentCadaster)
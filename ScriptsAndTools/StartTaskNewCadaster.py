@@ -1,13 +1,19 @@
+from time import perf_counter
+ScriptStart = perf_counter()   # The startup latency of the tool is measured from here, before its imports (see Utils.WarmWorker.dispatch)
 from os import startfile
 from Utils.Configs import CNFG
-from Utils.Helpers import create_shelf, get_ProcessType, get_RecordGUID, get_BlockGUID, start_editing, stop_editing, zoom_to_aoi,  \
-    filter_to_aoi, get_FinalParcel, reopen_map, start_editing, stop_editing, cursor_length, \
-    timestamp, activate_record, get_DomainValue, get_layer, set_priority, rewrite_record_data, drop_layer,drop_dbtable, load_to_records, get_aprx_name
+from Utils.Helpers import is_headless, get_map, create_shelf, get_ProcessType, get_RecordGUID, get_BlockGUID, edit_session, zoom_to_aoi,  \
+    filter_to_aoi, get_FinalParcel, reopen_map, cursor_length, \
+    timestamp, activate_record, get_DomainValue, get_layer, set_priority, rewrite_record_data, drop_layer,drop_dbtable, load_to_records, get_aprx_name, query_max
 from Utils.UpdateAttributes import update_record_status
 from Utils.NewCadasterHelpers import append_process_to_records, append_settled_parcels, append_new_fronts, append_new_border_points,\
     count_features_in_group, filter_process_layers_group,update_blocks_geometry_by_active_parcels,append_first_registration_parcels, \
     insert_process_to_records, insert_settled_parcels, insert_new_fronts, insert_new_border_points, insert_first_registration_parcels,is_tax_process,is_guid_txt_file_exists, get_RecordGUID_NewCadaster
 from Utils.Reports import compute_matching_points_report
+from Utils.WarmWorker import dispatch
+from Utils.Pipeline import stage, run_pipeline, process_inputs
+from Utils.FieldMapping import clear_field_mapping_cache
+from Utils.PointMatching import get_tolerance
 from Utils.ValidationsNewCadaster import new_cadaster_validation_set, layer_exists, check_for_existing_records_data
 from Utils.VersionManagement import open_version
 from StartTaskRetireAndCreateCadaster import load_new_parcels
@@ -15,7 +21,6 @@ from RetireSelectedUnsettledFeatures import RetireSelectedFeatures
 from arcpy import AddMessage, AddError, AddWarning,GetParameterAsText,GetParameter, env as ENV
 from arcpy.management import SelectLayerByLocation as SelectByLocation, SelectLayerByAttribute as SelectByAttribute, GetCount
 from arcpy.da import SearchCursor, UpdateCursor
-from arcpy.mp import ArcGISProject
 
 
 ENV.preserveGlobalIds = False
@@ -38,6 +43,51 @@ def add_or_update_record(processName:str, recordExists:bool) -> None:
         #else:
         #    AddMessage(f'{timestamp()} | ⚡ The process {processName} was loaded into Records')
 
+def find_within_tax_parcels(processName:str, processType:int) -> set[str]|None:
+    '''
+    Finds the unsettled parcels which are completely within the process border, without using the map selection.
+    The candidates are read with an envelope filter of the border, the survivors are tested with a geometric within test
+    against the border buffered by the xy tolerance of the parcels (as the COMPLETELY_WITHIN selection does),
+    and the LandType/IsTax filters of the process type are applied in the same cursor.
+
+    Parameters:
+        processName (str): The name of the process.
+        processType (int): The process type code, 9 (הסדר) or 10 (רישום ראשון).
+
+    Returns:
+        set[str]: The GlobalIDs of the parcels to retire, None if the process type is not supported.
+    '''
+    if processType == 9:
+        where_clause = "LandType = 2"
+    elif processType == 10:
+        where_clause = "LandType = 2 And IsTax = 1"
+    else:
+        AddError(f"{timestamp()} | The process {processName} have wrong process type {processType}")
+        return None
+
+    record_guid = get_RecordGUID_NewCadaster(processName)
+    tolerance = get_tolerance(get_layer('חלקות לא מוסדרות'))
+    with SearchCursor(get_layer('גבול תכנית'), "SHAPE@") as cursor:
+        border = cursor.next()[0].buffer(tolerance)
+    envelope = border.extent
+
+    within_ids = set()
+    fields = ["GlobalID", "SHAPE@", "CreatedByRecord"]
+    with SearchCursor(get_layer('חלקות לא מוסדרות'), fields, where_clause, spatial_filter=envelope.polygon, spatial_relationship="INTERSECTS") as cursor:
+        for guid, shape, created_by in cursor:
+            if shape is None or created_by == record_guid:
+                continue
+            extent = shape.extent
+            # cheap envelope rejection before the exact within test
+            if extent.XMin < envelope.XMin or extent.YMin < envelope.YMin or extent.XMax > envelope.XMax or extent.YMax > envelope.YMax:
+                continue
+            if shape.within(border):
+                within_ids.add(guid)
+
+    del border, envelope
+    return within_ids
+
+
 def retire_within_tax_features(processName:str) -> None:
     ''' 
     Retiring all tax features which are completely within the given process border
@@ -46,26 +96,15 @@ def retire_within_tax_features(processName:str) -> None:
     AddMessage('\n ⭕ Looking for unsettled features to retire \n')
     #TODO check that the process parcels are not tax
 
-    Process_border_layer = get_layer('גבול תכנית')
-
-
     if is_tax_process(processName):
         AddMessage(f"{timestamp()} | The process {processName} contains tax parcels, so no retirement attempt will be made")
     else:
         if layer_exists('חלקות לא מוסדרות'):
-            unsettled_parcels_layer = get_layer('חלקות לא מוסדרות')
-            SelectByLocation(in_layer=unsettled_parcels_layer,overlap_type="WITHIN",select_features=Process_border_layer,selection_type="NEW_SELECTION")
-            if get_ProcessType(ProcessName) == 9:
-                SelectByAttribute(unsettled_parcels_layer,"SUBSET_SELECTION","LandType = 2")
-            elif get_ProcessType(ProcessName) == 10:
-                SelectByAttribute(unsettled_parcels_layer,"SUBSET_SELECTION","LandType = 2 And IsTax = 1")
-            else:
-                AddError(f"{timestamp()} | The process {processName} have wrong process type {get_ProcessType(processName)}")
-            num_of_selected_parcels = int(GetCount(unsettled_parcels_layer).getOutput(0))
-            if num_of_selected_parcels > 0:
-                #AddMessage(f"{timestamp()} | {num_of_selected_parcels} parcels were selected for retirement")
-                RetireSelectedFeatures(processName)
-            else:
+            within_ids = find_within_tax_parcels(processName, get_ProcessType(processName))
+            if within_ids:
+                AddMessage(f"{timestamp()} | {len(within_ids)} parcels within the process border were found for retirement")
+                RetireSelectedFeatures(processName, parcel_ids=within_ids)
+            elif within_ids is not None:
                 AddMessage(f"{timestamp()} | No within parcels to retire were found")
         else:
             AddMessage(f"{timestamp()} | No unsettled parcels layer found, so no retirement attempt will be made")
@@ -85,50 +124,43 @@ def update_settled_block(processName:str) -> None:
 
     RecordGUID = get_RecordGUID_NewCadaster(processName)
 
-    editor = start_editing(CNFG.ParcelFabricDatabase)
+    with edit_session():
     
-    AddMessage(f'{timestamp()} | ♻️ Updating attributes for block {processName}:') 
+        AddMessage(f'{timestamp()} | ♻️ Updating attributes for block {processName}:') 
    
-    # Get the single feature from Process_border_layer
-    with SearchCursor(Process_border_layer, field_names="SHAPE@") as cursor:
-        process_geometry = cursor.next()[0]
+        # Get the single feature from Process_border_layer
+        with SearchCursor(Process_border_layer, field_names="SHAPE@") as cursor:
+            process_geometry = cursor.next()[0]
  
-    # Find the maximum value in the ParcelNumber field
-    max_parcel_number = None
-    with SearchCursor(Parcels_layer, ["ParcelNumber"]) as cursor:
-        parcel_numbers = [row[0] for row in cursor]
-
-    if parcel_numbers:
-        max_parcel_number = max(parcel_numbers)
-
-
-    is_updated = False
-    # Update the CreatedByRecord, LandType, and BlockStatus fields in the single feature of the Block_layer
-    with UpdateCursor(Block_layer, ["SHAPE@","CreatedByRecord", "LandType", "BlockStatus", "LastSetteledParcel"]) as cursor:
-        row = next(cursor, None)  # Safely get the first row or None
-        if row:
-            row[0] = process_geometry
-            row[1] = RecordGUID
-            row[2] = 1
-            row[3] = 11
-            row[4] = max_parcel_number
-            cursor.updateRow(row)
-            is_updated = True
-
-
-    if is_updated:
-        LandTypeDomainValue = get_DomainValue('LandType', 1)
-        BlockStatusDomainValue = get_DomainValue('BlockStatus', 11)
-
-        AddMessage(f'                Geometry was updated')
-        AddMessage(f'                Created By Record = {RecordGUID}')
-        AddMessage(f'                Land Type = {LandTypeDomainValue}')
-        AddMessage(f'                Block Status = {BlockStatusDomainValue}')
-        AddMessage(f'                Last Settled Parcel = {max_parcel_number}')
-    else:
-        AddWarning(f'                Was unable to update the block\'s attributes')
+        # Find the maximum value in the ParcelNumber field
+        max_parcel_number = query_max(Parcels_layer, "ParcelNumber")
 
-    stop_editing(editor)
+
+        is_updated = False
+        # Update the CreatedByRecord, LandType, and BlockStatus fields in the single feature of the Block_layer
+        with UpdateCursor(Block_layer, ["SHAPE@","CreatedByRecord", "LandType", "BlockStatus", "LastSetteledParcel"]) as cursor:
+            row = next(cursor, None)  # Safely get the first row or None
+            if row:
+                row[0] = process_geometry
+                row[1] = RecordGUID
+                row[2] = 1
+                row[3] = 11
+                row[4] = max_parcel_number
+                cursor.updateRow(row)
+                is_updated = True
+
+
+        if is_updated:
+            LandTypeDomainValue = get_DomainValue('LandType', 1)
+            BlockStatusDomainValue = get_DomainValue('BlockStatus', 11)
+
+            AddMessage(f'                Geometry was updated')
+            AddMessage(f'                Created By Record = {RecordGUID}')
+            AddMessage(f'                Land Type = {LandTypeDomainValue}')
+            AddMessage(f'                Block Status = {BlockStatusDomainValue}')
+            AddMessage(f'                Last Settled Parcel = {max_parcel_number}')
+        else:
+            AddWarning(f'                Was unable to update the block\'s attributes')
 
 
 
@@ -146,6 +178,7 @@ def load_data_to_sequence_layers(ProcessName:str, TaskType:str = 'CreateNewCadas
 
     if TaskType == 'CreateNewCadaster':
         RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
+        clear_field_mapping_cache()   # The exported process layers are recreated by every run
 
         new_points_dq = None
         new_fronts_dq = None
@@ -211,7 +244,7 @@ def display_process_data(ProcessName:str, TaskType:str = 'CreateNewCadaster' or
     None
     '''
     
-    CurrentMap = ArcGISProject("CURRENT").activeMap
+    CurrentMap = get_map()
 
     AddMessage('\n ⭕ Loading data: \n')
 
@@ -258,14 +291,31 @@ def display_process_data(ProcessName:str, TaskType:str = 'CreateNewCadaster' or
 
     
 
-def start_task_CreateNewCadaster(Independent: bool, ProcessName: str|None, ComputeReport:bool, TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster', auto_retire_tax_features:bool = 'False') -> None:
+def update_process_block(ProcessName:str) -> None:
+    '''
+    Updates the block of the process: the settled block data for settlement processes (הסדר),
+    or the block geometry by its active parcels for first registration processes (רישום ראשון).
+    '''
+    if get_ProcessType(ProcessName) == 9: #(הסדר)
+        update_settled_block(ProcessName)
+    else: # current_process_type_code==10 (רישום ראשון)
+        block_guid = get_BlockGUID('ProcessName',ProcessName)
+        record_guid = get_RecordGUID_NewCadaster(ProcessName)
+        # the block's geometry update performed for every case to ensure that the block's field last_edited_date will be updating
+        update_blocks_geometry_by_active_parcels(block_guid,record_guid)
+
+
+def start_task_CreateNewCadaster(Independent: bool, ProcessName: str|None, ComputeReport:bool, TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster', auto_retire_tax_features:bool = 'False', Resume:bool = True) -> None:
 
     '''
-    Executing the main task function
+    Executing the main task function.
+    The task runs as a pipeline of stages checkpointed in the process shelf, a re-run skips the stages completed
+    by a previous run as long as the process data did not change since.
 
     Parameters:
     - ProcessName (str): The name of the cadaster process.
     - TaskType (str): The Task's type, CreateNewCadaster or ImproveNewCadaster
+    - Resume (bool): Skip the stages completed by a previous run. False runs the whole task again.
 
     Returns:
     None
@@ -279,29 +329,36 @@ def start_task_CreateNewCadaster(Independent: bool, ProcessName: str|None, Compu
 
         shelf = create_shelf(ProcessName)
         open_version(ProcessName)
-        startfile(r''+shelf)
-        record_exists = check_for_existing_records_data(ProcessName, TaskType)
-        add_or_update_record(ProcessName, record_exists)
-        display_process_data(ProcessName, TaskType)
-        load_data_to_sequence_layers(ProcessName, TaskType)
-        activate_record(ProcessName)
+        if not is_headless():
+            startfile(r''+shelf)
+
+        process_data = process_inputs(ProcessName)
+        record_outputs = ['CadasterRecordsBorders', 'Parcels2D', 'Parcels2DFronts', 'BorderPoints', 'Blocks']
+
+        # Every stage is committed on its own, a failing stage is rolled back and the next run resumes from it
+        stages = [stage('record', lambda: add_or_update_record(ProcessName, check_for_existing_records_data(ProcessName, TaskType)),
+                        inputs=process_data, outputs=record_outputs),
+                  stage('display', lambda: display_process_data(ProcessName, TaskType), always=True, transaction=False),
+                  stage('load', lambda: load_data_to_sequence_layers(ProcessName, TaskType),  # Appends with geoprocessing tools, not rolled back on failure
+                        inputs=process_data + ['CadasterRecordsBorders'], outputs=['Parcels2D', 'Parcels2DFronts', 'BorderPoints'], resumable=False),
+                  stage('activate', lambda: activate_record(ProcessName), always=True, transaction=False)]
+
         if TaskType == 'CreateNewCadaster':
-            if get_ProcessType(ProcessName) == 9: #(הסדר)
-                update_settled_block(ProcessName)
-            else: # current_process_type_code==10 (רישום ראשון)
-                block_guid = get_BlockGUID('ProcessName',ProcessName)
-                record_guid = get_RecordGUID_NewCadaster(ProcessName)
-                # the block's geometry update performed for every case to ensure that the block's field last_edited_date will be updating
-                update_blocks_geometry_by_active_parcels(block_guid,record_guid)
-        filter_to_aoi(ProcessName) 
-        zoom_to_aoi()
+            stages.append(stage('block', lambda: update_process_block(ProcessName), inputs=process_data + ['Parcels2D'], outputs=['Blocks']))
+
+        stages.append(stage('filter', lambda: filter_to_aoi(ProcessName), always=True, transaction=False))
+        stages.append(stage('zoom', zoom_to_aoi, always=True, transaction=False))
 
         if auto_retire_tax_features:
-            retire_within_tax_features(ProcessName)
+            stages.append(stage('retire tax features', lambda: retire_within_tax_features(ProcessName),
+                                inputs=process_data + ['Parcels2D', 'Blocks'], outputs=['Parcels2D', 'Parcels2DFronts', 'BorderPoints', 'Blocks']))
+
+        run_pipeline(TaskType, ProcessName, stages, Resume)
         
         if ComputeReport:
             compute_matching_points_report(ProcessName, 'CreateNewCadaster')
-            startfile(fr'{shelf}/PointsDistanceReport-{ProcessName.replace("/","_")}.xlsx')
+            if not is_headless():
+                startfile(fr'{shelf}/PointsDistanceReport-{ProcessName.replace("/","_")}.xlsx')
 
         
 
@@ -317,5 +374,7 @@ if __name__ == "__main__":
     else:
         auto_retire_tax_features = None
 
-    start_task_CreateNewCadaster(Independent,ProcessName, ComputeReport, TaskType, auto_retire_tax_features)
+    Resume = GetParameterAsText(5).lower() != 'false'
+
+    dispatch('StartTaskNewCadaster', Independent,ProcessName, ComputeReport, TaskType, auto_retire_tax_features, Resume, started= ScriptStart, fallback= start_task_CreateNewCadaster)
 
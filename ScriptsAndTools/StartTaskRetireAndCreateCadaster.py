@@ -1,17 +1,20 @@
+from time import perf_counter
+ScriptStart = perf_counter()   # The startup latency of the tool is measured from here, before its imports (see Utils.WarmWorker.dispatch)
 from os import startfile
-from arcpy.mp import ArcGISProject
 from arcpy.da import SearchCursor, InsertCursor
 from arcpy import RefreshLayer, AddMessage, GetParameterAsText, GetParameter, env as ENV
 from Utils.Configs import CNFG
 from Utils.TypeHints import *
 from Utils.VersionManagement import open_version
 from Utils.Reports import compute_matching_points_report
+from Utils.WarmWorker import dispatch
+from Utils.Pipeline import stage, run_pipeline, process_inputs
 from Utils.Validations import validation_set, creating_record_is_duplicated, features_exist
 from Utils.UpdateAttributes import retire_parcels, retire_fronts, retire_substractions_by_2D_process, retire_blocks, \
                                    update_record_status, reshape_transferring_block, reshape_or_construct_absorbing_blocks
-from Utils.Helpers import create_shelf, get_ProcessGUID, get_RecordGUID, get_ProcessType, Type2CreateType, \
+from Utils.Helpers import is_headless, get_map, create_shelf, get_ProcessGUID, get_RecordGUID, get_ProcessType, Type2CreateType, \
                           get_BlockGUID, refresh_map_view, timestamp, activate_record, zoom_to_aoi, load_to_records, \
-                          filter_to_aoi, get_FinalParcel, reopen_map, start_editing, stop_editing, cursor_length, \
+                          filter_to_aoi, get_FinalParcel, reopen_map, edit_session, cursor_length, \
                           set_priority, process_is_transferring, get_layer, Type2CancelType, get_process_shape, \
                           process_will_retire_its_block, get_aprx_name
 
@@ -26,7 +29,7 @@ def display_process_data(ProcessName: str) -> None:
         ProcessName (str): The name of the process for which data is displayed.
     """
 
-    CurrentMap: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+    CurrentMap: Map = get_map('מפת עריכה')
     ProcessGUID: str = get_ProcessGUID(ProcessName)
     query_name: str = f'Process {ProcessName}'
 
@@ -69,7 +72,7 @@ def load_intermediate_parcels(ProcessName: str) -> None:
 
     if total > 0:
         AddMessage(f'\n ⭕ Adding intermediate parcels:')
-        current_map: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+        current_map: Map = get_map('מפת עריכה')
         Parcels2D_layer: Layer = current_map.listLayers('חלקות מבוטלות')[0]
 
         record_guid: str = get_RecordGUID(ProcessName, 'SHELF')
@@ -78,26 +81,25 @@ def load_intermediate_parcels(ProcessName: str) -> None:
         CancelProcessType: int = Type2CancelType(process_type)
         parcel_type: int = 2  # סופית
 
-        editor: Editor = start_editing(ENV.workspace)
-        AddMessage(f'{timestamp()} | ⚡ {total} intermediate parcels will be added')
+        with edit_session():
+            AddMessage(f'{timestamp()} | ⚡ {total} intermediate parcels will be added')
 
 
-        Parcels2DFields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandType', 'IsTax', 'StatedArea', 'LandDesignationPlan', 'Shape@', 'CreatedByRecord', 'CreateProcessType', 'BlockUniqueID', 'ParcelType', 'RetiredByRecord', 'CancelProcessType']
-        Parcels2DData: Icur = InsertCursor(Parcels2D_layer, Parcels2DFields)
-        for idx, parcel_data in enumerate(intermediate, start=1):
-            block_guid: str = get_BlockGUID(by= 'BlockName', name= f'{parcel_data[1]}/{parcel_data[2]}')
-            temporary_parcel: int = parcel_data[0]
-            parcel_final_number: int = get_FinalParcel(parcel_data[0], parcel_data[1], parcel_data[2])
-            geometry: Polygon = get_process_shape(ProcessName) if not parcel_data[7] else parcel_data[7]  # For older in-process intermediate parcels were geoetry were not saved.
-            parcel_data: tuple[Any] = (parcel_final_number,) + parcel_data[1:7] + (geometry, record_guid, CreateProcessType, block_guid, parcel_type, record_guid, CancelProcessType)
-            Parcels2DData.insertRow(parcel_data)
+            Parcels2DFields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandType', 'IsTax', 'StatedArea', 'LandDesignationPlan', 'Shape@', 'CreatedByRecord', 'CreateProcessType', 'BlockUniqueID', 'ParcelType', 'RetiredByRecord', 'CancelProcessType']
+            Parcels2DData: Icur = InsertCursor(Parcels2D_layer, Parcels2DFields)
+            for idx, parcel_data in enumerate(intermediate, start=1):
+                block_guid: str = get_BlockGUID(by= 'BlockName', name= f'{parcel_data[1]}/{parcel_data[2]}')
+                temporary_parcel: int = parcel_data[0]
+                parcel_final_number: int = get_FinalParcel(parcel_data[0], parcel_data[1], parcel_data[2])
+                geometry: Polygon = get_process_shape(ProcessName) if not parcel_data[7] else parcel_data[7]  # For older in-process intermediate parcels were geoetry were not saved.
+                parcel_data: tuple[Any] = (parcel_final_number,) + parcel_data[1:7] + (geometry, record_guid, CreateProcessType, block_guid, parcel_type, record_guid, CancelProcessType)
+                Parcels2DData.insertRow(parcel_data)
 
-            AddMessage(f'{timestamp()} | {idx}/{total} | ✔️ Temporary parcel {temporary_parcel} added as intermediate parcel {parcel_final_number} at block {parcel_data[1]}/{parcel_data[2]}')
+                AddMessage(f'{timestamp()} | {idx}/{total} | ✔️ Temporary parcel {temporary_parcel} added as intermediate parcel {parcel_final_number} at block {parcel_data[1]}/{parcel_data[2]}')
 
-        del total, current_map, record_guid, process_type, CreateProcessType, CancelProcessType, parcel_type, Parcels2DFields, Parcels2DData
-        stop_editing(editor)
+            del total, current_map, record_guid, process_type, CreateProcessType, CancelProcessType, parcel_type, Parcels2DFields, Parcels2DData
         RefreshLayer(Parcels2D_layer)
-        del editor, Parcels2D_layer
+        del Parcels2D_layer
 
 
 def load_new_parcels(ProcessName: str) -> None:
@@ -108,7 +110,7 @@ def load_new_parcels(ProcessName: str) -> None:
     """
     AddMessage(f'\n ⭕ Adding new parcels:')
     refresh_map_view()
-    current_map: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+    current_map: Map = get_map('מפת עריכה')
     Parcels2D_layer: Layer = current_map.listLayers('חלקות')[0]
     NewParcels_layer: Layer = current_map.listLayers('חלקות חדשות')[0]
 
@@ -116,28 +118,26 @@ def load_new_parcels(ProcessName: str) -> None:
     CreateProcessType: int = Type2CreateType(get_ProcessType(ProcessName))
     parcel_type: int = 2  # סופית
 
-    editor: Editor = start_editing(ENV.workspace)
-    InProcessFields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandType', 'IsTax', 'LegalArea', 'LandDesignationPlan', 'Shape@']
-    NewParcelsData: Scur = SearchCursor(NewParcels_layer, InProcessFields)
+    with edit_session():
+        InProcessFields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandType', 'IsTax', 'LegalArea', 'LandDesignationPlan', 'Shape@']
+        NewParcelsData: Scur = SearchCursor(NewParcels_layer, InProcessFields)
 
-    total: int = cursor_length(NewParcelsData)
-    AddMessage(f'{timestamp()} | ⚡ {total} New parcels will be added')
+        total: int = cursor_length(NewParcelsData)
+        AddMessage(f'{timestamp()} | ⚡ {total} New parcels will be added')
 
-    Parcels2DFields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandType', 'IsTax', 'StatedArea', 'LandDesignationPlan', 'Shape@', 'CreatedByRecord', 'CreateProcessType', 'BlockUniqueID', 'ParcelType']
-    Parcels2DData: Icur = InsertCursor(Parcels2D_layer, Parcels2DFields)
-    for idx, parcel_data in enumerate(NewParcelsData, start=1):
-        block_guid: str = get_BlockGUID(by = 'BlockName', name = f'{parcel_data[1]}/{parcel_data[2]}')
-        temporary_parcel: int = parcel_data[0]
-        parcel_final_number: int = get_FinalParcel(parcel_data[0], parcel_data[1], parcel_data[2])
+        Parcels2DFields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandType', 'IsTax', 'StatedArea', 'LandDesignationPlan', 'Shape@', 'CreatedByRecord', 'CreateProcessType', 'BlockUniqueID', 'ParcelType']
+        Parcels2DData: Icur = InsertCursor(Parcels2D_layer, Parcels2DFields)
+        for idx, parcel_data in enumerate(NewParcelsData, start=1):
+            block_guid: str = get_BlockGUID(by = 'BlockName', name = f'{parcel_data[1]}/{parcel_data[2]}')
+            temporary_parcel: int = parcel_data[0]
+            parcel_final_number: int = get_FinalParcel(parcel_data[0], parcel_data[1], parcel_data[2])
 
-        parcel_data: tuple[Any] = (parcel_final_number,) + parcel_data[1:8] + (record_guid, CreateProcessType, block_guid, parcel_type)
-        Parcels2DData.insertRow(parcel_data)
+            parcel_data: tuple[Any] = (parcel_final_number,) + parcel_data[1:8] + (record_guid, CreateProcessType, block_guid, parcel_type)
+            Parcels2DData.insertRow(parcel_data)
 
-        AddMessage(f'{timestamp()} | {idx}/{total} | ✔️ Temporary parcel {temporary_parcel} added as active parcel {parcel_final_number} at block {parcel_data[1]}/{parcel_data[2]}')
-    del NewParcelsData, Parcels2DData, NewParcels_layer, total
-    stop_editing(editor)
+            AddMessage(f'{timestamp()} | {idx}/{total} | ✔️ Temporary parcel {temporary_parcel} added as active parcel {parcel_final_number} at block {parcel_data[1]}/{parcel_data[2]}')
+        del NewParcelsData, Parcels2DData, NewParcels_layer, total
     RefreshLayer(Parcels2D_layer)
-    del editor
 
 
 def load_new_fronts(ProcessName: str) -> None:
@@ -148,100 +148,146 @@ def load_new_fronts(ProcessName: str) -> None:
     """
 
     AddMessage(f'\n ⭕ Adding new fronts:')
-    current_map: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+    current_map: Map = get_map('מפת עריכה')
     Fronts_layer: Layer = current_map.listLayers('חזיתות')[0]
     NewFronts_layer: Layer = current_map.listLayers('חזיתות לשימור וחדשות')[0]
     record_guid: str = get_RecordGUID(ProcessName, 'SHELF')
 
-    editor: Editor = start_editing(ENV.workspace)
-    InProcessFields: list[str] = ['LegalLength', 'Radius', 'LineType', 'Shape@']
-    NewFronts_data: Scur = SearchCursor(NewFronts_layer, InProcessFields, "LineStatus = 2")  # חזיתות חדשות
-    new_fronts_count: int = cursor_length(NewFronts_data)
+    with edit_session():
+        InProcessFields: list[str] = ['LegalLength', 'Radius', 'LineType', 'Shape@']
+        NewFronts_data: Scur = SearchCursor(NewFronts_layer, InProcessFields, "LineStatus = 2")  # חזיתות חדשות
+        new_fronts_count: int = cursor_length(NewFronts_data)
 
-    if new_fronts_count > 0:
-        AddMessage(f'{timestamp()} | ⚡ {new_fronts_count} New fronts will be added')
+        if new_fronts_count > 0:
+            AddMessage(f'{timestamp()} | ⚡ {new_fronts_count} New fronts will be added')
 
-        FrontsFields: list[str] = ['Distance', 'Radius', 'LineType', 'Shape@', 'CreatedByRecord']
-        FrontsData: Icur = InsertCursor(Fronts_layer, FrontsFields)
+            FrontsFields: list[str] = ['Distance', 'Radius', 'LineType', 'Shape@', 'CreatedByRecord']
+            FrontsData: Icur = InsertCursor(Fronts_layer, FrontsFields)
 
-        for row in NewFronts_data:
-            data: tuple[Any] = row + (record_guid,)
-            FrontsData.insertRow(data)
-        AddMessage(f'{timestamp()} | ✔️ Fronts Added successfully')
+            for row in NewFronts_data:
+                data: tuple[Any] = row + (record_guid,)
+                FrontsData.insertRow(data)
+            del FrontsData
+            AddMessage(f'{timestamp()} | ✔️ Fronts Added successfully')
 
-        stop_editing(editor)
+    if new_fronts_count > 0:
         RefreshLayer(Fronts_layer)
         reopen_map()
 
     else:
         AddMessage(f'{timestamp()} | ✔️ No new fronts to add')
 
-    del new_fronts_count, NewFronts_data, editor, record_guid
+    del new_fronts_count, NewFronts_data, record_guid
 
 
-def start_task_RetireAndCreateCadaster(Independent: bool, ProcessName: str|None, Report: bool = True) -> None:
+def load_or_update_record(ProcessName: str) -> None:
     """
-    Workflow for starting the Retire And Create Cadaster task.
+    Loads the process into the records, or updates the status of its existing record.
 
     Parameters:
-        Independent (bool): An option to start the task environment for a different process than the one suggested by the APRX file. This option may be useful when the CMS is down. Default is False.
         ProcessName (str): The name of the cadaster process.
-        Report (bool): Perform the matching points report. Default is True.
     """
+    if creating_record_is_duplicated(ProcessName):
+        update_record_status(ProcessName, new_status=5)  # מעדכן סטאטוס לרשומה
+    else:
+        load_to_records(ProcessName)
 
-    set_priority()
 
-    # Whether the process is executed from CMS or independent task.
-    ProcessName: str = get_aprx_name() if not Independent else ProcessName
+def retire_process_features(ProcessName: str) -> None:
+    """
+    Retires the 2D parcels, fronts and substractions replaced by the process, and its block if the process transfers all of its parcels.
 
-    qualified: bool = validation_set("RetireAndCreateCadaster", ProcessName)
+    Parameters:
+        ProcessName (str): The name of the cadaster process.
+    """
+    retire_parcels(ProcessName)
 
-    if qualified:
+    retire_fronts(ProcessName)
 
-        shelf: str = create_shelf(ProcessName)
+    #    If there are active substractions in the AOI
+    retire_substractions_by_2D_process(ProcessName)
 
-        open_version(ProcessName)
+    transfer_included: bool = process_is_transferring(ProcessName, 'MAP')
+    block_should_retire: bool = process_will_retire_its_block(ProcessName)
 
-        startfile(fr'{shelf}')
+    if transfer_included and block_should_retire:
+        retire_blocks(ProcessName)
 
-        if creating_record_is_duplicated(ProcessName):
-            update_record_status(ProcessName, new_status=5)  # מעדכן סטאטוס לרשומה
-        else:
-            load_to_records(ProcessName)
+    del transfer_included, block_should_retire
 
-        display_process_data(ProcessName)
 
-        activate_record(ProcessName)  # Known issue: The records layer is not updated till the end of the execution of gp tool.
+def create_process_features(ProcessName: str) -> None:
+    """
+    Loads the new and intermediate parcels and the new fronts of the process into the fabric.
 
-        zoom_to_aoi()
+    Parameters:
+        ProcessName (str): The name of the cadaster process.
+    """
+    load_new_parcels(ProcessName)
+
+    load_intermediate_parcels(ProcessName)
+
+    load_new_fronts(ProcessName)
+
+
+def adjust_transfer_blocks(ProcessName: str) -> None:
+    """
+    Reshapes the absorbing and the transferring blocks of a process with transfer actions.
+
+    Parameters:
+        ProcessName (str): The name of the cadaster process.
+    """
+    if process_is_transferring(ProcessName, 'MAP'):
+        # reshape_sender_block(ProcessName)
+        reshape_or_construct_absorbing_blocks(ProcessName)
+        reshape_transferring_block(ProcessName)
+
+
+def start_task_RetireAndCreateCadaster(Independent: bool, ProcessName: str|None, Report: bool = True, Resume: bool = True) -> None:
+    """
+    Workflow for starting the Retire And Create Cadaster task.
+    The workflow runs as a pipeline of stages checkpointed in the process shelf, a re-run skips the stages completed
+    by a previous run as long as the process data did not change since.
+
+    Parameters:
+        Independent (bool): An option to start the task environment for a different process than the one suggested by the APRX file. This option may be useful when the CMS is down. Default is False.
+        ProcessName (str): The name of the cadaster process.
+        Report (bool): Perform the matching points report. Default is True.
+        Resume (bool): Skip the stages completed by a previous run. False runs the whole workflow again. Default is True.
+    """
 
-        # Retire
-        retire_parcels(ProcessName)
+    set_priority()
 
-        retire_fronts(ProcessName)
+    # Whether the process is executed from CMS or independent task.
+    ProcessName: str = get_aprx_name() if not Independent else ProcessName
 
-        #    If there are active substractions in the AOI
-        retire_substractions_by_2D_process(ProcessName)
+    qualified: bool = validation_set("RetireAndCreateCadaster", ProcessName)
 
-        transfer_included: bool = process_is_transferring(ProcessName, 'MAP')
-        block_should_retire: bool = process_will_retire_its_block(ProcessName)
+    if qualified:
 
-        if transfer_included and block_should_retire:
-            retire_blocks(ProcessName)
+        shelf: str = create_shelf(ProcessName)
 
-        # Create
-        load_new_parcels(ProcessName)
+        open_version(ProcessName)
 
-        load_intermediate_parcels(ProcessName)
+        if not is_headless():
+            startfile(fr'{shelf}')
 
-        load_new_fronts(ProcessName)
+        process_data: list[tuple[str, str]] = process_inputs(ProcessName, '2D')
 
-        # Transfer action blocks adjustments
-        if transfer_included:
-            # reshape_sender_block(ProcessName)
-            reshape_or_construct_absorbing_blocks(ProcessName)
-            reshape_transferring_block(ProcessName)
+        # Every stage is committed on its own, a failing stage is rolled back and the next run resumes from it
+        stages: list[dict[str, Any]] = [
+            stage('record', lambda: load_or_update_record(ProcessName), inputs=process_data, outputs=['CadasterRecordsBorders']),
+            stage('display', lambda: display_process_data(ProcessName), always=True, transaction=False),
+            stage('activate', lambda: activate_record(ProcessName), always=True, transaction=False),  # Known issue: The records layer is not updated till the end of the execution of gp tool.
+            stage('zoom', zoom_to_aoi, always=True, transaction=False),
+            stage('retire', lambda: retire_process_features(ProcessName),
+                  inputs=process_data + ['CadasterRecordsBorders'], outputs=['Parcels2D', 'Parcels2DFronts', 'Substractions', 'Blocks']),
+            stage('create', lambda: create_process_features(ProcessName),
+                  inputs=process_data + ['CadasterRecordsBorders'], outputs=['Parcels2D', 'Parcels2DFronts', 'BorderPoints']),
+            stage('transfer blocks', lambda: adjust_transfer_blocks(ProcessName),
+                  inputs=process_data + ['Parcels2D', 'Blocks'], outputs=['Blocks'])]
 
+        run_pipeline('RetireAndCreateCadaster', ProcessName, stages, Resume)
 
         # Closers
         reopen_map()
@@ -250,10 +296,12 @@ def start_task_RetireAndCreateCadaster(Independent: bool, ProcessName: str|None,
         # Report
         if Report:
             compute_matching_points_report(ProcessName, task= 'RetireAndCreateCadaster')
-            startfile(fr'{shelf}/PointsDistanceReport-{ProcessName.replace("/","_")}.xlsx')
+            if not is_headless():
+                startfile(fr'{shelf}/PointsDistanceReport-{ProcessName.replace("/","_")}.xlsx')
 
-        del shelf, transfer_included, block_should_retire
+        del shelf, process_data, stages
 
 
 if __name__ == "__main__":
-    start_task_RetireAndCreateCadaster(Independent= GetParameter(0), ProcessName= GetParameterAsText(1), Report= GetParameter(2))
+    dispatch('StartTaskRetireAndCreateCadaster', Independent= GetParameter(0), ProcessName= GetParameterAsText(1), Report= GetParameter(2),
+             Resume= GetParameterAsText(3).lower() != 'false', started= ScriptStart, fallback= start_task_RetireAndCreateCadaster)
@@ -1,17 +1,22 @@
+from time import perf_counter
+ScriptStart = perf_counter()   # The startup latency of the tool is measured from here, before its imports (see Utils.WarmWorker.dispatch)
 from os import startfile
 from arcpy import RefreshLayer, AddMessage, GetParameterAsText, env as ENV
-from arcpy.mp import ArcGISProject
 from arcpy.conversion import ExportFeatures
 from arcpy.da import SearchCursor, UpdateCursor, InsertCursor
 from arcpy.management import Append, MakeFeatureLayer as MakeLayer, CalculateField, AddField, AlterField
 from Utils.Configs import CNFG
 from Utils.TypeHints import *
 from Utils.VersionManagement import open_version
+from Utils.FieldMapping import compile_field_map, clear_field_mapping_cache
+from Utils.WarmWorker import dispatch
+from Utils.Pipeline import stage, run_pipeline, process_inputs
 from Utils.UpdateAttributes import retire_3D_parcels_and_substractions, retire_3D_points, update_record_status
 from Utils.Validations import validation_set, features_exist, creating_record_is_duplicated
-from Utils.Helpers import create_shelf, get_ProcessGUID, get_RecordGUID, get_ActiveParcel2DGUID, timestamp, \
+from StartTaskRetireAndCreateCadaster import load_or_update_record
+from Utils.Helpers import is_headless, get_project, get_map, create_shelf, get_ProcessGUID, get_RecordGUID, get_ActiveParcel2DGUID, timestamp, \
     zoom_to_aoi, filter_to_aoi, get_FinalParcel, reopen_map, cursor_length, \
-    set_priority, load_to_records, Type2CreateType, get_ProcessType, get_layer, get_aprx_name, activate_record
+    set_priority, load_to_records, Type2CreateType, get_ProcessType, get_layer, get_aprx_name, activate_record, in_query
 
 ENV.preserveGlobalIds = False
 
@@ -24,7 +29,7 @@ def display_process_data(ProcessName: str) -> None:
         ProcessName (str): The name of the process for which data is displayed.
     """
 
-    CurrentMap: Map = ArcGISProject("current").listMaps('סצנת עריכה')[0]
+    CurrentMap: Map = get_map('סצנת עריכה')
     ProcessGUID: str = get_ProcessGUID(ProcessName)
     query_name: str = f'Process {ProcessName}'
 
@@ -50,15 +55,13 @@ def display_process_data(ProcessName: str) -> None:
 
     parcels3D_guids: set[str] = {row[0] for row in SearchCursor(Parcelslayer, 'GlobalID')}
     if parcels3D_guids:  # 3D plans types of substraction-recalculation  won't contain new parcels
-        parcels3D_guids: str = ", ".join(f"'{p}'" for p in parcels3D_guids)
-        ProjectedParcelslayer.updateDefinitionQueries([{'name': query_name, 'sql': f" Parcel3DUniqueID IN ({parcels3D_guids}) ", 'isActive': True}])
+        ProjectedParcelslayer.updateDefinitionQueries([{'name': query_name, 'sql': in_query('Parcel3DUniqueID', list(parcels3D_guids)), 'isActive': True}])
     else:
         ProjectedParcelslayer.updateDefinitionQueries([{'name': query_name, 'sql': f" OBJECTID = -1 ", 'isActive': True}])
 
     substractions_guids: set[str] = {row[0] for row in SearchCursor(Substractionslayer, 'GlobalID')}
     if substractions_guids:  # 3D plans types of substraction-recalculation  won't contain new substractions
-        substractions_guids: str = ", ".join(f"'{s}'" for s in substractions_guids)
-        ProjectedSubstractionslayer.updateDefinitionQueries([{'name': query_name, 'sql': f" SubstractionUniqueID IN ({substractions_guids}) ", 'isActive': True}])
+        ProjectedSubstractionslayer.updateDefinitionQueries([{'name': query_name, 'sql': in_query('SubstractionUniqueID', list(substractions_guids)), 'isActive': True}])
     else:
         ProjectedSubstractionslayer.updateDefinitionQueries([{'name': query_name, 'sql': f" OBJECTID = -1 ", 'isActive': True}])
 
@@ -106,7 +109,7 @@ def load_new_3D_parcels(ProcessName: str) -> None:
                         fr'LandType "סוג מקרקעין" true false false 2 Short 0 0,First,#,{inprocess_parcels3D},LandType,-1,-1;' + \
                         fr'IsTax "שומא" true false false 2 Short 0 0,First,#,{inprocess_parcels3D},IsTax,-1,-1'
 
-        exported_name: str = fr"{ArcGISProject('current').defaultGeodatabase}\new_parcels"
+        exported_name: str = fr"{get_project().defaultGeodatabase}\new_parcels"
         new_parcels: Result = ExportFeatures(in_features= inprocess_parcels3D, out_features= exported_name, where_clause= query, field_mapping= FieldMap)
         new_parcels: Layer = MakeLayer(new_parcels, "new_parcels").getOutput(0)
 
@@ -146,13 +149,13 @@ def load_new_projected_3D_parcels() -> None:
     AddMessage(f'\n ⭕ Adding new projections of 3D parcels:')
 
     # The exported new parcels from load_new_3D_parcels executed earlier
-    new_parcels3D_path: str = fr"{ArcGISProject('current').defaultGeodatabase}\new_parcels"
+    new_parcels3D_path: str = fr"{get_project().defaultGeodatabase}\new_parcels"
 
     # Export the new projections of 3D parcels of the process
     # Note: exporting directly from the layer of היטלי חלקות חדשות generated an empty output for some reason, hence the export input will be from the feature class.
     ENV.preserveGlobalIds = False
     process_projection_path: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}InProcessProjectedParcels3D"
-    exported_projections_path: str = fr"{ArcGISProject('current').defaultGeodatabase}\new_parcels_projections"
+    exported_projections_path: str = fr"{get_project().defaultGeodatabase}\new_parcels_projections"
     query: str = get_layer('היטלי חלקות חדשות').definitionQuery
     field_mapping: str = fr'Parcel3DUniqueID "מזהה חלקה תלת-ממדית" true true false 38 Guid 0 0,First,#,{process_projection_path},Parcel3DUniqueID,-1,-1;' + \
                          fr'GlobalID "מזהה היטל חלקה תלת-ממדית" false false true 38 GlobalID 0 0,First,#,{process_projection_path},GlobalID,-1,-1;' + \
@@ -219,7 +222,7 @@ def load_new_substractions(ProcessName: str) -> None:
                         fr'BlockUniqueID "מזהה גוש" true true false 38 Guid 0 0,First,#,{inprocess_substractions},BlockUniqueID,-1,-1'
 
 
-        exported_name: str = fr"{ArcGISProject('current').defaultGeodatabase}\new_substractions"
+        exported_name: str = fr"{get_project().defaultGeodatabase}\new_substractions"
         ExportFeatures(in_features= inprocess_substractions, out_features= exported_name, where_clause= query, field_mapping= FieldMap)
 
         # Arrange necessary fields in the exported feature class:
@@ -242,7 +245,7 @@ def load_new_substractions(ProcessName: str) -> None:
         info: Ucur = UpdateCursor(exported_name, fields)
         for idx, row in enumerate(info, start=1):
             row[0]: int = get_FinalParcel(row[0], row[1], row[2])
-            row[5]: str = SearchCursor(fr"{ArcGISProject('current').defaultGeodatabase}\new_parcels", 'GlobalID', f"ParcelNumber = {row[0]}").next()[0]  # The new Name of the 3D parcel. Note: the function get_ActiveParcel3DGUID won't work here since the source of 3D parcels is a local export at this moment.
+            row[5]: str = SearchCursor(fr"{get_project().defaultGeodatabase}\new_parcels", 'GlobalID', f"ParcelNumber = {row[0]}").next()[0]  # The new Name of the 3D parcel. Note: the function get_ActiveParcel3DGUID won't work here since the source of 3D parcels is a local export at this moment.
 
             # If 2D parcel is temporary - the 2D parcel fields will be updated.
             if row[8] == 1:
@@ -265,16 +268,16 @@ def load_new_projected_substractions(ProcessName) -> None:
     AddMessage(f'\n ⭕ Adding new projections of substractions:')
 
     # Export the new projections of substractions of the process
-    new_substractions_path: str = fr"{ArcGISProject('current').defaultGeodatabase}\new_substractions"  # The exported new substractions from load_new_substraction executed earlier
+    new_substractions_path: str = fr"{get_project().defaultGeodatabase}\new_substractions"  # The exported new substractions from load_new_substraction executed earlier
     inprocess_substractions_path: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}InProcessSubstractions"
     inprocess_projected_substractions: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}InProcessProjectedSubstractions"
-    new_substractions_projections: str = fr"{ArcGISProject('current').defaultGeodatabase}\new_substractions_projections"
+    new_substractions_projections: str = fr"{get_project().defaultGeodatabase}\new_substractions_projections"
 
     # Note: exporting directly from the layer of היטלי גריעות חדשות generated an empty output for some reason, hence the export input will be from the feature class.
     ENV.preserveGlobalIds = False
     query: str = f"CPBUniqueID = '{get_ProcessGUID(ProcessName)}' And Role = 2"
-    new_substractions_guids: str = ", ".join(f"'{guid[0]}'" for guid in SearchCursor(inprocess_substractions_path, 'GlobalID', query))
-    query: str = f"SubstractionUniqueID IN ({new_substractions_guids})"
+    new_substractions_guids: list[str] = [guid[0] for guid in SearchCursor(inprocess_substractions_path, 'GlobalID', query)]
+    query: str = in_query('SubstractionUniqueID', new_substractions_guids)
     field_mapping: str = fr'SubstractionUniqueID "מזהה גריעה" true true false 38 Guid 0 0,First,#,{inprocess_projected_substractions},SubstractionUniqueID,-1,-1;' + \
                          fr'GlobalID "מזהה היטל גריעה" false false true 38 GlobalID 0 0,First,#,{inprocess_projected_substractions},GlobalID,-1,-1;' + \
                          fr'Shape__Area "שטח גיאומטריה" false true true 0 Double 0 0,First,#,{inprocess_projected_substractions},Shape__Area,-1,-1;' + \
@@ -348,68 +351,35 @@ def append_parcels3D_and_substractions_data() -> None:
     Loads all the new features from the exported feature classes with their new GlobalID values preserved.
     """
     AddMessage(f'\n ⭕ Loading all new features:')
-    home_gdb: str = ArcGISProject('current').defaultGeodatabase
+    home_gdb: str = get_project().defaultGeodatabase
     ENV.preserveGlobalIds = True
+    clear_field_mapping_cache()   # The exported feature classes are recreated by every run
 
     # Parcels3D:
     inputs: str = fr"{home_gdb}\new_parcels"
-    FM: str = fr'GlobalID "מזהה חלקה" false false true 38 GlobalID 0 0,First,#,{inputs},GlobalID,-1,-1;' + \
-              fr'ParcelNumber "מספר חלקה" true false false 2 Short 0 0,First,#,{inputs},ParcelNumber,-1,-1;' + \
-              fr'BlockNumber "מספר גוש" true false false 4 Long 0 0,First,#,{inputs},BlockNumber,-1,-1;' + \
-              fr'SubBlockNumber "מספר תת-גוש" true false false 2 Short 0 0,First,#,{inputs},SubBlockNumber,-1,-1;' + \
-              fr'BlockUniqueID "מזהה גוש" true true false 38 Guid 0 0,First,#,{inputs},BlockUniqueID,-1,-1;' + \
-              fr'ParcelType "סוג חלקה" true false false 2 Short 0 0,First,#,{inputs},ParcelType,-1,-1;' + \
-              fr'StatedVolume "נפח רשום במטר מעוקב" true false false 8 Double 0 0,First,#,{inputs},StatedVolume,-1,-1;' + \
-              fr'ProjectedArea "שטח היטל" true false false 8 Double 0 0,First,#,{inputs},ProjectedArea,-1,-1;' + \
-              fr'UpperLevel "רום עליון" true false false 8 Double 0 0,First,#,{inputs},UpperLevel,-1,-1;' + \
-              fr'LowerLevel "רום תחתון" true false false 8 Double 0 0,First,#,{inputs},LowerLevel,-1,-1;' + \
-              fr'LandDesignation "ייעוד קרקע" true true false 100 Text 0 0,First,#,{inputs},LandDesignation,0,99;' + \
-              fr'LandDescription "תיאור קרקע" true true false 100 Text 0 0,First,#,{inputs},LandDescription,0,99;' + \
-              fr'LandType "סוג מקרקעין" true false false 2 Short 0 0,First,#,{inputs},LandType,-1,-1;' + \
-              fr'IsTax "שומא" true false false 2 Short 0 0,First,#,{inputs},IsTax,-1,-1;' + \
-              fr'Name "מספר מלא" true true false 25 Text 0 0,First,#,{inputs},Name,0,24;' + \
-              fr'CreatedByRecord "מזהה תהליך יוצר" true true false 38 Guid 0 0,First,#,{inputs},CreatedByRecord,-1,-1;' + \
-              fr'RetiredByRecord "מזהה תהליך מבטל" true true false 38 Guid 0 0,First,#;' + \
-              fr'CalculatedArea "שטח מחושב במטר רבוע" true true false 8 Double 0 0,First,#;' + \
-              fr'CreateProcessType "סוג תהליך יוצר" true false false 2 Short 0 0,First,#,{inputs},CreateProcessType,-1,-1;' + \
-              fr'CancelProcessType "סוג תהליך מבטל" true true false 2 Short 0 0,First,#;' + \
-              fr'UpdatedByRecord "מזהה תהליך מעדכן" true true false 38 Guid 0 0,First,#'
+    FM: FieldMappings = compile_field_map(inputs, get_layer('חלקות תלת-ממדיות'),
+                                          {field: field for field in ['GlobalID', 'ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'BlockUniqueID', 'ParcelType',
+                                                                      'StatedVolume', 'ProjectedArea', 'UpperLevel', 'LowerLevel', 'LandDesignation',
+                                                                      'LandDescription', 'LandType', 'IsTax', 'Name', 'CreatedByRecord', 'CreateProcessType']})
     Append(inputs= inputs, target= get_layer('חלקות תלת-ממדיות'), schema_type="NO_TEST", field_mapping= FM, feature_service_mode="USE_FEATURE_SERVICE_MODE")
 
     # ProjectedParcels3D:
     inputs: str = fr"{home_gdb}\new_parcels_projections"
-    FM: str = fr'Parcel3DUniqueID "מזהה חלקה תלת-ממדית" true true false 38 Guid 0 0,First,#,{inputs},Parcel3DUniqueID,-1,-1;' + \
-              fr'GlobalID "מזהה היטל חלקה תלת-ממדית" false false true 38 GlobalID 0 0,First,#,{inputs},GlobalID,-1,-1'
+    FM: FieldMappings = compile_field_map(inputs, get_layer('היטלי חלקות תלת-ממדיות'), {'Parcel3DUniqueID': 'Parcel3DUniqueID', 'GlobalID': 'GlobalID'})
     Append(inputs= inputs, target= get_layer('היטלי חלקות תלת-ממדיות'), schema_type="NO_TEST", field_mapping= FM, feature_service_mode="USE_FEATURE_SERVICE_MODE")
 
     # Substractions:
     inputs: str = fr"{home_gdb}\new_substractions"
-    FM: str = fr'GlobalID "מזהה גריעה" false false true 38 GlobalID 0 0,First,#,{inputs},GlobalID,-1,-1;' + \
-              fr'SubstractionNumber "מספר גריעה" true false false 2 Short 0 5,First,#,{inputs},SubstractionNumber,-1,-1;' + \
-              fr'Parcel3DNumber "מספר חלקה תלת-ממדית" true false false 2 Short 0 5,First,#,{inputs},Parcel3DNumber,-1,-1;' + \
-              fr'Parcel2DNumber "מספר חלקה קרקעית" true false false 2 Short 0 5,First,#,{inputs},Parcel2DNumber,-1,-1;' + \
-              fr'BlockNumber "מספר גוש" true false false 4 Long 0 10,First,#,{inputs},BlockNumber,-1,-1;' + \
-              fr'SubBlockNumber "מספר תת-גוש" true false false 2 Short 0 5,First,#,{inputs},SubBlockNumber,-1,-1;' + \
-              fr'StatedVolume "נפח רשום במעוקב" true false false 8 Double 8 38,First,#,{inputs},StatedVolume,-1,-1;' + \
-              fr'ProjectedArea "שטח היטל" true false false 8 Double 8 38,First,#,{inputs},ProjectedArea,-1,-1;' + \
-              fr'UpperLevel "רום עליון" true false false 8 Double 8 38,First,#,{inputs},UpperLevel,-1,-1;' + \
-              fr'LowerLevel "רום תחתון" true false false 8 Double 8 38,First,#,{inputs},LowerLevel,-1,-1;' + \
-              fr'RelativePosition "מיקום גריעה ביחס לפני הקרקע" true false false 2 Short 0 5,First,#,{inputs},RelativePosition,-1,-1;' + \
-              fr'SubstractionType "סוג גריעה" true false false 2 Short 0 5,First,#,{inputs},SubstractionType,-1,-1;' + \
-              fr'Parcel3DUniqueID "מזהה חלקה תלת-ממדית" true true false 38 Guid 0 0,First,#,{inputs},Parcel3DUniqueID,-1,-1;' + \
-              fr'Parcel2DUniqueID "מזהה חלקה קרקעית" true true false 38 Guid 0 0,First,#,{inputs},Parcel2DUniqueID,-1,-1;' + \
-              fr'BlockUniqueID "מזהה גוש" true true false 38 Guid 0 0,First,#,{inputs},BlockUniqueID,-1,-1;' + \
-              fr'CreatedByRecord "מזהה תהליך יוצר" true true false 38 Guid 0 0,First,#,{inputs},CreatedByRecord,-1,-1;' + \
-              fr'UpdatedByRecord "מזהה תהליך מעדכן" true true false 38 Guid 0 0,First,#;' + \
-              fr'RetiredByRecord "מזהה תהליך מבטל" true true false 38 Guid 0 0,First,#;' + \
-              fr'CreateProcessType "סוג תהליך יוצר" true false false 2 Short 0 5,First,#,{inputs},CreateProcessType,-1,-1;' + \
-              fr'CancelProcessType "סוג תהליך מבטל" true true false 2 Short 0 5,First,#'
+    FM: FieldMappings = compile_field_map(inputs, get_layer('גריעות'),
+                                          {field: field for field in ['GlobalID', 'SubstractionNumber', 'Parcel3DNumber', 'Parcel2DNumber', 'BlockNumber',
+                                                                      'SubBlockNumber', 'StatedVolume', 'ProjectedArea', 'UpperLevel', 'LowerLevel',
+                                                                      'RelativePosition', 'SubstractionType', 'Parcel3DUniqueID', 'Parcel2DUniqueID',
+                                                                      'BlockUniqueID', 'CreatedByRecord', 'CreateProcessType']})
     Append(inputs= inputs, target= get_layer('גריעות'), schema_type="NO_TEST", field_mapping= FM, feature_service_mode="USE_FEATURE_SERVICE_MODE")
 
     # ProjectedSubstractions:
     inputs: str = fr"{home_gdb}\new_substractions_projections"
-    FM: str = fr'SubstractionUniqueID "מזהה גריעה" true true false 38 Guid 0 0,First,#,{inputs},SubstractionUniqueID,-1,-1;' + \
-              fr'GlobalID "מזהה היטל גריעה" false false true 38 GlobalID 0 0,First,#,{inputs},GlobalID,-1,-1'
+    FM: FieldMappings = compile_field_map(inputs, get_layer('היטלי גריעות'), {'SubstractionUniqueID': 'SubstractionUniqueID', 'GlobalID': 'GlobalID'})
     Append(inputs=inputs, target=get_layer('היטלי גריעות'), schema_type="NO_TEST", field_mapping=FM, feature_service_mode="USE_FEATURE_SERVICE_MODE")
 
     # Closers
@@ -418,67 +388,92 @@ def append_parcels3D_and_substractions_data() -> None:
     AddMessage(f'{timestamp()} | ✔️ New features loaded to the active layers')
 
 
-def start_task_RetireAndCreateCadaster3D(ProcessName: str|None) -> None:
+def retire_3D_features(ProcessName: str) -> None:
     """
-    Workflow for starting the Create And Retire Cadaster 3D task.
+    Retires the 3D parcels, substractions and 3D border points replaced by the process.
 
     Parameters:
         ProcessName (str): The name of the cadaster process.
     """
+    retire_3D_parcels_and_substractions(ProcessName)
 
-    set_priority()
-
-    # Whether the process is executed from CMS or independent task.
-    ProcessName: str = get_aprx_name() if not ProcessName else ProcessName
-
-    qualified: bool = validation_set('RetireAndCreateCadaster3D', ProcessName)
+    retire_3D_points(ProcessName)
 
-    if qualified:
 
-        shelf: str = create_shelf(ProcessName)  # Will skip if executed from CMS
+def create_3D_features(ProcessName: str) -> None:
+    """
+    Loads the new 3D parcels, substractions and their projections into the fabric.
 
-        open_version(ProcessName)
+    Parameters:
+        ProcessName (str): The name of the cadaster process.
+    """
+    load_new_3D_parcels(ProcessName)
+    # TODO: add load_intermediate_3D_parcels(?) if the process is not only creates.
 
-        startfile(fr'{shelf}')
+    load_new_projected_3D_parcels()
+    # TODO: add load_intermediate_3D_parcels_projections(?) if the process is not only creates.
 
-        if creating_record_is_duplicated(ProcessName):
-            update_record_status(ProcessName, new_status=5)  # מעדכן סטאטוס לרשומה
-        else:
-            load_to_records(ProcessName)
+    load_new_substractions(ProcessName)
 
-        display_process_data(ProcessName)
+    load_new_projected_substractions(ProcessName)
 
-        activate_record(ProcessName)  # Known issue: The records layer is not updated until the end of the execution of GP tool.
+    append_parcels3D_and_substractions_data()
 
-        zoom_to_aoi()
 
-        # Retire
-        retire_3D_parcels_and_substractions(ProcessName)
+def start_task_RetireAndCreateCadaster3D(ProcessName: str|None, Resume: bool = True) -> None:
+    """
+    Workflow for starting the Create And Retire Cadaster 3D task.
+    The workflow runs as a pipeline of stages checkpointed in the process shelf, a re-run skips the stages completed
+    by a previous run as long as the process data did not change since.
 
-        retire_3D_points(ProcessName)
+    Parameters:
+        ProcessName (str): The name of the cadaster process.
+        Resume (bool): Skip the stages completed by a previous run. False runs the whole workflow again. Default is True.
+    """
 
-        # Create
-        load_new_3D_parcels(ProcessName)
-        # TODO: add load_intermediate_3D_parcels(?) if the process is not only creates.
+    set_priority()
 
-        load_new_projected_3D_parcels()
-        # TODO: add load_intermediate_3D_parcels_projections(?) if the process is not only creates.
+    # Whether the process is executed from CMS or independent task.
+    ProcessName: str = get_aprx_name() if not ProcessName else ProcessName
 
-        load_new_substractions(ProcessName)
+    qualified: bool = validation_set('RetireAndCreateCadaster3D', ProcessName)
 
-        load_new_projected_substractions(ProcessName)
+    if qualified:
 
-        append_parcels3D_and_substractions_data()
+        shelf: str = create_shelf(ProcessName)  # Will skip if executed from CMS
 
-        load_new_3D_points(ProcessName)
-        # TODO: add load_intermediate_3D_points(?) if the process is not only creates.
+        open_version(ProcessName)
 
-        # TODO: add modify_3D_preserved_points(?) for existing points (Role=3) to update their attributes.
+        if not is_headless():
+            startfile(fr'{shelf}')
+
+        process_data: list[tuple[str, str]] = process_inputs(ProcessName, '3D')
+
+        # Every stage is committed on its own, a failing stage is rolled back and the next run resumes from it
+        stages: list[dict[str, Any]] = [
+            stage('record', lambda: load_or_update_record(ProcessName), inputs=process_data, outputs=['CadasterRecordsBorders']),
+            stage('display', lambda: display_process_data(ProcessName), always=True, transaction=False),
+            stage('activate', lambda: activate_record(ProcessName), always=True, transaction=False),  # Known issue: The records layer is not updated until the end of the execution of GP tool.
+            stage('zoom', zoom_to_aoi, always=True, transaction=False),
+            stage('retire', lambda: retire_3D_features(ProcessName),
+                  inputs=process_data + ['CadasterRecordsBorders'], outputs=['Parcels3D', 'Substractions', 'BorderPoints3D']),
+            stage('create', lambda: create_3D_features(ProcessName),  # Appends the 3D data with geoprocessing tools, not rolled back on failure
+                  inputs=process_data + ['CadasterRecordsBorders'], outputs=['Parcels3D', 'Substractions', 'ProjectedParcels3D', 'ProjectedSubstractions'],
+                  resumable=False),
+            stage('create points', lambda: load_new_3D_points(ProcessName),
+                  inputs=process_data + ['CadasterRecordsBorders'], outputs=['BorderPoints3D'])]
+            # TODO: add load_intermediate_3D_points(?) if the process is not only creates.
+            # TODO: add modify_3D_preserved_points(?) for existing points (Role=3) to update their attributes.
+
+        run_pipeline('RetireAndCreateCadaster3D', ProcessName, stages, Resume)
 
         # Closers
         reopen_map()
         zoom_to_aoi()
 
+        del shelf, process_data, stages
+
 
 if __name__ == "__main__":
-    start_task_RetireAndCreateCadaster3D(ProcessName= GetParameterAsText(0))
+    dispatch('StartTaskRetireAndCreateCadaster3D', ProcessName= GetParameterAsText(0), Resume= GetParameterAsText(1).lower() != 'false',
+             started= ScriptStart, fallback= start_task_RetireAndCreateCadaster3D)
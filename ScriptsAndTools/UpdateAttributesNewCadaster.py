@@ -1,15 +1,14 @@
-import pandas as pd
 import os
 from Utils.Configs import CNFG
-from Utils.Helpers import delete_file, get_ProcessType, get_ProcessGUID, get_RecordGUID, remove_intermediate_vertices, start_editing, stop_editing, get_BlockGUID,get_layer, reopen_map, get_ActiveRecord
+from Utils.Helpers import get_project, get_map, delete_file, get_ProcessType, get_ProcessGUID, get_RecordGUID, remove_intermediate_vertices, start_editing, stop_editing, edit_session, bulk_update, chunked_in_clauses, select_by_values, get_BlockGUID,get_layer, reopen_map, get_ActiveRecord
 from Utils.NewCadasterHelpers import insert_new_fronts, insert_new_border_points, get_ProcessName, get_RecordGUID_NewCadaster
 from Utils.ValidationsNewCadaster import layer_exists
+from Utils.PointMatching import get_tolerance, index_points, join_points, build_endpoint_index, resolve_endpoint
+from Utils.FrontsTopology import split_fronts_at_points, classify_fronts, find_collinear_chains
 from arcpy import AddMessage, AddError, AddWarning, GetParameterAsText, PointGeometry, env, CopyFeatures_management as CopyFeatures, Delete_management as Delete, Describe
-from arcpy.mp import ArcGISProject
-from arcpy.da import SearchCursor, UpdateCursor
-from arcpy.management import SelectLayerByLocation as SelectByLocation, SelectLayerByAttribute as SelectByAttribute,GetCount, SplitLineAtPoint, Append, CreateFeatureclass, DeleteIdentical, PointsToLine
+from arcpy.da import SearchCursor, UpdateCursor, InsertCursor
+from arcpy.management import SelectLayerByLocation as SelectByLocation, SelectLayerByAttribute as SelectByAttribute,GetCount, Append, PointsToLine
 from arcpy.parcel import BuildParcelFabric
-from arcpy.edit import Snap
 from arcpy.parcel import MergeCollinearParcelBoundaries
 from Utils.TypeHints import *
 
@@ -25,8 +24,8 @@ def build_record(ProcessName: str) -> None:
 
     AddMessage(f'\n ⭕ Building record {ProcessName} \n')
     #records_layer = get_layer('גבולות רישומים')
-    #records_layer = ArcGISProject("CURRENT").listMaps()[0].listLayers('רישומים')[0]
-    records_layer = ArcGISProject("CURRENT").activeMap.listLayers('רישומים')[0]
+    #records_layer = get_project().listMaps()[0].listLayers('רישומים')[0]
+    records_layer = get_map().listLayers('רישומים')[0]
     try:
         BuildParcelFabric(records_layer, extent="DEFAULT", record_name = ProcessName)
         AddMessage(f"    ✔ Record {ProcessName} Built successfully \n ")
@@ -47,25 +46,51 @@ def print_list(list_string):
         item = item.strip().strip("'")  # Remove surrounding whitespace and single quotes
         AddMessage(f"            {item}")  
     
-def merge_collinear_fronts(TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster'):
+def merge_collinear_fronts(TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster', offset_tolerance:float = 0.01, dry_run:bool = False) -> list[list[str]]:
     """
-        Merges collinear fronts
+        Merges collinear fronts overlapping with the process border.
+        The merge groups are found in memory: chains of fronts meeting at border points that are not process points
+        and that only these two fronts end at, where the chain stays within the offset tolerance of a straight line.
+        With dry_run=True the groups are only reported and no edits are made.
+        Returns the merge groups (lists of fronts GlobalIDs).
     """
     
     record_fronts_layer = get_layer('חזיתות')
     process_borders_layer = get_layer('גבול תכנית')
+    process_points_layer = get_layer('נקודות ביסוס')
+    AddMessage('\n ⭕ Looking for collinear fronts overlapping with the process border: \n')
+
+    # The points degree is counted on all the fronts touching the process border, only fronts along it are merged
+    tolerance = get_tolerance(record_fronts_layer)
+    SelectByLocation(in_layer=record_fronts_layer,overlap_type="INTERSECT",select_features=process_borders_layer)
+    with SearchCursor(record_fronts_layer, ["GlobalID", "SHAPE@"]) as record_cursor:
+        fronts = {front_guid: front_geometry for front_guid, front_geometry in record_cursor}
     SelectByLocation(in_layer=record_fronts_layer,overlap_type="SHARE_A_LINE_SEGMENT_WITH",select_features=process_borders_layer)
-    num_before = int(GetCount(record_fronts_layer).getOutput(0))
-    AddMessage('\n ⭕ Looking for duplicate fronts overlapping with the process border: \n')
-    MergeCollinearParcelBoundaries(in_parcel_boundaries=record_fronts_layer, offset_tolerance="0.01 Meters")
-    SelectByLocation(in_layer=record_fronts_layer,overlap_type="SHARE_A_LINE_SEGMENT_WITH",select_features=process_borders_layer)
-    num_after = int(GetCount(record_fronts_layer).getOutput(0))
-    SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
+    with SearchCursor(record_fronts_layer, ["GlobalID"]) as record_cursor:
+        candidates = {row[0] for row in record_cursor}
+
+    SelectByAttribute(process_points_layer, "CLEAR_SELECTION")
+    process_points = index_points(process_points_layer, [], tolerance=tolerance)
+    merge_groups = find_collinear_chains(fronts, process_points, offset_tolerance, tolerance, candidates)
+
+    for counter, group in enumerate(merge_groups, start=1):
+        AddMessage(f"    ({counter}/{len(merge_groups)}) {len(group)} fronts can be merged into one front:")
+        print_list(','.join(group))
 
-    if num_before != num_after:
-        AddMessage(f'    ✔ {num_before - num_after} duplicate fronts were removed \n')
+    if not merge_groups:
+        AddMessage(f'    ✔ No collinear fronts were found \n')
+    elif dry_run:
+        AddMessage(f'    ✔ Dry run: {sum(len(group) - 1 for group in merge_groups)} fronts would be removed, no changes were made \n')
     else:
-        AddMessage(f'    ✔ No duplicate fronts were found \n')
+        # Every group is merged on its own selection, so the fabric tool merges exactly the planned chain and never joins two groups
+        for group in merge_groups:
+            select_by_values(record_fronts_layer, 'GlobalID', group)
+            MergeCollinearParcelBoundaries(in_parcel_boundaries=record_fronts_layer, offset_tolerance=f"{offset_tolerance} Meters")
+        AddMessage(f'    ✔ {sum(len(group) - 1 for group in merge_groups)} collinear fronts were merged \n')
+
+    SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
+    del [record_fronts_layer, process_borders_layer, process_points_layer, fronts, candidates, process_points]
+    return merge_groups
 
 '''
 def append_unmatched_fronts(ProcessName,fronts_list):
@@ -177,33 +202,6 @@ def append_unmatched_points(ProcessName,points_list):
 '''
 
 
-def are_identical(record_fronts):
-    """
-        Checks if the selected record fronts have the same geometry among themselves
-    """
-    geometries = []
-    with SearchCursor(record_fronts, ["SHAPE@"]) as row:
-        for temp_row in row:
-            geometries.append(temp_row[0])
-
-    num_of_lines = len(geometries)
-    for i in range(num_of_lines-1):
-        if not geometries[i].equals(geometries[i+1]):
-            return False
-    return True
-    
-def is_passing_through_border_points(process_front, record_points):
-    """
-        Checks if the selected process front is passing through border points
-    """
-    contained_points = SelectByLocation(in_layer=record_points,overlap_type="COMPLETELY_WITHIN",select_features=process_front,selection_type="NEW_SELECTION")
-    num_of_contained_points = int(GetCount(contained_points).getOutput(0))
-
-    if num_of_contained_points > 0:
-        return True
-    return False
-
-
 def break_fronts_at_border_points(ProcessName:str, TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster') -> None:
     """
         Breaking existing fronts which are crossing via border points matching the process points
@@ -235,43 +233,32 @@ def break_fronts_at_border_points(ProcessName:str, TaskType:str = 'CreateNewCada
 
         AddMessage(f"    {num_of_fronts_for_retirment} Fronts will be retired and replaced with shorter collinear fronts:")
         RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
-        editor = start_editing(CNFG.ParcelFabricDatabase)
-        sr = Describe(record_fronts_layer).spatialReference
-        new_fronts = CreateFeatureclass("memory","new_fronts",template=record_fronts_layer,spatial_reference=sr)
-        counter = 1
-        with UpdateCursor(fronts_for_retirment, ["SHAPE@","GlobalID", "RetiredByRecord"]) as old_fronts_cursor:
-            for row in old_fronts_cursor:
-                #splitted_line = SplitLineAtPoint(in_features=row[0],point_features=matching_record_points,out_feature_class=r"memory\splited_line")
-                splitted_line = SplitLineAtPoint(in_features=row[0],point_features=matching_record_points,out_feature_class=r"memory\splited_line",search_radius="0.1 Meters")
-                #num_of_parts = int(GetCount(splitted_line).getOutput(0))
-                Append(inputs = splitted_line, target = new_fronts,schema_type="NO_TEST")
-
-
-                row[2] = RecordGUID
-                old_fronts_cursor.updateRow(row)
-                AddMessage(f"    ({counter}/{num_of_fronts_for_retirment}) Front {row[1]} was retired and will be replaced by shorter fronts")
-                counter += 1
-
-
-        with UpdateCursor(new_fronts, ["GlobalID","CreatedByRecord","LineType"]) as new_fronts_cursor:
-            for row in new_fronts_cursor:
-                row[1] = RecordGUID
-                row[2] = 1
-                new_fronts_cursor.updateRow(row)
-
-        Snap(in_features=new_fronts,snap_environment=fr"'{process_fronts_layer}' END '0.1 Meters'")
-
-        SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
-        DeleteIdentical(in_dataset=new_fronts,fields="Shape",xy_tolerance=None,z_tolerance=0)
-        Append(inputs = new_fronts, target = record_fronts_layer,schema_type="NO_TEST")
-        num_of_new_fronts = int(GetCount(new_fronts).getOutput(0))
-        AddMessage(f"    {num_of_new_fronts} new fronts were added")
-        reopen_map()
-        stop_editing(editor)
+        split_points = [row[0] for row in SearchCursor(record_points_layer, ["SHAPE@XY"])]
+        tolerance = get_tolerance(record_fronts_layer)
+        has_z = Describe(record_fronts_layer).hasZ
+
+        with edit_session(CNFG.ParcelFabricDatabase):
+            retired_fronts = []
+            counter = 1
+            with UpdateCursor(fronts_for_retirment, ["SHAPE@","GlobalID", "RetiredByRecord"]) as old_fronts_cursor:
+                for row in old_fronts_cursor:
+                    retired_fronts.append(row[0])
+                    row[2] = RecordGUID
+                    old_fronts_cursor.updateRow(row)
+                    AddMessage(f"    ({counter}/{num_of_fronts_for_retirment}) Front {row[1]} was retired and will be replaced by shorter fronts")
+                    counter += 1
+
+            # split all the retired fronts at the border points within 0.1 meters in memory, identical children are kept once
+            new_fronts = split_fronts_at_points(retired_fronts, split_points, radius=0.1, tolerance=tolerance, has_z=has_z)
+
+            SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
+            with InsertCursor(record_fronts_layer, ["SHAPE@", "CreatedByRecord", "LineType"]) as new_fronts_cursor:
+                for shape in new_fronts:
+                    new_fronts_cursor.insertRow((shape, RecordGUID, 1))
+
+        AddMessage(f"    {len(new_fronts)} new fronts were added")
         reopen_map()
-        #CopyFeatures(new_fronts,os.path.join(env.workspace, "output"))
-        Delete("memory\new_fronts")
-        Delete("memory\splited_line")
+        del [split_points, retired_fronts, new_fronts]
 
     SelectByAttribute(record_points_layer, "CLEAR_SELECTION")
     SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
@@ -305,11 +292,10 @@ def modify_external_fronts_attributes(ProcessName:str, TaskType:str = 'CreateNew
 
     num_of_process_fronts = int(GetCount(process_fronts_layer).getOutput(0))
 
-    env.preserveGlobalIds = True
-    matching_record_points = SelectByLocation(record_points_layer,"ARE_IDENTICAL_TO",process_points_layer,None,"NEW_SELECTION","NOT_INVERT")
-    matching_record_points = CopyFeatures(matching_record_points,"memory\matching_record_points")
-    env.preserveGlobalIds = False
+    # index the record points matching the process points by their location, to resolve the fronts' end points by a lookup
     SelectByAttribute(record_points_layer, "CLEAR_SELECTION")
+    tolerance = get_tolerance(record_points_layer)
+    endpoint_index = build_endpoint_index(record_points_layer, tolerance=tolerance, restrict_to=index_points(process_points_layer, [], tolerance=tolerance))
     missing_process_points = SelectByLocation(record_points_layer,"INTERSECT",process_borders_layer,None,"NEW_SELECTION","NOT_INVERT")
     missing_process_points = SelectByLocation(missing_process_points,"ARE_IDENTICAL_TO",process_points_layer,None,"REMOVE_FROM_SELECTION","NOT_INVERT")
 
@@ -326,77 +312,54 @@ def modify_external_fronts_attributes(ProcessName:str, TaskType:str = 'CreateNew
     else: #if TaskType == 'ImproveNewCadaster':
         AddMessage('\n ⭕ Modifying base fronts attributes (only for fronts that are along the settled borders): \n')
     
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-
-    counter = 1
-
+    fronts_updates = {}
     collinear_passing_through_record_points = []
     other_collinear = []
     matching_with_duplicates = []
     no_matching_fronts = []
 
-    # Iterate through each line in the process_fronts_layer
-    with SearchCursor(process_fronts_layer, ["SHAPE@"] + process_fields + ["GlobalID"]) as process_cursor:
-        for process_row in process_cursor:
-            process_line_geometry = process_row[0]
-            start_point = process_line_geometry.firstPoint
-            end_point = process_line_geometry.lastPoint
-
-            SelectByLocation(record_fronts_layer, "SHARE_A_LINE_SEGMENT_WITH", process_line_geometry)
-            num_of_record_fronts = int(GetCount(record_fronts_layer).getOutput(0))
-            if num_of_record_fronts==1:
-                with UpdateCursor(record_fronts_layer, ["SHAPE@", "StartPointUniqueID", "EndPointUniqueID"] + record_fields + ["UpdatedByRecord","GlobalID"]) as record_cursor:
-                    for record_row in record_cursor:
-                        record_line_geometry = record_row[0]
-
-                        # Check for full match
-                        if record_line_geometry.equals(process_line_geometry):
-                            # Copy attributes from process_fronts to record_fronts
-                            for i, field in enumerate(record_fields):
-                                record_row[i + 3] = process_row[i + 1]
-
-                            # Set the UpdatedByRecord field with the constant RecordID value
-                            record_row[5] = RecordGuid
-
-                            # Find the StartPointID and EndPointID based on the points in record_points_layer
-                            tempPoint = SelectByLocation(matching_record_points, "ARE_IDENTICAL_TO", PointGeometry(start_point))
-                            start_point_id = None
-                            with SearchCursor(tempPoint, ["GlobalID"]) as points_cursor:
-                                for point_row in points_cursor:
-                                    start_point_id = point_row[0]
-                                    break
-
-                            tempPoint = SelectByLocation(matching_record_points, "ARE_IDENTICAL_TO", PointGeometry(end_point))
-                            end_point_id = None
-                            with SearchCursor(tempPoint, ["GlobalID"]) as points_cursor:
-                                for point_row in points_cursor:
-                                    end_point_id = point_row[0]
-                                    break
-
-                            # Update the StartPointID and EndPointID fields
-                            record_row[1] = start_point_id
-                            record_row[2] = end_point_id
-                            AddMessage(f"    ({counter}/{num_of_process_fronts}) Updated attributes for front {record_row[6]}: \n            StartPointUniqueID: {record_row[1]} EndPointUniqueID: {record_row[2]} \n            UpdatedByRecord: {RecordGuid} Distance: {record_row[3]} Radius: {record_row[4]}")
-                            counter += 1
-                            # Update the row in the record_fronts_layer
-                            record_cursor.updateRow(record_row)
-                            break
-
-                        else:
-                            other_collinear.append(process_row[3])    
-                            
-            elif num_of_record_fronts > 1:
-                if is_passing_through_border_points(process_line_geometry,missing_process_points):
-                    collinear_passing_through_record_points.append(process_row[3])
-                elif are_identical(record_fronts_layer):
-                    matching_with_duplicates.append(process_row[3])
-                else:
-                    other_collinear.append(process_row[3])
-            else:
-                no_matching_fronts.append(process_row[3])
-            SelectByAttribute(matching_record_points, "CLEAR_SELECTION")
+    # Read the border points missing from the process (the current selection), the record fronts and the process fronts once
+    with SearchCursor(record_points_layer, ["SHAPE@XY"]) as points_cursor:
+        unmatched_points = [row[0] for row in points_cursor]
 
-    stop_editing(editor)
+    SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
+    with SearchCursor(record_fronts_layer, ["GlobalID", "SHAPE@"]) as record_cursor:
+        record_fronts = {record_guid: record_line_geometry for record_guid, record_line_geometry in record_cursor}
+
+    with SearchCursor(process_fronts_layer, ["GlobalID", "SHAPE@"] + process_fields) as process_cursor:
+        process_rows = {row[0]: row[1:] for row in process_cursor}
+
+    # Classify all the process fronts against a segment index of the record fronts in a single pass
+    classification = classify_fronts({guid: row[0] for guid, row in process_rows.items()}, record_fronts, unmatched_points, tolerance)
+
+    for process_guid, (category, record_guids) in classification.items():
+        process_line_geometry = process_rows[process_guid][0]
+
+        if category == 'exact':
+            # Copy attributes from process_fronts to record_fronts, set the UpdatedByRecord field with the constant RecordID value
+            # and find the StartPointID and EndPointID based on the points in record_points_layer
+            fronts_updates[record_guids[0]] = {"StartPointUniqueID": resolve_endpoint(endpoint_index, process_line_geometry.firstPoint, tolerance),
+                                               "EndPointUniqueID": resolve_endpoint(endpoint_index, process_line_geometry.lastPoint, tolerance),
+                                               **{field: process_rows[process_guid][i + 1] for i, field in enumerate(record_fields)},
+                                               "UpdatedByRecord": RecordGuid}
+        elif category == 'through_points':
+            collinear_passing_through_record_points.append(process_guid)
+        elif category == 'duplicated':
+            matching_with_duplicates.append(process_guid)
+        elif category == 'partial':
+            other_collinear.append(process_guid)
+        else:
+            no_matching_fronts.append(process_guid)
+
+    del [record_fronts, process_rows, unmatched_points, classification]
+
+    # Update all the fully matched record fronts in one cursor
+    SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
+    change_log = bulk_update(record_fronts_layer, "GlobalID", fronts_updates)
+    for counter, (record_guid, changes) in enumerate(change_log, start=1):
+        values = {field: new for field, (_, new) in changes.items()}
+        AddMessage(f"    ({counter}/{num_of_process_fronts}) Updated attributes for front {record_guid}: \n            StartPointUniqueID: {values['StartPointUniqueID']} EndPointUniqueID: {values['EndPointUniqueID']} \n            UpdatedByRecord: {RecordGuid} Distance: {values['Distance']} Radius: {values['Radius']}")
+    del [fronts_updates, change_log, endpoint_index]
  
 
 
@@ -407,8 +370,7 @@ def modify_external_fronts_attributes(ProcessName:str, TaskType:str = 'CreateNew
         AddMessage(f"    ⚠️ For {num_of_fronts} process fronts no matching results were found, these fronts will be appended:\n ")
         print_list(fronts_list)
         #append_unmatched_fronts(ProcessName,fronts_list)
-        query = fr'GlobalID IN ({fronts_list})'
-        num_of_appended_features = insert_new_fronts(ProcessName,query)
+        num_of_appended_features = sum(insert_new_fronts(ProcessName, clause) for clause in chunked_in_clauses('GlobalID', no_matching_fronts))
         if not num_of_appended_features:
             AddWarning(fr'    ⚠️ Failed to load {num_of_fronts} new fronts')
         else:
@@ -442,9 +404,8 @@ def modify_external_fronts_attributes(ProcessName:str, TaskType:str = 'CreateNew
     SelectByAttribute(process_fronts_layer, "CLEAR_SELECTION")
     SelectByAttribute(process_points_layer, "CLEAR_SELECTION")
     SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
-    del [process_fronts_layer,record_fronts_layer,matching_record_points]
+    del [process_fronts_layer,record_fronts_layer]
     del [process_points_layer,record_points_layer,process_borders_layer,missing_process_points]
-    Delete("memory\matching_record_points")
     AddMessage(f"    ✔ The fronts modifying process is complete.")
 
 
@@ -465,52 +426,29 @@ def modify_external_points_attributes(ProcessName:str, TaskType:str = 'CreateNew
         SelectByAttribute(blocks_layer, "CLEAR_SELECTION")
         del [blocks_layer,settled_blocks]
 
-    num_of_process_points = int(GetCount(process_points_layer).getOutput(0))
-
-    env.preserveGlobalIds = True
-    matching_record_points = SelectByLocation(record_points_layer,"ARE_IDENTICAL_TO",process_points_layer,None,"NEW_SELECTION","NOT_INVERT")
-    matching_record_points = CopyFeatures(matching_record_points,"memory\matching_record_points")
-    SelectByAttribute(record_points_layer, "CLEAR_SELECTION")
-    env.preserveGlobalIds = False
-    no_match_points = []
-    more_than_one_match_points = []
-    counter = 1
-
     if TaskType == 'CreateNewCadaster':
         AddMessage('\n ⭕ Modifying base points attributes: \n')
     else: #if TaskType == 'ImproveNewCadaster':
         AddMessage('\n ⭕ Modifying base points attributes (only for points that are along the settled borders): \n')
 
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-    # Iterate through each point in the process_points layer
-    with SearchCursor(process_points_layer, ["SHAPE@", "PointName", "Class","GlobalID"]) as process_cursor:
-        for process_row in process_cursor:
-            process_point_geometry = process_row[0]
-            point_name = process_row[1]
-            point_class = process_row[2]
-
-            # Select the matching point in the record_points layer by location
-            currentRecordPoint = SelectByLocation(matching_record_points, "ARE_IDENTICAL_TO", process_point_geometry)
-            count = int(GetCount(currentRecordPoint).getOutput(0))
-            #count = get_number_of_selections(currentRecordPoint)
-            if count == 0:
-                no_match_points.append(process_row[3])
-                # AddWarning(f"    No matching point found for process point {process_row[3]} ")
-            elif count > 1:
-                more_than_one_match_points.append(process_row[3])
-                #AddWarning(f"    found {count} matching points for process point {process_row[3]}. No updates were made ")
-            else:
-                # Update the matching point in the record_points layer
-                with UpdateCursor(currentRecordPoint, ["Name", "Class","GlobalID"]) as record_cursor:
-                    for record_row in record_cursor:
-                        record_row[0] = point_name  # Copy point_name
-                        record_row[1] = point_class  # Copy class
-                        AddMessage(f"    ({counter}/{num_of_process_points}) Updated border point {record_row[2]} with point name {point_name} and class {point_class}")
-                        counter += 1
-                        record_cursor.updateRow(record_row)
-            
-            SelectByAttribute(currentRecordPoint, "CLEAR_SELECTION")
+    # Hash-join the process points to the record points by their snapped coordinates (one pass over each layer)
+    SelectByAttribute(record_points_layer, "CLEAR_SELECTION")
+    tolerance = get_tolerance(record_points_layer)
+    process_index = index_points(process_points_layer, ["GlobalID", "PointName", "Class"], tolerance=tolerance)
+    record_index = index_points(record_points_layer, ["GlobalID"], tolerance=tolerance)
+    partitions = join_points(process_index, record_index)
+    num_of_process_points = sum(len(rows) for rows in process_index.values())
+
+    no_match_points = [process_row[0] for process_row in partitions['none']]
+    more_than_one_match_points = [process_row[0] for process_row in partitions['multi']]
+
+    # Update all the single matched record points in one cursor
+    updates = {record_row[0]: {"Name": process_row[1], "Class": process_row[2]} for process_row, record_row in partitions['single']}
+    change_log = bulk_update(record_points_layer, "GlobalID", updates)
+    for counter, (record_guid, changes) in enumerate(change_log, start=1):
+        AddMessage(f"    ({counter}/{num_of_process_points}) Updated border point {record_guid} with point name {changes['Name'][1]} and class {changes['Class'][1]}")
 
+    del [process_index, record_index, partitions, updates, change_log]
 
     if no_match_points:
         num_of_points = len(no_match_points)
@@ -519,9 +457,7 @@ def modify_external_points_attributes(ProcessName:str, TaskType:str = 'CreateNew
         AddMessage(f"    ⚠️ {num_of_points} process points were not found in the record points layer, these points will be appended:\n")
         print_list(points_list)
         #append_unmatched_points(ProcessName,points_list)
-        query = fr'GlobalID IN ({points_list})'
-
-        num_of_appended_features = insert_new_border_points(ProcessName,query)
+        num_of_appended_features = sum(insert_new_border_points(ProcessName, clause) for clause in chunked_in_clauses('GlobalID', no_match_points))
         if not num_of_appended_features:
             AddWarning(fr'    ⚠️ Failed to load {num_of_points} new border points')
         else:
@@ -536,11 +472,8 @@ def modify_external_points_attributes(ProcessName:str, TaskType:str = 'CreateNew
         AddMessage(f"    ⚠️ {num_of_points} process points have more than one matching point in the record points layer:\n       no changes will be made")
         print_list(points_list)
 
-    #del [process_points_layer,record_points_layer,matching_record_points]
     SelectByAttribute(process_points_layer, "CLEAR_SELECTION")
     del [process_points_layer,record_points_layer]
-    Delete("memory\matching_record_points")
-    stop_editing(editor)
     AddMessage(f"    ✔ The points modifying process is complete.")
     
 
@@ -577,10 +510,10 @@ def modify_new_fronts_attributes(ProcessName:str, Filter:str = 'INTERNAL' or 'EX
 
 
     num_of_new_fronts = int(GetCount(fronts_layer).getOutput(0))
-    env.preserveGlobalIds = True
-    matching_points = CopyFeatures(points_layer,"memory\matching_points")
+    # index the selected points by their location once, the fronts' end points are then resolved by a lookup
+    tolerance = get_tolerance(all_points_layer)
+    endpoint_index = build_endpoint_index(all_points_layer, tolerance=tolerance)
     SelectByAttribute(points_layer, "CLEAR_SELECTION")
-    env.preserveGlobalIds = False
     counter = 1
 
         
@@ -591,51 +524,33 @@ def modify_new_fronts_attributes(ProcessName:str, Filter:str = 'INTERNAL' or 'EX
 
 
 
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-    # Iterate through each line in the fronts feature class
-    with UpdateCursor(fronts_layer, ["SHAPE@", "StartPointUniqueID", "EndPointUniqueID","GlobalID"]) as fronts_cursor:
-        for front_row in fronts_cursor:
-            line_geometry = front_row[0]
-            start_point = line_geometry.firstPoint
-            end_point = line_geometry.lastPoint
-            
-             # Find the exact matching point for the start point
-            selected_points = SelectByLocation(matching_points, "ARE_IDENTICAL_TO", PointGeometry(start_point))
-            start_point_id = None
-            with SearchCursor(selected_points, ["GlobalID"]) as points_cursor:
-                for point_row in points_cursor:
-                    start_point_id = point_row[0]
-                    break
-
-            SelectByAttribute(selected_points, "CLEAR_SELECTION")
-
-            # Find the exact matching point for the end point
-            selected_points = SelectByLocation(matching_points, "ARE_IDENTICAL_TO", PointGeometry(end_point))
-            end_point_id = None
-            with SearchCursor(selected_points, ["GlobalID"]) as points_cursor:
-                for point_row in points_cursor:
-                    end_point_id = point_row[0]
-                    break
-                SelectByAttribute(selected_points, "CLEAR_SELECTION")
-            # Update the fronts feature class if exact matches are found
-            if start_point_id:
-                front_row[1] = start_point_id
-            if end_point_id:
-                front_row[2] = end_point_id
-
-            AddMessage(f"    ({counter}/{num_of_new_fronts}) Updated front {front_row[3]}:\n            StartPointUniqueID: {start_point_id} EndPointUniqueID: {end_point_id}")
-            counter += 1
-            # Update the row
-            fronts_cursor.updateRow(front_row)
+    with edit_session(CNFG.ParcelFabricDatabase):
+        # Iterate through each line in the fronts feature class
+        with UpdateCursor(fronts_layer, ["SHAPE@", "StartPointUniqueID", "EndPointUniqueID","GlobalID"]) as fronts_cursor:
+            for front_row in fronts_cursor:
+                line_geometry = front_row[0]
+
+                # Find the exact matching points for the start and end points
+                start_point_id = resolve_endpoint(endpoint_index, line_geometry.firstPoint, tolerance)
+                end_point_id = resolve_endpoint(endpoint_index, line_geometry.lastPoint, tolerance)
+
+                # Update the fronts feature class if exact matches are found
+                if start_point_id:
+                    front_row[1] = start_point_id
+                if end_point_id:
+                    front_row[2] = end_point_id
+
+                AddMessage(f"    ({counter}/{num_of_new_fronts}) Updated front {front_row[3]}:\n            StartPointUniqueID: {start_point_id} EndPointUniqueID: {end_point_id}")
+                counter += 1
+                # Update the row
+                fronts_cursor.updateRow(front_row)
             
-    stop_editing(editor)
     if Filter == 'EXTERNAL':
         AddMessage(f"    ✔ The new external fronts modifying process is complete.")
     elif Filter == 'INTERNAL':
         AddMessage(f"    ✔ The new internal fronts modifying process is complete.")
     
-    del [fronts_layer, points_layer]
-    Delete("memory\matching_points")
+    del [fronts_layer, points_layer, endpoint_index]
 
 def update_attributes_new_cadaster(ProcessName:str, TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster') -> None:
     #merge_collinear_fronts(TaskType)
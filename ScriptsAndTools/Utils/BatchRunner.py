@@ -0,0 +1,208 @@
+import os
+import sys
+import csv
+import shutil
+import datetime as dt
+import multiprocessing
+from importlib import import_module
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+from Utils.TypeHints import *
+from Utils.Configs import CNFG
+from Utils.Helpers import timestamp, use_project, get_project, get_ActiveRecord, AddTableMessage
+from arcpy import AddMessage, AddWarning, Exists
+from arcpy.management import CreateFileGDB, GetCount
+
+
+# The task pipelines the batch runs: task: (start module, start function, start arguments, update attributes module)
+_Pipelines: dict[str, tuple[str, str, dict[str, Any], str]] = {
+    'ImproveCurrentCadaster': ('StartTaskImproveCurrentCadaster', 'start_task_ImproveCurrentCadaster', {'Independent': True, 'Report': False}, 'UpdateAttributesImproveCurrentCadaster'),
+    'RetireAndCreateCadaster': ('StartTaskRetireAndCreateCadaster', 'start_task_RetireAndCreateCadaster', {'Independent': True, 'Report': False}, 'UpdateAttributesRetireAndCreateCadaster'),
+    'RetireAndCreateCadaster3D': ('StartTaskRetireAndCreateCadaster3D', 'start_task_RetireAndCreateCadaster3D', {}, 'UpdateAttributesRetireAndCreateCadaster3D')}
+
+# The QA outputs written by EvaluateAOI into the default geodatabase, counted for the batch report
+_QAOutputs: list[str] = ['GapsAndOverlaps', 'AdjacentPoints', 'DisconnectedPoints', 'DeviatedAreaParcels', 'RedundantVertices']
+
+
+def prepare_workspace(ProcessName: str, aprx_path: str, batch_folder: str) -> str:
+    """
+    Creates the scratch workspace of a process: a copy of the project (named by the process, as the CMS names it)
+    with its own default file geodatabase, so parallel workers never share outputs.
+
+    Parameters:
+        ProcessName (str): The name of the process.
+        aprx_path (str): The path to the template project.
+        batch_folder (str): The folder of the batch run.
+
+    Returns:
+        str: The path to the project copy.
+    """
+    shelf: str = ProcessName.replace('/', '_')
+    scratch: str = os.path.join(batch_folder, shelf)
+    os.makedirs(scratch, exist_ok=True)
+
+    project_copy: str = os.path.join(scratch, f'{shelf}.aprx')
+    shutil.copyfile(aprx_path, project_copy)
+    if not Exists(os.path.join(scratch, 'Scratch.gdb')):
+        CreateFileGDB(scratch, 'Scratch.gdb')
+
+    use_project(project_copy)
+    get_project().defaultGeodatabase = os.path.join(scratch, 'Scratch.gdb')
+    get_project().save()
+
+    return project_copy
+
+
+def count_qa_results() -> dict[str, int]:
+    """ Returns the feature count of every QA output in the default geodatabase of the project (0 if it was not created). """
+    home_gdb: str = get_project().defaultGeodatabase
+    return {name: int(GetCount(fr'{home_gdb}\{name}')[0]) if Exists(fr'{home_gdb}\{name}') else 0 for name in _QAOutputs}
+
+
+def run_process(ProcessName: str, task: str, aprx_path: str, batch_folder: str, user_name: str, password: str, post: bool = True) -> dict[str, Any]:
+    """
+    Runs the task pipeline of one process in a worker: StartTask → UpdateAttributes → EvaluateAOI → EndTask,
+    on a scratch copy of the project. Opening the task creates the branch version of the process, so every worker
+    edits its own version. A failing stage stops the pipeline of the process, the other processes are not affected.
+
+    Parameters:
+        ProcessName (str): The name of the process.
+        task (str): The task type, a key of the pipelines registry.
+        aprx_path (str): The path to the template project.
+        batch_folder (str): The folder of the batch run.
+        user_name (str): The name of the user in ArcGIS Portal (for EndTask).
+        password (str): The password for the given user.
+        post (bool): Run EndTask to reconcile and post the version. False leaves the version open for review. Default is True.
+
+    Returns:
+        dict[str, Any]: The process result: status, failed stage, error, seconds per stage, version and QA counts.
+    """
+    start_module, start_function, start_kwargs, update_module = _Pipelines[task]
+    result: dict[str, Any] = {'ProcessName': ProcessName, 'task': task, 'status': 'done', 'stage': None, 'error': None,
+                              'version': None, 'seconds': {}, 'qa': {}, 'pid': os.getpid()}
+
+    def EvaluateAOI() -> None:
+        import_module('EvaluateAOI').EvaluateAOI(qa_extent='Record', validate_validation=False, validate_volumetric_overlaps=False)
+        result['qa'] = count_qa_results()
+
+    def EndTask() -> None:
+        import_module('EndTask').EndTask(user_name, password, reinitializer=False)
+
+    stages: list[tuple[str, Callable[[], Any]]] = [
+        ('workspace', lambda: prepare_workspace(ProcessName, aprx_path, batch_folder)),
+        ('start', lambda: getattr(import_module(start_module), start_function)(ProcessName=ProcessName, **start_kwargs)),
+        ('update attributes', lambda: import_module(update_module).update_attributes()),
+        ('evaluate', EvaluateAOI)] + ([('end', EndTask)] if post else [])
+
+    for name, step in stages:
+        result['stage'] = name
+        stage_start: float = perf_counter()
+        try:
+            step()
+        except Exception as error:
+            result.update({'status': 'failed', 'error': f'{type(error).__name__}: {error}'})
+            break
+        finally:
+            result['seconds'][name] = round(perf_counter() - stage_start, 1)
+
+        if name == 'start':
+            if get_ActiveRecord() != ProcessName:
+                result.update({'status': 'not qualified', 'error': 'The process did not pass the task validations'})
+                break
+            from Utils.VersionManagement import get_VersionName
+            result['version'] = get_VersionName('רישומים')
+
+    if result['status'] == 'done':
+        result['stage'] = None
+        if not post:
+            result['status'] = 'open'   # The version was not posted, left for review
+
+    return result
+
+
+def run_batch(ProcessNames: list[str], task: str, aprx_path: str, user_name: str, password: str,
+              max_workers: int = 2, post: bool = True) -> str:
+    """
+    Runs the task pipeline for many processes headless, in a pool of worker processes with bounded concurrency.
+    Every process gets its own worker (a fresh interpreter), scratch copy of the project and branch version.
+    The per-process results and QA counts are collected into one CSV report in the library folder.
+
+    Parameters:
+        ProcessNames (list[str]): The names of the processes.
+        task (str): The task type, one of 'ImproveCurrentCadaster', 'RetireAndCreateCadaster', 'RetireAndCreateCadaster3D'.
+        aprx_path (str): The path to the template project (a task project as used by the operators).
+        user_name (str): The name of the user in ArcGIS Portal.
+        password (str): The password for the given user.
+        max_workers (int): The maximal number of processes running at the same time. Default is 2.
+        post (bool): Reconcile and post every version at the end (EndTask). Default is True.
+
+    Returns:
+        str: The report path.
+    """
+    if task not in _Pipelines:
+        raise ValueError(f'The task is {task} but must be one of {list(_Pipelines)}')
+
+    # Inside ArcGIS Pro the interpreter is the application, the workers must be started with the python of the environment
+    if not os.path.basename(sys.executable).lower().startswith('python'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'python.exe'))
+
+    run: str = dt.datetime.now().strftime('%Y%m%d-%H%M%S')
+    batch_folder: str = os.path.join(f'{CNFG.Library}Batch', run)
+    os.makedirs(batch_folder, exist_ok=True)
+    ProcessNames: list[str] = list(dict.fromkeys(name.strip() for name in ProcessNames if name.strip()))
+    workers: int = max(1, min(max_workers, len(ProcessNames)))
+
+    AddMessage(f'\n ⭕ Running {task} for {len(ProcessNames)} processes ({workers} workers):')
+    start: float = perf_counter()
+    results: list[dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        futures: dict[Any, str] = {pool.submit(run_process, name, task, aprx_path, batch_folder, user_name, password, post): name
+                                   for name in ProcessNames}
+        for future in as_completed(futures):
+            try:
+                result: dict[str, Any] = future.result()
+            except Exception as error:   # The worker itself died (i.e. a crash of the interpreter)
+                result: dict[str, Any] = {'ProcessName': futures[future], 'task': task, 'status': 'failed', 'stage': 'worker',
+                                          'error': f'{type(error).__name__}: {error}', 'version': None, 'seconds': {}, 'qa': {}}
+            results.append(result)
+
+            # A completed process does not need its scratch project anymore, a failed one is kept for inspection
+            if result['status'] in ['done', 'open']:
+                shutil.rmtree(os.path.join(batch_folder, result['ProcessName'].replace('/', '_')), ignore_errors=True)
+
+            icon: str = '✔️' if result['status'] in ['done', 'open'] else '❌'
+            AddMessage(f"{timestamp()} | {icon} {result['ProcessName']}: {result['status']}" +
+                       (f" at {result['stage']} ({result['error']})" if result['error'] else ''))
+
+    results.sort(key=lambda r: ProcessNames.index(r['ProcessName']))
+    report: str = write_batch_report(results, os.path.join(batch_folder, f'BatchReport-{run}.csv'))
+
+    failed: list[str] = [r['ProcessName'] for r in results if r['status'] not in ['done', 'open']]
+    AddMessage(f'{timestamp()} | ✔️ Batch finished in {perf_counter() - start:.0f} s, {len(results) - len(failed)} of {len(results)} processes completed')
+    AddTableMessage([[r['ProcessName'], r['status'], r['stage'] or '', sum(r['seconds'].values()), sum(r['qa'].values())] for r in results],
+                    header=['Process', 'Status', 'Stage', 'Seconds', 'QA findings'])
+    if failed:
+        AddWarning(f"{timestamp()} | ⚠️ Failed processes (their scratch projects are kept in {batch_folder}): {', '.join(failed)}")
+    AddMessage(f'{timestamp()} | 💡 Report saved to {report}')
+
+    return report
+
+
+def write_batch_report(results: list[dict[str, Any]], report_path: str) -> str:
+    """
+    Writes the batch results as a CSV report, a row per process with the seconds of every stage and the QA counts.
+
+    Returns:
+        str: The report path.
+    """
+    stages: list[str] = list(dict.fromkeys(stage for r in results for stage in r['seconds']))
+    columns: list[str] = ['ProcessName', 'task', 'status', 'stage', 'error', 'version'] + [f'{s} seconds' for s in stages] + _QAOutputs
+
+    with open(report_path, mode='w', newline='', encoding='utf-8-sig') as report_csv:
+        writer = csv.writer(report_csv)
+        writer.writerow(columns)
+        for r in results:
+            writer.writerow([r.get(c) for c in ['ProcessName', 'task', 'status', 'stage', 'error', 'version']] +
+                            [r['seconds'].get(s, '') for s in stages] + [r['qa'].get(q, '') for q in _QAOutputs])
+
+    return report_path
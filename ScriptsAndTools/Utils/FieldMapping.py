@@ -0,0 +1,227 @@
+from time import perf_counter
+from arcpy import AddWarning, Describe, ListFields, FieldMap, FieldMappings as ArcFieldMappings
+from arcpy.conversion import ExportFeatures
+from arcpy.management import Append, CalculateField, Delete, GetCount
+from Utils.TypeHints import *
+from Utils.Helpers import bulk_insert, query_count
+
+
+_Schemas: dict[str, dict[str, Field]] = {}
+_FieldMappings: dict[tuple[str, str, tuple], FieldMappings] = {}
+
+# From this number of rows `load_rows` appends with the geoprocessing tools instead of the insert cursor,
+# their fixed cost (export, field calculations and Append) pays off only for large loads
+_AppendThreshold: int = 20000
+
+# Field types that can be loaded into each target field type
+_CompatibleTypes: dict[str, set[str]] = {
+    'SmallInteger': {'SmallInteger', 'Integer', 'BigInteger', 'Single', 'Double'},
+    'Integer': {'SmallInteger', 'Integer', 'BigInteger', 'Single', 'Double'},
+    'BigInteger': {'SmallInteger', 'Integer', 'BigInteger', 'Single', 'Double'},
+    'Single': {'SmallInteger', 'Integer', 'BigInteger', 'Single', 'Double'},
+    'Double': {'SmallInteger', 'Integer', 'BigInteger', 'Single', 'Double'},
+    'String': {'SmallInteger', 'Integer', 'BigInteger', 'Single', 'Double', 'String', 'Date', 'Guid', 'GlobalID'},
+    'Date': {'Date'},
+    'Guid': {'Guid', 'GlobalID', 'String'},
+    'GlobalID': {'Guid', 'GlobalID'}}
+
+# The CalculateField type of a new field holding a value of each target field type
+_CalculateTypes: dict[str, str] = {'SmallInteger': 'SHORT', 'Integer': 'LONG', 'BigInteger': 'BIGINTEGER', 'Single': 'FLOAT', 'Double': 'DOUBLE',
+                                   'String': 'TEXT', 'Date': 'DATE', 'Guid': 'GUID', 'GlobalID': 'GUID'}
+
+
+def dataset_path(dataset: Layer|str) -> str:
+    """
+    Returns the catalog path of a layer or feature class, used as the key of the schema and field mappings caches.
+
+    Parameters:
+        dataset (Layer|str): The layer, layer name or feature class path.
+    """
+    return Describe(dataset).catalogPath
+
+
+def get_schema(dataset: Layer|str) -> dict[str, Field]:
+    """
+    Returns the fields of a dataset keyed by their name, the schema is listed once per feature class and cached.
+
+    Parameters:
+        dataset (Layer|str): The layer or feature class.
+    """
+    path: str = dataset_path(dataset)
+    if path not in _Schemas:
+        _Schemas[path] = {field.name: field for field in ListFields(dataset)}
+
+    return _Schemas[path]
+
+
+def validate_field_map(source: Layer|str, target: Layer|str, field_map: dict[str, str|list[str]]) -> list[str]:
+    """
+    Checks a field map against the source and target schemas before any data is loaded.
+
+    Parameters:
+        source (Layer|str): The layer or feature class to load from.
+        target (Layer|str): The layer or feature class to load into.
+        field_map (dict[str, str|list[str]]): Target field -> source field (or source fields to join).
+
+    Returns:
+        list[str]: The problems found: missing fields, incompatible types and text fields that may be truncated.
+    """
+    source_schema: dict[str, Field] = get_schema(source)
+    target_schema: dict[str, Field] = get_schema(target)
+    problems: list[str] = []
+
+    for target_name, source_names in field_map.items():
+        target_field: Field|None = target_schema.get(target_name)
+        if target_field is None:
+            problems.append(f"Target field {target_name} does not exist")
+            continue
+
+        for source_name in [source_names] if isinstance(source_names, str) else source_names:
+            source_field: Field|None = source_schema.get(source_name)
+            if source_field is None:
+                problems.append(f"Source field {source_name} (mapped to {target_name}) does not exist")
+            elif source_field.type not in _CompatibleTypes.get(target_field.type, {target_field.type}):
+                problems.append(f"Source field {source_name} ({source_field.type}) cannot be loaded into {target_name} ({target_field.type})")
+            elif target_field.type == 'String' and source_field.type == 'String' and source_field.length > target_field.length:
+                problems.append(f"Source field {source_name} ({source_field.length}) may be truncated in {target_name} ({target_field.length})")
+
+    return problems
+
+
+def compile_field_map(source: Layer|str, target: Layer|str, field_map: dict[str, str|list[str]]|None = None,
+                      join_delimiter: str = '/') -> FieldMappings:
+    """
+    Compiles a FieldMappings object for Append from a plain field map, instead of a hand-written field mapping string.
+    The output fields are taken from the target schema, and the compiled object is cached by (source, target, field map).
+
+    Parameters:
+        source (Layer|str): The layer or feature class to load from.
+        target (Layer|str): The layer or feature class to load into.
+        field_map (dict[str, str|list[str]], optional): Target field -> source field. A list of source fields is joined
+                                                        with the join delimiter. Default maps all the editable fields
+                                                        found by the same name in both datasets.
+        join_delimiter (str, optional): The delimiter of joined source fields. Default is '/'.
+
+    Returns:
+        FieldMappings: The field mappings, target fields that are not mapped are left empty.
+
+    Raises:
+        ValueError: If the field map does not fit the schemas.
+    """
+    source_schema: dict[str, Field] = get_schema(source)
+    target_schema: dict[str, Field] = get_schema(target)
+    if field_map is None:
+        field_map: dict[str, str] = {name: name for name, field in target_schema.items()
+                                     if name in source_schema and field.editable and field.type not in ['OID', 'Geometry']}
+
+    key: tuple[str, str, tuple] = (dataset_path(source), dataset_path(target), tuple((k, v if isinstance(v, str) else tuple(v)) for k, v in field_map.items()))
+    if key in _FieldMappings:
+        return _FieldMappings[key]
+
+    problems: list[str] = validate_field_map(source, target, field_map)
+    errors: list[str] = [problem for problem in problems if 'truncated' not in problem]
+    for problem in problems:
+        if problem not in errors:
+            AddWarning(f'    ⚠️ {problem}')
+    if errors:
+        raise ValueError('Invalid field map:\n' + '\n'.join(errors))
+
+    field_mappings: FieldMappings = ArcFieldMappings()
+    for target_name, source_names in field_map.items():
+        source_names: list[str] = [source_names] if isinstance(source_names, str) else source_names
+        field_map_object: FieldMap = FieldMap()
+        for source_name in source_names:
+            field_map_object.addInputField(source, source_name)
+        if len(source_names) > 1:
+            field_map_object.mergeRule = 'Join'
+            field_map_object.joinDelimiter = join_delimiter
+        field_map_object.outputField = target_schema[target_name]
+        field_mappings.addFieldMap(field_map_object)
+
+    _FieldMappings[key] = field_mappings
+    return field_mappings
+
+
+def copy_with_field_map(source: Layer|str, target: Layer|str, field_map: dict[str, str], where_clause: str|None = None,
+                        constants: dict[str, Any]|None = None, workspace: str|None = None) -> dict[str, int|float]:
+    """
+    Copies rows with cursors using the same field map given to `compile_field_map`, validated against the cached schemas.
+
+    Parameters:
+        source (Layer|str): The layer or feature class to copy from.
+        target (Layer|str): The layer or feature class to insert into.
+        field_map (dict[str, str]): Target field -> source field. 'SHAPE@' -> 'SHAPE@' copies the geometry.
+        where_clause (str, optional): A filter for the copied rows.
+        constants (dict[str, Any], optional): Constant target values for every inserted row.
+        workspace (str, optional): The edited workspace. Default is the parcel fabric database.
+
+    Returns:
+        dict[str, int|float]: The counts and timings returned by `bulk_insert`.
+    """
+    errors: list[str] = [problem for problem in validate_field_map(source, target, {k: v for k, v in field_map.items() if k != 'SHAPE@'})
+                         if 'truncated' not in problem]
+    if errors:
+        raise ValueError('Invalid field map:\n' + '\n'.join(errors))
+
+    return bulk_insert(source, target, {source_name: target_name for target_name, source_name in field_map.items()},
+                       where_clause, constants, workspace=workspace)
+
+
+def load_rows(source: Layer|str, target: Layer|str, field_map: dict[str, str], where_clause: str|None = None,
+              constants: dict[str, Any]|None = None, append_threshold: int = _AppendThreshold, workspace: str|None = None) -> dict[str, int|float|str]:
+    """
+    Loads the rows of a source layer into a target layer by the faster path for their number: small loads are streamed with
+    `bulk_insert`, loads of `append_threshold` rows or more are exported, given their constant values (typed as their target fields) and appended.
+    The rows are counted up to the threshold only.
+
+    Parameters:
+        source (Layer|str): The layer or feature class to load from.
+        target (Layer|str): The layer or feature class to load into.
+        field_map (dict[str, str]): Source field -> target field, as given to `bulk_insert`. 'SHAPE@' is copied by both paths.
+        where_clause (str, optional): A filter for the loaded rows.
+        constants (dict[str, Any], optional): Constant target values for every loaded row.
+        append_threshold (int, optional): The number of rows from which Append is used. Default is 20000.
+        workspace (str, optional): The edited workspace of the cursor path. Default is the parcel fabric database.
+
+    Returns:
+        dict[str, int|float|str]: The counts and timings of `bulk_insert`, and the 'method' used ('cursor' or 'append').
+    """
+    if query_count(source, where_clause, limit=append_threshold) < append_threshold:
+        return {**bulk_insert(source, target, field_map, where_clause, constants, workspace=workspace), 'method': 'cursor'}
+
+    constants: dict[str, Any] = constants or {}
+    target_schema: dict[str, Field] = get_schema(target)
+    start: float = perf_counter()
+    exported: str = str(ExportFeatures(source, r'memory\loaded_rows', where_clause))
+    try:
+        for field, value in constants.items():
+            field_type: str = target_schema[field].type if field in target_schema else 'String'
+            expression: str = repr(value) if field_type in ['String', 'Guid', 'GlobalID', 'Date'] or value is None else str(value)
+            CalculateField(exported, field, expression, 'PYTHON3', field_type=_CalculateTypes.get(field_type, 'TEXT'),
+                           enforce_domains='NO_ENFORCE_DOMAINS')
+        read_seconds: float = perf_counter() - start
+
+        tic: float = perf_counter()
+        field_mappings: FieldMappings = compile_field_map(exported, target, {**{target_name: source_name for source_name, target_name in field_map.items()
+                                                                                if source_name != 'SHAPE@'}, **{field: field for field in constants}})
+        Append(exported, target, 'NO_TEST', field_mappings, feature_service_mode='USE_FEATURE_SERVICE_MODE')
+        inserted: int = int(GetCount(exported)[0])
+    finally:
+        # The export is recreated by every load, its schema must not be reused
+        path: str = dataset_path(exported)
+        _Schemas.pop(path, None)
+        for key in [key for key in _FieldMappings if key[0] == path]:
+            del _FieldMappings[key]
+        Delete(exported)
+
+    return {'inserted': inserted, 'chunks': 1, 'read_seconds': read_seconds, 'insert_seconds': perf_counter() - tic,
+            'total_seconds': perf_counter() - start, 'method': 'append'}
+
+
+def clear_field_mapping_cache() -> None:
+    """
+    Clears the cached schemas and field mappings, called at the start of every load since the exported feature classes
+    are recreated by each run (and the warm worker keeps the cache between runs).
+    """
+    _Schemas.clear()
+    _FieldMappings.clear()
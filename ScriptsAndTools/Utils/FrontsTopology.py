@@ -0,0 +1,442 @@
+from math import floor, sqrt
+from arcpy import Array, Point, PointGeometry, Polyline
+from Utils.TypeHints import *
+from Utils.Helpers import snap_key, snap_lookup
+
+
+def build_point_grid(points: list[tuple[float, float]], cell_size: float = 10.0) -> dict[tuple[int, int], list[tuple[float, float]]]:
+    """
+    Buckets points into a regular grid, so the points near a front are found without scanning the whole point set.
+
+    Parameters:
+        points (list[tuple[float, float]]): The X, Y of the points.
+        cell_size (float, optional): The grid cell size in meters. Default is 10.
+
+    Returns:
+        dict[tuple[int, int], list[tuple[float, float]]]: The points of every non-empty cell.
+    """
+    grid: dict[tuple[int, int], list[tuple[float, float]]] = {}
+    for x, y in points:
+        grid.setdefault((floor(x / cell_size), floor(y / cell_size)), []).append((x, y))
+
+    return grid
+
+
+def grid_candidates(grid: dict[tuple[int, int], list[tuple[float, float]]], cell_size: float,
+                    xmin: float, ymin: float, xmax: float, ymax: float) -> list[tuple[float, float]]:
+    """
+    Returns the points of the grid cells intersecting an envelope.
+
+    Parameters:
+        grid (dict): The grid built by `build_point_grid`.
+        cell_size (float): The grid cell size used to build the grid.
+        xmin, ymin, xmax, ymax (float): The envelope (already expanded by the search radius).
+    """
+    candidates: list[tuple[float, float]] = []
+    for i in range(floor(xmin / cell_size), floor(xmax / cell_size) + 1):
+        for j in range(floor(ymin / cell_size), floor(ymax / cell_size) + 1):
+            candidates.extend(grid.get((i, j), []))
+
+    return candidates
+
+
+def canonical_key(line: Line, tolerance: float = 0.001) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """
+    Returns the snapped endpoints of a line in a direction-independent order, so identical fronts share the same key.
+
+    Parameters:
+        line (Line): The front's geometry.
+        tolerance (float, optional): The snapping tolerance. Default is 0.001.
+    """
+    start: tuple[int, ...] = snap_key((line.firstPoint.X, line.firstPoint.Y), tolerance)
+    end: tuple[int, ...] = snap_key((line.lastPoint.X, line.lastPoint.Y), tolerance)
+    return (start, end) if start <= end else (end, start)
+
+
+def split_straight_line(line: Line, grid: dict[tuple[int, int], list[tuple[float, float]]], cell_size: float,
+                        radius: float = 0.1, tolerance: float = 0.001, has_z: bool = False) -> list[Line]:
+    """
+    Splits a polyline of straight segments at the points within `radius` of its interior.
+    The split parameter of every point is computed along each segment, and the child lines are built directly from the
+    vertices, ending exactly at the split points.
+
+    Parameters:
+        line (Line): The front's geometry (without curves).
+        grid (dict): The split points grid built by `build_point_grid`.
+        cell_size (float): The grid cell size used to build the grid.
+        radius (float, optional): The search radius of the split points in meters. Default is 0.1.
+        tolerance (float, optional): Points closer than the tolerance to a vertex or to a previous split are ignored. Default is 0.001.
+        has_z (bool, optional): Whether the fronts have Z values. Default is False.
+
+    Returns:
+        list[Line]: The child lines, the original line if no split point was found.
+    """
+    pieces: list[list[Point]] = []
+
+    for part in line:
+        vertices: list[Point] = [vertex for vertex in part if vertex]
+        if len(vertices) < 2:
+            continue
+        current: list[Point] = [vertices[0]]
+
+        for a, b in zip(vertices, vertices[1:]):
+            dx, dy = b.X - a.X, b.Y - a.Y
+            length: float = sqrt(dx * dx + dy * dy)
+            if length <= tolerance:
+                current.append(b)
+                continue
+
+            cuts: list[tuple[float, float, float]] = []
+            candidates: list[tuple[float, float]] = grid_candidates(grid, cell_size, min(a.X, b.X) - radius, min(a.Y, b.Y) - radius,
+                                                                    max(a.X, b.X) + radius, max(a.Y, b.Y) + radius)
+            for x, y in candidates:
+                along: float = ((x - a.X) * dx + (y - a.Y) * dy) / length
+                offset: float = abs((x - a.X) * dy - (y - a.Y) * dx) / length
+                if tolerance < along < length - tolerance and offset <= radius:
+                    cuts.append((along, x, y))
+
+            previous: float = 0.0
+            for along, x, y in sorted(cuts):
+                if along - previous <= tolerance:
+                    continue
+                z: float|None = a.Z + (b.Z - a.Z) * along / length if has_z and a.Z is not None and b.Z is not None else None
+                split_point: Point = Point(x, y, z)
+                current.append(split_point)
+                pieces.append(current)
+                current = [split_point]
+                previous = along
+
+            current.append(b)
+
+        pieces.append(current)
+
+    return [Polyline(Array(piece), line.spatialReference, has_z) for piece in pieces if len(piece) > 1]
+
+
+def split_curved_line(line: Line, grid: dict[tuple[int, int], list[tuple[float, float]]], cell_size: float,
+                      radius: float = 0.1, tolerance: float = 0.001) -> list[Line]:
+    """
+    Splits a polyline with curves (arcs) at the points within `radius` of it, by their measures along the line.
+
+    Parameters:
+        line (Line): The front's geometry.
+        grid (dict): The split points grid built by `build_point_grid`.
+        cell_size (float): The grid cell size used to build the grid.
+        radius (float, optional): The search radius of the split points in meters. Default is 0.1.
+        tolerance (float, optional): Splits closer than the tolerance to each other or to the line's ends are ignored. Default is 0.001.
+
+    Returns:
+        list[Line]: The child lines, the original line if no split point was found.
+    """
+    extent: Extent = line.extent
+    measures: list[float] = []
+    for x, y in grid_candidates(grid, cell_size, extent.XMin - radius, extent.YMin - radius, extent.XMax + radius, extent.YMax + radius):
+        point: PointGeometry = PointGeometry(Point(x, y), line.spatialReference)
+        if line.distanceTo(point) <= radius:
+            measure: float = line.measureOnLine(point)
+            if tolerance < measure < line.length - tolerance:
+                measures.append(measure)
+
+    bounds: list[float] = [0.0]
+    for measure in sorted(measures):
+        if measure - bounds[-1] > tolerance:
+            bounds.append(measure)
+    bounds.append(line.length)
+
+    if len(bounds) == 2:
+        return [line]
+
+    return [line.segmentAlongLine(start, end) for start, end in zip(bounds, bounds[1:]) if end - start > tolerance]
+
+
+def split_fronts_at_points(lines: list[Line], points: list[tuple[float, float]], radius: float = 0.1, tolerance: float = 0.001,
+                           has_z: bool = False, cell_size: float = 10.0) -> list[Line]:
+    """
+    Splits fronts at the points passing through them, without geoprocessing calls.
+    The child lines are deduplicated by their canonical endpoints pair (instead of DeleteIdentical on the output).
+
+    Parameters:
+        lines (list[Line]): The fronts' geometries.
+        points (list[tuple[float, float]]): The X, Y of the split points (e.g. border points matching the process points).
+        radius (float, optional): The search radius of the split points in meters. Default is 0.1.
+        tolerance (float, optional): The snapping tolerance. Default is 0.001.
+        has_z (bool, optional): Whether the fronts have Z values. Default is False.
+        cell_size (float, optional): The grid cell size of the points index. Default is 10.
+
+    Returns:
+        list[Line]: The unique child lines of all the fronts.
+    """
+    grid: dict[tuple[int, int], list[tuple[float, float]]] = build_point_grid(points, cell_size)
+    seen: set[tuple[tuple[int, ...], tuple[int, ...]]] = set()
+    children: list[Line] = []
+
+    for line in lines:
+        if line.hasCurves:
+            pieces: list[Line] = split_curved_line(line, grid, cell_size, radius, tolerance)
+        else:
+            pieces: list[Line] = split_straight_line(line, grid, cell_size, radius, tolerance, has_z)
+
+        for piece in pieces:
+            key: tuple[tuple[int, ...], tuple[int, ...]] = canonical_key(piece, tolerance)
+            if key not in seen:
+                seen.add(key)
+                children.append(piece)
+
+    return children
+
+
+def line_segments(line: Line) -> list[tuple[float, float, float, float]]:
+    """
+    Returns the straight segments (x1, y1, x2, y2) of a polyline, curves are densified first.
+
+    Parameters:
+        line (Line): The front's geometry.
+    """
+    if line.hasCurves:
+        line = line.densify('DISTANCE', 1.0, 0.01)
+
+    segments: list[tuple[float, float, float, float]] = []
+    for part in line:
+        vertices: list[Point] = [vertex for vertex in part if vertex]
+        segments.extend((a.X, a.Y, b.X, b.Y) for a, b in zip(vertices, vertices[1:]))
+
+    return segments
+
+
+def build_segment_index(fronts: dict[Any, Line], cell_size: float = 25.0) -> dict[tuple[int, int], list[tuple[Any, tuple[float, float, float, float]]]]:
+    """
+    Builds a grid index of the fronts' segments, every segment is registered in all the cells its envelope covers.
+
+    Parameters:
+        fronts (dict[Any, Line]): The fronts' geometries keyed by their ID (e.g. GlobalID).
+        cell_size (float, optional): The grid cell size in meters. Default is 25.
+
+    Returns:
+        dict[tuple[int, int], list[tuple[Any, tuple[float, float, float, float]]]]: (front ID, segment) pairs per cell.
+    """
+    index: dict[tuple[int, int], list[tuple[Any, tuple[float, float, float, float]]]] = {}
+    for front_id, line in fronts.items():
+        for segment in line_segments(line):
+            x1, y1, x2, y2 = segment
+            for i in range(floor(min(x1, x2) / cell_size), floor(max(x1, x2) / cell_size) + 1):
+                for j in range(floor(min(y1, y2) / cell_size), floor(max(y1, y2) / cell_size) + 1):
+                    index.setdefault((i, j), []).append((front_id, segment))
+
+    return index
+
+
+def segments_overlap(process_segment: tuple[float, float, float, float], other_segment: tuple[float, float, float, float], tolerance: float = 0.001) -> bool:
+    """
+    Checks if two segments are collinear (within the tolerance) and share a part longer than the tolerance,
+    the equivalent of the SHARE_A_LINE_SEGMENT_WITH relationship.
+    """
+    ax, ay, bx, by = process_segment
+    cx, cy, dx, dy = other_segment
+    length: float = sqrt((bx - ax) ** 2 + (by - ay) ** 2)
+    if length <= tolerance:
+        return False
+
+    ux, uy = (bx - ax) / length, (by - ay) / length
+    if abs((cx - ax) * uy - (cy - ay) * ux) > tolerance or abs((dx - ax) * uy - (dy - ay) * ux) > tolerance:
+        return False
+
+    along_c: float = (cx - ax) * ux + (cy - ay) * uy
+    along_d: float = (dx - ax) * ux + (dy - ay) * uy
+    return min(length, max(along_c, along_d)) - max(0.0, min(along_c, along_d)) > tolerance
+
+
+def overlapping_fronts(line: Line, segment_index: dict, cell_size: float = 25.0, tolerance: float = 0.001) -> set[Any]:
+    """
+    Returns the IDs of the indexed fronts sharing a line segment with the given line.
+
+    Parameters:
+        line (Line): The process front's geometry.
+        segment_index (dict): The index built by `build_segment_index`.
+        cell_size (float, optional): The grid cell size used to build the index. Default is 25.
+        tolerance (float, optional): The collinearity and overlap tolerance. Default is 0.001.
+    """
+    matches: set[Any] = set()
+    for segment in line_segments(line):
+        x1, y1, x2, y2 = segment
+        for i in range(floor((min(x1, x2) - tolerance) / cell_size), floor((max(x1, x2) + tolerance) / cell_size) + 1):
+            for j in range(floor((min(y1, y2) - tolerance) / cell_size), floor((max(y1, y2) + tolerance) / cell_size) + 1):
+                for front_id, other_segment in segment_index.get((i, j), []):
+                    if front_id not in matches and segments_overlap(segment, other_segment, tolerance):
+                        matches.add(front_id)
+
+    return matches
+
+
+def passes_through_points(line: Line, grid: dict[tuple[int, int], list[tuple[float, float]]], cell_size: float = 10.0, tolerance: float = 0.001) -> bool:
+    """
+    Checks if any of the gridded points lies on the interior of the line (not on its ends).
+
+    Parameters:
+        line (Line): The process front's geometry.
+        grid (dict): The points grid built by `build_point_grid`.
+        cell_size (float, optional): The grid cell size used to build the grid. Default is 10.
+        tolerance (float, optional): The distance tolerance. Default is 0.001.
+    """
+    ends: list[tuple[int, ...]] = list(canonical_key(line, tolerance))
+    for ax, ay, bx, by in line_segments(line):
+        length: float = sqrt((bx - ax) ** 2 + (by - ay) ** 2)
+        if length <= tolerance:
+            continue
+        for x, y in grid_candidates(grid, cell_size, min(ax, bx) - tolerance, min(ay, by) - tolerance, max(ax, bx) + tolerance, max(ay, by) + tolerance):
+            along: float = ((x - ax) * (bx - ax) + (y - ay) * (by - ay)) / length
+            offset: float = abs((x - ax) * (by - ay) - (y - ay) * (bx - ax)) / length
+            if -tolerance <= along <= length + tolerance and offset <= tolerance and snap_key((x, y), tolerance) not in ends:
+                return True
+
+    return False
+
+
+def classify_fronts(process_fronts: dict[Any, Line], record_fronts: dict[Any, Line], unmatched_points: list[tuple[float, float]],
+                    tolerance: float = 0.001, cell_size: float = 25.0) -> dict[Any, tuple[str, list[Any]]]:
+    """
+    Classifies every process front against the record fronts in a single pass over a segment index:
+        'exact'          - exactly one record front shares a segment with it, and it has the same geometry.
+        'through_points' - several record fronts share segments with it, and it passes through record points that are not process points.
+        'duplicated'     - several identical record fronts share segments with it.
+        'partial'        - any other overlap with record fronts.
+        'none'           - no record front shares a segment with it.
+
+    Parameters:
+        process_fronts (dict[Any, Line]): The process fronts' geometries keyed by their ID.
+        record_fronts (dict[Any, Line]): The record fronts' geometries keyed by their ID.
+        unmatched_points (list[tuple[float, float]]): The X, Y of the record points that are not process points.
+        tolerance (float, optional): The collinearity and overlap tolerance. Default is 0.001.
+        cell_size (float, optional): The grid cell size of the indexes. Default is 25.
+
+    Returns:
+        dict[Any, tuple[str, list[Any]]]: The category and the overlapping record fronts' IDs of every process front.
+    """
+    segment_index: dict = build_segment_index(record_fronts, cell_size)
+    points_grid: dict[tuple[int, int], list[tuple[float, float]]] = build_point_grid(unmatched_points, cell_size)
+    classification: dict[Any, tuple[str, list[Any]]] = {}
+
+    for front_id, line in process_fronts.items():
+        matches: list[Any] = list(overlapping_fronts(line, segment_index, cell_size, tolerance))
+
+        if not matches:
+            category: str = 'none'
+        elif len(matches) == 1:
+            category: str = 'exact' if record_fronts[matches[0]].equals(line) else 'partial'
+        elif passes_through_points(line, points_grid, cell_size, tolerance):
+            category: str = 'through_points'
+        elif all(record_fronts[match].equals(record_fronts[matches[0]]) for match in matches[1:]):
+            category: str = 'duplicated'
+        else:
+            category: str = 'partial'
+
+        classification[front_id] = (category, matches)
+
+    return classification
+
+
+def line_vertices(line: Line) -> list[tuple[float, float]]|None:
+    """
+    Returns the X, Y of a single part straight polyline's vertices, None for curved or multipart lines.
+
+    Parameters:
+        line (Line): The front's geometry.
+    """
+    if line.hasCurves or line.partCount != 1:
+        return None
+
+    return [(vertex.X, vertex.Y) for vertex in line.getPart(0) if vertex]
+
+
+def within_offset(vertices: list[tuple[float, float]], offset_tolerance: float) -> bool:
+    """
+    Checks if all the vertices are within the offset tolerance of the straight line between the first and the last vertex.
+
+    Parameters:
+        vertices (list[tuple[float, float]]): The X, Y of the chain's vertices, in order.
+        offset_tolerance (float): The maximal offset of a vertex from the line.
+    """
+    (ax, ay), (bx, by) = vertices[0], vertices[-1]
+    length: float = sqrt((bx - ax) ** 2 + (by - ay) ** 2)
+    if length <= offset_tolerance:
+        return False
+
+    return all(abs((x - ax) * (by - ay) - (y - ay) * (bx - ax)) / length <= offset_tolerance for x, y in vertices)
+
+
+def find_collinear_chains(fronts: dict[Any, Line], protected_points: dict[tuple[int, ...], Any], offset_tolerance: float = 0.01,
+                          tolerance: float = 0.001, candidates: set[Any]|None = None) -> list[list[Any]]:
+    """
+    Finds groups of fronts that can be merged into a single front: chains of straight fronts meeting at points of degree 2
+    (exactly two fronts end at them) that are not protected, where every vertex of the chain is within the offset tolerance
+    of the line between the chain's ends. A chain that bends is cut into several groups, greedily along the chain.
+
+    Parameters:
+        fronts (dict[Any, Line]): The fronts' geometries keyed by their ID, the degree of the points is counted on these fronts.
+        protected_points (dict[tuple[int, ...], Any]): An index keyed by `snap_key` of points fronts must not be merged at (e.g. the process points).
+        offset_tolerance (float, optional): The maximal offset of a merged vertex from the merged front. Default is 0.01.
+        tolerance (float, optional): The snapping tolerance of the end points. Default is 0.001.
+        candidates (set[Any], optional): The IDs of the fronts allowed to be merged, default is all the fronts.
+
+    Returns:
+        list[list[Any]]: The merge groups, the IDs of every group in their order along the chain.
+    """
+    vertices: dict[Any, list[tuple[float, float]]] = {}
+    nodes: dict[tuple[int, ...], list[Any]] = {}
+    for front_id, line in fronts.items():
+        ends: tuple[tuple[int, ...], tuple[int, ...]] = (snap_key((line.firstPoint.X, line.firstPoint.Y), tolerance), snap_key((line.lastPoint.X, line.lastPoint.Y), tolerance))
+        nodes.setdefault(ends[0], []).append(front_id)
+        nodes.setdefault(ends[1], []).append(front_id)
+        if candidates is None or front_id in candidates:
+            vertices[front_id] = line_vertices(line)
+
+    def is_mergeable(key: tuple[int, ...]) -> bool:
+        members: list[Any] = nodes[key]
+        return (len(members) == 2 and members[0] != members[1] and all(vertices.get(member) for member in members)
+                and snap_lookup(protected_points, key)[0] is None)
+
+    def other_end(front_id: Any, key: tuple[int, ...]) -> tuple[int, ...]:
+        start: tuple[int, ...] = snap_key(vertices[front_id][0], tolerance)
+        return snap_key(vertices[front_id][-1], tolerance) if start == key else start
+
+    def oriented(front_id: Any, key: tuple[int, ...]) -> list[tuple[float, float]]:
+        """ The front's vertices starting from the given end. """
+        return vertices[front_id] if snap_key(vertices[front_id][0], tolerance) == key else vertices[front_id][::-1]
+
+    groups: list[list[Any]] = []
+    visited: set[Any] = set()
+    # Walk from the chains' loose ends first, so open chains are not entered from the middle
+    starts: list[Any] = sorted((front_id for front_id in vertices if vertices[front_id]),
+                               key=lambda front_id: all(is_mergeable(snap_key(end, tolerance)) for end in (vertices[front_id][0], vertices[front_id][-1])))
+
+    for start in starts:
+        if start in visited:
+            continue
+
+        start_key: tuple[int, ...] = snap_key(vertices[start][0], tolerance)
+        if is_mergeable(start_key):
+            start_key = other_end(start, start_key)
+
+        group: list[Any] = [start]
+        chain: list[tuple[float, float]] = oriented(start, start_key)
+        visited.add(start)
+        key: tuple[int, ...] = other_end(start, start_key)
+
+        while is_mergeable(key):
+            following: Any = next(member for member in nodes[key] if member != group[-1])
+            if following in visited:
+                break
+            visited.add(following)
+            extended: list[tuple[float, float]] = chain + oriented(following, key)[1:]
+            if within_offset(extended, offset_tolerance):
+                group.append(following)
+                chain = extended
+            else:
+                if len(group) > 1:
+                    groups.append(group)
+                group, chain = [following], oriented(following, key)
+            key = other_end(following, key)
+
+        if len(group) > 1:
+            groups.append(group)
+
+    return groups
@@ -0,0 +1,69 @@
+from arcpy.da import SearchCursor
+from Utils.TypeHints import *
+from Utils.Helpers import chunked_in_clauses
+
+
+def union_geometries(geometries: list[Polygon]) -> Polygon|None:
+    """
+    Unions polygons in memory with a cascaded (binary-tree) union: pairs are unioned level by level,
+    so every union works on geometries of similar size instead of growing one polygon parcel by parcel.
+
+    Parameters:
+        geometries (list[Polygon]): The polygons to union. None values are ignored.
+
+    Returns:
+        Polygon|None: The unioned polygon, None if no geometries were given.
+    """
+    level: list[Polygon] = [geometry for geometry in geometries if geometry is not None]
+    if not level:
+        return None
+
+    while len(level) > 1:
+        level = [level[i].union(level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+
+    return level[0]
+
+
+def union_features(sources: list[tuple[Layer|str, str|None]]) -> Polygon|None:
+    """
+    Reads the shapes of one or more feature sources with cursors and returns their union, without writing intermediate
+    feature classes (replaces a Merge + Dissolve of the sources).
+
+    Parameters:
+        sources (list[tuple[Layer|str, str|None]]): Pairs of (layer or feature class, where-clause).
+
+    Returns:
+        Polygon|None: The unioned polygon, None if no features were found.
+    """
+    geometries: list[Polygon] = []
+    for source, where_clause in sources:
+        with SearchCursor(source, 'SHAPE@', where_clause) as Scursor:
+            geometries.extend(row[0] for row in Scursor)
+
+    return union_geometries(geometries)
+
+
+def union_by_group(sources: list[tuple[Layer|str, str|None]], group_field: str, groups: list[Any]) -> dict[Any, Polygon|None]:
+    """
+    Computes the union of the shapes of many groups (e.g. the parcels of every affected block) in one call.
+    Every source is read once per chunk of an IN where-clause on the group field, the shapes are collected per group
+    and unioned in memory.
+
+    Parameters:
+        sources (list[tuple[Layer|str, str|None]]): Pairs of (layer or feature class, where-clause).
+        group_field (str): The field that holds the group key, e.g. 'BlockUniqueID'.
+        groups (list[Any]): The group keys to compute.
+
+    Returns:
+        dict[Any, Polygon|None]: The unioned polygon per group key, None for groups without features.
+    """
+    geometries: dict[Any, list[Polygon]] = {group: [] for group in groups}
+
+    for source, where_clause in sources:
+        for clause in chunked_in_clauses(group_field, groups):
+            query: str = f"({clause}) AND ({where_clause})" if where_clause else clause
+            with SearchCursor(source, [group_field, 'SHAPE@'], query) as Scursor:
+                for group, shape in Scursor:
+                    geometries.setdefault(group, []).append(shape)
+
+    return {group: union_geometries(shapes) for group, shapes in geometries.items()}
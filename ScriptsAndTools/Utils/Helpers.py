@@ -1,16 +1,20 @@
 import os
 import re
 from os.path import exists
-import requests
 import subprocess
 import datetime as dt
-from pandas import DataFrame
+from contextlib import contextmanager
+from itertools import product, islice
+from time import perf_counter
 from Utils.TypeHints import *
 from Utils.Configs import CNFG
-from arcpy import AddMessage, AddError, PointGeometry, Point, SpatialReference, RefreshLayer, Extent, env as ENV
+from Utils.LazyImports import load
+from arcpy import AddMessage, AddWarning, AddError, PointGeometry, Point, SpatialReference, RefreshLayer, Extent, AsShape, GetSigninToken, GetActivePortalURL, \
+                  env as ENV
 from arcpy.mp import ArcGISProject
 from arcpy.da import SearchCursor, UpdateCursor, InsertCursor, Editor, ListDomains
-from arcpy.management import SelectLayerByLocation as SelectByLocation, Append, Dissolve, MakeFeatureLayer
+from arcpy.management import SelectLayerByLocation as SelectByLocation, Append, Dissolve, MakeFeatureLayer, \
+                              SelectLayerByAttribute as SelectByAttribute, Delete
 
 
 def timestamp() -> str:
@@ -19,9 +23,14 @@ def timestamp() -> str:
     return current_time
 
 
+# The priority already applied to the current process, keyed by process id
+_ProcessPriority: dict[int, int] = {}
+
+
 def set_priority(priority: Literal['Realtime', 'High', 'Above Normal', 'Normal', 'Below Normal', 'Low', 'Idle'] = 'High') -> None:
     """
     Set the priority of the current process.
+    The priority is kept by the process, so the wmic call is skipped when it was already applied.
 
     Parameters:
         priority (str, optional): The priority level to set. Default is 'High'.
@@ -38,6 +47,9 @@ def set_priority(priority: Literal['Realtime', 'High', 'Above Normal', 'Normal',
     pid: str = str(os.getpid())
     # Get the corresponding integer priority
     priority_code = priority_map.get(priority, 128)
+    if _ProcessPriority.get(os.getpid()) == priority_code:
+        return
+    _ProcessPriority[os.getpid()] = priority_code
     # Construct the command
     command = f'wmic process where processid="{pid}" CALL setpriority {priority_code}'
     # Run the command
@@ -53,9 +65,143 @@ def cursor_length(cursor: Scur|Ucur) -> int:
     return count
 
 
+def query_exists(source: Layer|str, where_clause: str|None = None) -> bool:
+    """
+    Checks if at least one row of a layer or table matches a where-clause. The cursor stops at the first row.
+
+    Parameters:
+        source (Layer|str): The layer, feature class or table to query.
+        where_clause (str, optional): The rows filter. Default is all rows.
+
+    Returns:
+        bool: True if a matching row exists, otherwise False.
+    """
+    with SearchCursor(source, 'OID@', where_clause) as Scursor:
+        return next(Scursor, None) is not None
+
+
+def query_count(source: Layer|str, where_clause: str|None = None, limit: int|None = None) -> int:
+    """
+    Counts the rows of a layer or table matching a where-clause, streaming the cursor instead of materialising it.
+
+    Parameters:
+        source (Layer|str): The layer, feature class or table to query.
+        where_clause (str, optional): The rows filter. Default is all rows.
+        limit (int, optional): Stop counting once this number is reached (i.e. 2 to tell a unique row from duplicates).
+
+    Returns:
+        int: The number of matching rows, at most `limit`.
+    """
+    with SearchCursor(source, 'OID@', where_clause) as Scursor:
+        return sum(1 for _ in islice(Scursor, limit))
+
+
+def query_first(source: Layer|str, field: str, where_clause: str|None = None, descending: bool = False) -> Any|None:
+    """
+    Returns the first non-null value of a field in sort order, letting the database sort and return one row
+    (`TOP 1 ... ORDER BY`). Workspaces that ignore the prefix still sort, and only the first row is read.
+    If the workspace can not sort, falls back to a streaming min/max.
+
+    Parameters:
+        source (Layer|str): The layer, feature class or table to query.
+        field (str): The field to aggregate.
+        where_clause (str, optional): The rows filter. Default is all rows.
+        descending (bool): True for the maximum value, False for the minimum value (This is the default).
+
+    Returns:
+        Any|None: The value, or None if no row matches.
+    """
+    not_null: str = f"{field} IS NOT NULL"
+    query: str = f"({where_clause}) AND {not_null}" if where_clause else not_null
+    order_by: str = f"ORDER BY {field} {'DESC' if descending else 'ASC'}"
+
+    try:
+        with SearchCursor(source, field, query, sql_clause=('TOP 1', order_by)) as Scursor:
+            row: tuple|None = next(Scursor, None)
+        return row[0] if row else None
+
+    except RuntimeError:
+        with SearchCursor(source, field, query) as Scursor:
+            values: Iterator[Any] = (row[0] for row in Scursor)
+            return (max if descending else min)(values, default=None)
+
+
+def query_max(source: Layer|str, field: str, where_clause: str|None = None) -> Any|None:
+    """ Returns the maximum value of a field among the rows matching a where-clause, None if no row matches. """
+    return query_first(source, field, where_clause, descending=True)
+
+
+def query_min(source: Layer|str, field: str, where_clause: str|None = None) -> Any|None:
+    """ Returns the minimum value of a field among the rows matching a where-clause, None if no row matches. """
+    return query_first(source, field, where_clause, descending=False)
+
+
+def query_distinct(source: Layer|str, field: str, where_clause: str|None = None) -> list[Any]:
+    """
+    Returns the sorted distinct values of a field among the rows matching a where-clause.
+    The database removes the duplicates when it supports the `DISTINCT` prefix, otherwise they are removed while streaming.
+
+    Parameters:
+        source (Layer|str): The layer, feature class or table to query.
+        field (str): The field to collect.
+        where_clause (str, optional): The rows filter. Default is all rows.
+
+    Returns:
+        list[Any]: The distinct values.
+    """
+    try:
+        with SearchCursor(source, field, where_clause, sql_clause=('DISTINCT', f"ORDER BY {field}")) as Scursor:
+            return list(dict.fromkeys(row[0] for row in Scursor))
+
+    except RuntimeError:
+        with SearchCursor(source, field, where_clause) as Scursor:
+            values: set[Any] = {row[0] for row in Scursor}
+        return sorted(values, key=lambda v: (v is None, v))
+
+
+# The project the tools work on: 'current' inside ArcGIS Pro, or an aprx path in headless runs
+_ProjectSource: dict[str, Any] = {'path': 'current', 'project': None}
+
+
+def use_project(aprx_path: str = 'current') -> None:
+    """
+    Sets the project the tools work on. Inside ArcGIS Pro it is the current project, a headless run
+    (i.e. a batch worker) points the tools to its own copy of the project.
+
+    Parameters:
+        aprx_path (str): The path to the aprx file. Default is 'current'.
+    """
+    _ProjectSource.update({'path': aprx_path, 'project': None if aprx_path == 'current' else ArcGISProject(aprx_path)})
+
+
+def is_headless() -> bool:
+    """ Returns True if the tools work on a project path and not on the project opened in ArcGIS Pro (no views to refresh). """
+    return _ProjectSource['path'] != 'current'
+
+
+def get_project() -> Pro:
+    """ Returns the project the tools work on (see use_project). """
+    return _ProjectSource['project'] if is_headless() else ArcGISProject('current')
+
+
+def get_map(map_name: MapType = 'Active map') -> Map:
+    """
+    Returns a map of the project the tools work on.
+    A headless project has no active map, the editing map is used instead.
+
+    Parameters:
+        map_name (MapType): The name of the map. Default is the currently active map.
+    """
+    project: Pro = get_project()
+    if map_name == 'Active map':
+        return project.activeMap or project.listMaps('מפת עריכה')[0]
+    else:
+        return project.listMaps(map_name)[0]
+
+
 def drop_layer(layer_name: str) -> None:
     """ Remove a layer from a map in a project (if exists). """
-    current_map: Map = ArcGISProject('current').activeMap
+    current_map: Map = get_map()
     layer_list: list[Layer|None] = current_map.listLayers(layer_name)
     if layer_list:
         current_map.removeLayer(layer_list[0])
@@ -63,7 +209,7 @@ def drop_layer(layer_name: str) -> None:
 
 def drop_dbtable(table_name: str) -> None:
     """ Remove a table from a map in a project. """
-    current_map: Map = ArcGISProject('current').activeMap
+    current_map: Map = get_map()
     table_list: list[Table|None] = current_map.listTables(table_name)
     if table_list:
         current_map.removeTable(table_list[0])
@@ -96,16 +242,28 @@ def AddTabularMessage(table: df):
         table (df): Pandas DataFrame object
     """
 
-    from json import dumps
     first_row = table.iloc[0]
+    AddTableMessage([[col, str(first_row[col])] for col in table.columns])
+
+
+def AddTableMessage(rows: list[list[Any]], header: Optional[list[str]] = None):
+    """
+    Print rows of values as a multi-column tabular message (ArcGIS Pro JSON table element).
+
+    Parameters:
+        rows (list[list[Any]]): The table rows, every row has a value per column.
+        header (list[str], optional): The columns names, printed as the first row. Default is no header row.
+    """
+
+    from json import dumps
 
-    # Build the "data" array: [[col, value], ...]
-    data_part: list[list[str|Any]] = [[col, str(first_row[col])] for col in table.columns]
+    # Build the "data" array: [[value, ...], ...]
+    data_part: list[list[str]] = [[str(value) for value in row] for row in ([header] if header else []) + rows]
 
-    # Example elementProps (static, can be extended dynamically if needed)
+    # Every column is centered
+    columns: int = max((len(row) for row in data_part), default=0)
     element_props: dict[str, str|dict[str,str]] = {"striped": "true",
-                                                   "0": {"align": "center", "pad": "30px"},
-                                                   "1": {"align": "center", "pad": "30px"}}
+                                                   **{str(i): {"align": "center", "pad": "30px"} for i in range(columns)}}
 
     # Build the full structure
     result: dict[str, Any] = {"element": "table",
@@ -118,6 +276,10 @@ def AddTabularMessage(table: df):
     AddMessage(json_message)
 
 
+# The signed-in portal user, resolved once per portal sign-in of the ArcGIS Pro session
+_PortalSession: dict[str, Any] = {}
+
+
 def get_active_user(mode: Literal['short', 'long'] = 'short') -> str|None:
     """
     Retrieves the username of the currently signed-in ArcGIS Pro user.
@@ -128,14 +290,26 @@ def get_active_user(mode: Literal['short', 'long'] = 'short') -> str|None:
     - short: Returns the username without the domain or email suffix (@MM_NT_MALI).
     - long: Returns the full username as stored in the portal.
 
+    The portal connection is made once per sign-in, following calls reuse the signed-in user until the user signs out,
+    signs in again (i.e. as another user) or switches the active portal.
+
     Parameters:
         mode (Literal['short', 'long'], optional): Determines the format of the returned username. Defaults to `'short'`.
 
     Returns:
         str | None: The username of the active user if available, otherwise `None`.
     """
-    from arcgis.gis import GIS, User
-    user: User = GIS("pro").users.me
+    signin: dict[str, Any]|None = GetSigninToken()
+    if not signin:
+        _PortalSession.clear()
+        return None
+
+    session_key: tuple[str, str] = (GetActivePortalURL(), signin.get('token'))
+    if _PortalSession.get('key') != session_key or not _PortalSession.get('user'):
+        from arcgis.gis import GIS
+        _PortalSession.update({'key': session_key, 'user': GIS("pro").users.me})
+
+    user = _PortalSession['user']
     if user:
         if mode == 'short':
             return user.username.split('@')[0]
@@ -158,10 +332,7 @@ def get_layer(layer_name: str, map_name: MapType = 'Active map') -> Layer | None
     Return:
         The Layer object unless the layer name was not found in the map.
     """
-    if map_name == 'Active map':
-        layer: Layer|None = ArcGISProject("current").activeMap.listLayers(layer_name)[0]
-    else:
-        layer: Layer|None = ArcGISProject("current").listMaps(map_name)[0].listLayers(layer_name)[0]
+    layer: Layer|None = get_map(map_name).listLayers(layer_name)[0]
 
     if layer:
         return layer
@@ -180,10 +351,7 @@ def get_table(table_name: str, map_name: MapType = 'Active map') -> Table | None
         Return:
             The Table object unless the table name was not found in the map.
     """
-    if map_name == 'Active map':
-        table: Table|None = ArcGISProject("current").activeMap.listTables(table_name)[0]
-    else:
-        table: Table|None = ArcGISProject("current").listMaps(map_name)[0].listTables(table_name)[0]
+    table: Table|None = get_map(map_name).listTables(table_name)[0]
 
     if table:
         return table
@@ -218,7 +386,7 @@ def refresh_map_view(scale: Optional[float] = 0.1) -> None:
         Parameters:
             scale (Optional[float]): the scale (in meters) that will be added to the active map camera view. Default is  0.1 meters.
     """
-    view = ArcGISProject("current").activeView
+    view = get_project().activeView
     if view:
         view.camera.scale = view.camera.scale + scale
 
@@ -231,41 +399,351 @@ def reopen_map(map_name: MapType = 'Active map') -> None:
             map_name (MapType): The name of the map the close and reopen. Default is current active map.
     """
 
-    current_project: Pro = ArcGISProject('current')
-    if map_name == 'Active map':
-        map_object: Map = current_project.activeMap
-    else:
-        map_object: Map = current_project.listMaps(map_name)[0]
+    current_project: Pro = get_project()
+    map_object: Map = get_map(map_name)
     if map_object:
         current_project.save()
-        current_project.closeViews('MAPS')
-        map_object.openView()
+        if not is_headless():
+            current_project.closeViews('MAPS')
+            map_object.openView()
+
+
+# Open edit sessions keyed by workspace, shared by nested start_editing calls
+_EditSessions: dict[str, dict[str, Any]] = {}
 
 
-def start_editing(workspace: str) -> Editor:
+def _session_key(workspace: str|None) -> str:
+    """ The key of a workspace in the open edit sessions, the parcel fabric database by default. """
+    return os.path.normcase(os.path.normpath(workspace or CNFG.ParcelFabricDatabase))
+
+
+def start_editing(workspace: str|None = None) -> Editor:
     """
     Start editing in a geodatabase workspace using the arcpy.da.Editor class.
+    If an edit session is already open on the workspace the call joins it and returns the same editor,
+    so the session and its edit operation are opened only once by the outermost caller.
+    Prefer `edit_session`, which always leaves the session, also when an exception is raised.
 
     Parameters:
-        workspace (str): The path to the geodatabase workspace.
+        workspace (str, optional): The path to the geodatabase workspace. Default is the parcel fabric database.
     """
 
+    workspace: str = workspace or CNFG.ParcelFabricDatabase
+    key: str = _session_key(workspace)
+    session: dict[str, Any]|None = _EditSessions.get(key)
+    if session:
+        session['depth'] += 1
+        return session['editor']
+
     editor: Editor = Editor(workspace=workspace, multiuser_mode=True)
     editor.startEditing(with_undo=True, multiuser_mode=True)
     editor.startOperation()
+    _EditSessions[key] = {'editor': editor, 'depth': 1, 'rollback': False}
     return editor
 
 
 def stop_editing(editor: Editor, save: bool = True) -> None:
     """
     Stop editing in a geodatabase workspace using the arcpy.da.Editor class.
+    Nested calls only leave the shared session, the edits are saved (or discarded) once by the outermost caller.
+    Discarding at any level marks the whole session to be rolled back.
 
     Parameters:
         editor (Editor): The current active editor object.
         save (bool): True to save the edits (This is the default), False to discard changes.
     """
-    editor.stopOperation()
-    editor.stopEditing(save_changes = save)
+
+    key: str|None = next((k for k, v in _EditSessions.items() if v['editor'] is editor), None)
+    if key is None:
+        editor.stopOperation()
+        editor.stopEditing(save_changes = save)
+        return
+
+    session: dict[str, Any] = _EditSessions[key]
+    session['rollback'] = session['rollback'] or not save
+    session['depth'] -= 1
+    if session['depth'] > 0:
+        return
+
+    del _EditSessions[key]
+    if session['rollback']:
+        editor.abortOperation()
+        editor.stopEditing(save_changes = False)
+        AddMessage(f'{timestamp()} | ⚠️ Edit session was rolled back, no changes were saved')
+    else:
+        editor.stopOperation()
+        editor.stopEditing(save_changes = True)
+
+
+@contextmanager
+def edit_session(workspace: str|None = None) -> Iterator[Editor]:
+    """
+    Context manager for a reentrant edit transaction.
+    Nested sessions join the outer one, the edits are saved once when the outermost session exits
+    and rolled back if an exception is raised inside any of them.
+    The outermost session closes the edit session by itself whatever its depth, so a nested start_editing
+    that was never stopped can not leave it open: its edits are rolled back.
+
+    Parameters:
+        workspace (str, optional): The path to the geodatabase workspace. Default is the parcel fabric database.
+
+    Returns:
+        Iterator[Editor]: The active editor object.
+    """
+
+    key: str = _session_key(workspace)
+    outermost: bool = key not in _EditSessions
+    editor: Editor = start_editing(workspace)
+    if not outermost:
+        try:
+            yield editor
+        except BaseException:
+            stop_editing(editor, save=False)
+            raise
+        stop_editing(editor)
+        return
+
+    failed: bool = True
+    try:
+        yield editor
+        failed: bool = False
+    finally:
+        session: dict[str, Any] = _EditSessions.pop(key, {'depth': 1, 'rollback': False})
+        if session['depth'] != 1:
+            AddWarning(f'{timestamp()} | ⚠️ {session["depth"] - 1} nested edit sessions were not stopped')
+        if failed or session['rollback'] or session['depth'] != 1:
+            editor.abortOperation()
+            editor.stopEditing(save_changes = False)
+            AddMessage(f'{timestamp()} | ⚠️ Edit session was rolled back, no changes were saved')
+        else:
+            editor.stopOperation()
+            editor.stopEditing(save_changes = True)
+
+
+def snap_key(coordinates: tuple[float, ...], tolerance: float = 0.001) -> tuple[int, ...]:
+    """
+    Snap a 2D/3D coordinate to the tolerance grid, so co-located points share the same hashable key.
+
+    Parameters:
+        coordinates (tuple[float, ...]): The X, Y (and Z) values of the point.
+        tolerance (float, optional): The grid cell size in meters. Default is the fabric xy tolerance (0.001).
+
+    Returns:
+        tuple[int, ...]: The coordinate as grid cell indices.
+    """
+    return tuple(round(c / tolerance) for c in coordinates if c is not None)
+
+
+def snap_lookup(index: dict[tuple[int, ...], Any], key: tuple[int, ...]) -> tuple[tuple[int, ...]|None, Any]:
+    """
+    Looks up a snapped coordinate in an index, probing the neighbouring grid cells when the exact cell is empty,
+    so points closer than the tolerance on both sides of a cell edge still match.
+
+    Parameters:
+        index (dict[tuple[int, ...], Any]): A mapping keyed by `snap_key` values.
+        key (tuple[int, ...]): The snapped coordinate to look up.
+
+    Returns:
+        tuple[tuple[int, ...]|None, Any]: The matched key and its value, (None, None) if nothing was found.
+    """
+    if key in index:
+        return key, index[key]
+
+    for offset in product((-1, 0, 1), repeat=len(key)):
+        candidate: tuple[int, ...] = tuple(k + o for k, o in zip(key, offset))
+        if candidate in index:
+            return candidate, index[candidate]
+
+    return None, None
+
+
+def chunked_in_clauses(field: str, values: list[Any], chunk_size: int = 1000) -> list[str]:
+    """
+    Builds `field IN (...)` where-clauses, each one holding at most `chunk_size` values.
+
+    Parameters:
+        field (str): The field name to filter by.
+        values (list[Any]): The values to filter by. Strings are quoted, duplicates and None values are dropped.
+        chunk_size (int, optional): The maximum number of values per clause. Default is 1000.
+
+    Returns:
+        list[str]: The where-clauses, empty if no values were given.
+    """
+    unique: list[Any] = list(dict.fromkeys(v for v in values if v is not None))
+    literals: list[str] = [f"'{str(v).replace(chr(39), chr(39) * 2)}'" if isinstance(v, str) else str(v) for v in unique]
+
+    return [f"{field} IN ({','.join(literals[i:i + chunk_size])})" for i in range(0, len(literals), chunk_size)]
+
+
+def in_query(field: str, values: list[Any], chunk_size: int = 1000, negate: bool = False) -> str:
+    """
+    Builds a single where-clause matching a list of values of any length, as `IN` batches of bounded size joined by OR.
+    For the places that take one expression only (definition queries, tool parameters). The length of the whole clause
+    is not bounded: requests that must stay within the SQL and URL limits iterate the clauses of `chunked_in_clauses`
+    (see chunked_search and select_by_values).
+
+    Parameters:
+        field (str): The field name to filter by.
+        values (list[Any]): The values to filter by.
+        chunk_size (int, optional): The maximum number of values per IN batch. Default is 1000.
+        negate (bool, optional): True to match the rows whose value is not in the list. Default is False.
+
+    Returns:
+        str: The where-clause. An empty list matches no rows (all rows when negated).
+    """
+    clauses: list[str] = chunked_in_clauses(field, values, chunk_size)
+    if not clauses:
+        return '1 = 1' if negate else '1 = 0'
+
+    query: str = clauses[0] if len(clauses) == 1 else f"({' OR '.join(clauses)})"
+    return f"NOT {query}" if negate else query
+
+
+def chunked_search(source: Layer|str, fields: list[str]|str, key_field: str, values: list[Any], where_clause: str|None = None,
+                   chunk_size: int = 1000) -> Iterator[tuple[Any, ...]]:
+    """
+    Reads the rows whose key field is in a list of values, one SearchCursor per IN batch, as a single iterator.
+    The batches are read one after the other.
+
+    Parameters:
+        source (Layer|str): The layer, feature class path or feature service URL.
+        fields (list[str]|str): The fields to read.
+        key_field (str): The field to filter by.
+        values (list[Any]): The values to filter by.
+        where_clause (str, optional): An additional filter.
+        chunk_size (int, optional): The maximum number of values per batch. Default is 1000.
+
+    Returns:
+        Iterator[tuple[Any, ...]]: The rows of all the batches, in the order of the batches.
+    """
+    for clause in chunked_in_clauses(key_field, values, chunk_size):
+        with SearchCursor(source, fields, f"({clause}) AND ({where_clause})" if where_clause else clause) as Scursor:
+            yield from Scursor
+
+
+def select_by_values(layer: Layer|str, field: str, values: list[Any], chunk_size: int = 1000) -> Result:
+    """
+    Selects the rows of a layer whose field value is in a list, one SelectLayerByAttribute call per IN batch
+    (the first one makes a new selection, the next ones add to it).
+
+    Parameters:
+        layer (Layer|str): The layer or table view to select in.
+        field (str): The field name to filter by.
+        values (list[Any]): The values to filter by. An empty list selects no rows.
+        chunk_size (int, optional): The maximum number of values per batch. Default is 1000.
+
+    Returns:
+        Result: The result of the last call, holding the layer and the count of the whole selection.
+    """
+    clauses: list[str] = chunked_in_clauses(field, values, chunk_size) or ['1 = 0']
+    for idx, clause in enumerate(clauses):
+        result: Result = SelectByAttribute(layer, 'NEW_SELECTION' if idx == 0 else 'ADD_TO_SELECTION', clause)
+
+    return result
+
+
+def bulk_update(layer: Layer|str, key_field: str, updates: dict[Any, dict[str, Any]], where_clause: str|None = None,
+                tolerance: float = 0.001, chunk_size: int = 1000, workspace: str|None = None) -> list[tuple[Any, dict[str, tuple[Any, Any]]]]:
+    """
+    Updates the rows of a layer from a mapping of {key: {field: new value}} in a single edit session.
+
+    For an attribute key (GlobalID, Name, ...) one UpdateCursor is opened per chunk of an IN where-clause.
+    For a coordinate key ('SHAPE@XY' or 'SHAPE@XYZ') one UpdateCursor scans the layer and the keys are
+    expected to be snapped with `snap_key` using the same tolerance, the change log holds the matched keys.
+
+    Parameters:
+        layer (Layer|str): The layer or feature class to update.
+        key_field (str): The field that holds the keys of `updates`.
+        updates (dict[Any, dict[str, Any]]): The new field values per key.
+        where_clause (str, optional): An additional filter for the updated rows.
+        tolerance (float, optional): The snapping tolerance of coordinate keys. Default is 0.001.
+        chunk_size (int, optional): The maximum number of keys per IN clause. Default is 1000.
+        workspace (str, optional): The edited workspace. Default is the parcel fabric database.
+
+    Returns:
+        list[tuple[Any, dict[str, tuple[Any, Any]]]]: The change log, (key, {field: (previous value, new value)}) per updated row.
+    """
+    change_log: list[tuple[Any, dict[str, tuple[Any, Any]]]] = []
+    if not updates:
+        return change_log
+
+    fields: list[str] = list(dict.fromkeys(f for values in updates.values() for f in values))
+    by_coordinate: bool = key_field.upper() in ['SHAPE@XY', 'SHAPE@XYZ']
+
+    if by_coordinate:
+        clauses: list[str|None] = [where_clause]
+    else:
+        clauses: list[str|None] = [f"({c}) AND ({where_clause})" if where_clause else c for c in chunked_in_clauses(key_field, list(updates), chunk_size)]
+
+    with edit_session(workspace):
+        for clause in clauses:
+            with UpdateCursor(layer, [key_field] + fields, clause) as Ucursor:
+                for row in Ucursor:
+                    if by_coordinate:
+                        key, new_values = snap_lookup(updates, snap_key(row[0], tolerance))
+                    else:
+                        key, new_values = row[0], updates.get(row[0])
+                    if new_values is None:
+                        continue
+
+                    changes: dict[str, tuple[Any, Any]] = {}
+                    for idx, field in enumerate(fields, start=1):
+                        if field in new_values:
+                            changes[field] = (row[idx], new_values[field])
+                            row[idx] = new_values[field]
+
+                    Ucursor.updateRow(row)
+                    change_log.append((key, changes))
+
+    return change_log
+
+
+def bulk_insert(source: Layer|str, target: Layer|str, field_map: dict[str, str], where_clause: str|None = None,
+                constants: dict[str, Any]|None = None, chunk_size: int = 5000, workspace: str|None = None) -> dict[str, int|float]:
+    """
+    Copies the rows of a source layer into a target layer, streaming them in fixed-size chunks so only one chunk is held in memory.
+    All the chunks are inserted in a single edit session, every chunk is committed as its own edit operation.
+
+    Parameters:
+        source (Layer|str): The layer or feature class to copy from.
+        target (Layer|str): The layer or feature class to insert into.
+        field_map (dict[str, str]): Source field -> target field, e.g. {'LegalLength': 'Distance', 'SHAPE@': 'SHAPE@'}.
+        where_clause (str, optional): A filter for the copied rows.
+        constants (dict[str, Any], optional): Constant target values for every inserted row, e.g. {'CreatedByRecord': RecordGUID}.
+        chunk_size (int, optional): The number of rows per chunk. Default is 5000.
+        workspace (str, optional): The edited workspace. Default is the parcel fabric database.
+
+    Returns:
+        dict[str, int|float]: 'inserted' rows, number of 'chunks', and the 'read_seconds', 'insert_seconds' and 'total_seconds' timings.
+    """
+    constants: dict[str, Any] = constants or {}
+    source_fields: list[str] = list(field_map)
+    target_fields: list[str] = [field_map[field] for field in source_fields] + list(constants)
+    constant_values: tuple[Any, ...] = tuple(constants.values())
+    stats: dict[str, int|float] = {'inserted': 0, 'chunks': 0, 'read_seconds': 0.0, 'insert_seconds': 0.0, 'total_seconds': 0.0}
+    start: float = perf_counter()
+
+    with edit_session(workspace) as editor:
+        with SearchCursor(source, source_fields, where_clause) as Scursor, InsertCursor(target, target_fields) as Icursor:
+            while True:
+                tic: float = perf_counter()
+                chunk: list[tuple[Any, ...]] = list(islice(Scursor, chunk_size))
+                stats['read_seconds'] += perf_counter() - tic
+                if not chunk:
+                    break
+
+                tic: float = perf_counter()
+                for row in chunk:
+                    Icursor.insertRow(tuple(row) + constant_values)
+                editor.stopOperation()
+                editor.startOperation()
+                stats['insert_seconds'] += perf_counter() - tic
+
+                stats['inserted'] += len(chunk)
+                stats['chunks'] += 1
+
+    stats['total_seconds'] = perf_counter() - start
+    return stats
 
 
 def get_DomainValue(domain: str, code: int) -> str:
@@ -610,6 +1088,7 @@ def get_FinalParcel(temp_number: int, block_number: int, subblock_number: int =
     source_temp_name: str = f'{temp_number}/{block_number}/{subblock_number}'
     fields: list[str] = ['FromParcelFinal', 'FromParcelTemp', 'ToParcelTemp', 'ToParcelFinal', 'BlockNumber', 'SubBlockNumber', 'ToBlockNumber', 'ToSubBlockNumber', 'ActionType']
 
+    DataFrame = load('pandas').DataFrame
     if process_guid:
         pairs: df = DataFrame(SearchCursor(fr"{CNFG.ParcelFabricDatabase}SequenceActions", fields, f"CPBUniqueID = '{process_guid}'"), columns=fields)
     else:
@@ -720,13 +1199,13 @@ def process_will_retire_its_block(ProcessName: str) -> bool|None:
 
     # If the process has parcels to retire:
     if cursor_length(retired_parcel_of_process) > 0:
-        retired_parcel_as_text: str = ",".join([f"'{i[0]}/{i[1]}/{i[2]}'" for i in retired_parcel_of_process])
+        retired_parcels: set[str] = {f"{i[0]}/{i[1]}/{i[2]}" for i in retired_parcel_of_process}
 
-        # Query the for active parcels of the block, excluding the retiring parcels pf the process
+        # Count the active parcels of the block, excluding the retiring parcels of the process (a set difference instead of a NOT IN list)
         Parcels2D: str = fr"{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Parcels2D"
-        query: str = f"""BlockUniqueID = '{get_BlockGUID("ProcessName", ProcessName)}' And RetiredByRecord Is Null And Name Not In ({retired_parcel_as_text})"""
+        query: str = f"""BlockUniqueID = '{get_BlockGUID("ProcessName", ProcessName)}' And RetiredByRecord Is Null"""
         active_2D_Parcels: Scur = SearchCursor(Parcels2D, 'Name', query)
-        active_2D_Parcels_count: int = cursor_length(active_2D_Parcels)
+        active_2D_Parcels_count: int = len({row[0] for row in active_2D_Parcels} - retired_parcels)
 
         del retired_parcel_of_process, active_2D_Parcels
 
@@ -811,7 +1290,7 @@ def get_AbsorbingBlockGUIDs() -> list[str] | None:
 
     process_actions: Table = get_table('פעולות בתכנית')
     block_cols: list[str] = ['ToBlockNumber', 'ToSubBlockNumber']
-    blocks_df: df = DataFrame(data = SearchCursor(process_actions, block_cols, 'ActionType = 3'), columns = block_cols).astype(int)
+    blocks_df: df = load('pandas').DataFrame(data = SearchCursor(process_actions, block_cols, 'ActionType = 3'), columns = block_cols).astype(int)
     blocks_df['Name'] = blocks_df['ToBlockNumber'].astype(str) + '/' + blocks_df['ToSubBlockNumber'].astype(str)
     names: list[str] = blocks_df['Name'].unique().tolist()
     total: int = len(names)
@@ -878,7 +1357,7 @@ def load_to_records_(ProcessName: str) -> None:
     Parameters:
         ProcessName (str): The name of the process border to load into Records.
     """
-    current_map: Map = ArcGISProject('current').activeMap
+    current_map: Map = get_map()
     processes_layer: Layer = current_map.listLayers('גבולות תהליכי קדסטר')[0]
     records_layer: Layer = current_map.listLayers('גבולות רישומים')[0]    # -->> At this moment the record layer is under new edit version
     del current_map
@@ -945,16 +1424,16 @@ def rewrite_record_data(ProcessName: str) -> None:
     fields_to_update: list[str] = ['BlockUniqueID', 'GeodeticNetwork', 'SurveyorLicenseID', 'DataSource', 'PlanName', 'Shape@']
     new_data: tuple[Any, ...] = SearchCursor(get_layer('גבולות תהליכי קדסטר'), fields_to_update, f" ProcessName = '{ProcessName}' ").next()
 
-    editor: Editor = start_editing(ENV.workspace)
     records_layer = get_layer('גבולות רישומים')
-    record_data: Ucur = UpdateCursor(records_layer, fields_to_update, f" Name = '{ProcessName}' ")
-    for row in record_data:
-        row = new_data
-        record_data.updateRow(row)
+    with edit_session():
+        record_data: Ucur = UpdateCursor(records_layer, fields_to_update, f" Name = '{ProcessName}' ")
+        for row in record_data:
+            row = new_data
+            record_data.updateRow(row)
 
-    stop_editing(editor); RefreshLayer(records_layer); reopen_map('מפת עריכה');
+    RefreshLayer(records_layer); reopen_map('מפת עריכה');
 
-    del new_data, record_data, records_layer, editor
+    del new_data, record_data, records_layer
     AddMessage(f'{timestamp()} | ⚡ Record {ProcessName} data updated')
 
 
@@ -976,8 +1455,8 @@ def activate_record(ProcessName: str, map_name: MapType = 'Active map') -> None:
     if not RecordGUID:
         RecordGUID: str = get_RecordGUID(ProcessName, source="SHELF")
 
-    current_project: Pro = ArcGISProject('current')
-    map_object: Map = current_project.activeMap if map_name == 'Active map' else current_project.listMaps(map_name)[0]
+    current_project: Pro = get_project()
+    map_object: Map = get_map(map_name)
     pf_layer: Layer = map_object.listLayers('רישומים')[0]
     CIM: parcelCIM = pf_layer.getDefinition('V3')
     CIM.parcelFabricActiveRecord.activeRecord = RecordGUID
@@ -985,8 +1464,9 @@ def activate_record(ProcessName: str, map_name: MapType = 'Active map') -> None:
     pf_layer.setDefinition(CIM)
 
     current_project.save();
-    current_project.closeViews('MAPS');
-    map_object.openView();
+    if not is_headless():
+        current_project.closeViews('MAPS');
+        map_object.openView();
 
     AddMessage(f'{timestamp()} | ✔️ Record {ProcessName} activated')
     del RecordGUID, current_project, map_object, pf_layer, CIM
@@ -995,8 +1475,8 @@ def activate_record(ProcessName: str, map_name: MapType = 'Active map') -> None:
 def deactivate_record(map_name: MapType = 'Active map') -> None:
     """Deactivate the current active record """
 
-    current_project: Pro = ArcGISProject('current')
-    map_object: Map = current_project.activeMap if map_name == 'Active map' else current_project.listMaps(map_name)[0]
+    current_project: Pro = get_project()
+    map_object: Map = get_map(map_name)
     records: Layer = map_object.listLayers('רישומים')[0]
     CIM: parcelCIM = records.getDefinition('V3')
     current_active: str|None = CIM.parcelFabricActiveRecord.activeRecord
@@ -1004,7 +1484,9 @@ def deactivate_record(map_name: MapType = 'Active map') -> None:
     if current_active:
         CIM.parcelFabricActiveRecord.enabled = False
         records.setDefinition(CIM)
-        current_project.save(); current_project.closeViews('MAPS'); map_object.openView(); refresh_map_view();
+        current_project.save()
+        if not is_headless():
+            current_project.closeViews('MAPS'); map_object.openView(); refresh_map_view();
         AddMessage(f'{timestamp()} | ✔️ Record deactivated')
     else:
         AddMessage(f'{timestamp()} | ⚠️ No record is currently active')
@@ -1083,9 +1565,11 @@ def Type2CancelType(Type: int) -> int | None:
 
 
 def zoom_to_aoi(map_name: MapType = 'Active map') -> None:
-    """ Zoom-in the canvas camera view to the area of interest (the process border feature) """
+    """ Zoom-in the canvas camera view to the area of interest (the process border feature). A headless run has no view to zoom. """
+    if is_headless():
+        return
 
-    current_camera: Camera = ArcGISProject('current').activeView.camera
+    current_camera: Camera = get_project().activeView.camera
     aoi_layer: Layer = get_layer('*גבול תכנית', map_name)
     aoi_extent: Extent = SearchCursor(aoi_layer, 'SHAPE@').next()[0].extent
 
@@ -1103,7 +1587,10 @@ def zoom_to_layer(layer_name: str) -> None:
     Parameters:
         layer_name(str): The name of the layer in the active map to zoom-in.
     """
-    current_camera: Camera = ArcGISProject('current').activeView.camera
+    if is_headless():
+        return
+
+    current_camera: Camera = get_project().activeView.camera
     extent: Extent = get_LayerExtent(layer_name)
 
     if extent:
@@ -1137,207 +1624,335 @@ def get_LayerExtent(layer_name: str) -> Extent|None:
 
 def get_AOIExtent() -> Extent:
     """Returns the area of interest Extent object"""
+    if is_headless():
+        return SearchCursor(get_layer('*גבול תכנית'), 'SHAPE@').next()[0].extent
+
     zoom_to_aoi()
-    aoi_extent: Extent = ArcGISProject("current").activeView.camera.getExtent()
+    aoi_extent: Extent = get_project().activeView.camera.getExtent()
 
     return aoi_extent
 
 
 def get_display_extent() -> Extent:
-    """Returns the current extent of the active map"""
-    current_extent: Extent = ArcGISProject('current').activeView.camera.getExtent()
+    """Returns the current extent of the active map, the area of interest extent in a headless run"""
+    if is_headless():
+        return get_AOIExtent()
+
+    current_extent: Extent = get_project().activeView.camera.getExtent()
     return current_extent
 
 
-def AddDefinitionQuery(layer: Layer, query: dict[str, Any]) -> None:
-    """ Adds a single definition query to a layer"""
+def AddDefinitionQuery(layer: Layer, query: dict[str, Any]) -> bool:
+    """
+    Adds a single definition query to a layer.
+    An existing query with the same name is replaced instead of stacked, and the layer is left untouched
+    when an identical query is already the active one.
+
+    Returns:
+        bool: True if the layer definition queries were changed, otherwise False.
+    """
     queries: list[dict[str, Any]] = layer.listDefinitionQueries()
+    current: list[dict[str, Any]] = [q for q in queries if q.get('name') == query['name']]
+
+    if current and same_definition_query(current[0], query):
+        return False
 
+    queries: list[dict[str, Any]] = [q for q in queries if q.get('name') != query['name']]
     if query['isActive']:
         for q in queries:
             q['isActive'] = False
 
     queries.append(query)
     layer.updateDefinitionQueries(queries)
+    return True
 
 
-def filter_to_aoi(ProcessName: str, map_name: MapType = 'Active map') -> None:
+def same_definition_query(current: dict[str, Any], query: dict[str, Any]) -> bool:
     """
-    Reduces the display view by filtering the cadastral layers based on the regions of all blocks
-    borders intersecting the process.
+    Checks whether an existing definition query is equivalent to a new one (same sql, active state and spatial clause geometry).
 
     Parameters:
-        ProcessName (str): The name of the process to filter by.
-        map_name (MapType): The name of the map object to use.  Default is the currently active map view ("Active map").
+        current (dict): A definition query as returned by Layer.listDefinitionQueries().
+        query (dict): The definition query to compare with.
+
+    Returns:
+        bool: True if both queries filter the layer the same way.
     """
-    aoi_map: Map = ArcGISProject("current").activeMap if map_name == 'Active map' else ArcGISProject("current").listMaps(map_name)[0]
-    process_layer: Layer = aoi_map.listLayers('גבול תכנית')[0]
-    blocks_layer: Layer = aoi_map.listLayers('גושים')[0]
-    name: str = 'Area of Interest'
+    if bool(current.get('isActive')) != bool(query.get('isActive')):
+        return False
+    if (current.get('sql') or '') != (query.get('sql') or ''):
+        return False
 
-    RecordGUID: str|None = get_RecordGUID(ProcessName, 'SDE', False)
-    if not RecordGUID:
-        RecordGUID: str = get_RecordGUID(ProcessName, 'SHELF', False)
+    current_clause: list[dict[str, Any]] = current.get('spatialClause') or []
+    query_clause: list[dict[str, Any]] = query.get('spatialClause') or []
+    if len(current_clause) != len(query_clause):
+        return False
 
+    for current_item, query_item in zip(current_clause, query_clause):
+        current_geom, query_geom = current_item.get('geometry'), query_item.get('geometry')
+        if current_geom is None or query_geom is None or not current_geom.equals(query_geom):
+            return False
 
-    # Get blocks guids:
-    aoi_blocks_layer: Layer = SelectByLocation(in_layer= blocks_layer, select_features= process_layer, overlap_type= 'INTERSECT', search_distance="1 Meter")[0]
-    aoi_blocks: Scur = SearchCursor(aoi_blocks_layer, 'GlobalID', "RetiredByRecord IS NULL")
-    aoi_blocks: str = ', '.join(["'" + row[0] + "'" for row in aoi_blocks])
-    del process_layer, aoi_blocks_layer
+    return True
 
-    if get_ProcessType(ProcessName) not in [9, 15]:  # תנאי לתהליכים מסוג הסדר מקרקעין ותת"ג להסדר מקרקעין משום שאין להם פעולות בטבלת סדר פעולות
-        if process_is_establish_block(ProcessName):
-            AbsorbingBlocks: str = ', '.join(["'" + guid + "'" for guid in get_AbsorbingBlockGUIDs()])
-            aoi_blocks: str = f'{aoi_blocks}, {AbsorbingBlocks}'
-            del AbsorbingBlocks
 
-    aoi_map.clearSelection()
+def aoi_key(border: Layer|str, blocks_layer: Layer|str, extra_blocks: Optional[list[str]] = None) -> str:
+    """
+    Returns the key of an area of interest: a hash of the border geometry, of the blocks added to it and of the state of
+    the blocks it is made of, so a cached area is outdated once these blocks are edited (i.e. reshaped, retired or transferred).
+
+    Parameters:
+        border (Layer|str): A layer (or feature class) holding the process or record border.
+        blocks_layer (Layer|str): The blocks layer the area of interest is computed from.
+        extra_blocks (list[str], optional): GlobalIDs of blocks added to the area of interest (i.e. absorbing blocks).
+    """
+    from json import dumps
+    from hashlib import sha1
+
+    border_shapes: list[Polygon] = [row[0] for row in SearchCursor(border, 'SHAPE@') if row[0]]
+    fields: list[str] = ['GlobalID', 'RetiredByRecord', 'last_edited_date']
+
+    # The blocks selected by compute_aoi (within 1 meter of the border) and the extra blocks
+    blocks: set[tuple[str, ...]] = set()
+    for shape in border_shapes:
+        with SearchCursor(blocks_layer, fields, spatial_filter= shape.buffer(1), spatial_relationship= 'INTERSECTS') as cursor:
+            blocks.update(tuple(str(value) for value in row) for row in cursor)
+    if extra_blocks:
+        blocks.update(tuple(str(value) for value in row) for row in SearchCursor(blocks_layer, fields, in_query('GlobalID', extra_blocks)))
+
+    shapes: list[str] = sorted(shape.WKT for shape in border_shapes)
+    return sha1(dumps([shapes, sorted(extra_blocks or []), sorted(blocks)]).encode('utf-8')).hexdigest()
+
+
+def load_aoi(ProcessName: str, key: str|None = None) -> tuple[list[str], Polygon]|None:
+    """
+    Loads the area of interest (blocks GUIDs and dissolved blocks polygon) cached in the process shelf by save_aoi.
+
+    Parameters:
+        ProcessName (str): The name of the process (or free edit record) owning the shelf.
+        key (str, optional): The current key of the area of interest (see aoi_key). A cache saved with another key is ignored.
+
+    Returns:
+        tuple: The list of the aoi blocks GUIDs and the aoi polygon, or None if nothing (or an outdated area) was cached.
+    """
+    from json import load
+
+    json_file: str = fr"{CNFG.Library}{ProcessName.replace('/', '_')}/AOI.json"
+    if not exists(json_file):
+        return None
+
+    with open(json_file, 'r', encoding='utf-8') as f:
+        aoi: dict[str, Any] = load(f)
+
+    if not aoi.get('blocks') or not aoi.get('geometry') or (key and aoi.get('key') != key):
+        return None
+
+    aoi_geom: Polygon = AsShape(aoi['geometry'], True)
+    return aoi['blocks'], aoi_geom
+
+
+def save_aoi(ProcessName: str, aoi_blocks: list[str], aoi_geom: Polygon, key: str|None = None) -> None:
+    """
+    Caches the area of interest of a process in its shelf, so a re-run or a reopened map skip the spatial selection and the dissolve.
+
+    Parameters:
+        ProcessName (str): The name of the process (or free edit record) owning the shelf.
+        aoi_blocks (list[str]): The GlobalIDs of the blocks composing the area of interest.
+        aoi_geom (Polygon): The dissolved polygon of these blocks.
+        key (str, optional): The key of the area of interest (see aoi_key).
+    """
+    from json import dump, loads
+
+    shelf: str = create_shelf(ProcessName)
+    with open(os.path.join(shelf, 'AOI.json'), 'w', encoding='utf-8') as f:
+        dump({'key': key, 'blocks': aoi_blocks, 'geometry': loads(aoi_geom.JSON)}, f)
 
-    # Filter active blocks layer
-    query_params: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL AND GlobalID IN ({aoi_blocks})", 'isActive': True}
-    AddDefinitionQuery(blocks_layer, query_params)
-    RefreshLayer(blocks_layer)
 
-    # Get aoi polygon geometry from filtered blocks layer:
-    Dissolve(blocks_layer, r"memory\aoi")
-    aoi_blocks_geom: Polygon = SearchCursor(r"memory\aoi", "Shape@").next()[0]
-    spatial_clause: list[dict[str, Polygon]] = [{'geometry': aoi_blocks_geom}]
-    del blocks_layer
+def compute_aoi(blocks_layer: Layer, border: Layer, extra_blocks: Optional[list[str]] = None) -> tuple[list[str], Polygon]|None:
+    """
+    Collects the active blocks intersecting a border and dissolves them into a single area of interest polygon.
 
+    Parameters:
+        blocks_layer (Layer): The active blocks layer.
+        border (Layer): A layer holding the process or record border to select by.
+        extra_blocks (list[str], optional): GlobalIDs of blocks to add to the area of interest (i.e. absorbing blocks).
 
-    # Filter active 2D parcels, 3D parcels and substractions layers
-    query_params: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL AND BlockUniqueID IN ({aoi_blocks})", 'isActive': True}
-    for layer_name in ['חלקות', 'חלקות תלת-ממדיות', 'גריעות']:
-        layer: Layer = aoi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+    Returns:
+        tuple: The list of the aoi blocks GUIDs and the aoi polygon, or None if no block was found.
+    """
+    aoi_blocks_layer: Layer = SelectByLocation(in_layer= blocks_layer, select_features= border, overlap_type= 'INTERSECT', search_distance="1 Meter")[0]
+    aoi_blocks: list[str] = [row[0] for row in SearchCursor(aoi_blocks_layer, 'GlobalID', "RetiredByRecord IS NULL")]
+    SelectByAttribute(blocks_layer, 'CLEAR_SELECTION')
+    del aoi_blocks_layer
 
+    aoi_blocks: list[str] = list(dict.fromkeys(aoi_blocks + (extra_blocks or [])))
+    if not aoi_blocks:
+        return None
 
-    # Filter active 2D points, active 3D points, and active fronts layers
-    query_params: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL OR CreatedByRecord = '{RecordGUID}'", 'spatialClause': spatial_clause, 'isActive': True}
+    blocks: Layer = MakeFeatureLayer(blocks_layer, 'aoi_blocks', f"RetiredByRecord IS NULL AND {in_query('GlobalID', aoi_blocks)}")[0]
+    Dissolve(blocks, r"memory\aoi")
+    aoi_geom: Polygon = SearchCursor(r"memory\aoi", "Shape@").next()[0]
+    Delete([blocks, r"memory\aoi"])
 
-    for layer_name in ['נקודות גבול', 'נקודות גבול תלת-ממדיות', 'חזיתות']:
-        layer: Layer = aoi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+    return aoi_blocks, aoi_geom
 
 
-    # Filter control points
-    control_points_layer: Layer = aoi_map.listLayers('נקודות בקרה')[0]
-    query_params: dict[str, Any] = {'name': name, 'spatialClause': spatial_clause, 'isActive': True}
-    AddDefinitionQuery(control_points_layer, query_params)
-    del control_points_layer
+def aoi_definition_queries(aoi_blocks: list[str], aoi_geom: Polygon, RecordGUID: str|None, name: str = 'Area of Interest') -> dict[str, dict[str, Any]]:
+    """
+    Builds the definition queries of all the cadastral layers filtered to an area of interest.
+
+    Parameters:
+        aoi_blocks (list[str]): The GlobalIDs of the blocks composing the area of interest.
+        aoi_geom (Polygon): The dissolved polygon of these blocks.
+        RecordGUID (str): The GlobalID of the record, its created features are always displayed.
+        name (str): The name of the definition query.
 
+    Returns:
+        dict: Layer name as key, and its definition query as value.
+    """
+    spatial_clause: list[dict[str, Polygon]] = [{'geometry': aoi_geom}]
+    blocks_query: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL AND {in_query('GlobalID', aoi_blocks)}", 'isActive': True}
+    parcels_query: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL AND {in_query('BlockUniqueID', aoi_blocks)}", 'isActive': True}
+    active_query: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL OR CreatedByRecord = '{RecordGUID}'", 'spatialClause': spatial_clause, 'isActive': True}
+    retired_query: dict[str, Any] = {'name': name, 'sql': "RetiredByRecord IS NOT NULL", 'spatialClause': spatial_clause, 'isActive': True}
+    spatial_query: dict[str, Any] = {'name': name, 'spatialClause': spatial_clause, 'isActive': True}
 
-    # Filter QA layers
     validation_names: list[str] = ['קווי אימות' , 'נקודות אימות', 'שטחי אימות']
     topology_names: list[str] = ['שגיאות מסוג פוליגון' , 'שגיאות מסוג קו' , 'שגיאות מסוג נקודה' , 'אזורים לא חוקיים']
-    qa_names: list[str] = validation_names + topology_names
-    qa_layers: list[Layer] = [layer for layer in aoi_map.listLayers() if layer.name in qa_names]
-    query_params: dict[str, Any] = {'name': name, 'spatialClause': spatial_clause, 'isActive': True}
-    for layer in qa_layers:
-        AddDefinitionQuery(layer, query_params)
-    del validation_names, topology_names, qa_names, qa_layers
+    retired_names: list[str] = ['גושים מבוטלים', 'חלקות מבוטלות', 'חלקות תלת-ממדיות מבוטלות', 'גריעות מבוטלות',
+                                'נקודות גבול מבוטלות', 'נקודות גבול תלת-ממדיות מבוטלות', 'חזיתות מבוטלות']
 
+    plan: dict[str, dict[str, Any]] = {'גושים': blocks_query}
+    plan.update({layer_name: parcels_query for layer_name in ['חלקות', 'חלקות תלת-ממדיות', 'גריעות']})
+    plan.update({layer_name: active_query for layer_name in ['נקודות גבול', 'נקודות גבול תלת-ממדיות', 'חזיתות']})
+    plan.update({layer_name: retired_query for layer_name in retired_names})
+    plan.update({layer_name: spatial_query for layer_name in ['נקודות בקרה', 'היטלי חלקות תלת-ממדיות', 'היטלי גריעות'] + validation_names + topology_names})
 
-    # Filter Retired Cadastral layers:
-    query_params: dict[str, Any] = {'name': name, 'sql': "RetiredByRecord IS NOT NULL", 'spatialClause': spatial_clause, 'isActive': True}
-    for layer_name in ['גושים מבוטלים', 'חלקות מבוטלות', 'חלקות תלת-ממדיות מבוטלות', 'גריעות מבוטלות', 'נקודות גבול מבוטלות', 'נקודות גבול תלת-ממדיות מבוטלות', 'חזיתות מבוטלות']:
-        layer: Layer = aoi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+    return plan
 
 
-    # Filter active projected 3D parcels and projected substractions (scene map)
-    query_params: dict[str, Any] = {'name': name, 'spatialClause': spatial_clause, 'isActive': True}
-    for layer_name in ['היטלי חלקות תלת-ממדיות', 'היטלי גריעות']:
-        layer: Layer = aoi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+def apply_aoi_filter(aoi_map: Map, plan: dict[str, dict[str, Any]]) -> list[str]:
+    """
+    Applies a batch of definition queries to the layers of a map, listing the map layers only once.
+    Layers already filtered by an identical query are skipped.
 
-    del query_params, spatial_clause, aoi_map, RecordGUID, aoi_blocks
+    Parameters:
+        aoi_map (Map): The map object holding the layers.
+        plan (dict): Layer name as key, and its definition query as value (see aoi_definition_queries).
 
+    Returns:
+        list[str]: The names of the layers whose definition queries were changed.
+    """
+    changed: list[str] = []
+    for layer in aoi_map.listLayers():
+        if layer.isGroupLayer or layer.name not in plan:
+            continue
+        if AddDefinitionQuery(layer, dict(plan[layer.name])):
+            changed.append(layer.name)
 
-def filter_to_roi(RecordName: str, map_name: MapType = 'Active map') -> None:
+    if 'גושים' in changed:
+        RefreshLayer(aoi_map.listLayers('גושים')[0])
+
+    return changed
+
+
+def filter_to_area(aoi_map: Map, ShelfName: str, border: Layer, RecordGUID: str|None,
+                   extra_blocks: Optional[list[str]] = None, refresh: bool = False) -> list[str]:
     """
-    Reduces the display view by filtering the cadastral layers based on the regions of all blocks borders intersecting the free edit record border.
+    Reduces the display view by filtering the cadastral layers to the blocks intersecting a border.
+    The area of interest is cached in the shelf, keyed on the border geometry, the extra blocks and the state of the blocks:
+    following calls only re-apply the definition queries, until the border changes or any of these blocks is edited.
 
     Parameters:
-        RecordName (str): The name of the record to filter by.
-        map_name (MapType): The name of the map object to use.  Default is the currently active map view ("Active map").
+        aoi_map (Map): The map object to filter.
+        ShelfName (str): The process or record name whose shelf caches the area of interest.
+        border (Layer): A layer holding the process or record border.
+        RecordGUID (str): The GlobalID of the record.
+        extra_blocks (list[str], optional): GlobalIDs of blocks to add to the area of interest.
+        refresh (bool): If True, ignores the cached area of interest and computes it again.
+
+    Returns:
+        list[str]: The names of the layers whose definition queries were changed.
     """
-    ENV.addOutputsToMap = False
-    roi_map: Map = ArcGISProject("current").activeMap if map_name == 'Active map' else ArcGISProject("current").listMaps(map_name)[0]
-    record_layer: Layer = MakeFeatureLayer(fr'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}CadasterRecordsBorders', 'Free Edit Record', f"Name = '{RecordName}' AND RecordType = 16")[0]
-    blocks_layer: Layer = roi_map.listLayers('גושים')[0]
-    name: str = 'Area of Interest'
+    blocks_layer: Layer = aoi_map.listLayers('גושים')[0]
+    key: str = aoi_key(border, blocks_layer, extra_blocks)
+    aoi: tuple[list[str], Polygon]|None = None if refresh else load_aoi(ShelfName, key)
 
-    RecordGUID: str|None = get_RecordGUID(RecordName, 'SDE', False)
+    if aoi:
+        AddMessage(f'{timestamp()} | Using the area of interest cached in the shelf')
+    else:
+        aoi: tuple[list[str], Polygon]|None = compute_aoi(blocks_layer, border, extra_blocks)
+        if not aoi:
+            AddMessage(f'{timestamp()} | ⚠️ No active blocks intersect {ShelfName}, layers are not filtered')
+            return []
+        save_aoi(ShelfName, *aoi, key)
 
-    # Get blocks guids:
-    aoi_blocks_layer: Layer = SelectByLocation(in_layer= blocks_layer, select_features= record_layer, overlap_type= 'INTERSECT', search_distance="1 Meter")[0]
-    aoi_blocks: Scur = SearchCursor(aoi_blocks_layer, 'GlobalID', "RetiredByRecord IS NULL")
-    aoi_blocks: str = ', '.join(["'" + row[0] + "'" for row in aoi_blocks])
-    del record_layer, aoi_blocks_layer
+    aoi_blocks, aoi_geom = aoi
+    changed: list[str] = apply_aoi_filter(aoi_map, aoi_definition_queries(aoi_blocks, aoi_geom, RecordGUID))
 
-    roi_map.clearSelection()
+    if changed:
+        AddMessage(f'{timestamp()} | ✔️ Filtered {len(changed)} layers to the area of interest: {", ".join(changed)}')
+    else:
+        AddMessage(f'{timestamp()} | Layers are already filtered to the area of interest')
 
-    # Filter active blocks layer
-    query_params: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL AND GlobalID IN ({aoi_blocks})", 'isActive': True}
-    AddDefinitionQuery(blocks_layer, query_params)
-    RefreshLayer(blocks_layer)
+    del aoi, aoi_blocks, aoi_geom, key, blocks_layer
+    return changed
 
-    # Get aoi polygon geometry from filtered blocks layer:
-    Dissolve(blocks_layer, r"memory\aoi")
-    aoi_blocks_geom: Polygon = SearchCursor(r"memory\aoi", "Shape@").next()[0]
-    spatial_clause: list[dict[str, Polygon]] = [{'geometry': aoi_blocks_geom}]
-    del blocks_layer
 
+def filter_to_aoi(ProcessName: str, map_name: MapType = 'Active map', refresh: bool = False) -> list[str]:
+    """
+    Reduces the display view by filtering the cadastral layers based on the regions of all blocks
+    borders intersecting the process.
 
-    # Filter active 2D parcels, 3D parcels and substractions layers
-    query_params: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL AND BlockUniqueID IN ({aoi_blocks})", 'isActive': True}
-    for layer_name in ['חלקות', 'חלקות תלת-ממדיות', 'גריעות']:
-        layer: Layer = roi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+    Parameters:
+        ProcessName (str): The name of the process to filter by.
+        map_name (MapType): The name of the map object to use.  Default is the currently active map view ("Active map").
+        refresh (bool): If True, ignores the area of interest cached in the process shelf.
 
+    Returns:
+        list[str]: The names of the layers whose definition queries were changed.
+    """
+    aoi_map: Map = get_map(map_name)
+    process_layer: Layer = aoi_map.listLayers('גבול תכנית')[0]
 
-    # Filter active 2D points, active 3D points, and active fronts layers
-    query_params: dict[str, Any] = {'name': name, 'sql': f"RetiredByRecord IS NULL OR CreatedByRecord = '{RecordGUID}'", 'spatialClause': spatial_clause, 'isActive': True}
+    RecordGUID: str|None = get_RecordGUID(ProcessName, 'SDE', False)
+    if not RecordGUID:
+        RecordGUID: str = get_RecordGUID(ProcessName, 'SHELF', False)
 
-    for layer_name in ['נקודות גבול', 'נקודות גבול תלת-ממדיות', 'חזיתות']:
-        layer: Layer = roi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+    absorbing_blocks: list[str] = []
+    if get_ProcessType(ProcessName) not in [9, 15]:  # תנאי לתהליכים מסוג הסדר מקרקעין ותת"ג להסדר מקרקעין משום שאין להם פעולות בטבלת סדר פעולות
+        if process_is_establish_block(ProcessName):
+            absorbing_blocks: list[str] = get_AbsorbingBlockGUIDs() or []
 
+    changed: list[str] = filter_to_area(aoi_map, ProcessName, process_layer, RecordGUID, absorbing_blocks, refresh)
 
-    # Filter control points
-    control_points_layer: Layer = roi_map.listLayers('נקודות בקרה')[0]
-    query_params: dict[str, Any] = {'name': name, 'spatialClause': spatial_clause, 'isActive': True}
-    AddDefinitionQuery(control_points_layer, query_params)
-    del control_points_layer
+    del aoi_map, process_layer, RecordGUID, absorbing_blocks
+    return changed
 
 
-    # Filter QA layers
-    validation_names: list[str] = ['קווי אימות' , 'נקודות אימות', 'שטחי אימות']
-    topology_names: list[str] = ['שגיאות מסוג פוליגון' , 'שגיאות מסוג קו' , 'שגיאות מסוג נקודה' , 'אזורים לא חוקיים']
-    qa_names: list[str] = validation_names + topology_names
-    qa_layers: list[Layer] = [layer for layer in roi_map.listLayers() if layer.name in qa_names]
-    query_params: dict[str, Any] = {'name': name, 'spatialClause': spatial_clause, 'isActive': True}
-    for layer in qa_layers:
-        AddDefinitionQuery(layer, query_params)
-    del validation_names, topology_names, qa_names, qa_layers
+def filter_to_roi(RecordName: str, map_name: MapType = 'Active map', refresh: bool = False) -> list[str]:
+    """
+    Reduces the display view by filtering the cadastral layers based on the regions of all blocks borders intersecting the free edit record border.
 
+    Parameters:
+        RecordName (str): The name of the record to filter by.
+        map_name (MapType): The name of the map object to use.  Default is the currently active map view ("Active map").
+        refresh (bool): If True, ignores the area of interest cached in the record shelf.
 
-    # Filter Retired Cadastral layers:
-    query_params: dict[str, Any] = {'name': name, 'sql': "RetiredByRecord IS NOT NULL", 'spatialClause': spatial_clause, 'isActive': True}
-    for layer_name in ['גושים מבוטלים', 'חלקות מבוטלות', 'חלקות תלת-ממדיות מבוטלות', 'גריעות מבוטלות', 'נקודות גבול מבוטלות', 'נקודות גבול תלת-ממדיות מבוטלות', 'חזיתות מבוטלות']:
-        layer: Layer = roi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+    Returns:
+        list[str]: The names of the layers whose definition queries were changed.
+    """
+    ENV.addOutputsToMap = False
+    roi_map: Map = get_map(map_name)
+    RecordGUID: str|None = get_RecordGUID(RecordName, 'SDE', False)
 
+    record_layer: Layer = MakeFeatureLayer(fr'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}CadasterRecordsBorders', 'Free Edit Record', f"Name = '{RecordName}' AND RecordType = 16")[0]
 
-    # Filter active projected 3D parcels and projected substractions (scene map)
-    query_params: dict[str, Any] = {'name': name, 'spatialClause': spatial_clause, 'isActive': True}
-    for layer_name in ['היטלי חלקות תלת-ממדיות', 'היטלי גריעות']:
-        layer: Layer = roi_map.listLayers(layer_name)[0]
-        AddDefinitionQuery(layer, query_params)
+    changed: list[str] = filter_to_area(roi_map, RecordName, record_layer, RecordGUID, None, refresh)
 
-    del query_params, spatial_clause, roi_map, RecordGUID, aoi_blocks
+    Delete(record_layer)
+    del roi_map, record_layer, RecordGUID
+    return changed
 
 
 def respond_to_CMS(ProcessName: str, ProcessType: int, ProjectStatus: Optional[int] = 1) -> None:
@@ -1380,6 +1995,7 @@ def respond_to_CMS(ProcessName: str, ProcessType: int, ProjectStatus: Optional[i
 
     url: str = f'{CNFG.CMS_url}{ProcessNumber}/{ProcessYear}/{ProcessType}/{ProjectStatus}'
 
+    requests = load('requests')
     try:
         r = requests.get(url)
         r.raise_for_status()    # Raises an HTTPError for bad responses (4xx and 5xx)
@@ -1406,7 +2022,7 @@ def get_aprx_name(aprx_path: str = 'current') -> str:
         aprx_path (str, Optional): The path to the aprx file.
     """
 
-    aprx_name: str = ArcGISProject(aprx_path).filePath\
+    aprx_name: str = (get_project() if aprx_path == 'current' else ArcGISProject(aprx_path)).filePath\
                                              .split("\\")[-1]\
                                              .split(".")[0]\
                                              .replace("_", "/")
@@ -0,0 +1,35 @@
+import sys
+from importlib import import_module
+from time import perf_counter
+from types import ModuleType
+
+
+# The import duration (seconds) of every module loaded through `load` in the current session
+_ImportSeconds: dict[str, float] = {}
+
+
+def load(name: str) -> ModuleType:
+    """
+    Imports a heavy third party module on its first use instead of at the module scope of the Utils modules,
+    so tools which never reach the code using it do not pay its import cost. Following calls return the loaded module.
+
+    Parameters:
+        name (str): The module name, i.e. 'pandas', 'numpy', 'openpyxl', 'arcgis.gis' or 'requests'.
+
+    Returns:
+        ModuleType: The imported module.
+    """
+    module: ModuleType|None = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    start: float = perf_counter()
+    module: ModuleType = import_module(name)
+    _ImportSeconds[name] = round(perf_counter() - start, 3)
+
+    return module
+
+
+def loaded_imports() -> dict[str, float]:
+    """ Returns the modules imported through `load` in the current session and their import duration in seconds. """
+    return dict(_ImportSeconds)
@@ -1,13 +1,14 @@
 from Utils.Configs import CNFG
-from Utils.Helpers import get_ProcessGUID, get_RecordGUID, get_BlockGUID, start_editing, stop_editing, get_layer, reopen_map, Type2CreateType, timestamp,get_ProcessType,reopen_map
-from arcpy.management import Append, DeleteIdentical, GetCount, SelectLayerByAttribute as SelectByAttribute, SelectLayerByLocation as SelectByLocation, CalculateField, Delete, Dissolve,SplitLine, CopyFeatures
+from Utils.Helpers import get_project, get_map, get_ProcessGUID, get_RecordGUID, get_BlockGUID, edit_session, get_layer, reopen_map, Type2CreateType, timestamp,get_ProcessType,reopen_map
+from arcpy.management import Append, DeleteIdentical, GetCount, SelectLayerByAttribute as SelectByAttribute, SelectLayerByLocation as SelectByLocation, CalculateField, Delete, SplitLine, CopyFeatures
 
 from arcpy.da import SearchCursor, UpdateCursor, InsertCursor
 from arcpy import AddMessage, AddWarning, AddError,env as ENV, Describe, Extent,RefreshLayer
-from arcpy.mp import LayerFile, ArcGISProject
-from arcpy.mp import ArcGISProject
+from arcpy.mp import LayerFile
 from arcpy import Geometry
 from Utils.TypeHints import *
+from Utils.GeometryUnion import union_features
+from Utils.FieldMapping import compile_field_map, load_rows
 from arcpy.conversion import ExportFeatures
 import os
 
@@ -34,10 +35,8 @@ def is_process_border_valid(ProcessName:str) -> bool:
         AddWarning(f'{timestamp()} | No parcels found for process {ProcessName}. No change to process border will be made.')
         return False
     
-    dissolved_parcels = Dissolve(in_features=process_parcels, out_feature_class=r"memory\dissolved_parcels")
-
-    with SearchCursor(dissolved_parcels, field_names="SHAPE@") as cursor:
-        dissolved_parcels_geometry = cursor.next()[0]
+    # the union of the selected process parcels
+    dissolved_parcels_geometry = union_features([(parcels_layer, None)])
 
     with SearchCursor(process_border, field_names="SHAPE@") as cursor:
         process_border_geometry = cursor.next()[0]
@@ -48,14 +47,13 @@ def is_process_border_valid(ProcessName:str) -> bool:
         default_gdb = get_default_gdb()
         local_process_border = CopyFeatures(process_border, f"{default_gdb}\\ProcessBorder_{ProcessName.replace('/','_')}")
         ENV.preserveGlobalIds = False
-        editor = start_editing(CNFG.ParcelFabricDatabase)
+        with edit_session():
 
-        with UpdateCursor(local_process_border, ["SHAPE@"]) as cursor:
-                row = next(cursor, None)  # Safely get the first row or None
-                if row:
-                    row[0] = dissolved_parcels_geometry
-                    cursor.updateRow(row)
-        stop_editing(editor)
+            with UpdateCursor(local_process_border, ["SHAPE@"]) as cursor:
+                    row = next(cursor, None)  # Safely get the first row or None
+                    if row:
+                        row[0] = dissolved_parcels_geometry
+                        cursor.updateRow(row)
 
         result = False
     else:
@@ -63,7 +61,6 @@ def is_process_border_valid(ProcessName:str) -> bool:
         
         result = True
 
-    Delete(dissolved_parcels)
     clear_map_selections()
     return result
 
@@ -74,7 +71,7 @@ def get_default_gdb() -> str:
     Returns:
         str: The path to the default geodatabase.
     '''
-    aprx = ArcGISProject("CURRENT")
+    aprx = get_project()
     default_gdb = aprx.defaultGeodatabase
     return default_gdb
 
@@ -91,10 +88,8 @@ def match_process_border_to_process_parcels(ProcessName:str) -> None:
         AddMessage(f'{timestamp()} | No parcels found for process {ProcessName}. No change to process border will be made.')
         return
     
-    dissolved_parcels = Dissolve(in_features=process_parcels, out_feature_class=r"memory\dissolved_parcels")
-
-    with SearchCursor(dissolved_parcels, field_names="SHAPE@") as cursor:
-        dissolved_parcels_geometry = cursor.next()[0]
+    # the union of the selected process parcels
+    dissolved_parcels_geometry = union_features([(parcels_layer, None)])
 
     with SearchCursor(process_border, field_names="SHAPE@") as cursor:
         process_border_geometry = cursor.next()[0]
@@ -102,20 +97,18 @@ def match_process_border_to_process_parcels(ProcessName:str) -> None:
     if not process_border_geometry.equals(dissolved_parcels_geometry):
         AddMessage(f'{timestamp()} | Mismatch between the process border and the dissolved process parcels was found for process {ProcessName}.\
          Updating the process border to match the process parcels contour.')
-        editor = start_editing(CNFG.ParcelFabricDatabase)
+        with edit_session():
 
-        with UpdateCursor(process_border, ["SHAPE@"]) as cursor:
-                row = next(cursor, None)  # Safely get the first row or None
-                if row:
-                    AddMessage(f'{timestamp()} | Updating process border geometry...')
-                    row[0] = dissolved_parcels_geometry
-                    cursor.updateRow(row)
-        stop_editing(editor)
+            with UpdateCursor(process_border, ["SHAPE@"]) as cursor:
+                    row = next(cursor, None)  # Safely get the first row or None
+                    if row:
+                        AddMessage(f'{timestamp()} | Updating process border geometry...')
+                        row[0] = dissolved_parcels_geometry
+                        cursor.updateRow(row)
 
     else:
         AddMessage(f'{timestamp()} | The process border matches the process parcels contour for process {ProcessName}.')
     clear_map_selections()
-    Delete(dissolved_parcels)
     reopen_map()
 
 
@@ -156,13 +149,12 @@ def match_active_tax_blocks_to_active_tax_parcels(ProcessName:str) -> None:
         return
 
     AddMessage(f'{timestamp()} | Found {len(retired_block_guids)} tax blocks that were wrongly retired. Restoring them to active blocks layer and updating their geometry to fit their active parcels')
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-    for block_guid in retired_block_guids:
-        with UpdateCursor(retired_blocks_layer, ['RetiredByRecord'], where_clause=f"GlobalID = '{block_guid}'") as cursor:
-            for row in cursor:
-                row[0] = None
-                cursor.updateRow(row)
-    stop_editing(editor)
+    with edit_session():
+        for block_guid in retired_block_guids:
+            with UpdateCursor(retired_blocks_layer, ['RetiredByRecord'], where_clause=f"GlobalID = '{block_guid}'") as cursor:
+                for row in cursor:
+                    row[0] = None
+                    cursor.updateRow(row)
 
     for block_guid in retired_block_guids:
         update_blocks_geometry_by_active_parcels(block_guid, None)
@@ -211,8 +203,7 @@ def split_merged_tax_fronts(ProcessName:str) -> None:
     count_fronts_after = int(GetCount(splitted_fronts).getOutput(0))
     if count_fronts_after > count_fronts_before:
         AddMessage(f'{timestamp()} | The found merged {count_fronts_before} fronts will be splitted into {count_fronts_after} fronts.')
-        editor = start_editing(CNFG.ParcelFabricDatabase)
-        try:
+        with edit_session():
             # Append the split fronts back to the main layer
             Append(
                 inputs=splitted_fronts,
@@ -230,8 +221,6 @@ def split_merged_tax_fronts(ProcessName:str) -> None:
             with UpdateCursor(fronts_to_split, ["OID@"]) as cursor:
                 for row in cursor:
                     cursor.deleteRow()
-        finally:
-            stop_editing(editor)
 
         clear_map_selections()
         reopen_map()
@@ -259,8 +248,7 @@ def clear_map_selections() -> None:
     Returns:
         None
     '''
-    aprx = ArcGISProject("CURRENT")
-    active_map = aprx.activeMap
+    active_map = get_map()
     if active_map:
             active_map.clearSelection()
     
@@ -413,22 +401,14 @@ def append_first_registration_parcels(ProcessName:str) -> None:
     CalculateField(in_table=exported_process_parcels,field="LandType",expression="1",
         expression_type="PYTHON3",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
     CalculateField(in_table=exported_process_parcels,field="CreateProcessType",expression=f"{Type2CreateType(get_ProcessType(ProcessName))}",
-        expression_type="PYTHON3",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
+        expression_type="PYTHON3",code_block="",field_type="SHORT",enforce_domains="NO_ENFORCE_DOMAINS")
 
     if not is_tax_process(ProcessName):
-        field_mapping = fr'Name "Name" true true true 255 Text 0 0,Join,"/",{process_parcels_layer.name},ParcelNumber,-1,-1,{process_parcels_layer.name},BlockNumber,-1,-1,{process_parcels_layer.name},SubBlockNumber,-1,-1;'+\
-                fr'ParcelNumber "מספר חלקה" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},ParcelNumber,-1,-1;'+\
-                fr'BlockNumber "מספר גוש" true false false 0 Long 0 0,First,#,{process_parcels_layer.name},BlockNumber,-1,-1;'+\
-                fr'SubBlockNumber "מספר תת-גוש" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},SubBlockNumber,-1,-1;'+\
-                fr'LandType "סוג מקרקעין" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},LandType,-1,-1;'+\
-                fr'IsTax "שומא" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},IsTax,-1,-1;'+\
-                fr'StatedArea "שטח רשום" true true true 0 Double 0 0,First,#,{process_parcels_layer.name},LegalArea,-1,-1;'+\
-                fr'LandDesignationPlan "יעוד הקרקע" true true false 80 Text 0 0,First,#,{process_parcels_layer.name},LandDesignationPlan,0,79;'+\
-                fr'ParcelType "סוג החלקה" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},ParcelType,-1,-1;'+\
-                fr'BlockUniqueID "מזהה גוש" true true false 38 Guid 0 0,First,#,{process_parcels_layer.name},BlockUniqueID,-1,-1;'+\
-                fr'CreatedByRecord "מזהה תהליך יוצר" true true true 38 Guid 0 0,First,#,{process_parcels_layer.name},CreatedByRecord,0,511;'+\
-                fr'CreateProcessType "סוג תהליך יוצר" true false false 512 Short 0 0,First,#,{process_parcels_layer.name},CreateProcessType,0,511;'+\
-                fr'LandType "סוג מקרקעין" true false false 2 Short 0 0,First,#,{process_parcels_layer.name},LandType,-1,-1'
+        field_mapping = compile_field_map(exported_process_parcels, record_parcels_layer,
+                                          {"Name": ["ParcelNumber", "BlockNumber", "SubBlockNumber"], "ParcelNumber": "ParcelNumber", "BlockNumber": "BlockNumber",
+                                           "SubBlockNumber": "SubBlockNumber", "LandType": "LandType", "IsTax": "IsTax", "StatedArea": "LegalArea",
+                                           "LandDesignationPlan": "LandDesignationPlan", "ParcelType": "ParcelType", "BlockUniqueID": "BlockUniqueID",
+                                           "CreatedByRecord": "CreatedByRecord", "CreateProcessType": "CreateProcessType"})
         
         Append(inputs=exported_process_parcels,target=record_parcels_layer,expression = "",field_mapping = field_mapping,
                                     schema_type="NO_TEST",subtype="",match_fields=None,update_geometry="NOT_UPDATE_GEOMETRY",feature_service_mode="USE_FEATURE_SERVICE_MODE")
@@ -465,28 +445,22 @@ def update_blocks_geometry_by_active_parcels(block_guid:str, record_guid:str) ->
     parcels_layer = get_layer('חלקות')
     blocks_layer = get_layer('גושים')
 
-    SelectByAttribute(parcels_layer,where_clause=f"BlockUniqueID = '{block_guid}' AND RetiredByRecord IS NULL",selection_type='NEW_SELECTION')
-    num_of_parcels = int(GetCount(parcels_layer).getOutput(0))
-    if num_of_parcels > 0: 
-        dissolved_parcels = Dissolve(in_features=parcels_layer, out_feature_class=r"memory\dissolved_parcels")
-        #dissolved_parcels = Dissolve(in_features=parcels_layer, out_feature_class=r"memory\dissolved_parcels",multi_part="MULTI_PART",unsplit_lines="UNSPLIT_LINES")
+    # the union of the active parcels of the block, computed in memory (None if the block has no active parcels)
+    SelectByAttribute(parcels_layer,selection_type='CLEAR_SELECTION')
+    new_geometry = union_features([(parcels_layer, f"BlockUniqueID = '{block_guid}' AND RetiredByRecord IS NULL")])
+    if new_geometry: 
         SelectByAttribute(blocks_layer,where_clause=f"GlobalID = '{block_guid}'",selection_type='NEW_SELECTION')
 
-        with SearchCursor(dissolved_parcels, field_names="SHAPE@") as cursor:
-            new_geometry = cursor.next()[0]
-
-        editor = start_editing(CNFG.ParcelFabricDatabase)
-        with UpdateCursor(blocks_layer, ["SHAPE@"]) as cursor:
-                row = next(cursor, None)  # Safely get the first row or None
-                if row:
-                    row[0] = new_geometry
-                    cursor.updateRow(row)
-        stop_editing(editor)
+        with edit_session(CNFG.ParcelFabricDatabase):
+            with UpdateCursor(blocks_layer, ["SHAPE@"]) as cursor:
+                    row = next(cursor, None)  # Safely get the first row or None
+                    if row:
+                        row[0] = new_geometry
+                        cursor.updateRow(row)
 
         update_status = 1  # Geometry was updated
 
         #AddMessage(f'{timestamp()} | Updated geometry for block {block_guid} from the active parcels')
-        Delete(dissolved_parcels)
     else:
         # Check if the block is already retired
         with SearchCursor(blocks_layer, ['RetiredByRecord'], where_clause=f"GlobalID = '{block_guid}'") as cursor:
@@ -495,13 +469,12 @@ def update_blocks_geometry_by_active_parcels(block_guid:str, record_guid:str) ->
                 if row:
                     if not row[0]:
                         update_status = 2  # No active parcels found, block is still active and will be retired
-                        editor = start_editing(CNFG.ParcelFabricDatabase)
-                        with UpdateCursor(blocks_layer, ['RetiredByRecord'], where_clause=f"GlobalID = '{block_guid}'") as cursor:
-                            for row in cursor:
-                                if record_guid:
-                                    row[0] = record_guid
-                                    cursor.updateRow(row)
-                        stop_editing(editor)
+                        with edit_session(CNFG.ParcelFabricDatabase):
+                            with UpdateCursor(blocks_layer, ['RetiredByRecord'], where_clause=f"GlobalID = '{block_guid}'") as cursor:
+                                for row in cursor:
+                                    if record_guid:
+                                        row[0] = record_guid
+                                        cursor.updateRow(row)
 
                 
 
@@ -521,34 +494,32 @@ def update_settled_block_geometry(processName:str) -> None:
     Process_border_layer = get_layer('גבול תכנית')
     Block_layer = get_layer('גוש הסדר')
 
-    editor = start_editing(CNFG.ParcelFabricDatabase)
+    with edit_session():
     
 
    
-    # Get the single feature from Process_border_layer
-    with SearchCursor(Process_border_layer, field_names="SHAPE@") as cursor:
-        process_geometry = cursor.next()[0]
+        # Get the single feature from Process_border_layer
+        with SearchCursor(Process_border_layer, field_names="SHAPE@") as cursor:
+            process_geometry = cursor.next()[0]
 
 
 
-    is_updated = False
-    # Update the CreatedByRecord, LandType, and BlockStatus fields in the single feature of the Block_layer
-    with UpdateCursor(Block_layer, ["SHAPE@","CreatedByRecord", "LandType", "BlockStatus", "LastSetteledParcel"]) as cursor:
-        row = next(cursor, None)  # Safely get the first row or None
-        if row:
-            row[0] = process_geometry      # SHAPE@
-            cursor.updateRow(row)
-            is_updated = True
-
+        is_updated = False
+        # Update the CreatedByRecord, LandType, and BlockStatus fields in the single feature of the Block_layer
+        with UpdateCursor(Block_layer, ["SHAPE@","CreatedByRecord", "LandType", "BlockStatus", "LastSetteledParcel"]) as cursor:
+            row = next(cursor, None)  # Safely get the first row or None
+            if row:
+                row[0] = process_geometry      # SHAPE@
+                cursor.updateRow(row)
+                is_updated = True
 
-    if is_updated:
 
-        AddMessage(f'                Geometry was updated')
+        if is_updated:
 
-    else:
-        AddWarning(f'                Was unable to update the block\'s geometry')
+            AddMessage(f'                Geometry was updated')
 
-    stop_editing(editor)
+        else:
+            AddWarning(f'                Was unable to update the block\'s geometry')
 
 
 
@@ -563,11 +534,8 @@ def layer_exists(layer_name)-> bool:
     Returns:
         bool: True if the layer exists, False otherwise.
     """
-    # Get the current ArcGIS Pro project
-    aprx = ArcGISProject("CURRENT")
-    
     # Get the active map
-    active_map = aprx.activeMap
+    active_map = get_map()
     if active_map is None:
         raise ValueError("No active map found.")
     
@@ -909,10 +877,8 @@ def update_layer_fields_dict(input_layer, updates_dict, method='UpdateCursor' or
         # Extract the field names and corresponding values from the dictionary
         fields_to_update = list(updates_dict.keys())
 
-        # Start an edit session
-        editor = start_editing(CNFG.ParcelFabricDatabase)
-
-        try:
+        # Edit session (commit on success, roll back if errors occur)
+        with edit_session(CNFG.ParcelFabricDatabase):
             with UpdateCursor(input_layer, fields_to_update, where_clause=where_clause) as cursor:
                 for row in cursor:
                     # For each row, update all specified fields
@@ -922,9 +888,6 @@ def update_layer_fields_dict(input_layer, updates_dict, method='UpdateCursor' or
                     # Update the row
                     cursor.updateRow(row)
                     num_of_updated_rows += 1
-        finally:
-            # Stop the edit session (commit by default, or roll back if errors occur)
-            stop_editing(editor)
 
     elif method == 'CalculateField':
 
@@ -953,38 +916,17 @@ def insert_process_to_records(ProcessName:str) -> int:
     process_borders_layer = get_layer('גבולות תהליכי קדסטר')
     record_borders_layer  = get_layer('גבולות רישומים')
 
-    # Define the fields to copy
-    fields = [
-        "ProcessName", "ProcessType", "GeodeticNetwork", "Status", "SurveyorLicenseID",
-        "DataSource", "PlanName", "BlockUniqueID", "SHAPE@"
-    ]
-    target_fields = [
-        "Name", "RecordType", "GeodeticNetwork", "Status", "SurveyorLicenseID",
-        "DataSource", "PlanName", "BlockUniqueID", "SHAPE@"
-    ]
-
-    # Select features to copy
-    where_clause = f"ProcessName = '{ProcessName}'"
-    rows_to_insert = []
-    with SearchCursor(process_borders_layer, fields, where_clause=where_clause) as search_cursor:
-        for row in search_cursor:
-            rows_to_insert.append(row)
-
-    # Insert into target layer
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-    inserted_count = 0
-    try:
-        with InsertCursor(record_borders_layer, target_fields) as insert_cursor:
-            for row in rows_to_insert:
-                insert_cursor.insertRow(row)
-                inserted_count += 1
-    finally:
-        stop_editing(editor)
+    # Define the fields to copy and their mapping
+    field_map = {"ProcessName": "Name", "ProcessType": "RecordType", "GeodeticNetwork": "GeodeticNetwork", "Status": "Status",
+                 "SurveyorLicenseID": "SurveyorLicenseID", "DataSource": "DataSource", "PlanName": "PlanName",
+                 "BlockUniqueID": "BlockUniqueID", "SHAPE@": "SHAPE@"}
+
+    stats = load_rows(process_borders_layer, record_borders_layer, field_map, f"ProcessName = '{ProcessName}'")
 
     RefreshLayer(record_borders_layer)
     reopen_map()
 
-    return inserted_count
+    return stats['inserted']
 
 
 
@@ -994,14 +936,10 @@ def append_process_to_records(ProcessName:str) -> int:
     process_borders_layer = get_layer('גבולות תהליכי קדסטר')
     record_borders_layer  = get_layer('גבולות רישומים')
 
-    field_mapping = fr'Name "שם מפה" true true true 255 Text 0 0,First,#,{process_borders_layer.name},ProcessName,0,100;'+\
-                fr'RecordType "סוג תהליך" true true true 4 Long 0 0,First,#,{process_borders_layer.name},ProcessType,-1,-1;'+\
-                fr'GeodeticNetwork "רשת בקרה" true true false 2 Short 0 0,First,#,{process_borders_layer.name},GeodeticNetwork,-1,-1;'+\
-                fr'Status "סטטוס" true true false 2 Short 0 0,First,#,{process_borders_layer.name},Status,-1,-1;'+\
-                fr'SurveyorLicenseID "רשיון מודד" true true false 2 Short 0 0,First,#,{process_borders_layer.name},SurveyorLicenseID,-1,-1;'+\
-                fr'DataSource "מקור הנתונים" true true false 2 Short 0 0,First,#,{process_borders_layer.name},DataSource,-1,-1;'+\
-                fr'PlanName "תכנית מפורטת" true true false 255 Text 0 0,First,#,{process_borders_layer.name},PlanName,0,255;'+\
-                fr'BlockUniqueID "מזהה גוש" true true false 38 Guid 0 0,First,#,{process_borders_layer.name},BlockUniqueID,-1,-1'              
+    field_mapping = compile_field_map(process_borders_layer, record_borders_layer,
+                                      {"Name": "ProcessName", "RecordType": "ProcessType", "GeodeticNetwork": "GeodeticNetwork", "Status": "Status",
+                                       "SurveyorLicenseID": "SurveyorLicenseID", "DataSource": "DataSource", "PlanName": "PlanName",
+                                       "BlockUniqueID": "BlockUniqueID"})
 
 
     Append(inputs = process_borders_layer, target = record_borders_layer, expression = f"ProcessName = '{ProcessName}'", field_mapping = field_mapping,
@@ -1019,45 +957,22 @@ def append_process_to_records(ProcessName:str) -> int:
 def insert_settled_parcels(ProcessName:str) -> int:
 
     RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
-    #BlockGUID = get_BlockGUID('ProcessName', ProcessName)
     ProcessGuid = get_ProcessGUID(ProcessName)
     process_parcels_layer = get_layer('חלקות בתהליך')
     record_parcels_layer = get_layer('חלקות')
 
     # Define the fields to copy from process_parcels_layer and their mapping to record_parcels_layer
-    source_fields = [
-        "ParcelNumber", "BlockNumber", "SubBlockNumber", "IsTax",
-        "LegalArea", "LandDesignationPlan", "ParcelType", "BlockUniqueID", "SHAPE@"
-    ]
-    target_fields = [
-        "ParcelNumber", "BlockNumber", "SubBlockNumber", "IsTax",
-        "StatedArea", "LandDesignationPlan", "ParcelType", "BlockUniqueID", "SHAPE@",
-        "CreatedByRecord","LandType","CreateProcessType"
-    ]
-
-    # Select features to copy
-    where_clause = f"CPBUniqueID = '{ProcessGuid}'"
-    rows_to_insert = []
-    with SearchCursor(process_parcels_layer, source_fields, where_clause=where_clause) as search_cursor:
-        for row in search_cursor:
-            rows_to_insert.append(row)
-
-    # Insert into target layer
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-    inserted_count = 0
-    try:
-        with InsertCursor(record_parcels_layer, target_fields) as insert_cursor:
-            for row in rows_to_insert:
-                parcel_row = row + (RecordGUID, "1", "3")
-                insert_cursor.insertRow(parcel_row)
-                inserted_count += 1
-    finally:
-        stop_editing(editor)
+    field_map = {"ParcelNumber": "ParcelNumber", "BlockNumber": "BlockNumber", "SubBlockNumber": "SubBlockNumber", "IsTax": "IsTax",
+                 "LegalArea": "StatedArea", "LandDesignationPlan": "LandDesignationPlan", "ParcelType": "ParcelType",
+                 "BlockUniqueID": "BlockUniqueID", "SHAPE@": "SHAPE@"}
+    constants = {"CreatedByRecord": RecordGUID, "LandType": "1", "CreateProcessType": "3"}
+
+    stats = load_rows(process_parcels_layer, record_parcels_layer, field_map, f"CPBUniqueID = '{ProcessGuid}'", constants)
 
     RefreshLayer(record_parcels_layer)
     reopen_map()
 
-    return inserted_count
+    return stats['inserted']
 
 
 def append_settled_parcels(ProcessName:str) -> int:
@@ -1077,22 +992,14 @@ def append_settled_parcels(ProcessName:str) -> int:
     CalculateField(in_table=exported_process_parcels,field="LandType",expression="1",
         expression_type="PYTHON3",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
     CalculateField(in_table=exported_process_parcels,field="CreateProcessType",expression=f"{Type2CreateType(get_ProcessType(ProcessName))}",
-        expression_type="PYTHON3",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
+        expression_type="PYTHON3",code_block="",field_type="SHORT",enforce_domains="NO_ENFORCE_DOMAINS")
 
 
-    field_mapping = fr'Name "Name" true true true 255 Text 0 0,Join,"/",{process_parcels_layer.name},ParcelNumber,-1,-1,{process_parcels_layer.name},BlockNumber,-1,-1,{process_parcels_layer.name},SubBlockNumber,-1,-1;'+\
-            fr'ParcelNumber "מספר חלקה" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},ParcelNumber,-1,-1;'+\
-            fr'BlockNumber "מספר גוש" true false false 0 Long 0 0,First,#,{process_parcels_layer.name},BlockNumber,-1,-1;'+\
-            fr'SubBlockNumber "מספר תת-גוש" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},SubBlockNumber,-1,-1;'+\
-            fr'LandType "סוג מקרקעין" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},LandType,-1,-1;'+\
-            fr'IsTax "שומא" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},IsTax,-1,-1;'+\
-            fr'StatedArea "שטח רשום" true true true 0 Double 0 0,First,#,{process_parcels_layer.name},LegalArea,-1,-1;'+\
-            fr'LandDesignationPlan "יעוד הקרקע" true true false 80 Text 0 0,First,#,{process_parcels_layer.name},LandDesignationPlan,0,79;'+\
-            fr'ParcelType "סוג החלקה" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},ParcelType,-1,-1;'+\
-            fr'BlockUniqueID "מזהה גוש" true true false 38 Guid 0 0,First,#,{process_parcels_layer.name},BlockUniqueID,-1,-1;'+\
-			fr'CreatedByRecord "מזהה תהליך יוצר" true true true 38 Guid 0 0,First,#,{process_parcels_layer.name},CreatedByRecord,0,511;'+\
-			fr'CreateProcessType "סוג תהליך יוצר" true false false 512 Short 0 0,First,#,{process_parcels_layer.name},CreateProcessType,0,511;'+\
-			fr'LandType "סוג מקרקעין" true false false 2 Short 0 0,First,#,{process_parcels_layer.name},LandType,-1,-1'
+    field_mapping = compile_field_map(exported_process_parcels, record_parcels_layer,
+                                      {"Name": ["ParcelNumber", "BlockNumber", "SubBlockNumber"], "ParcelNumber": "ParcelNumber", "BlockNumber": "BlockNumber",
+                                       "SubBlockNumber": "SubBlockNumber", "LandType": "LandType", "IsTax": "IsTax", "StatedArea": "LegalArea",
+                                       "LandDesignationPlan": "LandDesignationPlan", "ParcelType": "ParcelType", "BlockUniqueID": "BlockUniqueID",
+                                       "CreatedByRecord": "CreatedByRecord", "CreateProcessType": "CreateProcessType"})
     
     Append(inputs=exported_process_parcels,target=record_parcels_layer,expression = "",field_mapping = field_mapping,
                                 schema_type="NO_TEST",subtype="",match_fields=None,update_geometry="NOT_UPDATE_GEOMETRY",feature_service_mode="USE_FEATURE_SERVICE_MODE")
@@ -1106,91 +1013,22 @@ def append_settled_parcels(ProcessName:str) -> int:
     return num_of_features
 
 
-def append_settled_parcels_old(ProcessName:str) -> tuple[int,int]:
-
-    RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
-    BlockGUID = get_BlockGUID('ProcessName',ProcessName)
-    ProcessGuid = get_ProcessGUID(ProcessName)
-    process_parcels_layer = get_layer('חלקות בתהליך')   
-    record_parcels_layer = get_layer('חלקות')
-
-
-
-    field_mapping = fr'Name "Name" true true true 255 Text 0 0,Join,"/",{process_parcels_layer.name},ParcelNumber,-1,-1,{process_parcels_layer.name},BlockNumber,-1,-1,{process_parcels_layer.name},SubBlockNumber,-1,-1;'+\
-            fr'ParcelNumber "מספר חלקה" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},ParcelNumber,-1,-1;'+\
-            fr'BlockNumber "מספר גוש" true false false 0 Long 0 0,First,#,{process_parcels_layer.name},BlockNumber,-1,-1;'+\
-            fr'SubBlockNumber "מספר תת-גוש" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},SubBlockNumber,-1,-1;'+\
-            fr'LandType "סוג מקרקעין" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},LandType,-1,-1;'+\
-            fr'IsTax "שומא" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},IsTax,-1,-1;'+\
-            fr'StatedArea "שטח רשום" true true true 0 Double 0 0,First,#,{process_parcels_layer.name},LegalArea,-1,-1;'+\
-            fr'LandDesignationPlan "יעוד הקרקע" true true false 80 Text 0 0,First,#,{process_parcels_layer.name},LandDesignationPlan,0,79;'+\
-            fr'ParcelType "סוג החלקה" true false false 0 Short 0 0,First,#,{process_parcels_layer.name},ParcelType,-1,-1;'+\
-            fr'BlockUniqueID "מזהה גוש" true true false 38 Guid 0 0,First,#,{process_parcels_layer.name},BlockUniqueID,-1,-1'
-
-    
-    Append(inputs=process_parcels_layer,target=record_parcels_layer,expression = f"CPBUniqueID = '{ProcessGuid}'",field_mapping = field_mapping,
-        schema_type="NO_TEST",subtype="",match_fields=None,update_geometry="NOT_UPDATE_GEOMETRY")
-    
-    reopen_map()
-
-    SelectByAttribute(record_parcels_layer,where_clause=f"""BlockUniqueID='{BlockGUID}' AND RetiredByRecord IS NULL""",selection_type="NEW_SELECTION")
-    appended_features_count = int(GetCount(record_parcels_layer).getOutput(0))
-    SelectByAttribute(record_parcels_layer, "CLEAR_SELECTION")
-  
-    inserted_parcels = SelectByAttribute(record_parcels_layer,where_clause=f"""BlockUniqueID='{BlockGUID}' AND RetiredByRecord IS NULL""",selection_type='NEW_SELECTION')
-    calculated_features_count = int(GetCount(inserted_parcels)[0])
-
-    CalculateField(in_table=inserted_parcels,field="CreatedByRecord",expression=f"'{RecordGUID}'",
-        expression_type="SQL",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
-
-    CalculateField(in_table=inserted_parcels,field="LandType",expression="1",
-        expression_type="SQL",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
-    
-    CalculateField(in_table=inserted_parcels,field="CreateProcessType",expression="3",
-        expression_type="SQL",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
-    
-
-    return appended_features_count, calculated_features_count
-
-
 def insert_new_fronts(ProcessName:str, query:str) -> int:
             
     RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
-    Process_GUID = get_ProcessGUID(ProcessName)
 
     process_fronts_layer = get_layer('חזיתות בתהליך')
     record_fronts_layer = get_layer('חזיתות')
 
     # Define the fields to copy and their mapping
-    source_fields = [
-        "LineType", "LegalLength", "Radius", "SHAPE@"
-    ]
-    target_fields = [
-        "LineType", "Distance", "Radius", "SHAPE@", "CreatedByRecord"
-    ]
-
-    # Select features to copy based on the query
-    rows_to_insert = []
-    with SearchCursor(process_fronts_layer, source_fields, where_clause=query) as search_cursor:
-        for row in search_cursor:
-            rows_to_insert.append(row)
-
-    # Insert into target layer
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-    inserted_count = 0
-    try:
-        with InsertCursor(record_fronts_layer, target_fields) as insert_cursor:
-            for row in rows_to_insert:
-                front_row = row + (RecordGUID,)
-                insert_cursor.insertRow(front_row)
-                inserted_count += 1
-    finally:
-        stop_editing(editor)
+    field_map = {"LineType": "LineType", "LegalLength": "Distance", "Radius": "Radius", "SHAPE@": "SHAPE@"}
+
+    stats = load_rows(process_fronts_layer, record_fronts_layer, field_map, query, {"CreatedByRecord": RecordGUID})
 
     RefreshLayer(record_fronts_layer)
     reopen_map()
 
-    return inserted_count
+    return stats['inserted']
 
 def append_new_fronts(ProcessName:str, query:str) -> int:
 
@@ -1228,78 +1066,23 @@ def append_new_fronts(ProcessName:str, query:str) -> int:
 
     pass
 
-def append_new_fronts_old(ProcessName:str, query:str) -> tuple[int,int]:
-            
-    RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
-    Process_GUID = get_ProcessGUID(ProcessName)
-
-    process_fronts_layer = get_layer('חזיתות בתהליך')
-    record_fronts_layer = get_layer('חזיתות')
-    
-
-
-    field_mapping = fr'LineType "סוג הקו" true false true 0 Short 0 0,First,#,{process_fronts_layer.name},LineType,-1,-1;' + \
-        fr'Distance "אורך רשום" true true true 0 Double 0 0,First,#,{process_fronts_layer.name},LegalLength,-1,-1;' + \
-        fr'Radius "רדיוס" true true true 0 Double 0 0,First,#,{process_fronts_layer.name},Radius,-1,-1;' + \
-        fr'CreatedByRecord "מזהה תהליך יוצר" true true true 38 Guid 0 0,First,#,{process_fronts_layer.name},CPBUniqueID,-1,-1'
-
-    Append(inputs=process_fronts_layer,target=record_fronts_layer,expression = query,field_mapping = field_mapping,
-        schema_type="NO_TEST",subtype="",match_fields=None,update_geometry="NOT_UPDATE_GEOMETRY")
-
-    reopen_map()
-
-    SelectByAttribute(record_fronts_layer,where_clause=f""" CreatedByRecord = '{Process_GUID}' """,selection_type="NEW_SELECTION")
-    appended_features_count = int(GetCount(record_fronts_layer).getOutput(0))
-    SelectByAttribute(record_fronts_layer, "CLEAR_SELECTION")
-
-    inserted_fronts = SelectByAttribute(record_fronts_layer,where_clause=f""" CreatedByRecord = '{Process_GUID}' """,selection_type='NEW_SELECTION')
-
-    calculated_features_count = int(GetCount(inserted_fronts)[0])
-
-    CalculateField(in_table=inserted_fronts,field="CreatedByRecord",expression=f"'{RecordGUID}'",
-        expression_type="SQL",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
-
-    return appended_features_count, calculated_features_count
-
-
 def insert_new_border_points(ProcessName:str,query:str) -> int:
 
     RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
-    Process_GUID = get_ProcessGUID(ProcessName)
 
     process_points_layer = get_layer('נקודות בתהליך')
     record_points_layer = get_layer('נקודות גבול')
 
     # Define the fields to copy and their mapping
-    source_fields = [
-        "PointName", "Class", "IsControlBorder", "DataSource", "MarkCode", "SHAPE@"
-    ]
-    target_fields = [
-        "Name", "Class", "IsControlBorder","DataSource", "MarkCode", "SHAPE@", "CreatedByRecord"
-    ]
-
-    # Select features to copy based on the query
-    rows_to_insert = []
-    with SearchCursor(process_points_layer, source_fields, where_clause=query) as search_cursor:
-        for row in search_cursor:
-            rows_to_insert.append(row)
-
-    # Insert into target layer
-    editor = start_editing(CNFG.ParcelFabricDatabase)
-    inserted_count = 0
-    try:
-        with InsertCursor(record_points_layer, target_fields) as insert_cursor:
-            for row in rows_to_insert:
-                point_row = row + (RecordGUID,)
-                insert_cursor.insertRow(point_row)
-                inserted_count += 1
-    finally:
-        stop_editing(editor)
+    field_map = {"PointName": "Name", "Class": "Class", "IsControlBorder": "IsControlBorder", "DataSource": "DataSource",
+                 "MarkCode": "MarkCode", "SHAPE@": "SHAPE@"}
+
+    stats = load_rows(process_points_layer, record_points_layer, field_map, query, {"CreatedByRecord": RecordGUID})
 
     RefreshLayer(record_points_layer)
     reopen_map()
 
-    return inserted_count
+    return stats['inserted']
 
 
 def append_new_border_points(ProcessName:str, query:str) -> int:
@@ -1339,41 +1122,3 @@ def append_new_border_points(ProcessName:str, query:str) -> int:
 
     return num_of_features
     
-
-
-def append_new_border_points_old(ProcessName:str,query:str) -> tuple[int, int]:
-
-    RecordGUID = get_RecordGUID_NewCadaster(ProcessName)
-    Process_GUID = get_ProcessGUID(ProcessName)
-
-    process_points_layer = get_layer('נקודות בתהליך')  
-    record_points_layer = get_layer('נקודות גבול')
-
-
-
-    field_mapping=fr'Name "שם נקודה" true true true 255 Text 0 0,First,#,{process_points_layer.name},PointName,0,19;' + \
-        fr'Class "סיווג" true true false 0 Short 0 0,First,#,{process_points_layer.name},Class,-1,-1;' + \
-        fr'IsControlBorder "נקודת גבול ובקרה" true false false 0 Short 0 0,First,#,{process_points_layer.name},IsControlBorder,-1,-1;' + \
-        fr'CreatedByRecord "מזהה תהליך יוצר" true true true 38 Guid 0 0,First,#,{process_points_layer.name},CPBUniqueID,-1,-1;' + \
-        fr'DataSource "מקור הנקודה" true false false 0 Short 0 0,First,#,{process_points_layer.name},DataSource,-1,-1;' + \
-        fr'MarkCode "סימון" true false false 0 Short 0 0,First,#,{process_points_layer.name},MarkCode,-1,-1' 
-
-
-
-    Append(inputs=process_points_layer,target=record_points_layer,expression = query,field_mapping = field_mapping,
-        schema_type="NO_TEST",subtype="",match_fields=None,update_geometry="NOT_UPDATE_GEOMETRY")
-    reopen_map()
-
-    SelectByAttribute(record_points_layer,where_clause=f""" CreatedByRecord = '{Process_GUID}' """,selection_type="NEW_SELECTION")
-    appended_features_count = int(GetCount(record_points_layer).getOutput(0))
-    SelectByAttribute(record_points_layer, "CLEAR_SELECTION")
-
-    inserted_points = SelectByAttribute(record_points_layer,where_clause=f""" CreatedByRecord = '{Process_GUID}' """,selection_type='NEW_SELECTION')
-
-    calculated_features_count = int(GetCount(inserted_points)[0])
-    
-    CalculateField(in_table=inserted_points,field="CreatedByRecord",expression=f"'{RecordGUID}'",
-        expression_type="SQL",code_block="",field_type="TEXT",enforce_domains="NO_ENFORCE_DOMAINS")
-    
-
-    return appended_features_count, calculated_features_count
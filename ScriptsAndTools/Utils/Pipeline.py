@@ -0,0 +1,229 @@
+import os
+import json
+from time import perf_counter
+from Utils.TypeHints import *
+from Utils.Configs import CNFG
+from Utils.Helpers import timestamp, create_shelf, edit_session, get_ProcessGUID, get_RecordGUID, query_count, query_max
+from arcpy import AddMessage, AddError
+
+
+def stage(name: str, run: Callable[[], Any], inputs: Optional[list[tuple[str, str|None]|str]] = None,
+          outputs: Optional[list[str]] = None, always: bool = False, transaction: bool = True, resumable: bool = True) -> dict[str, Any]:
+    """
+    Declares a single stage of a task pipeline.
+
+    Parameters:
+        name (str): The unique name of the stage, used as its checkpoint key.
+        run (Callable): A function without arguments executing the stage.
+        inputs (list[tuple[str, str|None]|str], optional): The (dataset path, where-clause) pairs the stage reads.
+                                                           A completed stage runs again only if the fingerprint of its inputs changed.
+                                                           A plain dataset name declares a dependency on an earlier stage output only.
+        outputs (list[str], optional): The names of the datasets the stage writes.
+                                       Stages declaring one of them as an input run again when this stage runs.
+        always (bool): Run the stage on every execution (i.e. map display stages). Default is False.
+        transaction (bool): Run the stage in its own edit session, so its cursor edits are saved (and checkpointed) or rolled back as a whole. Default is True.
+        resumable (bool): False for stages writing with geoprocessing tools (i.e. Append, CalculateField), which are not rolled back
+                          with the edit session. After such a stage fails the pipeline does not resume, see `run_pipeline`. Default is True.
+
+    Returns:
+        dict[str, Any]: The stage declaration.
+    """
+    return {'name': name, 'run': run, 'inputs': inputs or [], 'outputs': outputs or [], 'always': always, 'transaction': transaction,
+            'resumable': resumable}
+
+
+def process_inputs(ProcessName: str, dimension: Literal['2D', '3D'] = '2D') -> list[tuple[str, str]]:
+    """
+    Returns the in-process datasets of a process as (dataset path, where-clause) stage inputs.
+
+    Parameters:
+        ProcessName (str): The name of the process.
+        dimension (str): '2D' for parcels, fronts and border points, '3D' for 3D parcels, substractions and 3D border points.
+    """
+    names: dict[str, list[str]] = {'2D': ['InProcessParcels2D', 'InProcessFronts', 'InProcessBorderPoints'],
+                                   '3D': ['InProcessParcels3D', 'InProcessSubstractions', 'InProcessBorderPoints3D']}
+
+    query: str = f"CPBUniqueID = '{get_ProcessGUID(ProcessName)}'"
+    inputs: list[tuple[str, str]] = [(fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}{name}", query) for name in names[dimension]]
+    inputs.append((fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}CadasterProcessBorders", f"ProcessName = '{ProcessName}'"))
+
+    return inputs
+
+
+def dataset_name(path: str) -> str:
+    """ Returns the dataset name of a path, without the workspace and the owner prefix. """
+    return os.path.basename(path).split('.')[-1]
+
+
+def fingerprint(inputs: list[tuple[str, str|None]|str]) -> list[list[Any]]:
+    """
+    Computes a cheap fingerprint of the stage inputs: the number of rows and the latest edit date (or the highest ObjectID
+    for datasets without editor tracking) of every (dataset path, where-clause) pair.
+
+    Parameters:
+        inputs (list[tuple[str, str|None]|str]): The stage inputs, dependency only names are ignored.
+
+    Returns:
+        list[list[Any]]: A JSON serializable fingerprint.
+    """
+    prints: list[list[Any]] = []
+    for path, where_clause in [i for i in inputs if isinstance(i, tuple)]:
+        try:
+            latest: Any = query_max(path, 'last_edited_date', where_clause)
+        except RuntimeError:
+            latest: Any = query_max(path, 'OBJECTID', where_clause)
+        prints.append([dataset_name(path), query_count(path, where_clause), str(latest)])
+
+    return prints
+
+
+def output_fingerprint(outputs: list[str], RecordGUID: str|None) -> dict[str, int]:
+    """
+    Computes the output check of a stage: the number of rows created or retired by the record in every output dataset
+    (the record itself for the records borders).
+
+    Parameters:
+        outputs (list[str]): The names of the datasets the stage writes.
+        RecordGUID (str|None): The Global ID of the record of the process, None before the record is created.
+
+    Returns:
+        dict[str, int]: The rows count per output dataset, empty if the record does not exist.
+    """
+    if not RecordGUID:
+        return {}
+
+    counts: dict[str, int] = {}
+    for name in outputs:
+        path: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}{name}"
+        try:
+            counts[name] = query_count(path, f"CreatedByRecord = '{RecordGUID}' OR RetiredByRecord = '{RecordGUID}'")
+        except RuntimeError:
+            counts[name] = query_count(path, f"GlobalID = '{RecordGUID}'")
+
+    return counts
+
+
+def changed_outputs(checkpoints: dict[str, dict[str, Any]], RecordGUID: str|None) -> set[str]:
+    """
+    Returns the names of the output datasets whose rows of the record changed since the last run of the pipeline
+    (i.e. edited or deleted by the operator, or left by a failing geoprocessing tool). The checkpoints of older runs without an output check are ignored.
+    """
+    recorded: dict[str, int] = {name: count for checkpoint in checkpoints.values() for name, count in checkpoint.get('outputs', {}).items()}
+    if not recorded:
+        return set()
+
+    current: dict[str, int] = output_fingerprint(list(recorded), RecordGUID)
+    return {name for name, count in recorded.items() if current.get(name) != count}
+
+
+def load_checkpoints(shelf: str, pipeline_name: str) -> dict[str, dict[str, Any]]:
+    """ Reads the completed stages of a pipeline from the process shelf. Returns an empty dict if the pipeline never completed a stage. """
+    json_file: str = os.path.join(shelf, f'Pipeline-{pipeline_name}.json')
+    if not os.path.exists(json_file):
+        return {}
+
+    with open(json_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoints(shelf: str, pipeline_name: str, checkpoints: dict[str, dict[str, Any]]) -> None:
+    """ Writes the completed stages of a pipeline to the process shelf. """
+    with open(os.path.join(shelf, f'Pipeline-{pipeline_name}.json'), 'w', encoding='utf-8') as f:
+        json.dump(checkpoints, f, ensure_ascii=False, indent=2)
+
+
+def report_timings(pipeline_name: str, timings: list[tuple[str, str, float]]) -> None:
+    """
+    Prints the status and duration of every stage of a pipeline run.
+
+    Parameters:
+        pipeline_name (str): The name of the pipeline.
+        timings (list[tuple[str, str, float]]): (stage name, status, seconds) per stage.
+    """
+    total: float = sum(seconds for _, _, seconds in timings)
+    width: int = max([len('Total')] + [len(name) for name, _, _ in timings])
+
+    AddMessage(f'\n{timestamp()} | ⏱️ {pipeline_name} stages:')
+    for name, status, seconds in timings:
+        AddMessage(f'    {name.ljust(width)} | {status.ljust(7)} | {seconds:8.1f} s')
+    AddMessage(f'    {"Total".ljust(width)} |         | {total:8.1f} s\n')
+
+
+def run_pipeline(pipeline_name: str, ProcessName: str, stages: list[dict[str, Any]], resume: bool = True) -> None:
+    """
+    Runs the stages of a task in order, checkpointing each completed stage into the process shelf.
+
+    On a re-run a completed stage is skipped, unless it is declared as `always`, its inputs fingerprint changed since it completed,
+    the rows of the record in its outputs changed since the last run, or an earlier stage that ran in this execution writes one of its inputs.
+    Every stage is saved in its own edit session, so the cursor edits of a failing stage are rolled back alone, its error is raised
+    after the timings report and the next run resumes from it. Geoprocessing tools write outside the edit session: after a failure
+    of a stage declared as not resumable the next run stops, until the data of the record is cleared and the task runs without resume.
+
+    Parameters:
+        pipeline_name (str): The name of the pipeline, used for the checkpoints file name.
+        ProcessName (str): The name of the process owning the shelf.
+        stages (list[dict[str, Any]]): The stages declarations, see `stage`.
+        resume (bool): Skip the stages completed by a previous run. False runs all the stages and resets the checkpoints. Default is True.
+    """
+    shelf: str = create_shelf(ProcessName)
+    checkpoints: dict[str, dict[str, Any]] = load_checkpoints(shelf, pipeline_name) if resume else {}
+    dirty: set[str] = set()
+    timings: list[tuple[str, str, float]] = []
+
+    failed: str|None = next((name for name, checkpoint in checkpoints.items() if checkpoint.get('failed')), None)
+    if failed:
+        AddError(f'{timestamp()} | ❌ Stage {failed} of {pipeline_name} failed at {checkpoints[failed]["failed"]} and its geoprocessing edits '
+                 f'were not rolled back. Clear the data of the record and run the task again without resume')
+        raise RuntimeError(f'{pipeline_name} can not resume after the failure of stage {failed}')
+
+    RecordGUID: str|None = get_RecordGUID(ProcessName, 'SDE', warnings=False)
+    changed: set[str] = changed_outputs(checkpoints, RecordGUID)
+
+    for current in stages:
+        name: str = current['name']
+        start: float = perf_counter()
+        prints: list[list[Any]] = fingerprint(current['inputs'])
+        checkpoint: dict[str, Any]|None = checkpoints.get(name)
+
+        input_names: set[str] = {dataset_name(i[0]) if isinstance(i, tuple) else i for i in current['inputs']}
+        stale: bool = checkpoint is None or checkpoint['fingerprint'] != prints or bool(input_names & dirty) \
+                      or bool(set(checkpoint.get('outputs', {})) & changed)
+
+        if not current['always'] and not stale:
+            AddMessage(f'{timestamp()} | ⏭️ Stage {name} completed at {checkpoint["completed"]}, skipped')
+            timings.append((name, 'skipped', perf_counter() - start))
+            continue
+
+        try:
+            if current['transaction']:
+                with edit_session():
+                    current['run']()
+            else:
+                current['run']()
+
+        except Exception as error:
+            timings.append((name, 'failed', perf_counter() - start))
+            report_timings(pipeline_name, timings)
+            if current['resumable']:
+                AddError(f'{timestamp()} | ❌ Stage {name} failed, the next run of {pipeline_name} resumes from it: {error}')
+            else:
+                checkpoints[name] = {'failed': timestamp()}
+                save_checkpoints(shelf, pipeline_name, checkpoints)
+                AddError(f'{timestamp()} | ❌ Stage {name} failed and its geoprocessing edits were not rolled back, '
+                         f'clear the data of the record before the next run of {pipeline_name}: {error}')
+            raise
+
+        # The output check of every stage sharing an output is refreshed, so the next run compares with the latest counts
+        RecordGUID: str|None = RecordGUID or get_RecordGUID(ProcessName, 'SDE', warnings=False)
+        outputs: dict[str, int] = output_fingerprint(current['outputs'], RecordGUID)
+        for other in checkpoints.values():
+            other.get('outputs', {}).update({key: value for key, value in outputs.items() if key in other.get('outputs', {})})
+
+        dirty.update(current['outputs'])
+        checkpoints[name] = {'fingerprint': fingerprint(current['inputs']) if current['outputs'] else prints, 'outputs': outputs,
+                             'completed': timestamp(), 'seconds': round(perf_counter() - start, 1)}
+        save_checkpoints(shelf, pipeline_name, checkpoints)
+        timings.append((name, 'ran', perf_counter() - start))
+
+    report_timings(pipeline_name, timings)
+    del shelf, checkpoints, dirty, timings
@@ -0,0 +1,179 @@
+from collections import Counter
+from arcpy import AddMessage, Describe
+from arcpy.da import SearchCursor
+from Utils.TypeHints import *
+from Utils.Helpers import timestamp, snap_key, snap_lookup, bulk_update
+
+
+def get_tolerance(layer: Layer|str) -> float:
+    """
+    Returns the xy tolerance of the layer's spatial reference (the fabric tolerance), 0.001 meters if it is not defined.
+
+    Parameters:
+        layer (Layer|str): The layer or feature class.
+    """
+    tolerance: float|None = Describe(layer).spatialReference.XYTolerance
+    return tolerance if tolerance else 0.001
+
+
+def index_points(layer: Layer|str, fields: list[str], where_clause: str|None = None, dimensions: Literal[2, 3] = 2,
+                 tolerance: float = 0.001) -> dict[tuple[int, ...], list[tuple[Any, ...]]]:
+    """
+    Builds a hash index of points keyed by their coordinates snapped to the tolerance grid, in a single cursor pass.
+
+    Parameters:
+        layer (Layer|str): The points layer or feature class.
+        fields (list[str]): The attribute fields to keep for every point.
+        where_clause (str, optional): A filter for the indexed points.
+        dimensions (int, optional): 2 to match by X, Y or 3 to match by X, Y, Z. Default is 2.
+        tolerance (float, optional): The snapping tolerance. Default is 0.001.
+
+    Returns:
+        dict[tuple[int, ...], list[tuple[Any, ...]]]: The attribute values of the points found at each snapped location.
+    """
+    shape_token: str = 'SHAPE@XYZ' if dimensions == 3 else 'SHAPE@XY'
+    index: dict[tuple[int, ...], list[tuple[Any, ...]]] = {}
+
+    with SearchCursor(layer, [shape_token] + fields, where_clause) as Scursor:
+        for row in Scursor:
+            index.setdefault(snap_key(row[0], tolerance), []).append(row[1:])
+
+    return index
+
+
+def build_endpoint_index(points_layer: Layer|str, where_clause: str|None = None, tolerance: float = 0.001,
+                         restrict_to: dict[tuple[int, ...], Any]|None = None) -> dict[tuple[int, ...], str]:
+    """
+    Builds an index from the snapped X, Y of border points to their GlobalID, used to resolve the start and end point
+    IDs of fronts by a dictionary lookup. When several points share a location the first one is kept.
+
+    Parameters:
+        points_layer (Layer|str): The border points layer (its selection is respected).
+        where_clause (str, optional): A filter for the indexed points.
+        tolerance (float, optional): The snapping tolerance. Default is 0.001.
+        restrict_to (dict, optional): An index of locations (e.g. the process points), only points found in it are indexed.
+
+    Returns:
+        dict[tuple[int, ...], str]: The GlobalID of the point at each snapped location.
+    """
+    index: dict[tuple[int, ...], str] = {}
+
+    with SearchCursor(points_layer, ['SHAPE@XY', 'GlobalID'], where_clause) as Scursor:
+        for xy, guid in Scursor:
+            key: tuple[int, ...] = snap_key(xy, tolerance)
+            if restrict_to is not None and snap_lookup(restrict_to, key)[0] is None:
+                continue
+            index.setdefault(key, guid)
+
+    return index
+
+
+def resolve_endpoint(endpoint_index: dict[tuple[int, ...], str], point: Point, tolerance: float = 0.001) -> str|None:
+    """
+    Returns the GlobalID of the indexed border point at the location of a front's vertex, None if there is no such point.
+
+    Parameters:
+        endpoint_index (dict[tuple[int, ...], str]): The index built by `build_endpoint_index` with the same tolerance.
+        point (Point): The vertex, e.g. the firstPoint or lastPoint of the front's geometry.
+        tolerance (float, optional): The snapping tolerance. Default is 0.001.
+    """
+    return snap_lookup(endpoint_index, snap_key((point.X, point.Y), tolerance))[1]
+
+
+def join_points(process_index: dict[tuple[int, ...], list[tuple[Any, ...]]], target_index: dict[tuple[int, ...], list[tuple[Any, ...]]]) -> dict[str, list]:
+    """
+    Hash-joins two point indexes built by `index_points` (with the same tolerance) and partitions the process points by
+    the number of target points found at their location.
+
+    Parameters:
+        process_index (dict): The index of the process points.
+        target_index (dict): The index of the points to match against.
+
+    Returns:
+        dict[str, list]: 'single' - (process row, target row) pairs of the points with exactly one match,
+                         'multi' - the process rows with more than one match,
+                         'none' - the process rows without a match.
+    """
+    partitions: dict[str, list] = {'single': [], 'multi': [], 'none': []}
+
+    for key, process_rows in process_index.items():
+        _, target_rows = snap_lookup(target_index, key)
+        target_rows: list[tuple[Any, ...]] = target_rows or []
+        for process_row in process_rows:
+            if not target_rows:
+                partitions['none'].append(process_row)
+            elif len(target_rows) > 1:
+                partitions['multi'].append(process_row)
+            else:
+                partitions['single'].append((process_row, target_rows[0]))
+
+    return partitions
+
+
+def update_matching_points(process_layer: Layer|str, active_layer: Layer|str, field_map: dict[str, str], constants: dict[str, Any]|None = None,
+                           where_clause: str|None = None, dimensions: Literal[2, 3] = 2, tolerance: float|None = None,
+                           workspace: str|None = None) -> tuple[list[tuple[tuple[int, ...], dict[str, tuple[Any, Any]]]], dict[str, Any]]:
+    """
+    Joins process points to active points by their snapped coordinates and pushes the process attributes to the
+    matching active points in one cursor pass per layer.
+    Process points that share a location with another process point are ambiguous and are not applied.
+
+    Parameters:
+        process_layer (Layer|str): The process points, the source of the new values.
+        active_layer (Layer|str): The active points to update.
+        field_map (dict[str, str]): Process field -> active field. The first process field labels the points in the summary.
+        constants (dict[str, Any], optional): Constant values to set on every matched active point (e.g. UpdatedByRecord).
+        where_clause (str, optional): A filter for the process points.
+        dimensions (int, optional): 2 to match by X, Y or 3 to match by X, Y, Z. Default is 2.
+        tolerance (float, optional): The snapping tolerance. Default is the active layer's xy tolerance.
+        workspace (str, optional): The edited workspace. Default is the parcel fabric database.
+
+    Returns:
+        tuple: The change log of `bulk_update` and a summary dictionary with the keys
+               'total', 'matched', 'unmatched', 'multi_matched' and 'duplicated' (the last three are lists of point labels).
+    """
+    tolerance: float = tolerance if tolerance else get_tolerance(active_layer)
+    process_fields: list[str] = list(field_map)
+    process_index: dict[tuple[int, ...], list[tuple[Any, ...]]] = index_points(process_layer, process_fields, where_clause, dimensions, tolerance)
+
+    updates: dict[tuple[int, ...], dict[str, Any]] = {}
+    duplicated: list[Any] = []
+    for key, rows in process_index.items():
+        if len(rows) > 1:
+            duplicated.extend(row[0] for row in rows)
+            continue
+        updates[key] = {field_map[field]: value for field, value in zip(process_fields, rows[0])}
+        updates[key].update(constants or {})
+
+    shape_token: str = 'SHAPE@XYZ' if dimensions == 3 else 'SHAPE@XY'
+    change_log: list[tuple[tuple[int, ...], dict[str, tuple[Any, Any]]]] = bulk_update(active_layer, shape_token, updates, tolerance=tolerance, workspace=workspace)
+
+    matches: Counter = Counter(key for key, _ in change_log)
+    summary: dict[str, Any] = {'total': sum(len(rows) for rows in process_index.values()),
+                               'matched': len(matches),
+                               'unmatched': [process_index[key][0][0] for key in updates if key not in matches],
+                               'multi_matched': [process_index[key][0][0] for key, count in matches.items() if count > 1],
+                               'duplicated': duplicated}
+
+    del process_index, updates, matches
+    return change_log, summary
+
+
+def report_point_matching(summary: dict[str, Any], points_type: str = 'points') -> None:
+    """
+    Prints the summary returned by `update_matching_points`.
+
+    Parameters:
+        summary (dict[str, Any]): The matching summary.
+        points_type (str, optional): The points description used in the messages. Default is 'points'.
+    """
+    AddMessage(f"{timestamp()} | ✔️ {summary['matched']} of {summary['total']} process {points_type} matched active {points_type}")
+
+    if summary['unmatched']:
+        AddMessage(f"{timestamp()} | ⚠️ {len(summary['unmatched'])} process {points_type} do not match any active point: {', '.join(map(str, summary['unmatched']))}")
+
+    if summary['multi_matched']:
+        AddMessage(f"{timestamp()} | ⚠️ {len(summary['multi_matched'])} process {points_type} match more than one active point: {', '.join(map(str, summary['multi_matched']))}")
+
+    if summary['duplicated']:
+        AddMessage(f"{timestamp()} | ⚠️ {len(summary['duplicated'])} process {points_type} share their location with another process point and were not applied: {', '.join(map(str, summary['duplicated']))}")
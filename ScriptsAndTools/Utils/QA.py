@@ -1,12 +1,10 @@
-import numpy as np
-from pandas import DataFrame
 from Utils.TypeHints import *
 from Utils.Configs import CNFG
+from Utils.LazyImports import load
 from Utils.VersionManagement import get_VersionName
-from Utils.Helpers import get_layer, timestamp, drop_layer, AddTabularMessage, get_display_extent, get_table, \
+from Utils.Helpers import get_project, get_map, get_layer, timestamp, drop_layer, AddTabularMessage, get_display_extent, get_table, \
                           AddDefinitionQuery
 from arcpy import AddMessage, Exists, EnvManager, env as ENV, Array, Polygon, Point, SpatialReference
-from arcpy.mp import ArcGISProject
 from arcpy.conversion import ExportFeatures
 from arcpy.da import SearchCursor, InsertCursor
 from arcpy.parcel import FindGapsAndOverlaps, FindAdjacentParcelPoints, FindDisconnectedParcelPoints
@@ -32,6 +30,7 @@ def eval_validation_rules() -> None:
     total: int = polygon_errors_count + line_errors_count + point_errors_count
     if total > 0:
         AddMessage(f"{timestamp()} | ❌ Found {total} violated attribute rules \n ")
+        DataFrame = load('pandas').DataFrame
         errors_df: df = DataFrame(data= {"Metric": "Count",
                                          f"{'❌' if polygon_errors_count > 0 else '✅'} | Polygon Errors": polygon_errors_count,
                                          f"{'❌' if line_errors_count > 0 else '✅'} | Line Errors": line_errors_count,
@@ -62,6 +61,7 @@ def eval_topology_rules() -> None:
     total: int = polygon_errors_count + line_errors_count + point_errors_count
     if total > 0:
         AddMessage(f"{timestamp()} | ❌ Found {total} violated topology rules \n ")
+        DataFrame = load('pandas').DataFrame
         errors_df: df = DataFrame(data= {"Metric": "Count",
                                          f"{'❌' if polygon_errors_count > 0 else '✅'} | Polygon Errors": polygon_errors_count,
                                          f"{'❌' if line_errors_count > 0 else '✅'} | Line Errors": line_errors_count,
@@ -83,12 +83,12 @@ def track_deviated_parcel_areas() -> None:
     AddMessage(f'\n{timestamp()} | Calculating deviations of parcels areas')
 
     # Clear previews results if exists
-    to_drop: list[Table] = ArcGISProject('current').activeMap.listTables('חלקות עם שטחים חורגים')
+    to_drop: list[Table] = get_map().listTables('חלקות עם שטחים חורגים')
     if len(to_drop) > 0:
         for t in to_drop:
-            ArcGISProject('current').activeMap.removeTable(t)
+            get_map().removeTable(t)
 
-    results_path: str = fr'{ArcGISProject("current").defaultGeodatabase}\DeviatedAreaParcels'
+    results_path: str = fr'{get_project().defaultGeodatabase}\DeviatedAreaParcels'
     if Exists(results_path):
         Delete(results_path)
 
@@ -104,9 +104,10 @@ def track_deviated_parcel_areas() -> None:
     selected_parcels: Layer = SelectByLocation(in_layer=get_layer("חלקות"), select_features=extent_polygon).getOutput(0)
 
     search: Scur = SearchCursor(selected_parcels, cols)
-    data: df = DataFrame(search, columns= cols).astype(schema).sort_values(['BlockNumber', 'SubBlockNumber', 'ParcelNumber'])
+    pd, np = load('pandas'), load('numpy')
+    data: df = pd.DataFrame(search, columns= cols).astype(schema).sort_values(['BlockNumber', 'SubBlockNumber', 'ParcelNumber'])
     del search, schema, selected_parcels, extent_polygon, extent
-    ArcGISProject('current').activeMap.clearSelection()
+    get_map().clearSelection()
 
     data['AbsDifference'] = abs(data['StatedArea'] - data['Shape__Area'])
     data['NormalizedStatedArea1'] = 0.3 * np.sqrt(data['StatedArea']) + 0.005 * data['StatedArea']
@@ -129,11 +130,11 @@ def track_deviated_parcel_areas() -> None:
         del cols, results
 
 
-        ArcGISProject('current').activeMap.addDataFromPath(results_path)
-        ArcGISProject('current').activeMap.addTableToGroup(get_layer("בקרת איכות"), get_table('חלקות עם שטחים חורגים'))
-        to_drop: list[Table] = ArcGISProject('current').activeMap.listTables('חלקות עם שטחים חורגים')
+        get_map().addDataFromPath(results_path)
+        get_map().addTableToGroup(get_layer("בקרת איכות"), get_table('חלקות עם שטחים חורגים'))
+        to_drop: list[Table] = get_map().listTables('חלקות עם שטחים חורגים')
         if len(to_drop) > 1:
-            ArcGISProject('current').activeMap.removeTable(to_drop[-1])
+            get_map().removeTable(to_drop[-1])
 
         # del results_table
 
@@ -155,7 +156,7 @@ def track_adjacent_points(tolerance: Optional[float|int] = 0.1) -> None:
     """
     AddMessage(f'\n{timestamp()} | Tracking for adjacent active points')
 
-    home_gdb: str = ArcGISProject("current").defaultGeodatabase
+    home_gdb: str = get_project().defaultGeodatabase
     output: str = fr'{home_gdb}\AdjacentPoints'
     drop_layer('נקודות סמוכות')
 
@@ -164,7 +165,7 @@ def track_adjacent_points(tolerance: Optional[float|int] = 0.1) -> None:
 
     if results > 0:
         AddMessage(f"{timestamp()} | ❌ Found {results} adjacent points")
-        current_map: Map = ArcGISProject('current').activeMap
+        current_map: Map = get_map()
         current_map.addDataFromPath(fr'{CNFG.LayerFiles}AdjacentPoints.lyrx')
         layer: Layer = get_layer('נקודות סמוכות')
         new_connection: dict[str, dict[str, str]] = {'dataset': 'AdjacentPoints', 'workspace_factory': 'File Geodatabase', 'connection_info': {'database': home_gdb}}
@@ -173,7 +174,7 @@ def track_adjacent_points(tolerance: Optional[float|int] = 0.1) -> None:
     else:
         AddMessage(f"{timestamp()} | ✅ No adjacent points were found")
 
-    ArcGISProject('current').activeMap.clearSelection()
+    get_map().clearSelection()
     del results, output
 
 
@@ -190,7 +191,7 @@ def track_gaps_overlaps(max_width: Optional[float|int] = 2.0) -> None:
     """
     AddMessage(f'\n{timestamp()} | Tracking for gaps & overlaps between active parcels and blocks')
 
-    home_gdb: str = ArcGISProject("current").defaultGeodatabase
+    home_gdb: str = get_project().defaultGeodatabase
     output: str = fr'{home_gdb}\GapsAndOverlaps'
     drop_layer('חורים וחפיפות')
 
@@ -218,6 +219,7 @@ def track_gaps_overlaps(max_width: Optional[float|int] = 2.0) -> None:
 
     # Report the results if there are any errors fond
     if total_errors > 0:
+        DataFrame = load('pandas').DataFrame
         errors_table: df = DataFrame(data= {"Metric": "Count",
                                             f"{'❌' if gaps_between_parcels > 0 else '✅'} | Gaps between parcels": gaps_between_parcels,
                                             f"{'❌' if gaps_between_blocks > 0 else '✅'} | Gaps between blocks": gaps_between_blocks,
@@ -226,7 +228,7 @@ def track_gaps_overlaps(max_width: Optional[float|int] = 2.0) -> None:
                                      index = [0])
         AddTabularMessage(errors_table)
 
-        current_map: Map = ArcGISProject('current').activeMap
+        current_map: Map = get_map()
         current_map.addDataFromPath(fr'{CNFG.LayerFiles}GapsAndOverlaps.lyrx')
         layer: Layer = get_layer("חורים וחפיפות")
         current_map.moveLayer(get_layer("אימות נתונים"), layer, "BEFORE")
@@ -237,7 +239,7 @@ def track_gaps_overlaps(max_width: Optional[float|int] = 2.0) -> None:
     else:
         AddMessage(f"{timestamp()} | ✅ No gaps or overlaps were found")
 
-    ArcGISProject('current').activeMap.clearSelection()
+    get_map().clearSelection()
     del output, parcels, blocks, extent_polygon, extent, results
 
 
@@ -250,7 +252,7 @@ def track_disconnected_points() -> None:
     """
     AddMessage(f'\n{timestamp()} | Tracking for disconnected active points')
 
-    home_gdb: str = ArcGISProject("current").defaultGeodatabase
+    home_gdb: str = get_project().defaultGeodatabase
     output: str = fr'{home_gdb}\DisconnectedPoints'
     drop_layer('נקודות מנותקות')
 
@@ -259,7 +261,7 @@ def track_disconnected_points() -> None:
 
     if results > 0:
         AddMessage(f"{timestamp()} | ❌ Found {results} disconnected points")
-        current_map: Map = ArcGISProject('current').activeMap
+        current_map: Map = get_map()
         current_map.addDataFromPath(fr'{CNFG.LayerFiles}DisconnectedPoints.lyrx')
         layer: Layer = get_layer("נקודות מנותקות")
         current_map.moveLayer(get_layer("אימות נתונים"), layer, "BEFORE")
@@ -270,7 +272,7 @@ def track_disconnected_points() -> None:
         AddMessage(f"{timestamp()} | ✅ No disconnected points were found")
 
     del output, results
-    ArcGISProject('current').activeMap.clearSelection()
+    get_map().clearSelection()
 
 
 def track_redundant_vertices() -> None:
@@ -279,8 +281,8 @@ def track_redundant_vertices() -> None:
     """
     AddMessage(f'\n{timestamp()} | Tracking for redundant vertices')
 
-    ArcGISProject('current').activeMap.clearSelection()
-    home_gdb: str = ArcGISProject("current").defaultGeodatabase
+    get_map().clearSelection()
+    home_gdb: str = get_project().defaultGeodatabase
     output: str = fr'{home_gdb}\RedundantVertices'
     drop_layer('נקודות מפנה מיותרות')
     if Exists(output):
@@ -337,6 +339,7 @@ def track_redundant_vertices() -> None:
             insert.insertRow(vertex)
 
         # Log a tabular summary message
+        DataFrame = load('pandas').DataFrame
         errors_table: df = DataFrame(data= {"Layer": "Redundant Vertices Count",
                                             "גושים": summary['גושים'],
                                             "חלקות": summary['חלקות'],
@@ -345,7 +348,7 @@ def track_redundant_vertices() -> None:
         AddTabularMessage(errors_table)
 
         # Add the redundant layer connected to the data
-        current_map: Map = ArcGISProject('current').activeMap
+        current_map: Map = get_map()
         current_map.addDataFromPath(fr'{CNFG.LayerFiles}RedundantVertices.lyrx')
         layer: Layer = get_layer("נקודות מפנה מיותרות")
         current_map.moveLayer(get_layer("אימות נתונים"), layer, "BEFORE")
@@ -360,7 +363,7 @@ def track_redundant_vertices() -> None:
     else:
         AddMessage(f"{timestamp()} | ✅ No redundant vertices were found")
 
-    ArcGISProject('current').activeMap.clearSelection()
+    get_map().clearSelection()
 
 
 def track_volumetric_overlaps() -> None:
@@ -380,12 +383,12 @@ def track_volumetric_overlaps() -> None:
 
         Parcels3D: Layer = get_layer('חלקות תלת-ממדיות')
         ExportFeatures(get_layer('חלקות תלת-ממדיות'), r'memory/Parcels3D', field_mapping= fr'')
-        parcels_overlays: str = fr"{ArcGISProject('current').defaultGeodatabase}/parcels_overlays"
+        parcels_overlays: str = fr"{get_project().defaultGeodatabase}/parcels_overlays"
         Intersect3D(in_feature_class_1= Parcels3D, out_feature_class= parcels_overlays, output_geometry_type= "SOLID")
         total_parcels_overlaps: int = 0
 
         Substractions: Layer = get_layer('גריעות')
-        substractions_overlays: str = fr"{ArcGISProject('current').defaultGeodatabase}/substractions_overlays"
+        substractions_overlays: str = fr"{get_project().defaultGeodatabase}/substractions_overlays"
         Intersect3D(in_feature_class_1= Substractions, out_feature_class= substractions_overlays, output_geometry_type="SOLID")
         total_substractions_overlaps: int = 0
 
@@ -393,13 +396,14 @@ def track_volumetric_overlaps() -> None:
 
         # Report the results if there are any errors fond
         if total_errors > 0:
+            DataFrame = load('pandas').DataFrame
             errors_table: df = DataFrame(data= {"Metric": "Count",
                                                 f"{'❌' if total_parcels_overlaps > 0 else '✅'} | Overlaps between 3D parcels": total_parcels_overlaps,
                                                 f"{'❌' if total_substractions_overlaps > 0 else '✅'} | Overlaps between substractions": total_substractions_overlaps},
                                          index=[0])
             AddTabularMessage(errors_table)
 
-            current_map: Map = ArcGISProject('current').activeMap
+            current_map: Map = get_map()
 
             if total_parcels_overlaps > 0:
                 current_map.addDataFromPath(fr'{CNFG.LayerFiles}Overlaps3DParcels.lyrx')
@@ -1,17 +1,12 @@
 from Utils.Configs import CNFG
 from Utils.TypeHints import *
 from Utils.VersionManagement import get_VersionName, layer_is_at_version
-from Utils.Helpers import delete_file, timestamp, get_layer, get_ActiveRecord, get_feature_layer_id, AddTabularMessage
+from Utils.Helpers import get_map, delete_file, timestamp, get_layer, get_ActiveRecord, get_feature_layer_id, AddTabularMessage, chunked_search
 from Utils.NewCadasterHelpers import get_RecordGUID_NewCadaster
-import pandas as pd
-from pandas.io.formats.style import Styler
+from Utils.LazyImports import load
 from os import makedirs
-from arcgis import GIS
-from arcgis.features._version import VersionManager
-from arcgis.features import GeoAccessor, GeoSeriesAccessor
 from arcpy import AddMessage, AddError, env as ENV
 from arcpy.da import SearchCursor
-from arcpy.mp import ArcGISProject
 from arcpy.analysis import GenerateNearTable
 from arcpy.management import SelectLayerByLocation as SelectByLocation, SelectLayerByAttribute as SelectByAttribute
 
@@ -19,7 +14,7 @@ from arcpy.management import SelectLayerByLocation as SelectByLocation, SelectLa
 ENV.overwriteOutput = True
 
 
-def highlight_conflicts(data: df) -> Styler:
+def highlight_conflicts(data: df) -> 'Styler':
     """
     Apply highlighting to a pandas DataFrame to emphasize conflicts based on a threshold.
 
@@ -81,7 +76,7 @@ def compute_matching_points_report(ProcessName: str, task: TaskType, distance: i
     """
     AddMessage('\n ⭕ Generating report \n')
     AddMessage(f'{timestamp()} | 🛠️ Computing the Matching Points Report, please wait...')
-    CurrentMap: Map = ArcGISProject("current").activeMap
+    CurrentMap: Map = get_map()
     CurrentMap.clearSelection()
     CurrentPoints: Layer = CurrentMap.listLayers('נקודות גבול')[0]
     InProcessPoints: Layer = SourcePointsByTask(task)
@@ -95,7 +90,9 @@ def compute_matching_points_report(ProcessName: str, task: TaskType, distance: i
     GenerateNearTable(in_features= InProcessPoints, near_features= CurrentPoints_selection, out_table= fr'{CNFG.Library}{shelf}/NearTable.csv',
                       search_radius= distance, location= 'LOCATION', closest= 'ALL', distance_unit= 'Meters')
 
-    # Read distances results and join data
+    # Read distances results and join data, arcgis.features registers the spatial accessor of pandas
+    pd = load('pandas')
+    load('arcgis.features')
     InProcessPoints_df: df = pd.DataFrame.spatial.from_featureclass(InProcessPoints, fields= ['OBJECTID', 'GlobalID', 'PointName'])
     CurrentPoints_df: df = pd.DataFrame.spatial.from_featureclass(CurrentPoints, fields= ['OBJECTID', 'GlobalID', 'Name'])
     NearTable_df: df = pd.read_csv(fr'{CNFG.Library}{shelf}/NearTable.csv', usecols= ['IN_FID', 'NEAR_FID', 'NEAR_RANK', 'NEAR_DIST', 'FROM_X', 'FROM_Y', 'NEAR_X', 'NEAR_Y'])
@@ -155,6 +152,7 @@ def compute_matching_points_report(ProcessName: str, task: TaskType, distance: i
 def set_date_columns(dataframe: df) -> df:
     """
     """
+    pd = load('pandas')
     date_columns: list[str] = ['created_date', 'last_edited_date', 'RecordedDate', 'SetteledDate']
     for col in date_columns:
         if col in dataframe.columns:
@@ -192,6 +190,10 @@ def compare_and_document_version_changes(user_name: str, password: str) -> None:
     is_versioned: bool = layer_is_at_version('גבולות רישומים', error=True)
 
     if process_name and is_versioned:
+        pd = load('pandas')
+        GIS = load('arcgis.gis').GIS
+        VersionManager = load('arcgis.features._version').VersionManager
+
         # Connection to version manager and fetch current branch version:
         version_management_server = VersionManager(CNFG.version_manager_url, GIS(CNFG.gis_url, f"{user_name}@MM_NT_MALI", password))
         branch_version_name: str = get_VersionName(name='גבולות רישומים', source='layer')
@@ -248,9 +250,11 @@ def compare_and_document_version_changes(user_name: str, password: str) -> None:
                                         fields: list[str] = fields + ['Shape__Area'] if is_area else fields
                                         fields: list[str] = fields + ['Shape__Length'] if is_length else fields
 
-                                        object_ids_string: str = ", ".join(str(oid) for oid in sorted(object_IDs))
-                                        query: str = f"OBJECTID IN ({object_ids_string})" if name != 'גבולות רישומים' else f"Name = '{process_name}'"
-                                        before: df = pd.DataFrame(SearchCursor(before_path, fields, query), columns=fields)\
+                                        if name != 'גבולות רישומים':
+                                            before_rows: list[tuple] = list(chunked_search(before_path, fields, 'OBJECTID', sorted(object_IDs)))
+                                        else:
+                                            before_rows: list[tuple] = list(SearchCursor(before_path, fields, f"Name = '{process_name}'"))
+                                        before: df = pd.DataFrame(before_rows, columns=fields)\
                                                        .rename(columns= {"Shape__Area": "Shape.STArea()", "Shape__Length": "Shape.STLength()"})
 
                                         before.to_csv(fr"{shelf}/before.csv", index=False)
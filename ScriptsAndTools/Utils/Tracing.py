@@ -0,0 +1,281 @@
+import os
+import sys
+import json
+import inspect
+import datetime as dt
+from functools import wraps
+from contextlib import contextmanager
+from time import perf_counter
+from Utils.TypeHints import *
+from Utils.LazyImports import load
+from Utils.Helpers import timestamp, create_shelf, get_ActiveRecord, AddTableMessage
+from arcpy import AddMessage
+
+
+# The modules whose functions are traced as steps of a task
+_TracedModules: list[str] = ['Utils.Helpers', 'Utils.UpdateAttributes', 'Utils.QA', 'Utils.VersionManagement']
+
+# Helpers too small or too frequent to be a step, and context managers (traced by their callers)
+_Untraced: set[str] = {'timestamp', 'snap_key', 'snap_lookup', 'in_query', 'chunked_in_clauses', 'same_definition_query',
+                       'cursor_length', 'AddTabularMessage', 'AddTableMessage', 'edit_session'}
+
+# Messaging and parameter functions of arcpy, not counted as arcpy calls
+_Uncounted: set[str] = {'AddMessage', 'AddWarning', 'AddError', 'AddReturnMessage', 'GetParameter', 'GetParameterAsText', 'SetParameter'}
+
+# The environment variable turning the tracing of the task runs on ('1')
+_TraceFlag: str = 'CADASTER_TRACE'
+
+# The trace of the current task run: the steps aggregated by name and the stack of the running steps
+_Trace: dict[str, Any] = {'task': None, 'ProcessName': None, 'run': None, 'steps': {}, 'stack': [],
+                          'counters': {'arcpy_calls': 0, 'rows_read': 0, 'rows_written': 0}, 'patched': []}
+
+
+def is_trace_enabled() -> bool:
+    """ Returns True if the task runs are traced, set the environment variable CADASTER_TRACE to 1 to trace them. """
+    return os.environ.get(_TraceFlag) == '1'
+
+
+def _active_record() -> str|None:
+    """ The active record name, None if it can not be resolved. """
+    try:
+        return get_ActiveRecord()
+    except Exception:
+        return None
+
+
+def _rss_mb() -> float|None:
+    """ The resident memory of the process in MB, None if psutil is not available. """
+    try:
+        return round(load('psutil').Process(os.getpid()).memory_info().rss / 2 ** 20, 1)
+    except Exception:
+        return None
+
+
+@contextmanager
+def trace_span(name: str) -> Iterator[None]:
+    """
+    Context manager recording a step of the current task into the totals of its name: calls, wall time, self time
+    (without its nested steps), arcpy calls and rows read and written. The counters of a step include its nested steps,
+    a recursive call is counted once. The memory is sampled for the top-level steps only.
+    Outside a traced task run the step is not recorded.
+
+    Parameters:
+        name (str): The step name, usually the function name.
+    """
+    if _Trace['run'] is None:
+        yield
+        return
+
+    counters: dict[str, int] = _Trace['counters']
+    stack: list[dict[str, Any]] = _Trace['stack']
+    frame: dict[str, Any] = {'name': name, 'children': 0.0, 'before': dict(counters), 'rss_before': None if stack else _rss_mb()}
+    stack.append(frame)
+    start: float = perf_counter()
+    failed: bool = False
+    try:
+        yield
+    except Exception:
+        failed: bool = True
+        raise
+    finally:
+        seconds: float = perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1]['children'] += seconds
+
+        step: dict[str, Any] = _Trace['steps'].setdefault(name, {'name': name, 'calls': 0, 'errors': 0, 'seconds': 0.0, 'self_seconds': 0.0,
+                                                                 'arcpy_calls': 0, 'rows_read': 0, 'rows_written': 0, 'rss_delta_mb': None})
+        step['calls'] += 1
+        step['errors'] += failed
+        step['self_seconds'] += seconds - frame['children']
+        if all(f['name'] != name for f in stack):
+            step['seconds'] += seconds
+            for key in counters:
+                step[key] += counters[key] - frame['before'][key]
+
+        rss_after: float|None = _rss_mb() if frame['rss_before'] is not None else None
+        if rss_after is not None:
+            delta: float = round(rss_after - frame['rss_before'], 1)
+            step['rss_delta_mb'] = max(step['rss_delta_mb'] if step['rss_delta_mb'] is not None else delta, delta)
+
+
+def traced(function: Optional[Callable[..., Any]] = None, *, name: Optional[str] = None) -> Callable[..., Any]:
+    """
+    Decorator recording every call of a function as a step of the current task (see trace_span).
+    Can be used as @traced or @traced(name='...').
+    """
+    def decorate(f: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with trace_span(name or f.__name__):
+                return f(*args, **kwargs)
+        wrapper.__traced__ = True
+        return wrapper
+
+    return decorate(function) if function else decorate
+
+
+class _CountedCursor:
+    """ Wraps an arcpy.da cursor to count the rows it reads and writes. """
+    def __init__(self, cursor: Any):
+        self._cursor: Any = cursor
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self._cursor)
+        _Trace['counters']['rows_read'] += 1
+        return row
+
+    def next(self):
+        return self.__next__()
+
+    def updateRow(self, row):
+        _Trace['counters']['rows_written'] += 1
+        return self._cursor.updateRow(row)
+
+    def deleteRow(self):
+        _Trace['counters']['rows_written'] += 1
+        return self._cursor.deleteRow()
+
+    def insertRow(self, row):
+        _Trace['counters']['rows_written'] += 1
+        return self._cursor.insertRow(row)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        return self._cursor.__exit__(*args)
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)
+
+
+def _counted(name: str, original: Callable[..., Any]) -> Callable[..., Any]:
+    """ Wraps an arcpy function (or cursor class) to count its calls (and the cursor rows). """
+    is_cursor: bool = name in ['SearchCursor', 'UpdateCursor', 'InsertCursor']
+
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        _Trace['counters']['arcpy_calls'] += 1
+        result = original(*args, **kwargs)
+        return _CountedCursor(result) if is_cursor else result
+
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def instrument() -> None:
+    """
+    Instruments the loaded tools modules for the current run: the functions of the traced modules become steps and the
+    arcpy functions they call are counted. Every module holding a reference to a wrapped function is patched, so calls
+    through `from Utils.Helpers import ...` are traced as well. The originals are restored by `uninstrument`.
+    """
+    scripts_folder: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    modules: list[Any] = [m for m in list(sys.modules.values()) if getattr(m, '__file__', None)
+                          and os.path.abspath(m.__file__).startswith(scripts_folder) and m.__name__ not in ['Utils.Tracing', 'Utils.TypeHints']
+                          and not m.__name__.startswith('Benchmarks')]
+
+    arcpy_callables: set[int] = {id(value) for name, module in list(sys.modules.items()) if name.split('.')[0] == 'arcpy' and module
+                                 for value in vars(module).values() if callable(value)}
+
+    wrappers: dict[int, Callable[..., Any]] = {}
+    for module in [m for m in modules if m.__name__ in _TracedModules]:
+        for name, value in vars(module).items():
+            if (inspect.isfunction(value) and value.__module__ == module.__name__ and not name.startswith('_') and name not in _Untraced
+                    and not hasattr(value, '__wrapped__') and not inspect.isgeneratorfunction(value)):
+                wrappers[id(value)] = traced(value)
+
+    for module in modules:
+        namespace: dict[str, Any] = vars(module)
+        for name, value in list(namespace.items()):
+            if getattr(value, '__traced__', False):
+                continue
+            if id(value) in wrappers:
+                replacement: Callable[..., Any] = wrappers[id(value)]
+            elif id(value) in arcpy_callables and name not in _Uncounted \
+                    and (inspect.isfunction(value) or name in ['SearchCursor', 'UpdateCursor', 'InsertCursor']):
+                replacement: Callable[..., Any] = _counted(name, value)
+            else:
+                continue
+            _Trace['patched'].append((namespace, name, value))
+            namespace[name] = replacement
+
+
+def uninstrument() -> None:
+    """ Restores the functions patched by `instrument`. """
+    for namespace, name, original in reversed(_Trace['patched']):
+        namespace[name] = original
+    _Trace['patched'].clear()
+
+
+def summarize(steps: dict[str, dict[str, Any]], top: int = 15) -> list[list[Any]]:
+    """
+    Returns the steps of a run as table rows.
+
+    Returns:
+        list[list[Any]]: Rows of [step, calls, total s, self s, arcpy calls, rows read, rows written, max memory delta MB],
+                         sorted by self time, at most `top` rows.
+    """
+    rows: list[dict[str, Any]] = sorted(steps.values(), key=lambda s: s['self_seconds'], reverse=True)[:top]
+    return [[r['name'], r['calls'], round(r['seconds'], 2), round(r['self_seconds'], 2), r['arcpy_calls'], r['rows_read'], r['rows_written'],
+             r['rss_delta_mb'] if r['rss_delta_mb'] is not None else ''] for r in rows]
+
+
+def start_trace(task: str, ProcessName: str|None = None) -> None:
+    """
+    Starts tracing a task run: resets the counters and instruments the loaded tools modules.
+
+    Parameters:
+        task (str): The task (entry point) name.
+        ProcessName (str, optional): The process of the task, its shelf receives the trace file.
+                                     Default is the active record when the task ends.
+    """
+    if _Trace['run'] is not None:
+        uninstrument()
+
+    _Trace.update({'task': task, 'ProcessName': ProcessName, 'run': dt.datetime.now().strftime('%Y%m%d-%H%M%S'), 'steps': {}, 'stack': []})
+    _Trace['counters'].update({'arcpy_calls': 0, 'rows_read': 0, 'rows_written': 0})
+    instrument()
+
+
+def finish_trace(seconds: float) -> str|None:
+    """
+    Ends the task run: restores the instrumented modules, writes the steps as a JSONL trace into the process shelf
+    (or the Traces folder of the library when the task has no process) and prints the summary table.
+
+    Parameters:
+        seconds (float): The total duration of the task.
+
+    Returns:
+        str|None: The trace file path, None if nothing was traced.
+    """
+    uninstrument()
+    steps: dict[str, dict[str, Any]] = _Trace['steps']
+    task, ProcessName, run = _Trace['task'], _Trace['ProcessName'], _Trace['run']
+    _Trace['run'] = None
+    if not steps:
+        return None
+
+    trace_file: str|None = None
+    try:
+        shelf: str = create_shelf(ProcessName or _active_record() or 'Traces')
+        trace_file: str = os.path.join(shelf, f'Trace-{task}-{run}.jsonl')
+        with open(trace_file, 'w', encoding='utf-8') as f:
+            for step in steps.values():
+                f.write(json.dumps({'task': task, 'run': run, 'seconds_total': round(seconds, 3), **step,
+                                    'seconds': round(step['seconds'], 3), 'self_seconds': round(step['self_seconds'], 3)}, ensure_ascii=False) + '\n')
+    except OSError:
+        trace_file: None = None
+
+    counters: dict[str, int] = _Trace['counters']
+    AddMessage(f"\n{timestamp()} | ⏱️ {task} took {seconds:.1f} s: {len(steps)} steps, {counters['arcpy_calls']} arcpy calls, "
+               f"{counters['rows_read']} rows read, {counters['rows_written']} rows written")
+    AddTableMessage(summarize(steps), header=['Step', 'Calls', 'Total s', 'Self s', 'arcpy calls', 'Rows read', 'Rows written', 'Memory Δ MB'])
+    if trace_file:
+        AddMessage(f'{timestamp()} | 💡 Trace saved to {trace_file}')
+
+    return trace_file
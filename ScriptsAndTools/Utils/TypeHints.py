@@ -1,6 +1,7 @@
 import arcpy
-from pandas import DataFrame, Series
-from typing import Any, Literal, Optional, Callable
+from typing import Any, Literal, Optional, Callable, Iterator, TYPE_CHECKING
+if TYPE_CHECKING:
+    from pandas import DataFrame, Series
 
 
 # General types
@@ -8,8 +9,9 @@ Any = Any
 Literal = Literal
 Optional = Optional
 Callable = Callable
-df = DataFrame
-series = Series
+Iterator = Iterator
+df = 'DataFrame'  # pandas is loaded lazily, see Utils.LazyImports
+series = 'Series'
 
 # Arcpy types
 Pro = arcpy._mp.ArcGISProject
@@ -28,6 +30,8 @@ Point = arcpy.Point
 Line = arcpy.Polyline
 Polygon = arcpy.Polygon
 Result = arcpy.Result
+Field = arcpy.Field
+FieldMappings = arcpy.FieldMappings
 
 # Custom types
 EnviType = Literal["Development", "Test", "Production"]
@@ -1,14 +1,15 @@
 from arcpy import AddMessage, AddError, env as ENV, RefreshLayer
-from arcpy.mp import ArcGISProject
 from arcpy.parcel import BuildParcelFabric
 from arcpy.da import SearchCursor, UpdateCursor
 from arcpy.management import SelectLayerByLocation as SelectByLocation, SelectLayerByAttribute as SelectByAttribute, \
-                             MakeFeatureLayer as MakeLayer, GetCount, Dissolve, CalculateField, Merge
+                             MakeFeatureLayer as MakeLayer, GetCount, CalculateField
 from Utils.Configs import CNFG
 from Utils.TypeHints import *
 from Utils.Validations import compare_counts
-from Utils.Helpers import timestamp, get_ProcessGUID, get_RecordGUID, get_ActiveParcel2DGUID, get_ProcessType, \
-                          get_layer, Type2CancelType, start_editing, stop_editing, get_BlockGUID, refresh_map_view, \
+from Utils.PointMatching import update_matching_points, report_point_matching
+from Utils.GeometryUnion import union_geometries, union_by_group
+from Utils.Helpers import get_map, timestamp, get_ProcessGUID, get_RecordGUID, get_ActiveParcel2DGUID, get_ProcessType, \
+                          get_layer, Type2CancelType, edit_session, bulk_update, in_query, chunked_in_clauses, select_by_values, get_BlockGUID, refresh_map_view, \
                           get_DomainValue, get_StartPointGUID, get_EndPointGUID, cursor_length, \
                           get_AbsorbingBlockGUIDs, get_BlockStatus, get_BlockName, reopen_map, activate_record, delete_file, get_ActiveRecord, \
                           process_will_retire_its_block, AddDefinitionQuery, drop_layer
@@ -31,34 +32,28 @@ def modify_ParcelsAttributes(ProcessName: str) -> None:
     Parcels2D: Layer = get_layer('חלקות')
     RecordGUID: str = get_RecordGUID(ProcessName, 'MAP')
 
-    Scursor: Scur = SearchCursor(get_layer('חלקות ביסוס'), ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandDesignationPlan'])
-    total: int = cursor_length(Scursor)
+    # Collect the new values of all the basis parcels, keyed by the parcel name
+    updates: dict[str, dict[str, Any]] = {}
+    with SearchCursor(get_layer('חלקות ביסוס'), ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'LandDesignationPlan']) as Scursor:
+        for ParcelNumber, BlockNumber, SubBlockNumber, NewLandDesignation in Scursor:
+            if NewLandDesignation in ['None', '', 'none']:
+                NewLandDesignation: None = None
+            updates[f"{ParcelNumber}/{BlockNumber}/{SubBlockNumber}"] = {'LandDesignationPlan': NewLandDesignation, 'UpdatedByRecord': RecordGUID}
 
     AddMessage('\n ⭕ Modifying parcels attributes:')
-    editor: Editor = start_editing(ENV.workspace)
+    change_log: list[tuple[str, dict[str, tuple[Any, Any]]]] = bulk_update(Parcels2D, 'Name', updates)
+    total: int = len(change_log)
 
-    for idx, row in enumerate(Scursor, start=1):
-        ParcelNumber, BlockNumber, SubBlockNumber, NewLandDesignation = row[0], row[1], row[2], row[3]
-        if NewLandDesignation in ['None', '', 'none']:
-            NewLandDesignation: None = None
+    for idx, (name, changes) in enumerate(change_log, start=1):
+        ParcelNumber, BlockNumber, SubBlockNumber = name.split('/')
+        PreviousLandDesignation, NewLandDesignation = changes['LandDesignationPlan']
+        PreviousUpdateRecord: str|None = changes['UpdatedByRecord'][0]
 
-        Ucursor: Ucur = UpdateCursor(Parcels2D, ['LandDesignationPlan', 'UpdatedByRecord'], f"Name = '{ParcelNumber}/{BlockNumber}/{SubBlockNumber}'")
+        AddMessage(fr"{timestamp()} | {idx}/{total} | ✔️ Parcel {ParcelNumber} at block {BlockNumber}/{SubBlockNumber} modified:")
+        AddMessage(fr"               | LandDesignation: {PreviousLandDesignation} ->> {NewLandDesignation}")
+        AddMessage(fr"               | UpdateByRecord: {PreviousUpdateRecord} ->> {RecordGUID}")
 
-        for value in Ucursor:
-            PreviousUpdateRecord: str|None = value[1]
-            value[1]: str = RecordGUID
-
-            PreviousLandDesignation: str|None = value[0]
-            if PreviousLandDesignation != NewLandDesignation:
-                value[0]: str = NewLandDesignation
-
-            Ucursor.updateRow(value)
-            AddMessage(fr"{timestamp()} | {idx}/{total} | ✔️ Parcel {ParcelNumber} at block {BlockNumber}/{SubBlockNumber} modified:")
-            AddMessage(fr"               | LandDesignation: {PreviousLandDesignation} ->> {NewLandDesignation}")
-            AddMessage(fr"               | UpdateByRecord: {PreviousUpdateRecord} ->> {RecordGUID}")
-
-    stop_editing(editor)
-    del Ucursor, Scursor, RecordGUID, Parcels2D, editor
+    del updates, change_log, RecordGUID, Parcels2D
 
 
 def modify_CurrentFrontsAttributes(ProcessName: str) -> None:
@@ -77,7 +72,7 @@ def modify_CurrentFrontsAttributes(ProcessName: str) -> None:
 
     AddMessage('\n ⭕ Modifying fronts attributes:')
     drop_layer('חזיתות לא מתואמות')
-    current_map: Map = ArcGISProject("current").activeMap
+    current_map: Map = get_map()
     current_map.clearSelection()
     RecordGUID: str = get_RecordGUID(ProcessName, 'MAP')
 
@@ -92,36 +87,36 @@ def modify_CurrentFrontsAttributes(ProcessName: str) -> None:
     unmatched_fronts: list[str | None] = []
 
     ENV.addOutputsToMap = False
-    editor: Editor = start_editing(ENV.workspace)
-    for idx, guid in enumerate(process_fronts_guids, start=1):
-        process_front: Layer = MakeLayer(process_fronts_layer, 'process_front', where_clause = f"GlobalID = '{guid}'").getOutput(0)
-        current_front: Result = SelectByLocation(in_layer= current_fronts_layer, select_features= process_front, overlap_type= 'ARE_IDENTICAL_TO')
-        count_matches: int = int(current_front.getOutput(2))
-
-        if count_matches == 0:
-            AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} does not match any active front and will not be modified. \n ")
-            unmatched_fronts.append(guid)
-        if count_matches > 1:
-            AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} matched with {count_matches} active fronts and will not be modified. \n ")
-            unmatched_fronts.append(guid)
-        if count_matches == 1:
-            process_data: Scur = SearchCursor(process_front, field_that_update)
-            process_data: dict[str, Any] = [{'LegalLength': i[0], 'Radius': i[1], 'LineType': i[2]} for i in process_data][0]
-
-            current_data = UpdateCursor(current_front.getOutput(0), fields_to_update)
-            for row in current_data:
-                prior: dict[str, Any] = {'Distance': row[0], 'Radius': row[1], 'LineType': row[2], 'UpdatedByRecord': row[3],
-                                         'StartPointUniqueID': row[4], 'EndPointUniqueID': row[5], 'Shape@': row[6], 'GlobalID': row[7]}
-
-                row[0]: float      = process_data['LegalLength']
-                row[1]: float|None = process_data['Radius']
-                row[2]: int        = process_data['LineType']
-                row[3]: str        = RecordGUID
-                row[4]: str|None   = get_StartPointGUID(row[6])  # Time Consuming Calculation
-                row[5]: str|None   = get_EndPointGUID(row[6])    # Time Consuming Calculation
-
-                current_data.updateRow(row)
-                AddMessage(f"{timestamp()} | {idx}/{total} | ✔️ The front {prior['GlobalID']} modified: \n \
+    with edit_session():
+        for idx, guid in enumerate(process_fronts_guids, start=1):
+            process_front: Layer = MakeLayer(process_fronts_layer, 'process_front', where_clause = f"GlobalID = '{guid}'").getOutput(0)
+            current_front: Result = SelectByLocation(in_layer= current_fronts_layer, select_features= process_front, overlap_type= 'ARE_IDENTICAL_TO')
+            count_matches: int = int(current_front.getOutput(2))
+
+            if count_matches == 0:
+                AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} does not match any active front and will not be modified. \n ")
+                unmatched_fronts.append(guid)
+            if count_matches > 1:
+                AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} matched with {count_matches} active fronts and will not be modified. \n ")
+                unmatched_fronts.append(guid)
+            if count_matches == 1:
+                process_data: Scur = SearchCursor(process_front, field_that_update)
+                process_data: dict[str, Any] = [{'LegalLength': i[0], 'Radius': i[1], 'LineType': i[2]} for i in process_data][0]
+
+                current_data = UpdateCursor(current_front.getOutput(0), fields_to_update)
+                for row in current_data:
+                    prior: dict[str, Any] = {'Distance': row[0], 'Radius': row[1], 'LineType': row[2], 'UpdatedByRecord': row[3],
+                                             'StartPointUniqueID': row[4], 'EndPointUniqueID': row[5], 'Shape@': row[6], 'GlobalID': row[7]}
+
+                    row[0]: float      = process_data['LegalLength']
+                    row[1]: float|None = process_data['Radius']
+                    row[2]: int        = process_data['LineType']
+                    row[3]: str        = RecordGUID
+                    row[4]: str|None   = get_StartPointGUID(row[6])  # Time Consuming Calculation
+                    row[5]: str|None   = get_EndPointGUID(row[6])    # Time Consuming Calculation
+
+                    current_data.updateRow(row)
+                    AddMessage(f"{timestamp()} | {idx}/{total} | ✔️ The front {prior['GlobalID']} modified: \n \
                | Distance: {prior['Distance']} ->> {process_data['LegalLength']} \n \
                | LineType: {prior['LineType']} ->> {process_data['LineType']} \n \
                | Radius:   {prior['Radius']} ->> {process_data['Radius']} \n \
@@ -129,23 +124,21 @@ def modify_CurrentFrontsAttributes(ProcessName: str) -> None:
                | EndPointUniqueID: {prior['EndPointUniqueID']} ->> {row[5]} \n \
                | UpdatedByRecord: {prior['UpdatedByRecord']} ->> {RecordGUID} \n ")
 
-            del current_data, process_data
+                del current_data, process_data
 
 
-    ENV.addOutputsToMap = True
-    current_map.clearSelection()
-    stop_editing(editor)
+        ENV.addOutputsToMap = True
+        current_map.clearSelection()
 
     # Add an unmatched fronts layer if unmatched fronts found
     total_unmatched: int = len(unmatched_fronts)
     if total_unmatched > 0:
-        unmatched_fronts: str = ', '.join(["'" + guid + "'" for guid in unmatched_fronts])
-        query_params: dict[str, Any] = {'name': 'UnmatchedFronts', 'sql': f"GlobalID IN ({unmatched_fronts})", 'isActive': True}
+        query_params: dict[str, Any] = {'name': 'UnmatchedFronts', 'sql': in_query('GlobalID', unmatched_fronts), 'isActive': True}
         current_map.addDataFromPath(f"{CNFG.LayerFiles}UnmatchedFronts_{CNFG.Environment}.lyrx")
         AddDefinitionQuery(get_layer('חזיתות לא מתואמות'), query_params)
         AddMessage(f"{timestamp()} | 💡 {total_unmatched} unmatched fronts from the process are displayed on the map")
 
-    del editor, current_map, fields_to_update, current_fronts_layer, total_unmatched
+    del current_map, fields_to_update, current_fronts_layer, total_unmatched
 
 
 def modify_CurrentAndNewFrontsAttributes() -> None:
@@ -158,7 +151,7 @@ def modify_CurrentAndNewFrontsAttributes() -> None:
     """
     AddMessage('\n ⭕ Modifying fronts attributes:')
     drop_layer('חזיתות לא מתואמות')
-    current_map: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+    current_map: Map = get_map('מפת עריכה')
     current_map.clearSelection()
 
     process_fronts_layer: Layer = current_map.listLayers('חזיתות לשימור וחדשות')[0]
@@ -170,58 +163,56 @@ def modify_CurrentAndNewFrontsAttributes() -> None:
     unmatched_fronts: list[str | None] = []
 
     ENV.addOutputsToMap = False
-    editor: Editor = start_editing(ENV.workspace)
-    for idx, guid in enumerate(process_fronts_guids, start=1):
-        process_front: Layer = MakeLayer(process_fronts_layer, 'process_front', where_clause = f"GlobalID = '{guid}'").getOutput(0)
-        current_front: Result = SelectByLocation(in_layer= current_fronts_layer, select_features= process_front, overlap_type= 'ARE_IDENTICAL_TO')
-        count_matches: int = int(current_front.getOutput(2))
-
-        if count_matches == 0:
-            AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} does not match any active front and will not be modified. \n ")
-            unmatched_fronts.append(guid)
-        if count_matches > 1:
-            AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} matched with {count_matches} active fronts and will not be modified. \n ")
-            unmatched_fronts.append(guid)
-        if count_matches == 1:
-            process_data: Scur = SearchCursor(process_front, ['LegalLength', 'Radius', 'LineType'])
-            process_data: dict[str, Any] = [{'LegalLength': i[0], 'Radius': i[1], 'LineType': i[2]} for i in process_data][0]
-
-            current_data = UpdateCursor(current_front.getOutput(0), ['GlobalID', 'Distance', 'LineType', 'Radius', 'Shape', 'StartPointUniqueID', 'EndPointUniqueID', 'Shape@'])
-            for row in current_data:
-                prior: dict[str, Any] = {'GlobalID': row[0], 'Distance': row[1], 'LineType': row[2], 'Radius': row[3],
-                                         'Shape': row[4], 'StartPointUniqueID': row[5], 'EndPointUniqueID': row[6], 'Shape@': row[7]}
-
-                row[1]: float      = process_data['LegalLength']
-                row[2]: int        = process_data['LineType']
-                row[3]: float|None = process_data['Radius']
-                row[5]: str|None   = get_StartPointGUID(row[7])
-                row[6]: str|None   = get_EndPointGUID(row[7])
-
-                current_data.updateRow(row)
-                AddMessage(f"{timestamp()} | {idx}/{total} | ✔️ The front {prior['GlobalID']} modified: \n \
+    with edit_session():
+        for idx, guid in enumerate(process_fronts_guids, start=1):
+            process_front: Layer = MakeLayer(process_fronts_layer, 'process_front', where_clause = f"GlobalID = '{guid}'").getOutput(0)
+            current_front: Result = SelectByLocation(in_layer= current_fronts_layer, select_features= process_front, overlap_type= 'ARE_IDENTICAL_TO')
+            count_matches: int = int(current_front.getOutput(2))
+
+            if count_matches == 0:
+                AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} does not match any active front and will not be modified. \n ")
+                unmatched_fronts.append(guid)
+            if count_matches > 1:
+                AddMessage(f"{timestamp()} | {idx}/{total} | ⚠️ The process front {guid} matched with {count_matches} active fronts and will not be modified. \n ")
+                unmatched_fronts.append(guid)
+            if count_matches == 1:
+                process_data: Scur = SearchCursor(process_front, ['LegalLength', 'Radius', 'LineType'])
+                process_data: dict[str, Any] = [{'LegalLength': i[0], 'Radius': i[1], 'LineType': i[2]} for i in process_data][0]
+
+                current_data = UpdateCursor(current_front.getOutput(0), ['GlobalID', 'Distance', 'LineType', 'Radius', 'Shape', 'StartPointUniqueID', 'EndPointUniqueID', 'Shape@'])
+                for row in current_data:
+                    prior: dict[str, Any] = {'GlobalID': row[0], 'Distance': row[1], 'LineType': row[2], 'Radius': row[3],
+                                             'Shape': row[4], 'StartPointUniqueID': row[5], 'EndPointUniqueID': row[6], 'Shape@': row[7]}
+
+                    row[1]: float      = process_data['LegalLength']
+                    row[2]: int        = process_data['LineType']
+                    row[3]: float|None = process_data['Radius']
+                    row[5]: str|None   = get_StartPointGUID(row[7])
+                    row[6]: str|None   = get_EndPointGUID(row[7])
+
+                    current_data.updateRow(row)
+                    AddMessage(f"{timestamp()} | {idx}/{total} | ✔️ The front {prior['GlobalID']} modified: \n \
                | Distance: {prior['Distance']} ->> {process_data['LegalLength']} \n \
                | LineType: {prior['LineType']} ->> {process_data['LineType']} \n \
                | Radius:   {prior['Radius']} ->> {process_data['Radius']} \n \
                | StartPointUniqueID: {prior['StartPointUniqueID']} ->> {row[5]} \n \
                | EndPointUniqueID: {prior['EndPointUniqueID']} ->> {row[6]} \n ")
 
-            del current_data, process_data
+                del current_data, process_data
 
 
-    ENV.addOutputsToMap = True
-    current_map.clearSelection()
-    stop_editing(editor)
+        ENV.addOutputsToMap = True
+        current_map.clearSelection()
 
     # Add an unmatched fronts layer if unmatched fronts found
     total_unmatched: int = len(unmatched_fronts)
     if total_unmatched > 0:
-        unmatched_fronts: str = ', '.join(["'" + guid + "'" for guid in unmatched_fronts])
-        query_params: dict[str, Any] = {'name': 'UnmatchedFronts', 'sql': f"GlobalID IN ({unmatched_fronts})", 'isActive': True}
+        query_params: dict[str, Any] = {'name': 'UnmatchedFronts', 'sql': in_query('GlobalID', unmatched_fronts), 'isActive': True}
         current_map.addDataFromPath(f"{CNFG.LayerFiles}UnmatchedFronts_{CNFG.Environment}.lyrx")
         AddDefinitionQuery(get_layer('חזיתות לא מתואמות'), query_params)
         AddMessage(f"{timestamp()} | 💡 {total_unmatched} unmatched fronts from the process are displayed on the map")
 
-    del editor, current_map, current_fronts_layer, count_matches, process_fronts_layer, process_fronts_guids, total
+    del current_map, current_fronts_layer, count_matches, process_fronts_layer, process_fronts_guids, total
 
 
 def modify_PointsAttributes(ProcessName: str, task: TaskType) -> None:
@@ -238,7 +229,7 @@ def modify_PointsAttributes(ProcessName: str, task: TaskType) -> None:
     """
 
     RecordGUID: str = get_RecordGUID(ProcessName, 'MAP')
-    current_map: Map = ArcGISProject("current").activeMap
+    current_map: Map = get_map()
     current_map.clearSelection()
 
     if task == 'ImproveCurrentCadaster':
@@ -250,39 +241,19 @@ def modify_PointsAttributes(ProcessName: str, task: TaskType) -> None:
         AddError('task argument must be one of [ImproveCurrentCadaster, RetireAndCreateCadaster]')
 
     points_layer: Layer = current_map.listLayers('נקודות גבול')[0]
-    selection_params: dict[str, Any] = {'in_layer': points_layer, 'select_features': process_points_layer, 'selection_type': 'NEW_SELECTION', 'overlap_type': 'ARE_IDENTICAL_TO'}
-    current_points_layer: Layer = SelectByLocation(**selection_params).getOutput(0)
-
-    if not compare_counts(process_points_layer, current_points_layer):
-        AddMessage(' ⚠️ Warning: Not all points are matched')
+    constants: dict[str, Any] = {'UpdatedByRecord': RecordGUID} if task == 'ImproveCurrentCadaster' else {}
 
-    # Modify in edit session
+    # Join the process points to the active points by their snapped location and modify them in one edit session
     AddMessage('\n ⭕ Modifying points attributes: \n')
-    editor: Editor = start_editing(ENV.workspace)
-    process_points_names: Scur = SearchCursor(process_points_layer, ['PointName', 'Shape'])
-    total: int = cursor_length(process_points_names)
-    for idx, process_point in enumerate(process_points_names, start=1):
-        new_name: str = process_point[0]
-        new_geom: str = process_point[1]
-
-        current_points_data: Ucur = UpdateCursor(current_points_layer, ['Name', 'Shape', 'UpdatedByRecord'])
-        for current_point in current_points_data:
-            current_name: str = current_point[0]
-            current_geom: str = current_point[1]
-
-            if current_geom == new_geom:
-                current_point[0]: str = new_name
-                if task == 'ImproveCurrentCadaster':
-                    current_point[2]: str = RecordGUID
-
-                current_points_data.updateRow(current_point)
-                AddMessage(f'{timestamp()} | {idx}|{total} | ✔️ Modifying point name from {current_name} to {new_name}')
+    change_log, summary = update_matching_points(process_points_layer, points_layer, {'PointName': 'Name'}, constants)
+    total: int = len(change_log)
+    for idx, (_, changes) in enumerate(change_log, start=1):
+        current_name, new_name = changes['Name']
+        AddMessage(f'{timestamp()} | {idx}|{total} | ✔️ Modifying point name from {current_name} to {new_name}')
 
-        del current_points_data
-
-    stop_editing(editor)
+    report_point_matching(summary)
     current_map.clearSelection()
-    del RecordGUID, current_map, points_layer, selection_params, current_points_layer, editor, process_points_names, total
+    del RecordGUID, current_map, points_layer, constants, change_log, summary, total
 
 
 def modify_3DPointsAttributes(ProcessName) -> None:
@@ -300,50 +271,38 @@ def modify_3DPointsAttributes(ProcessName) -> None:
 
     query: str = f"CPBUniqueID = '{get_ProcessGUID(ProcessName)}' And Role = 3"
     points_to_preserve: Layer = MakeLayer(fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}/InProcessBorderPoints3D", 'points_to_preserve', query).getOutput(0)
-    data: Scur = SearchCursor(points_to_preserve, ['Name', 'Class', 'Shape'])
-    total: int = cursor_length(data)
-
-    active_points: Layer = SelectByLocation(get_layer('נקודות גבול תלת ממדיות'), 'ARE_IDENTICAL_TO', points_to_preserve).getOutput(0)
+    total: int = int(GetCount(points_to_preserve).getOutput(0))
 
     if total > 0:
         AddMessage('\n ⭕ Modifying points attributes: \n')
 
-        if not compare_counts(points_to_preserve, active_points):
-            AddMessage(' ⚠️ Warning: Not all 3D points are matched')
-
-        for idx, point in enumerate(data, start=1):
-            preserved_point_name: str = point[0]
-            preserved_point_class: int = point[1]
-            preserved_point_coord: Point = point[2]
+        # Join the preserved points to the active 3D points by their snapped X, Y, Z and modify them in one edit session
+        change_log, summary = update_matching_points(points_to_preserve, get_layer('נקודות גבול תלת ממדיות'), {'Name': 'Name', 'Class': 'Class'},
+                                                     {'UpdatedByRecord': RecordGUID}, dimensions=3)
 
-            points_to_update: Ucur = UpdateCursor(active_points, ['Name', 'Class', 'UpdatedByRecord', 'Shape'], f"Shape == {preserved_point_coord}")
-            for row in points_to_update:
-                current_name: str = row[0]
-                current_class: int = row[1]
-                current_updated_record: str = row[2]
+        for idx, (_, changes) in enumerate(change_log, start=1):
+            current_name, preserved_point_name = changes['Name']
+            current_class, preserved_point_class = changes['Class']
+            current_updated_record: str|None = changes['UpdatedByRecord'][0]
 
-                AddMessage(f'{timestamp()} | {idx}|{total}  Modifying point {current_name}')
+            AddMessage(f'{timestamp()} | {idx}|{len(change_log)}  Modifying point {current_name}')
 
-                if current_name != preserved_point_name:
-                    row[0]: str = preserved_point_name
-                    AddMessage(f'{timestamp()} | ✔️ Updated name: {preserved_point_name}')
+            if current_name != preserved_point_name:
+                AddMessage(f'{timestamp()} | ✔️ Updated name: {preserved_point_name}')
 
-                if current_class != preserved_point_class:
-                    row[1]: int = preserved_point_class
-                    AddMessage(f'{timestamp()} | ✔️ Updated class: {preserved_point_class}')
+            if current_class != preserved_point_class:
+                AddMessage(f'{timestamp()} | ✔️ Updated class: {preserved_point_class}')
 
-                if current_updated_record != RecordGUID:
-                    row[3]: str = RecordGUID
-                    AddMessage(f'{timestamp()} | ✔️ Updated by record ID: {RecordGUID}')
+            if current_updated_record != RecordGUID:
+                AddMessage(f'{timestamp()} | ✔️ Updated by record ID: {RecordGUID}')
 
-                points_to_update.updateRow(row)
-
-        del points_to_update
+        report_point_matching(summary, '3D points')
+        del change_log, summary
 
     else:
         AddMessage(f'{timestamp()} | ✔️ No preserved 3D points to update')
 
-    del RecordGUID, points_to_preserve, data, total, active_points
+    del RecordGUID, points_to_preserve, total
 
 
 def modify_BlockAttributes(ProcessName: str) -> None:
@@ -375,22 +334,21 @@ def modify_BlockAttributes(ProcessName: str) -> None:
     del Areas_list, Parcels2D_areas, Parcels2D
 
     # Modify in edit session
-    editor: Editor = start_editing(ENV.workspace)
-    Block_area: Ucur = UpdateCursor(Blocks, ['Name', 'StatedArea'], f"GlobalID = '{BlockGUID}'")
+    with edit_session():
+        Block_area: Ucur = UpdateCursor(Blocks, ['Name', 'StatedArea'], f"GlobalID = '{BlockGUID}'")
 
-    if cursor_length(Block_area) > 0:
-        for row in Block_area:
-            BlockName: str = row[0]
-            PreviousStatedArea: float = row[1]
-            row[1]: float = TotalArea
+        if cursor_length(Block_area) > 0:
+            for row in Block_area:
+                BlockName: str = row[0]
+                PreviousStatedArea: float = row[1]
+                row[1]: float = TotalArea
 
-            Block_area.updateRow(row)
-            AddMessage(f"{timestamp()} | ✔️ The Block {BlockName} stated area modified from {PreviousStatedArea} to {TotalArea} square meters \n ")
-    else:
-        AddMessage(f"{timestamp()} | ✔️ No updates require \n ")
+                Block_area.updateRow(row)
+                AddMessage(f"{timestamp()} | ✔️ The Block {BlockName} stated area modified from {PreviousStatedArea} to {TotalArea} square meters \n ")
+        else:
+            AddMessage(f"{timestamp()} | ✔️ No updates require \n ")
 
-    stop_editing(editor)
-    del editor, Block_area, TotalArea, Blocks
+    del Block_area, TotalArea, Blocks
 
 
 def retire_parcels(ProcessName: str, method: Literal[1, 2] = 1) -> None:
@@ -407,7 +365,7 @@ def retire_parcels(ProcessName: str, method: Literal[1, 2] = 1) -> None:
     """
 
     AddMessage('\n ⭕ Retiring substantiated parcels: \n')
-    CurrentMap: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+    CurrentMap: Map = get_map('מפת עריכה')
     CurrentMap.clearSelection()
 
     Parcels2D: Layer = CurrentMap.listLayers('חלקות')[0]
@@ -432,19 +390,20 @@ def retire_parcels(ProcessName: str, method: Literal[1, 2] = 1) -> None:
     AddMessage(f'{timestamp()} | 🚫 The following {len(ToRetire)} parcels at block {substantiated_block} will retire: \n              {parcel_numbers}')
 
     if method == 1:
-        SelectByAttribute(in_layer_or_view= Parcels2D, selection_type= 'NEW_SELECTION', where_clause= f"Name IN ({ToRetire_expression})")
+        select_by_values(Parcels2D, 'Name', ToRetire)
         CalculateField(in_table= Parcels2D, expression_type= 'PYTHON3', field= 'CancelProcessType',  expression= CancelProcessType)
         CalculateField(in_table= Parcels2D, expression_type= 'PYTHON3', field= 'RetiredByRecord', expression= f"'{RecordGUID}'")
         CurrentMap.clearSelection()
 
     elif method == 2:
-        parcels_cursor: Ucur = UpdateCursor(Parcels2D, ['RetiredByRecord', 'CancelProcessType'], f"Name IN ({ToRetire_expression})")
-        for parcel in parcels_cursor:
-            parcel[0]: str = RecordGUID
-            parcel[1]: int = CancelProcessType
-            parcels_cursor.updateRow(parcel)
+        for clause in chunked_in_clauses('Name', ToRetire):
+            parcels_cursor: Ucur = UpdateCursor(Parcels2D, ['RetiredByRecord', 'CancelProcessType'], clause)
+            for parcel in parcels_cursor:
+                parcel[0]: str = RecordGUID
+                parcel[1]: int = CancelProcessType
+                parcels_cursor.updateRow(parcel)
 
-        del parcels_cursor
+            del parcels_cursor
 
     else:
         AddError(f'{timestamp()} | method Parameter must be one of [1, 2] to retire parcels')
@@ -478,7 +437,7 @@ def retire_3D_parcels_and_substractions(ProcessName: str) -> None:
 
     if cursor_length(inprocess_parcels_3D) > 0 and cursor_length(inprocess_substractions) > 0:
 
-        CurrentMap: Map = ArcGISProject("current").listMaps('סצנת עריכה')[0]
+        CurrentMap: Map = get_map('סצנת עריכה')
         CurrentMap.clearSelection()
         RecordGUID: str = get_RecordGUID(ProcessName, 'SHELF')
         CancelProcessType: int = Type2CancelType(get_ProcessType(ProcessName))  # For Tamar should be 4
@@ -486,11 +445,10 @@ def retire_3D_parcels_and_substractions(ProcessName: str) -> None:
         parcels_3D: Layer = CurrentMap.listLayers('חלקות תלת-ממדיות')[0]
         parcels3d_to_retire: list[str] = sorted([f'{row[0]}/{row[1]}/{row[2]}' for row in inprocess_parcels_3D])  # --> ['ParcelNumber/BlockNumber/SubBlockNumber', ...]
         parcel_numbers: list[int] = [int(p.split('/')[0]) for p in parcels3d_to_retire]  # --> [ParcelNumber, ParcelNumber, ...]
-        ToRetire_expression: str = f', '.join(f'\'{p}\'' for p in parcels3d_to_retire)  # --> "ParcelName, ParcelName, ..."
         substantiated_block: str = f'{parcels3d_to_retire[0].split("/")[1]}/{parcels3d_to_retire[0].split("/")[2]}'  # --> "BlockName"
 
         AddMessage(f'{timestamp()} | 🚫 The following {len(parcels3d_to_retire)} 3D parcels at block {substantiated_block} will retire: \n              {parcel_numbers}')
-        SelectByAttribute(in_layer_or_view= parcels_3D, selection_type= 'NEW_SELECTION', where_clause= f"Name IN ({ToRetire_expression})")
+        select_by_values(parcels_3D, 'Name', parcels3d_to_retire)
         CalculateField(in_table= parcels_3D, expression_type= 'SQL', field= 'CancelProcessType',  expression= CancelProcessType)
         CalculateField(in_table= parcels_3D, expression_type= 'SQL', field= 'RetiredByRecord', expression= f"'{RecordGUID}'")
 
@@ -501,10 +459,9 @@ def retire_3D_parcels_and_substractions(ProcessName: str) -> None:
         substractions: Layer = CurrentMap.listLayers('גריעות')[0]
         substractions_to_retire: list[str] = sorted([f'{row[0]}/{row[1]}/{row[2]}' for row in inprocess_substractions])
         substraction_numbers: list[int] = [int(p.split('/')[0]) for p in substractions_to_retire]
-        ToRetire_expression: str = f', '.join(f'\'{p}\'' for p in substractions_to_retire)
 
         AddMessage(f'{timestamp()} | 🚫 The following {len(substractions_to_retire)} substractions at block {substantiated_block} will retire: \n              {substraction_numbers}')
-        SelectByAttribute(in_layer_or_view= substractions, selection_type= 'NEW_SELECTION', where_clause= f"Name IN ({ToRetire_expression})")
+        select_by_values(substractions, 'Name', substractions_to_retire)
         CalculateField(in_table= substractions, expression_type= 'SQL', field= 'CancelProcessType',  expression= CancelProcessType)
         CalculateField(in_table= substractions, expression_type= 'SQL', field= 'RetiredByRecord', expression= f"'{RecordGUID}'")
 
@@ -530,7 +487,7 @@ def retire_fronts(ProcessName: str) -> None:
         ProcessName (str): The name of the record. Used to link the retirement to the specific process.
     """
     AddMessage('\n ⭕ Retiring substantiated fronts: \n')
-    CurrentMap: Map = ArcGISProject("current").listMaps('מפת עריכה')[0]
+    CurrentMap: Map = get_map('מפת עריכה')
     CurrentMap.clearSelection()
 
     Fronts: Layer = CurrentMap.listLayers('חזיתות')[0]
@@ -590,9 +547,7 @@ def retire_substractions_by_2D_process(ProcessName: str) -> None:
         parcels_query: str = f"CPBUniqueID = '{get_ProcessGUID(ProcessName, 'MAP')}' AND ParcelRole = 1"
         parcels_to_retire: Scur = SearchCursor(f"{CNFG.ParcelFabricDatabase}InProcessParcels2D", ['ParcelNumber', 'BlockNumber', 'SubBlockNumber'], parcels_query)
         parcels_to_retire: dict[str, str|None] = {f'{r[0]}/{r[1]}/{r[2]}': get_ActiveParcel2DGUID(f'{r[0]}/{r[1]}/{r[2]}') for r in parcels_to_retire}
-        expression: str = f', '.join(f'\'{p}\'' for p in parcels_to_retire.values())
-
-        substraction_to_retire: Result = SelectByAttribute(active_substractions, 'NEW_SELECTION', f"Parcel2DUniqueID IN ({expression})")
+        substraction_to_retire: Result = select_by_values(active_substractions, 'Parcel2DUniqueID', list(parcels_to_retire.values()))
         total: int = int(substraction_to_retire[1])
 
         # Continue if there are active substraction associated with the retiring 2D parcels
@@ -691,8 +646,7 @@ def reshape_transferring_block(ProcessName: str) -> None:
          - Retrieves the parcels retired by the process.
          - Selects all remaining active parcels of the block (excluding the retired ones).
          - Selects the new parcels added by the process that belong to the same block.
-         - Merges the remaining and new parcels to build the updated block geometry.
-         - Dissolves the merged geometry to create a single polygon.
+         - Unions the remaining and new parcels in memory to build the updated block geometry.
          - Updates the block’s geometry in the layer containing active blocks ('גושים').
     Parameters:
         ProcessName (str): The name of the process. Used to identify the sender block and relevant parcels.
@@ -708,32 +662,29 @@ def reshape_transferring_block(ProcessName: str) -> None:
     else:
         AddMessage(f'\n ⭕ Reshaping sender block borders: \n')
 
-        ENV.addOutputsToMap = False
-        home_gdb: str = ArcGISProject("current").defaultGeodatabase
-
         sender_block_guid: str = get_BlockGUID('ProcessName', ProcessName)
         sender_block_name: str = get_BlockName(sender_block_guid)
 
-        #   Get the retiring parcels of the process as a unified text to use in a query
+        #   Get the names of the retiring parcels of the process
         AddMessage(f"{timestamp()} | 💡 The sender block {sender_block_name} will be reshaped")
         InProcessParcels2D: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}InProcessParcels2D"
         query: str = f"CPBUniqueID = '{get_ProcessGUID(ProcessName)}' And ParcelRole = 1"
-        retired_parcel_of_process: Scur = SearchCursor(InProcessParcels2D, ['ParcelNumber', 'BlockNumber', 'SubBlockNumber'], query)
-        retired_parcel_as_text: str = ",".join([f"'{i[0]}/{i[1]}/{i[2]}'" for i in retired_parcel_of_process])
+        with SearchCursor(InProcessParcels2D, ['ParcelNumber', 'BlockNumber', 'SubBlockNumber'], query) as Scursor:
+            retired_parcels: set[str] = {f"{i[0]}/{i[1]}/{i[2]}" for i in Scursor}
 
-        #   Query the for active parcels of the block, excluding the retiring parcels pf the process
+        #   Read the active parcels of the block, excluding the retiring parcels of the process (in memory instead of a NOT IN list)
         Parcels2D: str = fr"{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Parcels2D"
-        query: str = f"""BlockUniqueID = '{sender_block_guid}' And RetiredByRecord Is Null And Name Not In ({retired_parcel_as_text})"""
-        remaining_active_parcels: Layer = MakeLayer(Parcels2D, 'remaining_active_parcels', query).getOutput(0)
+        query: str = f"""BlockUniqueID = '{sender_block_guid}' And RetiredByRecord Is Null"""
+        with SearchCursor(Parcels2D, ['Name', 'SHAPE@'], query) as Scursor:
+            shapes: list[Polygon] = [shape for name, shape in Scursor if name not in retired_parcels]
 
-        #   Query the new parcels of the sender block (they were added earlier in load_new_parcels but are not yet implemented on the map (known bug)
-        query: str = f"CPBUniqueID = '{get_ProcessGUID(ProcessName)}' And ParcelRole = 2 And BlockUniqueId = '{sender_block_guid}'"
-        new_parcels: Layer = MakeLayer(InProcessParcels2D, 'new_active_parcels', query).getOutput(0)
-        merged: Result = Merge([remaining_active_parcels, new_parcels], fr'{home_gdb}\merged_parcels_of_{sender_block_name.replace("/", "_")}')
+        #   Read the new parcels of the sender block (they were added earlier in load_new_parcels but are not yet implemented on the map (known bug)
+        new_parcels: str = f"CPBUniqueID = '{get_ProcessGUID(ProcessName)}' And ParcelRole = 2 And BlockUniqueId = '{sender_block_guid}'"
+        with SearchCursor(InProcessParcels2D, 'SHAPE@', new_parcels) as Scursor:
+            shapes.extend(row[0] for row in Scursor)
 
         #   Compute the updated geometry
-        dissolve: Result = Dissolve(merged.getOutput(0), fr'{home_gdb}\sender_block_{sender_block_name.replace("/", "_")}_geometry')
-        updated_shape: Polygon = SearchCursor(dissolve.getOutput(0), 'Shape@').next()[0]
+        updated_shape: Polygon = union_geometries(shapes)
 
         #   Update the block attributes
         block_to_update: Ucur = UpdateCursor(get_layer('גושים'), 'Shape@', f"GlobalID = '{sender_block_guid}' And RetiredByRecord Is Null")
@@ -741,10 +692,10 @@ def reshape_transferring_block(ProcessName: str) -> None:
             row[0]: Polygon = updated_shape
             block_to_update.updateRow(row)
 
-        del retired_parcel_of_process, remaining_active_parcels, dissolve, updated_shape, block_to_update
+        del retired_parcels, shapes, new_parcels, updated_shape, block_to_update
         AddMessage(f"{timestamp()} | ✔️ Block {sender_block_name} borders reshaped")
 
-        del home_gdb, sender_block_guid, sender_block_name
+        del sender_block_guid, sender_block_name
 
 
 def reshape_or_construct_absorbing_blocks(ProcessName: str) -> None:
@@ -754,15 +705,15 @@ def reshape_or_construct_absorbing_blocks(ProcessName: str) -> None:
     Handles two scenarios:
     1. New Block: If the block is created by this process (when the block Status=13), it constructs the block geometry
                   from scratch using the new parcels.
-    2. Existing Block: If the block already exists, it reshapes the border by merging existing active parcels with the
-                       incoming transferred parcels and dissolving.
+    2. Existing Block: If the block already exists, it reshapes the border by the union of its existing active parcels
+                       and the incoming transferred parcels.
+    The geometries of all the absorbing blocks are computed in memory in one call.
 
     Parameters:
         ProcessName (str): The name of the process. Used to identify the absorbing blocks and relevant parcels.
     """
     AddMessage(f'\n ⭕  Reshaping or constructing absorbing blocks borders: \n')
     ENV.addOutputsToMap = False
-    home_gdb: str = ArcGISProject("current").defaultGeodatabase
 
     refresh_map_view()
     RefreshLayer(get_layer('גושים'))
@@ -772,26 +723,25 @@ def reshape_or_construct_absorbing_blocks(ProcessName: str) -> None:
     record_guid: str = get_RecordGUID(ProcessName, 'SHELF')
     process_guid: str = get_ProcessGUID(ProcessName)
     InProcessParcels2D: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}InProcessParcels2D"
+    Parcels2D: str = fr"{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Parcels2D"
 
+    # Compute the geometries of all the absorbing blocks at once:
+    #   the transferred parcels of each block, and the transferred parcels together with its current active parcels.
+    new_parcels_shapes: dict[str, Polygon|None] = union_by_group([(InProcessParcels2D, f"CPBUniqueID = '{process_guid}' And ParcelRole = 2")], 'BlockUniqueID', absorbing_blocks_guids)
+    reshaped_blocks_shapes: dict[str, Polygon|None] = union_by_group([(InProcessParcels2D, f"CPBUniqueID = '{process_guid}' And ParcelRole = 2"),
+                                                                      (Parcels2D, "RetiredByRecord Is Null")], 'BlockUniqueID', absorbing_blocks_guids)
 
     for idx, guid in enumerate(absorbing_blocks_guids, start=1):
         block_name: str = get_BlockName(guid)
         block_status: int = get_BlockStatus('GlobalID', guid)
-        query_new_parcels_of_the_block: str = f"CPBUniqueID = '{process_guid}' And ParcelRole = 2 And BlockUniqueID = '{guid}'"
 
         # (2.A) The absorbing block is created by the process (טרום תצ''ר).
         #       In this scenario the block already exists in the Blocks table with empty geometry (by earlier CMS\Rakefet creation).
         if block_status == 13:
             AddMessage(f"{timestamp()} | {idx}/{total_absorbing} | 💡 The absorbing block {block_name} borders will be constructed")
 
-            # Get the relevant transferred parcels geometries that will create the new block
-            parcels_of_new_block: Layer = MakeLayer(InProcessParcels2D, 'parcels_of_new_block', query_new_parcels_of_the_block).getOutput(0)
-
-            #  Get outer geometry and modify attributes
-            dissolve: Result = Dissolve(parcels_of_new_block, fr'{home_gdb}\new_block_{block_name.replace("/", "_")}_geometry')
-            new_shape: Polygon = SearchCursor(dissolve.getOutput(0), 'Shape@').next()[0]
-
-            del parcels_of_new_block, dissolve
+            #  Get outer geometry of the transferred parcels that create the new block
+            new_shape: Polygon = new_parcels_shapes.get(guid)
 
             # NOTE:
             #  When accessing the active blocks layer directly with a cursor, the cursor fails to locate the relevant block for unknown reasons.
@@ -811,18 +761,8 @@ def reshape_or_construct_absorbing_blocks(ProcessName: str) -> None:
         # (2.B) The absorbing block is already exists (and active).
         else:
             AddMessage(f"{timestamp()} | {idx}/{total_absorbing} | 💡 The absorbing block {block_name} borders will be reshaped")
-            # Get the relevant parcels geometries that are transferred to the existing block
-            transferred_parcels: Layer = MakeLayer(InProcessParcels2D, 'transferred_parcels', query_new_parcels_of_the_block).getOutput(0)
-
-            # Get the current active parcels geometries of the existing block
-            Parcels2D: str = fr"{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Parcels2D"
-            query: str = f"BlockUniqueID = '{guid}' And RetiredByRecord Is Null"
-            current_parcels: Layer = MakeLayer(Parcels2D, 'current_parcels', query).getOutput(0)
-
-            #   Compute the updated geometry
-            merged: Result = Merge([current_parcels, transferred_parcels], fr'{home_gdb}\merged_parcels_of_{block_name.replace("/", "_")}')
-            dissolved: Result = Dissolve(merged.getOutput(0), fr'{home_gdb}\Block_{block_name.replace("/", "_")}_dissolved')
-            updated_shape: Polygon = SearchCursor(dissolved.getOutput(0), 'Shape@').next()[0]
+            #   The updated geometry of the current active parcels and the transferred parcels of the block
+            updated_shape: Polygon = reshaped_blocks_shapes.get(guid)
 
             #   Update the block shape geometry
             block_to_update: Ucur = UpdateCursor(get_layer('גושים'), 'Shape@', f"GlobalID = '{guid}'")
@@ -831,11 +771,11 @@ def reshape_or_construct_absorbing_blocks(ProcessName: str) -> None:
                 block_to_update.updateRow(row)
 
             AddMessage(f"{timestamp()} | ✔️ Block {block_name} borders reshaped successfully")
-            del transferred_parcels, Parcels2D, query, current_parcels, merged, dissolved, updated_shape, block_to_update
+            del updated_shape, block_to_update
 
-        del block_name, block_status, query_new_parcels_of_the_block
+        del block_name, block_status
 
-    del absorbing_blocks_guids, total_absorbing, record_guid, process_guid
+    del absorbing_blocks_guids, total_absorbing, record_guid, process_guid, new_parcels_shapes, reshaped_blocks_shapes
     refresh_map_view()
     RefreshLayer(get_layer('גושים'))
 
@@ -853,14 +793,13 @@ def update_record_status(ProcessName: str, new_status: int) -> None:
     refresh_map_view()
     new_status_text: str = get_DomainValue("ProcessStatus", new_status)
 
-    editor: Editor = start_editing(ENV.workspace)
-    Ucursor: Ucur = UpdateCursor(get_layer('גבולות רישומים'), 'Status', f"Name = '{ProcessName}'")
-    for row in Ucursor:
-        row[0]: int = new_status
-        Ucursor.updateRow(row)
+    with edit_session():
+        Ucursor: Ucur = UpdateCursor(get_layer('גבולות רישומים'), 'Status', f"Name = '{ProcessName}'")
+        for row in Ucursor:
+            row[0]: int = new_status
+            Ucursor.updateRow(row)
 
-    stop_editing(editor)
-    del Ucursor, editor
+    del Ucursor
     AddMessage(f'{timestamp()} | ⚡ Record {ProcessName} status updated to {new_status_text}')
 
     # Save the record Global ID in a text file
@@ -1,11 +1,10 @@
-from pandas import DataFrame
 from Utils.Configs import CNFG
-from Utils.TypeHints import Validation, Layer, Scur, df, series, Map, MapType, TaskType
-from Utils.Helpers import get_active_user, get_ProcessGUID, get_ProcessType, timestamp, get_DomainValue, get_layer, \
-                          process_is_transferring, cursor_length, process_only_creates, AddTabularMessage
+from Utils.LazyImports import load
+from Utils.TypeHints import Validation, Layer, Scur, df, series, Map, MapType, TaskType, Iterator, Any
+from Utils.Helpers import get_map, get_active_user, get_ProcessGUID, get_ProcessType, timestamp, get_DomainValue, get_layer, \
+                          process_is_transferring, cursor_length, process_only_creates, AddTabularMessage, AddTableMessage, chunked_search, query_count
 from arcpy import AddMessage, AddError
 from arcpy.da import SearchCursor
-from arcpy.mp import ArcGISProject
 from arcpy.management import GetCount
 
 
@@ -74,16 +73,15 @@ def creating_record_is_duplicated(ProcessName: str) -> bool | None:
     query: str = f""" Name = '{ProcessName}' AND RecordType IN (1,11) """
     Records_layer: Layer = get_layer('גבולות רישומים')
     
-    query: list[str] = [row[0] for row in SearchCursor(Records_layer, 'Name', query)]
-    count: int = len(query)
-    del query, Records_layer
+    count: int = query_count(Records_layer, query, limit=2)
     
     if count == 0:
         return False
     if count == 1:
         return True
     else:
-        AddError(f'{timestamp()} | ❌ Found {count} records with the name {ProcessName}')
+        # The duplicates are rare, only then are all of them counted for the message
+        AddError(f'{timestamp()} | ❌ Found {query_count(Records_layer, query)} records with the name {ProcessName}')
         return None
         
 
@@ -165,92 +163,101 @@ def validate_status(ProcessName: str, desire_status: int | list[int]) -> Validat
         return 'Invalid'
 
 
-def validate_stated_areas(ProcessName: str) -> Validation:
+def stated_area_mismatches(ProcessName: str) -> list[list[Any]]:
     """
-    Validates that the 'Legal Area' of parcels in the current process matches the 'Stated Area' recorded in the active parcel.
-    This function iterates through parcels involved in the specified process (specifically Parcel Roles 1 and 3).
-    It compares the incoming legal area against the existing stated area to ensure data integrity before finalization.
-
-    The validation logic includes:
-    1.  Exemption: Skips validation if the Process Type is 6 (Amendment 97b).
-    2.  ID Resolution: -   For Parcel Type 2: Uses the parcel number directly.
-                       -   For Parcel Type 1 (Temporary): Queries the 'SequenceActions' table to find the corresponding final parcel number.
-    3.  Comparison:
-        -   Retrieves `LegalArea` from `InProcessParcels2D`.
-        -   Retrieves `StatedArea` from the live `Parcels2D` layer.
-        -   Rounds both values to 3 decimal places before comparing.
+    Compares the 'Legal Area' of the parcels in a process (Parcel Roles 1 and 3) with the 'Stated Area' of their active parcels.
+    The in-process parcels, their SequenceActions rows and the active Parcels2D stated areas are each read in one
+    bounded query (IN batches), then joined in memory.
+
+    ID Resolution: - For Parcel Type 2: Uses the parcel number directly.
+                   - For Parcel Type 1 (Temporary): The final parcel number of the temporary parcel in the 'SequenceActions' table.
+    Both areas are rounded to 3 decimal places before comparing.
 
     Parameters:
         ProcessName (str): The name of the process with the parcels to validate.
 
     Returns:
-        Validation: A string status indicating the result:
-            - 'Valid': All areas match, or the process type is exempt.
-            - 'Invalid': Mismatches or Null values were found in the area checks.
+        list[list[Any]]: A row per mismatched parcel: [parcel number, block name, current area, process area, delta].
+                         A parcel that does not exist (or is not active) has no current area, a Null area has no delta.
     """
-    Unmatched: int = 0
-
-    if get_ProcessType(ProcessName) != 6:  # 6 is Amendment 97b
-
-        Parcels2D_path: str = fr"{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Parcels2D"
-
-        SequenceActions: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}SequenceActions"
-
-        process_guid: str = get_ProcessGUID(ProcessName, 'SDE')
-
-        InProcessParcels2D_path: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}InProcessParcels2D"
-        fields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'ParcelType', 'LegalArea']
-        in_process_parcels_data: Scur = SearchCursor(InProcessParcels2D_path, fields, f"ParcelRole IN (1,3) AND CPBUniqueID = '{process_guid}'")
-
-        for incoming_parcel in in_process_parcels_data:
-
-            parcel_number: int = incoming_parcel[0]
-            block_name: str = f"{incoming_parcel[1]}/{incoming_parcel[2]}"
-            parcel_type: int = incoming_parcel[3]
-
-            if parcel_type == 2:
-                parcel_name: str = f"{parcel_number}/{block_name}"
-            elif parcel_type == 1:
-                query: str = f"FromParcelTemp = {parcel_number} AND CPBUniqueID = '{process_guid}'"
-                final_parcel_number: int = SearchCursor(SequenceActions, "FromParcelFinal", query).next()[0]
-
-                if final_parcel_number:
-                    parcel_name: str = f"{final_parcel_number}/{block_name}"
-                else:
-                    parcel_name: None = None
-                    AddMessage(f"{timestamp()} | ⚠️ Areas check: Skipping temporary parcel {parcel_number} - the parcel doesn't have final number yet")
+    Parcels2D_path: str = fr"{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Parcels2D"
+    SequenceActions: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}SequenceActions"
+    InProcessParcels2D_path: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}InProcessParcels2D"
+    process_guid: str = get_ProcessGUID(ProcessName, 'SDE')
+
+    fields: list[str] = ['ParcelNumber', 'BlockNumber', 'SubBlockNumber', 'ParcelType', 'LegalArea']
+    with SearchCursor(InProcessParcels2D_path, fields, f"ParcelRole IN (1,3) AND CPBUniqueID = '{process_guid}'") as Scursor:
+        incoming_parcels: list[tuple[Any, ...]] = [row for row in Scursor]
+
+    # Final numbers of the temporary parcels -> {FromParcelTemp: FromParcelFinal}, the first action of a parcel is used
+    temporary: list[int] = [row[0] for row in incoming_parcels if row[3] == 1]
+    final_numbers: dict[int, int|None] = {}
+    for temp, final in chunked_search(SequenceActions, ['FromParcelTemp', 'FromParcelFinal'], 'FromParcelTemp', temporary, f"CPBUniqueID = '{process_guid}'"):
+        final_numbers.setdefault(temp, final)
+
+    # Parcel names to validate -> [(parcel number, block name, parcel name, legal area)]
+    parcels: list[tuple[int, str, str, float|None]] = []
+    for parcel_number, block_number, sub_block_number, parcel_type, legal_area in incoming_parcels:
+        block_name: str = f"{block_number}/{sub_block_number}"
+        if parcel_type == 2:
+            parcels.append((parcel_number, block_name, f"{parcel_number}/{block_name}", legal_area))
+        elif parcel_type == 1:
+            if final_numbers.get(parcel_number):
+                parcels.append((parcel_number, block_name, f"{final_numbers[parcel_number]}/{block_name}", legal_area))
             else:
-                parcel_name: None = None
-                AddError(f'{timestamp()} | Parcel type {parcel_type} is not allowed')
+                AddMessage(f"{timestamp()} | ⚠️ Areas check: Skipping temporary parcel {parcel_number} - the parcel doesn't have final number yet")
+        else:
+            AddError(f'{timestamp()} | Parcel type {parcel_type} is not allowed')
+
+    # Stated areas of the active parcels -> {Name: StatedArea}
+    stated_areas: dict[str, float|None] = {}
+    for name, stated_area in chunked_search(Parcels2D_path, ['Name', 'StatedArea'], 'Name', [p[2] for p in parcels], "RetiredByRecord IS NULL"):
+        stated_areas.setdefault(name, stated_area)
+
+    mismatches: list[list[Any]] = []
+    for parcel_number, block_name, parcel_name, legal_area in parcels:
+        process_area: float|None = round(legal_area, 3) if legal_area is not None else None
+        if parcel_name not in stated_areas:
+            AddError(f'{timestamp()} | ❌ Areas check: parcel {parcel_name.split("/")[0]} at block {block_name} does not exist or not active')
+            current_area: float|None = None
+        else:
+            current_area: float|None = round(stated_areas[parcel_name], 3) if stated_areas[parcel_name] is not None else None
+            if current_area is None:
+                AddError(f'{timestamp()} | ❌ Areas check: Stated area of parcel {parcel_number} at block {block_name}: is Null')
 
-            if parcel_name:
-                legal_area: float = round(incoming_parcel[4], 3)
+        if process_area is None:
+            AddError(f'{timestamp()} | ❌ Areas check: Legal area of parcel {parcel_number} at block {block_name}: is Null')
 
-                active_parcel: Scur = SearchCursor(Parcels2D_path, 'StatedArea', f"Name = '{parcel_name}' AND RetiredByRecord IS NULL")
-                if cursor_length(active_parcel) == 0:
-                    AddError(f'{timestamp()} | ❌ Areas check: parcel {parcel_name.split("/")[0]} at block {block_name} does not exist or not active')
-                    stated_area = None
-                else:
-                    stated_area = round(active_parcel.next()[0], 3)
+        if current_area != process_area or current_area is None:
+            delta: float|None = round(process_area - current_area, 3) if current_area is not None and process_area is not None else None
+            mismatches.append([parcel_number, block_name, current_area, process_area, delta])
 
-                if stated_area is None:
-                    Unmatched += 1
-                    AddError(f'{timestamp()} | ❌ Areas check: Stated area of parcel {parcel_number} at block {block_name}: is Null')
+    del process_guid, incoming_parcels, final_numbers, parcels, stated_areas
+    return mismatches
 
-                if legal_area is None:
-                    Unmatched += 1
-                    AddError(f'{timestamp()} | ❌ Areas check: Legal area of parcel {parcel_number} at block {block_name}: is Null')
 
-                if stated_area != legal_area:
-                    Unmatched += 1
-                    AddError(f'{timestamp()} | ❌ Areas check: Unmatched areas for parcel {parcel_number} at block {block_name}: \n\
-                                                   - Current area: {stated_area} square meters \n\
-                                                   - Process area: {legal_area} square meters \n ')
+def validate_stated_areas(ProcessName: str) -> Validation:
+    """
+    Validates that the 'Legal Area' of parcels in the current process matches the 'Stated Area' recorded in the active parcel
+    (see stated_area_mismatches). The mismatched parcels are printed as a table of current area, process area and delta.
+    Skips validation if the Process Type is 6 (Amendment 97b).
 
-        del process_guid, in_process_parcels_data
+    Parameters:
+        ProcessName (str): The name of the process with the parcels to validate.
 
+    Returns:
+        Validation: A string status indicating the result:
+            - 'Valid': All areas match, or the process type is exempt.
+            - 'Invalid': Mismatches or Null values were found in the area checks.
+    """
+    if get_ProcessType(ProcessName) == 6:  # 6 is Amendment 97b
+        return 'Valid'
 
-    if Unmatched > 0:
+    mismatches: list[list[Any]] = stated_area_mismatches(ProcessName)
+    if mismatches:
+        AddError(f'{timestamp()} | ❌ Areas check: Unmatched areas for {len(mismatches)} parcels (square meters):')
+        AddTableMessage([['' if value is None else value for value in row] for row in mismatches],
+                        header=['Parcel', 'Block', 'Current area', 'Process area', 'Delta'])
         return 'Invalid'
     else:
         AddMessage(f'{timestamp()} | ✅ Parcels stated areas are matched')
@@ -352,7 +359,7 @@ def absorbing_block_exist(ProcessName: str, map_name: MapType = 'Active map') ->
         str: Valid if all absorbing blocks exist in Blocks table, Invalid otherwise.
     """
     if process_is_transferring(ProcessName, source='SDE'):
-        current_map: Map = ArcGISProject('current').activeMap if map_name == 'Active map' else ArcGISProject('current').listMaps(map_name)[0]
+        current_map: Map = get_map(map_name)
         current_map.clearSelection()
 
         table: str = fr"{CNFG.ParcelFabricDatabase}{CNFG.OwnerName}SequenceActions".replace("/", "\\")
@@ -400,6 +407,12 @@ def validate_substantiated_Parcels2D(ProcessName: str) -> Validation:
     Parcels2D_dict: dict[int, list[str, int]] = {row[3]: [f'{row[0]}/{row[1]}/{row[2]}', row[4]] for row in search}  # -> {TemporarySubstractionNumber : [Parcel2DName, Parcel2DType]}
     del InProSubstractions, search, fields, query
 
+    # The final parcels referenced by the substractions are counted in one query -> {Name: count}
+    final_names: list[str] = [value[0] for value in Parcels2D_dict.values() if value[1] == 2]
+    name_counts: dict[str, int] = {}
+    for row in chunked_search(Parcels2D, 'Name', 'Name', final_names):
+        name_counts[row[0]] = name_counts.get(row[0], 0) + 1
+
     errors: int = 0
     for key, value in Parcels2D_dict.items():
         if value[1] == 1:  # ארעית
@@ -407,8 +420,7 @@ def validate_substantiated_Parcels2D(ProcessName: str) -> Validation:
             errors += 1
 
         elif value[1] == 2:  # סופית
-            search: Scur = SearchCursor(Parcels2D, 'Name', f"Name = '{value[0]}'")
-            if cursor_length(search) != 1:
+            if name_counts.get(value[0], 0) != 1:
                 errors += 1
                 AddMessage(f'{timestamp()} | ❌ Substraction {key} references 2D parcel {value[0]} which either not exist or is retired')
         else:
@@ -448,12 +460,9 @@ def validate_substantiated_Parcels3D(ProcessName: str) -> Validation:
                                              f" CPBUniqueID = '{get_ProcessGUID(ProcessName, 'MAP')}' ")
 
         process_parcels: dict[str, list[float]] = {f'{row[0]}/{row[1]}/{row[2]}': [row[3], row[4], row[5], row[6]] for row in process_parcels}  # -> {Name: ['StatedVolume', 'ProjectedArea', 'UpperLevel', 'LowerLevel']}
-        parcels_names: str = ", ".join(f"'{key}'" for key in process_parcels.keys())
-
-
-        active_parcels: Scur = SearchCursor(fr'{CNFG.ParcelFabricDataset}\{CNFG.OwnerName}.Parcels3D',
-                                            ['Name', 'StatedVolume', 'ProjectedArea', 'UpperLevel', 'LowerLevel'],
-                                            f" Name IN ({parcels_names}) And RetiredByRecord Is Null")
+        active_parcels: Iterator[tuple] = chunked_search(fr'{CNFG.ParcelFabricDataset}\{CNFG.OwnerName}.Parcels3D',
+                                                         ['Name', 'StatedVolume', 'ProjectedArea', 'UpperLevel', 'LowerLevel'],
+                                                         'Name', list(process_parcels), "RetiredByRecord Is Null")
 
         active_parcels: dict[str, list[float]] = {row[0]: [row[3], row[4], row[5], row[6]] for row in active_parcels}  # -> {Name: ['StatedVolume', 'ProjectedArea', 'UpperLevel', 'LowerLevel']}
 
@@ -521,6 +530,7 @@ def validation_set(task: TaskType, ProcessName: str) -> bool:
     """
 
     AddMessage(f'\n ⭕ Validating:')
+    DataFrame = load('pandas').DataFrame
     # Mapping the early validation by the task type
     if task == 'ImproveCurrentCadaster':
         vals: df = DataFrame(data={'Validation': 'Results',
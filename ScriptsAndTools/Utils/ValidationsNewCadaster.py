@@ -1,11 +1,11 @@
 from Utils.Configs import CNFG
-from Utils.Helpers import get_ProcessGUID, get_ProcessType, get_RecordGUID, start_editing, stop_editing, timestamp, get_DomainValue, get_layer,rewrite_record_data,reopen_map,get_process_shape
+from Utils.Helpers import get_map, get_ProcessGUID, get_ProcessType, get_RecordGUID, start_editing, stop_editing, timestamp, get_DomainValue, get_layer,rewrite_record_data,reopen_map,get_process_shape, \
+                          edit_session, bulk_update, chunked_in_clauses, query_exists, query_count
 from Utils.NewCadasterHelpers import get_RecordGUID_NewCadaster,clear_map_selections,get_default_gdb
 from Utils.Validations import user_is_signed_in, process_exist
 from arcpy.da import SearchCursor, UpdateCursor
 from arcpy import AddMessage, AddError, AddWarning,GetPortalInfo, GetActivePortalURL,RefreshLayer, env as ENV
 from arcpy.da import SearchCursor
-from arcpy.mp import ArcGISProject
 from arcpy.management import CopyFeatures, GetCount,Dissolve, Delete
 from arcpy.management import SelectLayerByLocation as SelectByLocation, SelectLayerByAttribute as SelectByAttribute
 
@@ -45,14 +45,13 @@ def is_process_border_valid(ProcessName:str) -> bool:
         default_gdb = get_default_gdb()
         local_process_border = CopyFeatures(process_border, f"{default_gdb}\\ProcessBorder_{ProcessName.replace('/','_')}")
         ENV.preserveGlobalIds = False
-        editor = start_editing(CNFG.ParcelFabricDatabase)
+        with edit_session():
 
-        with UpdateCursor(local_process_border, ["SHAPE@"]) as cursor:
-                row = next(cursor, None)  # Safely get the first row or None
-                if row:
-                    row[0] = dissolved_parcels_geometry
-                    cursor.updateRow(row)
-        stop_editing(editor)
+            with UpdateCursor(local_process_border, ["SHAPE@"]) as cursor:
+                    row = next(cursor, None)  # Safely get the first row or None
+                    if row:
+                        row[0] = dissolved_parcels_geometry
+                        cursor.updateRow(row)
 
         result = False
     else:
@@ -189,10 +188,9 @@ def block_exist(ProcessName:str) -> str:
     ''' 
     
     #query = [row[0] for row in SearchCursor(CNFG.ParcelFabricDataset + 'Blocks', 'Name', f""" Name = '{ProcessName}' AND IsTax=0 """)]
-    query = [row[0] for row in SearchCursor(f'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Blocks', 'Name', f""" Name = '{ProcessName}' AND IsTax=0 """)]
-
-    count = len(query)
-    del query
+    blocks_table = f'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}Blocks'
+    query = f""" Name = '{ProcessName}' AND IsTax=0 """
+    count = query_count(blocks_table, query, limit=2)
     
     if count == 0:
         AddError(f'{timestamp()} | ❌ Block {ProcessName} does not exist in the Blocks table among the non-tax blocks')
@@ -201,7 +199,7 @@ def block_exist(ProcessName:str) -> str:
         AddMessage(f'{timestamp()} | ✅ Block {ProcessName} found')
         return 'Valid'
     else:
-        AddError(f'{timestamp()} | ❌ Debug: Count of query in block_exist function: {count}')
+        AddError(f'{timestamp()} | ❌ Debug: Count of query in block_exist function: {query_count(blocks_table, query)}')
         return 'Invalid'
     
 def new_cadaster_validation_set(ProcessName:str, TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster') -> bool:
@@ -257,9 +255,8 @@ def new_cadaster_record_is_duplicated(ProcessName:str) -> str:
     '''
     Records_layer = get_layer('גבולות רישומים')
     
-    query = [row[0] for row in SearchCursor(Records_layer, 'Name', f""" Name = '{ProcessName}' """)]
-    count = len(query)
-    del [query, Records_layer]
+    count = int(query_exists(Records_layer, f""" Name = '{ProcessName}' """))
+    del Records_layer
     
     if count == 0:
         AddMessage(f'{timestamp()} | ✅ Record is not duplicated')
@@ -286,9 +283,7 @@ def features_created_by_record_exist(ProcessName:str,feature_class_name:str) ->
 
     record_GUID = get_RecordGUID_NewCadaster(ProcessName)
 
-    query = [row[0] for row in SearchCursor(f'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}{feature_class_name}', 'GlobalID', f""" CreatedByRecord = '{record_GUID}' """)]
-    count = len(query)
-    del query
+    count = int(query_exists(f'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}{feature_class_name}', f""" CreatedByRecord = '{record_GUID}' """))
     
     if count == 0:
         return 'Valid'
@@ -314,9 +309,7 @@ def features_retired_by_record_exist(ProcessName:str, feature_class_name:str) ->
 
     record_GUID = get_RecordGUID_NewCadaster(ProcessName)
 
-    query = [row[0] for row in SearchCursor(f'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}{feature_class_name}', 'GlobalID', f""" RetiredByRecord = '{record_GUID}' """)]
-    count = len(query)
-    del query
+    count = int(query_exists(f'{CNFG.ParcelFabricDataset}{CNFG.OwnerName}{feature_class_name}', f""" RetiredByRecord = '{record_GUID}' """))
     
     if count == 0:
         return 'Valid'
@@ -329,99 +322,117 @@ def features_retired_by_record_exist(ProcessName:str, feature_class_name:str) ->
 
 
 
-def delete_records_related_data(ProcessName:str, TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster') -> None:
+# The rolled back fabric classes, edited through their active and retired layers (in the version of the task)
+_RollbackClasses = {'Parcels2D': {'label': 'parcels', 'active': 'חלקות', 'retired': 'חלקות מבוטלות',
+                                  'restore': {'RetiredByRecord': None, 'CancelProcessType': None}},
+                    'Parcels2DFronts': {'label': 'fronts', 'active': 'חזיתות', 'retired': 'חזיתות מבוטלות', 'restore': {'RetiredByRecord': None}},
+                    'BorderPoints': {'label': 'points', 'active': 'נקודות גבול', 'retired': 'נקודות גבול מבוטלות', 'restore': {'RetiredByRecord': None}},
+                    'Blocks': {'label': 'blocks', 'active': 'גושים', 'retired': 'גושים מבוטלים', 'restore': {'RetiredByRecord': None}}}
+
+
+def collect_record_rollback(RecordGuid:str) -> dict:
+    '''
+    Collects every feature touched by a record, with a single scan of the active and of the retired layer of every fabric class.
+    A feature created by the record is deleted (even if the record retired it later), a feature only retired by it is restored.
+
+    Parameters:
+        RecordGuid (str): The GlobalID of the record to roll back.
+
+    Returns:
+        dict: Class name as key and {'delete': [GlobalIDs], 'delete_retired': [GlobalIDs], 'restore': [GlobalIDs]} as value,
+              the deletes of the active layer and of the retired layer are kept apart.
+    '''
+    plan = {}
+    for class_name, layers in _RollbackClasses.items():
+        with SearchCursor(get_layer(layers['active']), 'GlobalID', f""" CreatedByRecord = '{RecordGuid}' """) as cursor:
+            to_delete = [row[0] for row in cursor]
+
+        to_delete_retired, to_restore = [], []
+        where = f""" CreatedByRecord = '{RecordGuid}' OR RetiredByRecord = '{RecordGuid}' """
+        with SearchCursor(get_layer(layers['retired']), ['GlobalID', 'CreatedByRecord'], where) as cursor:
+            for guid, created_by in cursor:
+                if created_by == RecordGuid:
+                    to_delete_retired.append(guid)
+                else:
+                    to_restore.append(guid)
+        plan[class_name] = {'delete': to_delete, 'delete_retired': to_delete_retired, 'restore': to_restore}
+
+    return plan
+
+
+def preview_record_rollback(plan:dict, ProcessName:str) -> int:
+    '''
+    Prints the number of features to delete and to restore per class, returns the total number of touched features.
+    '''
+    total = 0
+    for class_name, actions in plan.items():
+        label = _RollbackClasses[class_name]['label']
+        deleted = len(actions['delete']) + len(actions['delete_retired'])
+        if deleted:
+            AddMessage(f'                {deleted} {label} previously created by process {ProcessName} will be deleted')
+        if actions['restore']:
+            AddMessage(f'                {len(actions["restore"])} {label} previously retired by process {ProcessName} will be restored')
+        total += deleted + len(actions['restore'])
+
+    if total == 0:
+        AddMessage(f'                No features were created or retired by process {ProcessName}')
+    return total
+
+
+def apply_record_rollback(plan:dict, ProcessName:str) -> None:
     '''
-    Recieves the process name and deletes it from CadasterRecordsBorders and all related data created by it in Parcels2D, Parcels2DFronts and BorderPoints
-    Additionaly restores the features that were retired by current process and set them to active
+    Applies a rollback plan in a single edit transaction, through the layers of the task version. The deletes and the restores
+    of all classes are saved together, if any of them fails nothing is saved.
+    '''
+    with edit_session():
+        for class_name, actions in plan.items():
+            layers = _RollbackClasses[class_name]
+            label = layers['label']
+
+            if actions['delete'] or actions['delete_retired']:
+                count = 0
+                for layer_name, guids in [(layers['active'], actions['delete']), (layers['retired'], actions['delete_retired'])]:
+                    for clause in chunked_in_clauses('GlobalID', guids):
+                        with UpdateCursor(get_layer(layer_name), 'GlobalID', clause) as cursor:
+                            for row in cursor:
+                                cursor.deleteRow()
+                                count += 1
+                AddMessage(f'                Deleted {count} existing {label} previously created by process {ProcessName}')
+
+            if actions['restore']:
+                restore = layers['restore']
+                restored = bulk_update(get_layer(layers['retired']), 'GlobalID', {guid: dict(restore) for guid in actions['restore']})
+                AddMessage(f'                Restored {len(restored)} {label} previously retired by process {ProcessName}')
+
+
+def delete_records_related_data(ProcessName:str, TaskType:str = 'CreateNewCadaster' or 'ImproveNewCadaster', dry_run:bool = False) -> dict:
+    '''
+    Recieves the process name and deletes it from CadasterRecordsBorders and all related data created by it in Parcels2D, Parcels2DFronts, BorderPoints and Blocks
+    Additionaly restores the features that were retired by current process and set them to active.
+    The touched features are collected with one scan per class, previewed, and rolled back in a single all-or-nothing edit transaction.
     
     Parameters:
     - ProcessName (str): The name of the process for which the related data should be deleted
     - TaskType (str): The Task's type, CreateNewCadaster or ImproveNewCadaster
+    - dry_run (bool): If True, only prints the preview without editing the fabric
 
     Returns:
-    - - str: 'Valid' if the current process type is valid, 'Invalid' otherwise.'''
+    - dict: The rollback plan, class name as key and {'delete': [GlobalIDs], 'delete_retired': [GlobalIDs], 'restore': [GlobalIDs]} as value.'''
     
 
     Records_layer = get_layer('גבולות רישומים') 
     RecordGuid = get_RecordGUID_NewCadaster(ProcessName)
-    
+    plan = {}
 
     if TaskType == 'CreateNewCadaster':
-        Parcels_layer = get_layer('חלקות')
-        Fronts_layer = get_layer('חזיתות')
-        Points_layer = get_layer('נקודות גבול') 
-        Retired_Parcels_layer = get_layer('חלקות מבוטלות')
-        Retired_Fronts_layer = get_layer('חזיתות מבוטלות') 
-        Retired_Points_layer = get_layer('נקודות גבול מבוטלות')
-        Retired_Blocks_layer = get_layer('גושים מבוטלים') 
-
-
-        # Open an edit session
-        editor = start_editing(CNFG.ParcelFabricDatabase)
-        
-        if features_created_by_record_exist(ProcessName, 'Parcels2D')=='Invalid':
-            with UpdateCursor(Parcels_layer, "GlobalID",f""" CreatedByRecord = '{RecordGuid}'""") as cursor:
-                count = 0
-                for row in cursor:
-                    cursor.deleteRow()
-                    count = count + 1
-                AddMessage(f'                Deleted {count} existing parcels previously created by process {ProcessName}')    
-    
+        plan = collect_record_rollback(RecordGuid)
+        touched = preview_record_rollback(plan, ProcessName)
 
-        if features_created_by_record_exist(ProcessName, 'Parcels2DFronts')=='Invalid':
-            with UpdateCursor(Fronts_layer, "GlobalID",f""" CreatedByRecord = '{RecordGuid}'""") as cursor:
-                count = 0
-                for row in cursor:
-                    cursor.deleteRow()
-                    count = count + 1
-                AddMessage(f'                Deleted {count} existing fronts previously created by process {ProcessName}')
+        if touched and not dry_run:
+            apply_record_rollback(plan, ProcessName)
 
-        if features_created_by_record_exist(ProcessName, 'BorderPoints')=='Invalid':
-            with UpdateCursor(Points_layer, "GlobalID",f""" CreatedByRecord = '{RecordGuid}'""") as cursor:
-                count = 0
-                for row in cursor:
-                    cursor.deleteRow()
-                    count = count + 1
-                AddMessage(f'                Deleted {count} existing points previously created by process {ProcessName}')
-
-        if features_retired_by_record_exist(ProcessName,'BorderPoints')=='Invalid':
-            with UpdateCursor(Retired_Points_layer, ["GlobalID","RetiredByRecord"],f""" RetiredByRecord = '{RecordGuid}'""") as cursor:
-                count = 0
-                for row in cursor:
-                    row[1] = None
-                    cursor.updateRow(row)
-                    count = count + 1
-                AddMessage(f'                Restored {count} points previously retired by process {ProcessName}')
-
-        if features_retired_by_record_exist(ProcessName, 'Parcels2DFronts')=='Invalid':
-            with UpdateCursor(Retired_Fronts_layer, ["GlobalID","RetiredByRecord"],f""" RetiredByRecord = '{RecordGuid}'""") as cursor:
-                count = 0
-                for row in cursor:
-                    row[1] = None
-                    cursor.updateRow(row)
-                    count = count + 1
-                AddMessage(f'                Restored {count} fronts previously retired by process {ProcessName}')
-
-        if features_retired_by_record_exist(ProcessName, 'Parcels2D')=='Invalid':
-            with UpdateCursor(Retired_Parcels_layer, ["GlobalID","RetiredByRecord","CancelProcessType"],f""" RetiredByRecord = '{RecordGuid}' """) as cursor:
-                count = 0
-                for row in cursor:
-                    row[1] = None
-                    row[2] = None
-                    cursor.updateRow(row)
-                    count = count + 1
-                AddMessage(f'                Restored {count} parcels previously retired by process {ProcessName}')
-
-        if features_retired_by_record_exist(ProcessName, 'Blocks')=='Invalid':
-            with UpdateCursor(Retired_Blocks_layer, ["GlobalID","RetiredByRecord"],f""" RetiredByRecord = '{RecordGuid}' """) as cursor:
-                count = 0
-                for row in cursor:
-                    row[1] = None
-                    cursor.updateRow(row)
-                    count = count + 1
-                AddMessage(f'                Restored {count} blocks previously retired by process {ProcessName}')
-
-        stop_editing(editor)
+    if dry_run:
+        return plan
 
     #rewrite_record_data(ProcessName)
     '''
@@ -436,6 +447,9 @@ def delete_records_related_data(ProcessName:str, TaskType:str = 'CreateNewCadast
     '''
     RefreshLayer(Records_layer)
     reopen_map()
+    return plan
+
+
 def layer_exists_(layer_name: str) -> bool:
     '''
     Checks if a layer with the specified name exists in the current map.
@@ -446,7 +460,7 @@ def layer_exists_(layer_name: str) -> bool:
     Returns:
         bool: True if the layer exists, False otherwise.
     '''
-    CurrentMap = ArcGISProject("CURRENT").activeMap
+    CurrentMap = get_map()
     layers = CurrentMap.listLayers()
     for layer in layers:
         if layer.name == layer_name:
@@ -463,11 +477,8 @@ def layer_exists(layer_name: str)-> bool:
     Returns:
         bool: True if the layer exists, False otherwise.
     """
-    # Get the current ArcGIS Pro project
-    aprx = ArcGISProject("CURRENT")
-    
     # Get the active map
-    active_map = aprx.activeMap
+    active_map = get_map()
     if active_map is None:
         raise ValueError("No active map found.")
     
@@ -493,16 +504,15 @@ def creating_record_is_duplicated(ProcessName:str) -> bool:
     '''
     Records_layer = get_layer('גבולות רישומים')
     
-    query = [row[0] for row in SearchCursor(Records_layer, 'Name', f""" Name = '{ProcessName}' """)]
-    count = len(query)
-    del [query, CurrentMap, Records_layer]
+    query = f""" Name = '{ProcessName}' """
+    count = query_count(Records_layer, query, limit=2)
     
     if count == 0:
         return False
     if count == 1:
         return True
     else:
-        AddError(f'{timestamp()} | ❌ Found {count} records with the name {ProcessName}')
+        AddError(f'{timestamp()} | ❌ Found {query_count(Records_layer, query)} records with the name {ProcessName}')
         
  
  
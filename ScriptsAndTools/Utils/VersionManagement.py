@@ -2,9 +2,8 @@ import os, csv
 from shutil import copy as copyfile
 from Utils.TypeHints import *
 from Utils.Configs import CNFG
-from Utils.Helpers import timestamp, get_layer, get_table, get_active_user, get_ActiveRecord
+from Utils.Helpers import get_map, is_headless, timestamp, get_layer, get_table, get_active_user, get_ActiveRecord
 from arcpy import AddMessage, AddError, ListVersions
-from arcpy.mp import ArcGISProject
 from arcpy.management import CreateVersion, ChangeVersion, ReconcileVersions
 
 
@@ -41,7 +40,7 @@ def generate_version_name(ProcessName: str) -> str:
 def get_VersionGUID(layer_name: str) -> str:
     """Returns the Global ID of a Version from a layer in the currently active map"""
 
-    layer: Layer = ArcGISProject("current").activeMap.listLayers(layer_name)[0]
+    layer: Layer = get_map().listLayers(layer_name)[0]
     connection_properties: dict[str, Any] = layer.connectionProperties
     VersionGUID: str = connection_properties['connection_info']['versionguid']
     return VersionGUID
@@ -160,6 +159,7 @@ def close_version() -> None:
         else:
             AddError(f'{timestamp()} | ❌ Version {version} was not posted. Review the log file.')
             AddMessage(f'{timestamp()} | Message: {log_results}')
-            os.startfile(log_file)
+            if not is_headless():
+                os.startfile(log_file)
 
         del results, log_results, log_file, version, shelf
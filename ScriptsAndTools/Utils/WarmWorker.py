@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+from importlib import import_module, reload
+from time import perf_counter
+from Utils.TypeHints import *
+from Utils.Configs import CNFG
+from Utils.Helpers import timestamp, set_priority, get_active_user, get_ActiveRecord
+from Utils.Tracing import is_trace_enabled, start_trace, finish_trace
+from arcpy import AddMessage, AddWarning
+
+
+# The entry points the worker dispatches, name: (module, function)
+_EntryPoints: dict[str, tuple[str, str]] = {'StartTaskNewCadaster': ('StartTaskNewCadaster', 'start_task_CreateNewCadaster'),
+                                            'StartTaskRetireAndCreateCadaster': ('StartTaskRetireAndCreateCadaster', 'start_task_RetireAndCreateCadaster'),
+                                            'StartTaskRetireAndCreateCadaster3D': ('StartTaskRetireAndCreateCadaster3D', 'start_task_RetireAndCreateCadaster3D'),
+                                            'StartTaskImproveCurrentCadaster': ('StartTaskImproveCurrentCadaster', 'start_task_ImproveCurrentCadaster'),
+                                            'StartTaskFreeEdit': ('StartTaskFreeEdit', 'start_task_FreeEdit'),
+                                            'EndTask': ('EndTask', 'EndTask'),
+                                            'EvaluateAOI': ('EvaluateAOI', 'EvaluateAOI')}
+
+# Third party modules every entry point pays for on its first import
+_HeavyModules: list[str] = ['pandas', 'openpyxl', 'arcgis.gis', 'arcgis.features']
+
+# The state of the worker in the current ArcGIS Pro session, with the modification time of the script of every loaded entry point module
+_WarmState: dict[str, Any] = {'warm': False, 'loaded_mtimes': {}, 'warmup_seconds': None, 'cold_seconds': {}, 'failed': []}
+
+
+def logged_cold_seconds() -> dict[str, float]:
+    """
+    Returns the median startup latency of the cold runs of every entry point found in the latency log of the library folder,
+    only the runs measured from the script start (with its imports) are comparable.
+    """
+    from statistics import median
+
+    cold: dict[str, list[float]] = {}
+    try:
+        with open(f'{CNFG.Library}WorkerLatency.jsonl', 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry: dict[str, Any] = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get('mode') == 'cold' and entry.get('measured_from') == 'script':
+                    cold.setdefault(entry['entry_point'], []).append(entry['seconds'])
+    except OSError:
+        return {}
+
+    return {name: median(seconds) for name, seconds in cold.items()}
+
+
+def warm_up(entry_points: Optional[list[str]] = None) -> float:
+    """
+    Prepares the ArcGIS Pro Python session for the task tools: pre-imports the heavy modules and the entry point modules,
+    resolves the signed-in portal user and sets the process priority once.
+    Should be executed once when the project is opened, every failing step is skipped and left to the tools cold path.
+
+    Parameters:
+        entry_points (list[str], optional): The entry points to pre-import. Default is all of them.
+
+    Returns:
+        float: The warm-up duration in seconds.
+    """
+    start: float = perf_counter()
+    failed: list[str] = []
+    entry_modules: list[str] = [_EntryPoints[name][0] for name in entry_points or _EntryPoints]
+
+    for module in _HeavyModules + entry_modules:
+        try:
+            loaded: Any = import_module(module)
+            if module in entry_modules:
+                _WarmState['loaded_mtimes'][module] = os.path.getmtime(loaded.__file__)
+        except Exception as error:
+            failed.append(f'{module} ({error})')
+
+    for name, step in [('portal user', get_active_user), ('priority', set_priority)]:
+        try:
+            step()
+        except Exception as error:
+            failed.append(f'{name} ({error})')
+
+    seconds: float = perf_counter() - start
+    _WarmState.update({'warm': True, 'warmup_seconds': round(seconds, 2), 'cold_seconds': logged_cold_seconds(), 'failed': failed})
+
+    AddMessage(f'{timestamp()} | 🔥 Task tools are warm ({seconds:.1f} s)')
+    for item in failed:
+        AddWarning(f'{timestamp()} | ⚠️ Warm-up skipped {item}, the tools will load it on first use')
+
+    return seconds
+
+
+def is_warm() -> bool:
+    """ Returns True if the worker was warmed up in the current ArcGIS Pro session. """
+    return _WarmState['warm']
+
+
+def resolve_entry_point(name: str, refresh: bool = False) -> Callable[..., Any]:
+    """
+    Returns the function of an entry point, importing its module if it is not loaded yet.
+    A module whose script was changed on disk since it was (re)loaded is reloaded.
+
+    Parameters:
+        name (str): The entry point name, a key of the entry points registry.
+        refresh (bool): Reload the module from disk. Default is False.
+    """
+    module_name, function_name = _EntryPoints[name]
+    loaded: Any = sys.modules.get(module_name)
+    loaded_mtime: float|None = _WarmState['loaded_mtimes'].get(module_name)
+    if loaded and loaded_mtime and os.path.getmtime(loaded.__file__) != loaded_mtime:
+        refresh: bool = True
+
+    if refresh and module_name in sys.modules:
+        module: Any = reload(sys.modules[module_name])
+    else:
+        module: Any = import_module(module_name)
+    _WarmState['loaded_mtimes'][module_name] = os.path.getmtime(module.__file__)
+
+    return getattr(module, function_name)
+
+
+def log_latency(name: str, mode: Literal['warm', 'cold'], seconds: float, measured_from: Literal['script', 'dispatch'] = 'script') -> None:
+    """
+    Reports the startup latency of an entry point and appends it to the latency log in the library folder.
+
+    Parameters:
+        name (str): The entry point name.
+        mode (str): 'warm' if the worker state was used, 'cold' otherwise.
+        seconds (float): The time from the script start (or the dispatch) to the entry point call.
+                         On the warm path it is compared with the median of the cold runs of the entry point found in the log.
+        measured_from (str): 'script' if the time includes the imports of the script, 'dispatch' if it starts at the dispatch call
+                             (then it is not compared). Default is 'script'.
+    """
+    cold: float|None = _WarmState['cold_seconds'].get(name) if mode == 'warm' and measured_from == 'script' else None
+    saved: float|None = round(cold - seconds, 3) if cold is not None else None
+    AddMessage(f'{timestamp()} | ⏱️ {name} started {mode} in {seconds:.2f} s' +
+               (f' (a logged cold start takes {cold:.2f} s, warm-up saved {saved:.2f} s)' if saved is not None else ''))
+
+    entry: dict[str, Any] = {'time': timestamp(), 'entry_point': name, 'mode': mode, 'seconds': round(seconds, 3), 'measured_from': measured_from,
+                             'saved_seconds': saved, 'warmup_seconds': _WarmState['warmup_seconds'], 'pid': os.getpid()}
+    try:
+        with open(f'{CNFG.Library}WorkerLatency.jsonl', 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    except OSError:
+        pass
+
+
+def dispatch(name: str, *args, fallback: Optional[Callable[..., Any]] = None, started: Optional[float] = None, **kwargs) -> Any:
+    """
+    Runs an entry point on the warm state of the worker, or on the cold path if the worker was not warmed up.
+    If the warm module can not be used (i.e. it fails to reload after a change) the call falls back to the cold path.
+    When tracing is enabled (see Utils.Tracing) the trace summary is printed when the entry point ends, also on failure.
+
+    Parameters:
+        name (str): The entry point name, a key of the entry points registry.
+        *args, **kwargs: The arguments of the entry point function.
+        fallback (Callable, optional): The cold path function, usually the entry point of the calling script itself.
+                                       Default is a fresh import of the entry point module.
+        started (float, optional): The perf_counter taken at the top of the calling script, before its imports, so the startup
+                                   latency includes them. Default is the dispatch call.
+
+    Returns:
+        Any: The entry point return value.
+    """
+    start: float = started if started is not None else perf_counter()
+    mode: Literal['warm', 'cold'] = 'warm' if is_warm() else 'cold'
+
+    function: Callable[..., Any]|None = None
+    if mode == 'warm':
+        try:
+            function: Callable[..., Any] = resolve_entry_point(name)
+        except Exception as error:
+            AddWarning(f'{timestamp()} | ⚠️ Warm {name} is unavailable ({error}), falling back to the cold path')
+            mode: Literal['warm', 'cold'] = 'cold'
+
+    if function is None:
+        function: Callable[..., Any] = fallback or resolve_entry_point(name, refresh=True)
+
+    log_latency(name, mode, perf_counter() - start, 'script' if started is not None else 'dispatch')
+    if not is_trace_enabled():
+        return function(*args, **kwargs)
+
+    # A starting task creates its process, its trace goes to the record active when it ends
+    ProcessName: str|None = kwargs.get('ProcessName') or None
+    if not ProcessName and not name.startswith('StartTask'):
+        try:
+            ProcessName: str|None = get_ActiveRecord()
+        except Exception:
+            ProcessName: None = None
+
+    run_start: float = perf_counter()
+    start_trace(name, ProcessName)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        try:
+            finish_trace(perf_counter() - run_start)
+        except Exception as error:
+            AddWarning(f'{timestamp()} | ⚠️ The trace of {name} was not saved ({error})')
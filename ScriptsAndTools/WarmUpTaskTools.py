@@ -0,0 +1,6 @@
+from Utils.WarmWorker import warm_up
+
+
+if __name__ == "__main__":
+    # Executed once when the project is opened, before the first task tool
+    warm_up()